@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class Coalescedor:
+    """
+    Agrupa chamadas concorrentes idênticas (single-flight): enquanto uma
+    execução para a chave estiver em andamento, as demais chamadas aguardam
+    o mesmo resultado em vez de repetir o trabalho
+    """
+    def __init__(self):
+        self._em_andamento: Dict[Hashable, asyncio.Future] = {}
+        self.executadas = 0
+        self.coalescidas = 0
+
+    async def executar(self, chave: Hashable, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa `fabrica()` para a chave ou aguarda a execução já em andamento
+        """
+        futuro = self._em_andamento.get(chave)
+        if futuro is not None:
+            self.coalescidas += 1
+            # shield: o cancelamento de um chamador não cancela os demais
+            return await asyncio.shield(futuro)
+
+        self.executadas += 1
+        futuro = asyncio.ensure_future(fabrica())
+        self._em_andamento[chave] = futuro
+        futuro.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        return await asyncio.shield(futuro)
+
+    def esta_em_andamento(self, chave: Hashable) -> bool:
+        return chave in self._em_andamento
+
+    @property
+    def em_andamento(self) -> int:
+        return len(self._em_andamento)
@@ -0,0 +1,331 @@
+import asyncio
+import hashlib
+import os
+import re
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ports.interfaces.Idatabase import IDatabase, Row
+from adapters.http.respostas import RespostaJSON
+
+CABECALHO_CHAVE = "Idempotency-Key"
+CABECALHO_REPETIDA = "Idempotent-Replayed"
+TAMANHO_MAXIMO_CHAVE = 255
+# Maior resposta guardada; respostas maiores são executadas sem proteção
+TAMANHO_MAXIMO_RESPOSTA = 1024 * 1024
+# Além dos erros do servidor (5xx), respostas que não são guardadas para que
+# o cliente possa repetir a requisição com a mesma chave
+STATUS_NAO_ARMAZENAVEIS = {429}
+
+class Idempotencia:
+    """
+    Respostas guardadas por (rota, Idempotency-Key) na tabela
+    `idempotencia`, compartilhada entre os processos.
+
+    A primeira requisição reserva a chave (estado em_andamento, com um
+    lease de `lease_segundos` para o caso de o processo morrer) e, ao
+    terminar, grava a resposta, que vale por `ttl_segundos`. Repetições
+    recebem a resposta gravada sem executar a rota de novo; repetições que
+    chegam durante a execução aguardam o seu fim.
+
+    Os métodos que acessam o banco são síncronos; o middleware os executa
+    em threads (asyncio.to_thread) para que um banco travado não pare o
+    event loop
+    """
+    def __init__(
+        self,
+        db: IDatabase,
+        ttl_segundos: int = 24 * 3600,
+        lease_segundos: int = 120,
+        espera_maxima: float = 30.0,
+        intervalo_espera: float = 0.05
+    ):
+        self.db = db
+        self.ttl_segundos = ttl_segundos
+        self.lease_segundos = lease_segundos
+        self.espera_maxima = espera_maxima
+        self.intervalo_espera = intervalo_espera
+        self.identificador = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Execuções em andamento neste processo: as repetições aguardam o
+        # evento em vez de consultar o banco
+        self._locais: Dict[Tuple[str, str], asyncio.Event] = {}
+        self.executadas = 0
+        self.repetidas = 0
+        self.aguardadas = 0
+        self.conflitos = 0
+
+    def reservar(self, rota: str, chave: str, impressao: str) -> Optional[Row]:
+        """
+        Reserva a chave para este processo. Retorna None se a reserva foi
+        feita ou o registro existente (em andamento ou concluído). Registros
+        expirados são reaproveitados
+        """
+        agora = datetime.now()
+        reservada = self.db.execute_returning(
+            """
+            INSERT INTO idempotencia (rota, chave, impressao, estado, dono, criada_em, expira_em)
+            VALUES (?, ?, ?, 'em_andamento', ?, ?, ?)
+            ON CONFLICT(rota, chave) DO UPDATE
+            SET impressao = excluded.impressao,
+                estado = excluded.estado,
+                dono = excluded.dono,
+                status_code = NULL,
+                tipo_conteudo = NULL,
+                corpo = NULL,
+                criada_em = excluded.criada_em,
+                expira_em = excluded.expira_em
+            WHERE idempotencia.expira_em < ?
+            RETURNING dono
+            """,
+            (
+                rota, chave, impressao, self.identificador,
+                agora, agora + timedelta(seconds=self.lease_segundos),
+                agora
+            )
+        )
+        if reservada:
+            return None
+        return self.db.fetch_one(
+            "SELECT * FROM idempotencia WHERE rota = ? AND chave = ?", (rota, chave)
+        )
+
+    def concluir(self, rota: str, chave: str, status_code: int, tipo_conteudo: Optional[str], corpo: str):
+        self.db.execute(
+            """
+            UPDATE idempotencia
+            SET estado = 'concluida', status_code = ?, tipo_conteudo = ?, corpo = ?, expira_em = ?
+            WHERE rota = ? AND chave = ? AND dono = ?
+            """,
+            (
+                status_code, tipo_conteudo, corpo,
+                datetime.now() + timedelta(seconds=self.ttl_segundos),
+                rota, chave, self.identificador
+            )
+        )
+
+    def liberar(self, rota: str, chave: str):
+        """
+        Desfaz a reserva de uma execução cuja resposta não foi guardada
+        """
+        self.db.execute(
+            "DELETE FROM idempotencia WHERE rota = ? AND chave = ? AND dono = ? AND estado = 'em_andamento'",
+            (rota, chave, self.identificador)
+        )
+
+    def limpar_expiradas(self) -> int:
+        """
+        Remove as respostas e reservas expiradas. Retorna a quantidade removida
+        """
+        with self.db.transacao() as transacao:
+            removidas = transacao.fetch_all(
+                "DELETE FROM idempotencia WHERE expira_em < ? RETURNING 1", (datetime.now(),)
+            )
+        return len(removidas)
+
+    def estatisticas(self) -> dict:
+        return {
+            'executadas': self.executadas,
+            'repetidas': self.repetidas,
+            'aguardadas': self.aguardadas,
+            'conflitos': self.conflitos,
+            'em_andamento': len(self._locais),
+        }
+
+
+class _Captura:
+    """
+    Repassa a resposta ao cliente e guarda uma cópia para as repetições.
+    Se o cliente desistiu (timeout), a execução continua e a resposta é
+    guardada mesmo assim: é justamente ela que a repetição vai receber
+    """
+    def __init__(self, send: Send):
+        self.send_original = send
+        self.status_code: Optional[int] = None
+        self.tipo_conteudo: Optional[str] = None
+        self.partes = []
+        self.tamanho = 0
+        self.completa = False
+        self.desconectado = False
+
+    async def send(self, mensagem: Message):
+        if mensagem['type'] == 'http.response.start':
+            self.status_code = mensagem['status']
+            self.tipo_conteudo = Headers(raw=mensagem.get('headers', [])).get('content-type')
+        elif mensagem['type'] == 'http.response.body':
+            corpo = mensagem.get('body', b'')
+            self.tamanho += len(corpo)
+            if self.tamanho <= TAMANHO_MAXIMO_RESPOSTA:
+                self.partes.append(corpo)
+            if not mensagem.get('more_body', False):
+                self.completa = True
+        if self.desconectado:
+            return
+        try:
+            await self.send_original(mensagem)
+        except OSError:
+            self.desconectado = True
+
+    def armazenavel(self) -> bool:
+        return (
+            self.completa
+            and self.status_code is not None
+            and self.status_code < 500
+            and self.status_code not in STATUS_NAO_ARMAZENAVEIS
+            and self.tamanho <= TAMANHO_MAXIMO_RESPOSTA
+        )
+
+
+class MiddlewareIdempotencia:
+    """
+    Aplica Idempotency-Key às rotas `rotas` (expressões regulares sobre o
+    caminho) nos métodos POST, PUT e PATCH. Sem o cabeçalho a requisição
+    segue normalmente.
+
+    A chave vale para a rota (método e caminho) e o conteúdo da requisição:
+    reutilizá-la com outra query string ou outro corpo JSON responde 422.
+    Em uploads (multipart) o corpo não entra na comparação, pois o
+    separador das partes muda a cada envio do cliente
+    """
+    def __init__(self, app: ASGIApp, idempotencia: Idempotencia, rotas: Iterable[str]):
+        self.app = app
+        self.idempotencia = idempotencia
+        self.rotas = [re.compile(rota) for rota in rotas]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope['type'] != 'http'
+            or scope['method'] not in ('POST', 'PUT', 'PATCH')
+            or not any(rota.fullmatch(scope['path']) for rota in self.rotas)
+        ):
+            return await self.app(scope, receive, send)
+        cabecalhos = Headers(scope=scope)
+        chave = cabecalhos.get(CABECALHO_CHAVE)
+        if chave is None:
+            return await self.app(scope, receive, send)
+        if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE:
+            return await RespostaJSON(
+                {"detail": f"{CABECALHO_CHAVE} deve ter de 1 a {TAMANHO_MAXIMO_CHAVE} caracteres"},
+                status_code=400
+            )(scope, receive, send)
+
+        rota = f"{scope['method']} {scope['path']}"
+        partes = [rota.encode(), scope.get('query_string', b'')]
+        if cabecalhos.get('content-type', '').startswith('application/json'):
+            corpo = await _ler_corpo(receive)
+            partes.append(corpo)
+            receive = _repetir_corpo(corpo, receive)
+        impressao = hashlib.sha256(b"\n".join(partes)).hexdigest()
+
+        servico = self.idempotencia
+        limite = time.monotonic() + servico.espera_maxima
+        aguardou = False
+        while True:
+            local = servico._locais.get((rota, chave))
+            if local is None:
+                # O evento é registrado antes da reserva, que roda fora do
+                # loop: repetições locais que chegarem enquanto isso aguardam
+                # por ele em vez de consultar o banco
+                evento = asyncio.Event()
+                servico._locais[(rota, chave)] = evento
+                try:
+                    registro = await asyncio.to_thread(servico.reservar, rota, chave, impressao)
+                except BaseException:
+                    servico._locais.pop((rota, chave), None)
+                    evento.set()
+                    raise
+                if registro is None:
+                    break
+                servico._locais.pop((rota, chave), None)
+                evento.set()
+                if registro['impressao'] != impressao:
+                    servico.conflitos += 1
+                    return await RespostaJSON(
+                        {"detail": f"{CABECALHO_CHAVE} já usada com outra requisição"},
+                        status_code=422
+                    )(scope, receive, send)
+                if registro['estado'] == 'concluida':
+                    servico.repetidas += 1
+                    return await _repetir(registro, scope, receive, send)
+
+            # A primeira requisição ainda está em andamento: aguarda o fim
+            if not aguardou:
+                aguardou = True
+                servico.aguardadas += 1
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return await RespostaJSON(
+                    {"detail": f"Requisição com a mesma {CABECALHO_CHAVE} ainda em processamento"},
+                    status_code=409,
+                    headers={"Retry-After": "1"}
+                )(scope, receive, send)
+            try:
+                if local is not None:
+                    await asyncio.wait_for(local.wait(), restante)
+                else:
+                    # Executando em outro processo: consulta o banco periodicamente
+                    await asyncio.sleep(min(servico.intervalo_espera, restante))
+            except asyncio.TimeoutError:
+                pass
+
+        servico.executadas += 1
+        captura = _Captura(send)
+        try:
+            await self.app(scope, receive, captura.send)
+        finally:
+            try:
+                if captura.armazenavel():
+                    corpo = b"".join(captura.partes).decode('utf-8', errors='replace')
+                    await asyncio.to_thread(
+                        servico.concluir, rota, chave, captura.status_code, captura.tipo_conteudo, corpo
+                    )
+                else:
+                    await asyncio.to_thread(servico.liberar, rota, chave)
+            except Exception as e:
+                print(f"Erro ao gravar a resposta idempotente: {str(e)}")
+            finally:
+                servico._locais.pop((rota, chave), None)
+                evento.set()
+
+
+async def _ler_corpo(receive: Receive) -> bytes:
+    partes = []
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] != 'http.request':
+            break
+        partes.append(mensagem.get('body', b''))
+        if not mensagem.get('more_body', False):
+            break
+    return b"".join(partes)
+
+
+def _repetir_corpo(corpo: bytes, receive: Receive) -> Receive:
+    """
+    Entrega à aplicação o corpo já lido para calcular a impressão digital;
+    depois dele, as mensagens seguintes (desconexão) vêm do cliente
+    """
+    entregue = False
+
+    async def receber() -> Message:
+        nonlocal entregue
+        if not entregue:
+            entregue = True
+            return {'type': 'http.request', 'body': corpo, 'more_body': False}
+        return await receive()
+    return receber
+
+
+async def _repetir(registro: Row, scope: Scope, receive: Receive, send: Send):
+    corpo = (registro['corpo'] or '').encode('utf-8')
+    cabecalhos = [
+        (b'content-length', str(len(corpo)).encode()),
+        (CABECALHO_REPETIDA.lower().encode(), b'true'),
+    ]
+    if registro['tipo_conteudo']:
+        cabecalhos.append((b'content-type', registro['tipo_conteudo'].encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': registro['status_code'], 'headers': cabecalhos})
+    await send({'type': 'http.response.body', 'body': corpo})
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+class TokenBucket:
+    """
+    Balde de tokens: permite rajadas de até `capacidade` requisições e
+    repõe `taxa` tokens por segundo
+    """
+    def __init__(self, taxa: float, capacidade: float):
+        if taxa <= 0 or capacidade <= 0:
+            raise ValueError("Taxa e capacidade devem ser maiores que zero")
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = capacidade
+        self._atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self, agora: float):
+        decorrido = agora - self._atualizado_em
+        self._tokens = min(self.capacidade, self._tokens + decorrido * self.taxa)
+        self._atualizado_em = agora
+
+    def consumir(self, quantidade: float = 1.0) -> Tuple[bool, float]:
+        """
+        Tenta consumir tokens. Retorna (permitido, segundos até haver tokens)
+        """
+        with self._lock:
+            self._repor(time.monotonic())
+            if self._tokens >= quantidade:
+                self._tokens -= quantidade
+                return True, 0.0
+            return False, (quantidade - self._tokens) / self.taxa
+
+    @property
+    def disponiveis(self) -> float:
+        with self._lock:
+            self._repor(time.monotonic())
+            return self._tokens
+
+class LimitadorTaxa:
+    """
+    Conjunto de token buckets indexados por chave (rota, credor, ...).
+    Mantém no máximo `max_chaves` baldes, descartando os usados há mais
+    tempo; um balde descartado volta cheio, o que é seguro para limitação
+    """
+    def __init__(self, taxa: float, capacidade: float, max_chaves: int = 10000):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.max_chaves = max_chaves
+        self._baldes: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejeitadas = 0
+
+    def _balde(self, chave: Hashable) -> TokenBucket:
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                balde = TokenBucket(self.taxa, self.capacidade)
+                self._baldes[chave] = balde
+                if len(self._baldes) > self.max_chaves:
+                    self._baldes.popitem(last=False)
+            else:
+                self._baldes.move_to_end(chave)
+            return balde
+
+    def consumir(self, chave: Hashable, quantidade: float = 1.0) -> Tuple[bool, float]:
+        """
+        Tenta consumir tokens do balde da chave
+        Retorna (permitido, segundos até haver tokens)
+        """
+        permitido, espera = self._balde(chave).consumir(quantidade)
+        if not permitido:
+            self.rejeitadas += 1
+        return permitido, espera
@@ -0,0 +1,39 @@
+import os
+from typing import Optional
+from ports.interfaces.Iarmazenamento import IArmazenamento
+from adapters.armazenamento.local import ArmazenamentoLocal
+
+BACKENDS = ("local", "s3")
+
+def criar_armazenamento(backend: Optional[str] = None) -> IArmazenamento:
+    """
+    Cria o backend de armazenamento de arquivos a partir de ARMAZENAMENTO_BACKEND.
+
+    - local (padrão): disco local, na pasta de trabalho da aplicação
+    - s3: bucket compatível com S3 (S3_BUCKET, S3_ENDPOINT_URL para MinIO,
+      S3_ENDPOINT_PUBLICO, S3_REGIAO, S3_PREFIXO). As credenciais seguem a
+      cadeia padrão do boto3 (AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY, perfil, IAM)
+    """
+    backend = backend or os.getenv("ARMAZENAMENTO_BACKEND", "local")
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de armazenamento inválido: {backend}. Use: {', '.join(BACKENDS)}")
+
+    if backend == "local":
+        return ArmazenamentoLocal()
+
+    bucket = os.getenv("S3_BUCKET")
+    if not bucket:
+        raise ValueError("O backend s3 requer S3_BUCKET")
+    # Importado sob demanda: o boto3 só é carregado quando usado
+    from adapters.armazenamento.s3 import ArmazenamentoS3
+    return ArmazenamentoS3(
+        bucket,
+        endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+        endpoint_publico=os.getenv("S3_ENDPOINT_PUBLICO"),
+        regiao=os.getenv("S3_REGIAO"),
+        prefixo=os.getenv("S3_PREFIXO", ""),
+        tamanho_parte=int(os.getenv("S3_TAMANHO_PARTE_MB", "8")) * 1024 * 1024,
+        partes_paralelas=int(os.getenv("S3_PARTES_PARALELAS", "4")),
+        expiracao_segundos=int(os.getenv("S3_URL_EXPIRACAO", "900")),
+        criar_bucket=os.getenv("S3_CRIAR_BUCKET", "0") == "1"
+    )
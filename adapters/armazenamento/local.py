@@ -0,0 +1,51 @@
+import os
+import shutil
+from typing import BinaryIO, Optional
+from adapters.arquivos import compactacao
+from ports.interfaces.Iarmazenamento import IArmazenamento
+
+class ArmazenamentoLocal(IArmazenamento):
+    """
+    Arquivos no disco local, com a chave usada como caminho relativo a
+    `raiz`. A leitura enxerga também os arquivos compactados pela camada
+    fria (ver adapters/arquivos/compactacao.py). Não há URLs assinadas:
+    os downloads passam pela API (/static e rotas de download)
+    """
+    def __init__(self, raiz: str = "."):
+        self.raiz = raiz
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.raiz, chave)
+
+    def salvar(self, chave: str, origem: BinaryIO, tipo_conteudo: Optional[str] = None) -> str:
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        # Grava em um temporário e renomeia: leitores nunca veem o arquivo pela metade
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as destino:
+            shutil.copyfileobj(origem, destino, compactacao.TAMANHO_BLOCO)
+        os.replace(temporario, caminho)
+        return chave
+
+    def salvar_arquivo(self, chave: str, caminho_local: str, tipo_conteudo: Optional[str] = None) -> str:
+        caminho = self._caminho(chave)
+        if os.path.abspath(caminho) != os.path.abspath(caminho_local):
+            os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+            shutil.move(caminho_local, caminho)
+        return chave
+
+    def abrir(self, chave: str) -> BinaryIO:
+        return compactacao.abrir(self._caminho(chave))
+
+    def existe(self, chave: Optional[str]) -> bool:
+        return bool(chave) and compactacao.existe(self._caminho(chave))
+
+    def remover(self, chave: Optional[str]):
+        if chave:
+            compactacao.remover(self._caminho(chave))
+
+    def url_download(self, chave: str, nome_arquivo: Optional[str] = None) -> Optional[str]:
+        return None
+
+    def estatisticas(self) -> dict:
+        return {'backend': 'local'}
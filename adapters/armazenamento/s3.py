@@ -0,0 +1,175 @@
+import mimetypes
+import os
+import threading
+from typing import BinaryIO, Optional
+from ports.interfaces.Iarmazenamento import IArmazenamento
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 é opcional: necessário apenas para o backend S3
+    boto3 = None
+
+CODIGOS_NAO_ENCONTRADO = ("404", "NoSuchKey", "NotFound", "NoSuchBucket")
+
+def _nao_encontrado(erro: Exception) -> bool:
+    return erro.response.get('Error', {}).get('Code') in CODIGOS_NAO_ENCONTRADO
+
+
+class ArmazenamentoS3(IArmazenamento):
+    """
+    Arquivos em um bucket compatível com S3 (AWS S3, MinIO).
+
+    - Upload multipart: arquivos maiores que `tamanho_parte` são enviados
+      em partes, até `partes_paralelas` ao mesmo tempo, lendo o arquivo em
+      blocos (nunca inteiro na memória).
+    - Download: url_download() gera uma URL assinada válida por
+      `expiracao_segundos`; as rotas redirecionam o cliente para ela e a
+      API deixa de transmitir os bytes do arquivo.
+
+    `endpoint_publico` é o endereço do armazenamento visto pelos clientes,
+    quando difere do usado pela API (ex.: http://minio:9000 dentro do
+    docker-compose e http://localhost:9000 no navegador). A assinatura
+    inclui o host, então as URLs são assinadas já com o endereço público
+    """
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        endpoint_publico: Optional[str] = None,
+        regiao: Optional[str] = None,
+        prefixo: str = "",
+        tamanho_parte: int = 8 * 1024 * 1024,
+        partes_paralelas: int = 4,
+        expiracao_segundos: int = 900,
+        criar_bucket: bool = False
+    ):
+        if boto3 is None:
+            raise RuntimeError("O backend S3 requer o pacote boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefixo = prefixo
+        self.expiracao_segundos = expiracao_segundos
+        self.criar_bucket = criar_bucket
+        configuracao = Config(
+            signature_version='s3v4',
+            # MinIO e outros compatíveis usam o bucket no caminho da URL
+            s3={'addressing_style': 'path'},
+            # Uma conexão por parte em envio, mais as requisições da API
+            max_pool_connections=max(10, partes_paralelas * 2),
+            retries={'max_attempts': 3, 'mode': 'standard'}
+        )
+        self.cliente = boto3.client('s3', endpoint_url=endpoint_url, region_name=regiao, config=configuracao)
+        self.cliente_publico = boto3.client(
+            's3', endpoint_url=endpoint_publico, region_name=regiao, config=configuracao
+        ) if endpoint_publico else self.cliente
+        self.transferencia = TransferConfig(
+            multipart_threshold=tamanho_parte,
+            multipart_chunksize=tamanho_parte,
+            max_concurrency=partes_paralelas,
+            use_threads=partes_paralelas > 1
+        )
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.bytes_enviados = 0
+        self.urls_assinadas = 0
+
+    def _chave(self, chave: str) -> str:
+        return self.prefixo + chave
+
+    def _extra(self, chave: str, tipo_conteudo: Optional[str]) -> dict:
+        return {'ContentType': tipo_conteudo or mimetypes.guess_type(chave)[0] or 'application/octet-stream'}
+
+    def _contabilizar(self, tamanho: int):
+        with self._lock:
+            self.uploads += 1
+            self.bytes_enviados += tamanho
+
+    def iniciar(self):
+        if not self.criar_bucket:
+            return
+        try:
+            self.cliente.head_bucket(Bucket=self.bucket)
+        except ClientError as e:
+            if not _nao_encontrado(e):
+                raise
+            self.cliente.create_bucket(Bucket=self.bucket)
+            print(f"Bucket {self.bucket} criado")
+
+    def salvar(self, chave: str, origem: BinaryIO, tipo_conteudo: Optional[str] = None) -> str:
+        contador = _ContadorLeitura(origem)
+        self.cliente.upload_fileobj(
+            contador, self.bucket, self._chave(chave),
+            ExtraArgs=self._extra(chave, tipo_conteudo), Config=self.transferencia
+        )
+        self._contabilizar(contador.lidos)
+        return chave
+
+    def salvar_arquivo(self, chave: str, caminho_local: str, tipo_conteudo: Optional[str] = None) -> str:
+        # A partir do caminho as partes são lidas em paralelo, cada uma do seu offset
+        tamanho = os.path.getsize(caminho_local)
+        self.cliente.upload_file(
+            caminho_local, self.bucket, self._chave(chave),
+            ExtraArgs=self._extra(chave, tipo_conteudo), Config=self.transferencia
+        )
+        os.remove(caminho_local)
+        self._contabilizar(tamanho)
+        return chave
+
+    def abrir(self, chave: str) -> BinaryIO:
+        try:
+            return self.cliente.get_object(Bucket=self.bucket, Key=self._chave(chave))['Body']
+        except ClientError as e:
+            if _nao_encontrado(e):
+                raise FileNotFoundError(f"Arquivo não encontrado: {chave}")
+            raise
+
+    def existe(self, chave: Optional[str]) -> bool:
+        if not chave:
+            return False
+        try:
+            self.cliente.head_object(Bucket=self.bucket, Key=self._chave(chave))
+            return True
+        except ClientError as e:
+            if _nao_encontrado(e):
+                return False
+            raise
+
+    def remover(self, chave: Optional[str]):
+        if chave:
+            self.cliente.delete_object(Bucket=self.bucket, Key=self._chave(chave))
+
+    def url_download(self, chave: str, nome_arquivo: Optional[str] = None) -> Optional[str]:
+        parametros = {'Bucket': self.bucket, 'Key': self._chave(chave)}
+        if nome_arquivo:
+            parametros['ResponseContentDisposition'] = f'attachment; filename="{nome_arquivo}"'
+        with self._lock:
+            self.urls_assinadas += 1
+        # A assinatura é calculada localmente, sem requisição ao armazenamento
+        return self.cliente_publico.generate_presigned_url(
+            'get_object', Params=parametros, ExpiresIn=self.expiracao_segundos
+        )
+
+    def estatisticas(self) -> dict:
+        return {
+            'backend': 's3',
+            'bucket': self.bucket,
+            'uploads': self.uploads,
+            'bytes_enviados': self.bytes_enviados,
+            'urls_assinadas': self.urls_assinadas,
+        }
+
+
+class _ContadorLeitura:
+    """
+    Envolve o arquivo de origem contando os bytes lidos pelo upload
+    """
+    def __init__(self, origem: BinaryIO):
+        self.origem = origem
+        self.lidos = 0
+
+    def read(self, tamanho: int = -1) -> bytes:
+        dados = self.origem.read(tamanho)
+        self.lidos += len(dados)
+        return dados
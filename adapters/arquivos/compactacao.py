@@ -0,0 +1,341 @@
+import gzip
+import os
+import threading
+import time
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from ports.interfaces.Idatabase import IDatabase
+from ports.database.conversao import para_datetime
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: sem ele apenas gzip está disponível
+    zstandard = None
+
+TAMANHO_BLOCO = 64 * 1024
+
+# Extensão acrescentada ao nome do arquivo compactado, por codec
+EXTENSOES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+def codecs_disponiveis() -> List[str]:
+    return [codec for codec in EXTENSOES if codec != 'zstd' or zstandard is not None]
+
+def localizar(caminho: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Retorna (caminho em disco, codec) do arquivo: o próprio caminho se ele
+    estiver descompactado, ou a versão compactada. (None, None) se não existir
+    """
+    if os.path.isfile(caminho):
+        return caminho, None
+    for codec, extensao in EXTENSOES.items():
+        if os.path.isfile(caminho + extensao):
+            return caminho + extensao, codec
+    return None, None
+
+def existe(caminho: Optional[str]) -> bool:
+    return bool(caminho) and localizar(caminho)[0] is not None
+
+def _abrir_compactado(caminho_disco: str, codec: str) -> BinaryIO:
+    if codec == 'gzip':
+        return gzip.open(caminho_disco, 'rb')
+    if zstandard is None:
+        raise RuntimeError(f"Arquivo {caminho_disco} compactado com zstd, mas zstandard não está instalado")
+    return zstandard.ZstdDecompressor().stream_reader(open(caminho_disco, 'rb'), closefd=True)
+
+def abrir(caminho: str) -> BinaryIO:
+    """
+    Abre o arquivo para leitura, descompactando-o durante a leitura se ele
+    estiver compactado. Quem lê arquivos enviados deve usar esta função em
+    vez de open(), pois a compactação pode ocorrer a qualquer momento
+    """
+    # O arquivo pode ser compactado (ou descompactado) entre a busca e a
+    # abertura: nesse caso a busca é refeita uma vez
+    for _ in range(2):
+        caminho_disco, codec = localizar(caminho)
+        if caminho_disco is None:
+            break
+        try:
+            if codec is None:
+                return open(caminho_disco, 'rb')
+            return _abrir_compactado(caminho_disco, codec)
+        except FileNotFoundError:
+            continue
+    raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+
+def ler(caminho: str) -> bytes:
+    with abrir(caminho) as arquivo:
+        return arquivo.read()
+
+def iterar_blocos(arquivo: BinaryIO) -> Iterator[bytes]:
+    """
+    Lê o arquivo em blocos e o fecha ao final (para StreamingResponse)
+    """
+    try:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b''):
+            yield bloco
+    finally:
+        arquivo.close()
+
+def remover(caminho: Optional[str]):
+    """
+    Remove o arquivo e suas versões compactadas
+    """
+    if not caminho:
+        return
+    for candidato in [caminho] + [caminho + extensao for extensao in EXTENSOES.values()]:
+        try:
+            os.remove(candidato)
+        except FileNotFoundError:
+            pass
+
+def _escrever_compactado(origem: BinaryIO, destino: BinaryIO, codec: str, nivel: Optional[int]):
+    if codec == 'gzip':
+        # mtime=0: o mesmo conteúdo gera sempre os mesmos bytes
+        with gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=nivel or 6, mtime=0) as saida:
+            for bloco in iter(lambda: origem.read(TAMANHO_BLOCO), b''):
+                saida.write(bloco)
+    else:
+        compressor = zstandard.ZstdCompressor(level=nivel or 3)
+        compressor.copy_stream(origem, destino, read_size=TAMANHO_BLOCO)
+
+def compactar_arquivo(caminho: str, codec: str = 'gzip', nivel: Optional[int] = None,
+                      taxa_minima: float = 0.9) -> Optional[int]:
+    """
+    Compacta o arquivo em `caminho + extensão` e remove o original.
+    Se o resultado não ficar abaixo de `taxa_minima` do tamanho original
+    (imagens e PDFs já comprimidos) o original é mantido e None é
+    retornado. Retorna o tamanho compactado
+    """
+    if codec not in codecs_disponiveis():
+        raise ValueError(f"Codec de compactação indisponível: {codec}")
+    estado = os.stat(caminho)
+    destino = caminho + EXTENSOES[codec]
+    temporario = destino + '.tmp'
+    try:
+        with open(caminho, 'rb') as origem, open(temporario, 'wb') as saida:
+            _escrever_compactado(origem, saida, codec, nivel)
+        tamanho = os.path.getsize(temporario)
+        if tamanho >= estado.st_size * taxa_minima:
+            os.remove(temporario)
+            return None
+        # Mantém a data de modificação, usada como Last-Modified no download
+        os.utime(temporario, ns=(estado.st_atime_ns, estado.st_mtime_ns))
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.remove(caminho)
+    return tamanho
+
+def descompactar_arquivo(caminho: str) -> bool:
+    """
+    Restaura a versão descompactada do arquivo e remove a compactada
+    """
+    caminho_disco, codec = localizar(caminho)
+    if codec is None:
+        return False
+    estado = os.stat(caminho_disco)
+    temporario = caminho + '.tmp'
+    try:
+        with _abrir_compactado(caminho_disco, codec) as origem, open(temporario, 'wb') as saida:
+            for bloco in iter(lambda: origem.read(TAMANHO_BLOCO), b''):
+                saida.write(bloco)
+        os.utime(temporario, ns=(estado.st_atime_ns, estado.st_mtime_ns))
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.remove(caminho_disco)
+    return True
+
+
+class ArmazenamentoCompactado:
+    """
+    Camada de armazenamento frio dos arquivos enviados.
+
+    Os downloads são registrados na tabela `arquivos_acessos`. A cada ciclo de manutenção:
+    - arquivos sem acesso há `dias_frio` dias (ou, se nunca acessados,
+      enviados há mais tempo que isso) são compactados com `codec`;
+    - arquivos compactados acessados `acessos_para_descompactar` vezes
+      desde a compactação voltam a ficar descompactados, pois estão quentes.
+
+    Arquivos cuja compactação não economiza ao menos 10% (JPEG, PNG e PDFs
+    já comprimidos) são marcados como incompressíveis e não são tentados
+    de novo. A leitura de arquivos compactados é transparente (ver abrir())
+    """
+    def __init__(
+        self,
+        database: IDatabase,
+        raizes: Tuple[str, ...] = (os.path.join("static", "documentos"), os.path.join("static", "certidoes")),
+        codec: str = 'gzip',
+        nivel: Optional[int] = None,
+        dias_frio: float = 30,
+        acessos_para_descompactar: int = 3,
+        intervalo_gravacao_segundos: float = 30
+    ):
+        if codec not in codecs_disponiveis():
+            raise ValueError(f"Codec de compactação indisponível: {codec}")
+        self.db = database
+        self.raizes = raizes
+        self.codec = codec
+        self.nivel = nivel
+        self.dias_frio = dias_frio
+        self.acessos_para_descompactar = acessos_para_descompactar
+        self.intervalo_gravacao_segundos = intervalo_gravacao_segundos
+        # Acessos acumulados em memória e gravados em lote, para não
+        # escrever no banco a cada download
+        self._acessos: Dict[str, Tuple[datetime, int]] = {}
+        self._ultima_gravacao = time.monotonic()
+        self._lock = threading.Lock()
+        self.leituras_compactadas = 0
+        self.compactados = 0
+        self.descompactados = 0
+        self.bytes_economizados = 0
+
+    def registrar_acesso(self, caminho: str, compactado: bool = False):
+        """
+        Registra a leitura de um arquivo. Grava os acessos pendentes se a
+        última gravação tiver ocorrido há mais de `intervalo_gravacao_segundos`
+        """
+        caminho = os.path.normpath(caminho)
+        with self._lock:
+            _, quantidade = self._acessos.get(caminho, (None, 0))
+            self._acessos[caminho] = (datetime.now(), quantidade + 1)
+            if compactado:
+                self.leituras_compactadas += 1
+            gravar = time.monotonic() - self._ultima_gravacao >= self.intervalo_gravacao_segundos
+        if gravar:
+            self.gravar_acessos()
+
+    def gravar_acessos(self):
+        with self._lock:
+            pendentes, self._acessos = self._acessos, {}
+            self._ultima_gravacao = time.monotonic()
+        if not pendentes:
+            return
+        try:
+            self.db.execute_many(
+                """
+                INSERT INTO arquivos_acessos (caminho, ultimo_acesso, acessos)
+                VALUES (?, ?, ?)
+                ON CONFLICT (caminho) DO UPDATE SET
+                    ultimo_acesso = excluded.ultimo_acesso,
+                    acessos = acessos + excluded.acessos
+                """,
+                [(caminho, quando, quantidade) for caminho, (quando, quantidade) in pendentes.items()]
+            )
+        except Exception as e:
+            print(f"Erro ao gravar acessos de arquivos: {str(e)}")
+
+    def _listar_arquivos(self) -> Iterator[Tuple[str, Optional[str], os.stat_result]]:
+        """
+        Percorre as pastas de upload: (caminho lógico, codec, stat)
+        """
+        sufixos = {extensao: codec for codec, extensao in EXTENSOES.items()}
+        for raiz in self.raizes:
+            for pasta, _, arquivos in os.walk(raiz):
+                for nome in arquivos:
+                    if nome.endswith('.tmp'):
+                        continue
+                    caminho = os.path.normpath(os.path.join(pasta, nome))
+                    base, extensao = os.path.splitext(caminho)
+                    codec = sufixos.get(extensao)
+                    try:
+                        estado = os.stat(caminho)
+                    except FileNotFoundError:
+                        continue
+                    yield (base if codec else caminho), codec, estado
+
+    def executar_ciclo(self) -> Dict[str, int]:
+        """
+        Compacta os arquivos frios e descompacta os que voltaram a ser
+        acessados. Executado periodicamente pelo processo líder
+        """
+        self.gravar_acessos()
+        acessos = {
+            row['caminho']: row for row in self.db.fetch_all(
+                "SELECT caminho, ultimo_acesso, acessos, incompressivel FROM arquivos_acessos"
+            )
+        }
+        limite_frio = time.time() - self.dias_frio * 86400
+        resultado = {'compactados': 0, 'descompactados': 0, 'incompressiveis': 0, 'bytes_economizados': 0}
+
+        existentes = set()
+        for caminho, codec, estado in self._listar_arquivos():
+            existentes.add(caminho)
+            registro = acessos.get(caminho)
+            try:
+                if codec:
+                    if registro and registro['acessos'] >= self.acessos_para_descompactar:
+                        if descompactar_arquivo(caminho):
+                            self._reiniciar_acessos(caminho)
+                            resultado['descompactados'] += 1
+                    continue
+
+                if registro and registro['incompressivel']:
+                    continue
+                ultimo_acesso = estado.st_mtime
+                if registro and registro['ultimo_acesso']:
+                    ultimo_acesso = max(ultimo_acesso, para_datetime(registro['ultimo_acesso']).timestamp())
+                if ultimo_acesso > limite_frio:
+                    continue
+
+                tamanho = compactar_arquivo(caminho, self.codec, self.nivel)
+                if tamanho is None:
+                    self._marcar_incompressivel(caminho)
+                    resultado['incompressiveis'] += 1
+                else:
+                    self._reiniciar_acessos(caminho)
+                    resultado['compactados'] += 1
+                    resultado['bytes_economizados'] += estado.st_size - tamanho
+            except FileNotFoundError:
+                # Removido durante o ciclo (ex.: documento excluído)
+                continue
+            except Exception as e:
+                print(f"Erro ao compactar/descompactar {caminho}: {str(e)}")
+
+        # Registros de arquivos que não existem mais (documentos excluídos)
+        orfaos = [(caminho,) for caminho in acessos if caminho not in existentes]
+        if orfaos:
+            self.db.execute_many("DELETE FROM arquivos_acessos WHERE caminho = ?", orfaos)
+
+        self.compactados += resultado['compactados']
+        self.descompactados += resultado['descompactados']
+        self.bytes_economizados += resultado['bytes_economizados']
+        return resultado
+
+    def _reiniciar_acessos(self, caminho: str):
+        self.db.execute(
+            """
+            INSERT INTO arquivos_acessos (caminho, ultimo_acesso, acessos)
+            VALUES (?, NULL, 0)
+            ON CONFLICT (caminho) DO UPDATE SET acessos = 0
+            """,
+            (caminho,)
+        )
+
+    def _marcar_incompressivel(self, caminho: str):
+        self.db.execute(
+            """
+            INSERT INTO arquivos_acessos (caminho, ultimo_acesso, acessos, incompressivel)
+            VALUES (?, NULL, 0, 1)
+            ON CONFLICT (caminho) DO UPDATE SET incompressivel = 1
+            """,
+            (caminho,)
+        )
+
+    def estatisticas(self) -> Dict:
+        return {
+            'codec': self.codec,
+            'dias_frio': self.dias_frio,
+            'leituras_compactadas': self.leituras_compactadas,
+            'compactados': self.compactados,
+            'descompactados': self.descompactados,
+            'bytes_economizados': self.bytes_economizados,
+        }
+
@@ -0,0 +1,100 @@
+import mimetypes
+import os
+from email.utils import formatdate
+from typing import Optional
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from adapters.arquivos.compactacao import ArmazenamentoCompactado, abrir, iterar_blocos, localizar
+from ports.interfaces.Iarmazenamento import IArmazenamento
+
+
+def resposta_arquivo(
+    caminho: str,
+    aceita_gzip: bool,
+    armazenamento: Optional[ArmazenamentoCompactado] = None,
+    nome_download: Optional[str] = None
+) -> Response:
+    """
+    Resposta HTTP para um arquivo enviado, compactado ou não:
+    - descompactado: FileResponse (com suporte a Range e ETag);
+    - gzip e o cliente aceita gzip: os bytes compactados são enviados
+      como estão, com Content-Encoding: gzip, sem custo de CPU;
+    - demais casos: descompactado em blocos durante o envio.
+    Levanta FileNotFoundError se o arquivo não existir
+    """
+    caminho_disco, codec = localizar(caminho)
+    if caminho_disco is None:
+        raise FileNotFoundError(caminho)
+    if armazenamento:
+        armazenamento.registrar_acesso(caminho, compactado=codec is not None)
+
+    tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+    if codec is None:
+        return FileResponse(caminho_disco, media_type=tipo, filename=nome_download)
+
+    estado = os.stat(caminho_disco)
+    cabecalhos = {
+        'Last-Modified': formatdate(estado.st_mtime, usegmt=True),
+        'Vary': 'Accept-Encoding',
+    }
+    if nome_download:
+        cabecalhos['Content-Disposition'] = f'attachment; filename="{nome_download}"'
+    if codec == 'gzip' and aceita_gzip:
+        cabecalhos['Content-Encoding'] = 'gzip'
+        return FileResponse(caminho_disco, media_type=tipo, headers=cabecalhos)
+    return StreamingResponse(iterar_blocos(abrir(caminho)), media_type=tipo, headers=cabecalhos)
+
+
+def aceita_gzip(cabecalhos: Headers) -> bool:
+    return 'gzip' in cabecalhos.get('accept-encoding', '').lower()
+
+
+class ArquivosEstaticos(StaticFiles):
+    """
+    StaticFiles que também serve arquivos movidos para o armazenamento
+    compactado (ver adapters/arquivos/compactacao.py) nas URLs originais
+    e registra os acessos usados para decidir o que está frio.
+
+    Com um armazenamento `remoto` (S3), arquivos que não estão no disco
+    são redirecionados para a URL assinada do armazenamento
+    """
+    def __init__(
+        self,
+        *args,
+        armazenamento: Optional[ArmazenamentoCompactado] = None,
+        remoto: Optional[IArmazenamento] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.armazenamento = armazenamento
+        self.remoto = remoto
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        caminho = os.path.join(str(self.directory), path)
+        try:
+            resposta = await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            # O StaticFiles já recusa caminhos fora da pasta; a busca pela
+            # versão compactada precisa fazer a mesma verificação
+            raiz = os.path.realpath(str(self.directory))
+            if os.path.commonpath([raiz, os.path.realpath(caminho)]) != raiz:
+                raise
+            try:
+                return await anyio.to_thread.run_sync(
+                    resposta_arquivo, caminho, aceita_gzip(Headers(scope=scope)), self.armazenamento
+                )
+            except (FileNotFoundError, ValueError):
+                pass
+            url = self.remoto.url_download(caminho) if self.remoto else None
+            if url is None:
+                raise e
+            return RedirectResponse(url, status_code=307)
+        if self.armazenamento and resposta.status_code == 200:
+            await anyio.to_thread.run_sync(self.armazenamento.registrar_acesso, caminho)
+        return resposta
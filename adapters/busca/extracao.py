@@ -0,0 +1,417 @@
+"""
+Extração de texto dos arquivos enviados, para o índice de busca.
+
+Cobre o texto de PDFs gerados digitalmente: streams sem filtro ou
+FlateDecode (inclusive dentro de object streams), operadores Tj/TJ/'/"
+e fontes com codificação simples ou mapeadas por CMap /ToUnicode.
+Imagens e PDFs escaneados não têm texto extraído (não há OCR)
+"""
+import re
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+from adapters.integridade.verificador import detectar_tipo, ler_dicionario
+
+# Limite do texto indexado por arquivo
+MAX_CARACTERES = 1_000_000
+
+OBJETO = re.compile(rb'(\d+)\s+\d+\s+obj\b')
+REFERENCIA = re.compile(rb'(\d+)\s+\d+\s+R')
+FONTE_RECURSO = re.compile(rb'/([^\s/<>\[\]()]+)\s+(\d+)\s+\d+\s+R')
+PAGINA = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+FILTROS_NAO_SUPORTADOS = re.compile(
+    rb'/(?:DCTDecode|JPXDecode|CCITTFaxDecode|JBIG2Decode|LZWDecode|ASCII85Decode|RunLengthDecode)'
+)
+
+TOKEN = re.compile(rb"""
+    (?P<literal>\()
+   |(?P<dicionario><<|>>)
+   |(?P<hex><[0-9A-Fa-f\s]*>)
+   |(?P<abre>\[)
+   |(?P<fecha>\])
+   |(?P<numero>[+-]?(?:\d+\.?\d*|\.\d+))
+   |(?P<nome>/[^\s/\[\]()<>{}%]*)
+   |(?P<comentario>%[^\r\n]*)
+   |(?P<operador>[A-Za-z'"*][A-Za-z0-9'"*]*)
+   |(?P<outro>\S)
+""", re.VERBOSE)
+
+ESCAPES = {
+    ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b',
+    ord('f'): b'\f', ord('('): b'(', ord(')'): b')', ord('\\'): b'\\',
+}
+
+# Espaçamento em milésimos de em num array TJ a partir do qual se considera
+# que há um espaço entre as palavras
+ESPACO_TJ = -200
+
+
+class Fonte:
+    """
+    Decodificação dos códigos de caractere de uma fonte: pelo CMap
+    /ToUnicode quando existe, senão como WinAnsi (cp1252). Fontes
+    compostas sem /ToUnicode não têm texto recuperável
+    """
+    def __init__(self, mapa: Optional[Dict[int, str]] = None, bytes_codigo: int = 1, composta: bool = False):
+        self.mapa = mapa
+        self.bytes_codigo = bytes_codigo
+        self.composta = composta
+
+    def decodificar(self, texto: bytes) -> str:
+        if self.mapa is not None:
+            n = self.bytes_codigo
+            return ''.join(
+                self.mapa.get(int.from_bytes(texto[i:i + n], 'big'), '')
+                for i in range(0, len(texto) - n + 1, n)
+            )
+        if self.composta:
+            return ''
+        if texto.startswith(b'\xfe\xff'):
+            return texto[2:].decode('utf-16-be', errors='ignore')
+        decodificado = texto.decode('cp1252', errors='ignore')
+        return ''.join(c for c in decodificado if c.isprintable() or c in '\n\t')
+
+
+FONTE_PADRAO = Fonte()
+
+
+def _hex_para_texto(hexadecimal: bytes) -> str:
+    dados = bytes.fromhex(hexadecimal.decode())
+    return dados.decode('utf-16-be', errors='ignore') if len(dados) > 1 else chr(dados[0])
+
+
+def ler_cmap(cmap: bytes) -> Tuple[Dict[int, str], int]:
+    """
+    Lê um CMap /ToUnicode (bfchar e bfrange). Retorna (código -> texto, bytes por código)
+    """
+    mapa: Dict[int, str] = {}
+    espaco = re.search(rb'begincodespacerange\s*<([0-9A-Fa-f]+)>', cmap)
+    bytes_codigo = len(espaco.group(1)) // 2 if espaco else 2
+
+    for bloco in re.findall(rb'beginbfchar(.*?)endbfchar', cmap, re.S):
+        for origem, destino in re.findall(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]*)>', bloco):
+            if destino:
+                mapa[int(origem, 16)] = _hex_para_texto(destino)
+
+    for bloco in re.findall(rb'beginbfrange(.*?)endbfrange', cmap, re.S):
+        for inicio, fim, destino in re.findall(
+            rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]+>|\[[^\]]*\])', bloco
+        ):
+            inicio, fim = int(inicio, 16), int(fim, 16)
+            if fim - inicio > 0xFFFF:
+                continue
+            if destino.startswith(b'['):
+                for deslocamento, valor in enumerate(re.findall(rb'<([0-9A-Fa-f]+)>', destino)):
+                    mapa[inicio + deslocamento] = _hex_para_texto(valor)
+            else:
+                base = destino[1:-1]
+                # Incrementa apenas o último caractere do destino
+                prefixo = _hex_para_texto(base[:-4]) if len(base) > 4 else ''
+                ultimo = int(base[-4:], 16)
+                for codigo in range(inicio, fim + 1):
+                    mapa[codigo] = prefixo + chr(ultimo + codigo - inicio)
+    return mapa, bytes_codigo
+
+
+class DocumentoPdf:
+    """
+    Acesso aos objetos de um PDF sem depender da xref: os objetos são
+    localizados por varredura (os últimos definidos prevalecem, como em
+    atualizações incrementais), incluindo os compactados em object streams
+    """
+    def __init__(self, dados: bytes):
+        self.dados = dados
+        self._posicoes: Dict[int, Tuple[int, int]] = {}
+        self._compactados: Dict[int, bytes] = {}
+        self._streams: Dict[int, Optional[bytes]] = {}
+        self._fontes: Dict[int, Fonte] = {}
+        for objeto in OBJETO.finditer(dados):
+            fim = dados.find(b'endobj', objeto.end())
+            self._posicoes[int(objeto.group(1))] = (objeto.end(), fim if fim >= 0 else len(dados))
+        for numero in list(self._posicoes):
+            if re.search(rb'/Type\s*/ObjStm', self._cabecalho(numero)):
+                self._ler_object_stream(numero)
+
+    def _corpo(self, numero: int) -> bytes:
+        if numero in self._posicoes:
+            inicio, fim = self._posicoes[numero]
+            return self.dados[inicio:fim]
+        return self._compactados.get(numero, b'')
+
+    def _cabecalho(self, numero: int) -> bytes:
+        """
+        Parte do objeto antes do stream (o dicionário)
+        """
+        corpo = self._corpo(numero)
+        fim = corpo.find(b'stream')
+        return corpo if fim < 0 else corpo[:fim]
+
+    def _ler_object_stream(self, numero: int):
+        conteudo = self.stream(numero)
+        cabecalho = self._cabecalho(numero)
+        primeiro = re.search(rb'/First\s+(\d+)', cabecalho)
+        if not conteudo or not primeiro:
+            return
+        primeiro = int(primeiro.group(1))
+        pares = [int(n) for n in conteudo[:primeiro].split()]
+        entradas = list(zip(pares[0::2], pares[1::2]))
+        for indice, (objeto, deslocamento) in enumerate(entradas):
+            fim = entradas[indice + 1][1] if indice + 1 < len(entradas) else len(conteudo) - primeiro
+            if objeto not in self._posicoes:
+                self._compactados.setdefault(objeto, conteudo[primeiro + deslocamento:primeiro + fim])
+
+    def stream(self, numero: int) -> Optional[bytes]:
+        """
+        Conteúdo decodificado do stream do objeto
+        """
+        if numero in self._streams:
+            return self._streams[numero]
+        conteudo = None
+        if numero in self._posicoes:
+            inicio, fim = self._posicoes[numero]
+            marcador = self.dados.find(b'stream', inicio, fim)
+            if marcador >= 0:
+                cabecalho = self.dados[inicio:marcador]
+                corpo = marcador + len(b'stream')
+                if self.dados[corpo:corpo + 2] == b'\r\n':
+                    corpo += 2
+                elif self.dados[corpo:corpo + 1] in (b'\n', b'\r'):
+                    corpo += 1
+                final = self.dados.rfind(b'endstream', corpo, fim)
+                conteudo = self.dados[corpo:final if final >= 0 else fim]
+                if FILTROS_NAO_SUPORTADOS.search(cabecalho):
+                    conteudo = None
+                elif b'/FlateDecode' in cabecalho:
+                    try:
+                        conteudo = zlib.decompressobj().decompress(conteudo)
+                    except zlib.error:
+                        conteudo = None
+        self._streams[numero] = conteudo
+        return conteudo
+
+    def valor(self, corpo: bytes, chave: bytes) -> bytes:
+        """
+        Valor de uma chave do dicionário, resolvendo referências indiretas
+        """
+        encontrado = re.search(rb'/' + chave + rb'(?![A-Za-z0-9])\s*', corpo)
+        if not encontrado:
+            return b''
+        pos = encontrado.end()
+        if corpo.startswith(b'<<', pos):
+            return ler_dicionario(corpo, pos)
+        if corpo.startswith(b'[', pos):
+            return corpo[pos:corpo.find(b']', pos) + 1]
+        referencia = REFERENCIA.match(corpo, pos)
+        if referencia:
+            return self._cabecalho(int(referencia.group(1)))
+        return corpo[pos:pos + 64]
+
+    def fonte(self, numero: int) -> Fonte:
+        if numero not in self._fontes:
+            corpo = self._cabecalho(numero)
+            composta = bool(re.search(rb'/Subtype\s*/Type0', corpo))
+            referencia = re.search(rb'/ToUnicode\s+(\d+)\s+\d+\s+R', corpo)
+            cmap = self.stream(int(referencia.group(1))) if referencia else None
+            if cmap:
+                mapa, bytes_codigo = ler_cmap(cmap)
+                self._fontes[numero] = Fonte(mapa, bytes_codigo, composta)
+            else:
+                self._fontes[numero] = Fonte(composta=composta)
+        return self._fontes[numero]
+
+    def _recursos(self, pagina: int) -> bytes:
+        """
+        /Resources da página, herdados dos nós /Pages ancestrais se ausentes
+        """
+        visitados = set()
+        while pagina not in visitados:
+            visitados.add(pagina)
+            corpo = self._cabecalho(pagina)
+            recursos = self.valor(corpo, b'Resources')
+            if recursos:
+                return recursos
+            pai = re.search(rb'/Parent\s+(\d+)\s+\d+\s+R', corpo)
+            if not pai:
+                break
+            pagina = int(pai.group(1))
+        return b''
+
+    def paginas(self) -> Iterator[Tuple[Dict[bytes, Fonte], List[bytes]]]:
+        """
+        Para cada página: (fontes por nome de recurso, content streams)
+        """
+        numeros = sorted(set(self._posicoes) | set(self._compactados))
+        for numero in numeros:
+            corpo = self._cabecalho(numero)
+            if not PAGINA.search(corpo):
+                continue
+            fontes = {
+                nome: self.fonte(int(referencia))
+                for nome, referencia in FONTE_RECURSO.findall(
+                    self.valor(self._recursos(numero), b'Font')
+                )
+            }
+            conteudos = []
+            encontrado = re.search(rb'/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)', corpo)
+            if encontrado:
+                referencias = [int(r) for r in REFERENCIA.findall(encontrado.group(1))]
+                # /Contents pode apontar para um objeto que é um array de streams
+                if len(referencias) == 1 and self.stream(referencias[0]) is None:
+                    referencias = [int(r) for r in REFERENCIA.findall(self._corpo(referencias[0]))]
+                conteudos = [c for c in (self.stream(r) for r in referencias) if c]
+            yield fontes, conteudos
+
+
+def _literal(conteudo: bytes, pos: int):
+    """
+    Lê uma string literal (...) a partir do parêntese de abertura,
+    tratando escapes e parênteses balanceados. Retorna (bytes, fim)
+    """
+    resultado = bytearray()
+    nivel = 1
+    i = pos + 1
+    n = len(conteudo)
+    while i < n:
+        c = conteudo[i]
+        if c == 0x5C:  # \
+            i += 1
+            if i >= n:
+                break
+            escapado = conteudo[i]
+            if escapado in ESCAPES:
+                resultado += ESCAPES[escapado]
+            elif 0x30 <= escapado <= 0x37:
+                digitos = re.match(rb'[0-7]{1,3}', conteudo[i:i + 3]).group(0)
+                resultado.append(int(digitos, 8) & 0xFF)
+                i += len(digitos) - 1
+            elif escapado == 0x0D and conteudo[i + 1:i + 2] == b'\n':
+                i += 1
+            elif escapado not in (0x0A, 0x0D):
+                resultado.append(escapado)
+        elif c == 0x28:
+            nivel += 1
+            resultado.append(c)
+        elif c == 0x29:
+            nivel -= 1
+            if nivel == 0:
+                return bytes(resultado), i + 1
+            resultado.append(c)
+        else:
+            resultado.append(c)
+        i += 1
+    return bytes(resultado), n
+
+
+def texto_conteudo(conteudo: bytes, fontes: Optional[Dict[bytes, Fonte]] = None) -> str:
+    """
+    Interpreta os operadores de texto de um content stream
+    """
+    fontes = fontes or {}
+    fonte = FONTE_PADRAO
+    partes: List[str] = []
+    operandos: list = []
+    arrays: List[list] = []
+    pos = 0
+    n = len(conteudo)
+
+    def quebra(separador: str):
+        if partes and not partes[-1].endswith(('\n', ' ')):
+            partes.append(separador)
+
+    while pos < n:
+        token = TOKEN.search(conteudo, pos)
+        if not token:
+            break
+        tipo = token.lastgroup
+        pos = token.end()
+        if tipo == 'literal':
+            valor, pos = _literal(conteudo, token.start())
+        elif tipo == 'hex':
+            digitos = re.sub(rb'\s', b'', token.group(0)[1:-1])
+            if len(digitos) % 2:
+                digitos += b'0'
+            valor = bytes.fromhex(digitos.decode())
+        elif tipo == 'numero':
+            valor = float(token.group(0))
+        elif tipo == 'nome':
+            valor = token.group(0)[1:]
+        elif tipo == 'abre':
+            arrays.append([])
+            continue
+        elif tipo == 'fecha':
+            if not arrays:
+                continue
+            valor = arrays.pop()
+        elif tipo == 'operador':
+            operador = token.group(0)
+            if operador == b'Tf':
+                if len(operandos) >= 2 and isinstance(operandos[-2], bytes):
+                    fonte = fontes.get(operandos[-2], FONTE_PADRAO)
+            elif operador in (b'Tj', b"'", b'"'):
+                if operador != b'Tj':
+                    quebra('\n')
+                if operandos and isinstance(operandos[-1], bytes):
+                    partes.append(fonte.decodificar(operandos[-1]))
+            elif operador == b'TJ':
+                for elemento in (operandos[-1] if operandos and isinstance(operandos[-1], list) else []):
+                    if isinstance(elemento, bytes):
+                        partes.append(fonte.decodificar(elemento))
+                    elif isinstance(elemento, float) and elemento < ESPACO_TJ:
+                        quebra(' ')
+            elif operador in (b'Td', b'TD'):
+                deslocamento_y = operandos[-1] if operandos and isinstance(operandos[-1], float) else 0
+                quebra('\n' if deslocamento_y else ' ')
+            elif operador in (b'T*', b'Tm', b'ET'):
+                quebra('\n')
+            elif operador == b'ID':
+                # Dados binários de imagem inline até o EI
+                fim = conteudo.find(b'EI', pos)
+                pos = n if fim < 0 else fim + 2
+            operandos = []
+            arrays = []
+            continue
+        else:
+            continue
+
+        if arrays:
+            arrays[-1].append(valor)
+        else:
+            operandos.append(valor)
+
+    return ''.join(partes)
+
+
+def extrair_texto_pdf(dados: bytes) -> str:
+    """
+    Extrai o texto das páginas de um PDF
+    """
+    trechos = []
+    total = 0
+    for fontes, conteudos in DocumentoPdf(dados).paginas():
+        for conteudo in conteudos:
+            texto = texto_conteudo(conteudo, fontes)
+            if texto.strip():
+                trechos.append(texto)
+                total += len(texto)
+        if total >= MAX_CARACTERES:
+            break
+    texto = '\n'.join(trechos)
+    texto = re.sub(r'[ \t]+', ' ', texto)
+    texto = re.sub(r'\s*\n\s*', '\n', texto)
+    return texto.strip()[:MAX_CARACTERES]
+
+
+def extrair_texto(dados: bytes) -> Optional[str]:
+    """
+    Extrai o texto de um arquivo conforme o formato. Imagens retornam None;
+    conteúdo que não é PDF nem imagem é tratado como texto
+    """
+    tipo = detectar_tipo(dados)
+    if tipo == 'pdf':
+        return extrair_texto_pdf(dados)
+    if tipo is not None:
+        return None
+    try:
+        texto = dados.decode('utf-8')
+    except UnicodeDecodeError:
+        texto = dados.decode('latin-1')
+    return texto.strip()[:MAX_CARACTERES]
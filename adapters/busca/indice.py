@@ -0,0 +1,137 @@
+import re
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+from core.entities.job import EntidadeJob
+from ports.interfaces.Ibusca import IIndiceBusca
+from ports.interfaces.Idatabase import IDatabase
+
+# Marcadores dos termos encontrados no trecho retornado
+INICIO_DESTAQUE = "<b>"
+FIM_DESTAQUE = "</b>"
+TOKENS_TRECHO = 16
+
+TERMO = re.compile(r'\S+')
+
+def montar_consulta_fts(consulta: str) -> str:
+    """
+    Converte o texto digitado em uma consulta FTS5 segura: cada termo vira
+    uma frase entre aspas (números de processo com pontos e hífens são
+    buscados como sequência) e o último termo casa por prefixo
+    """
+    termos = [termo.replace('"', '""') for termo in TERMO.findall(consulta)]
+    if not termos:
+        return ''
+    frases = [f'"{termo}"' for termo in termos]
+    frases[-1] += '*'
+    return ' '.join(frases)
+
+class BuscaIndisponivelError(Exception):
+    """
+    O banco em uso não tem o índice FTS5 (apenas SQLite)
+    """
+    pass
+
+class IndiceBuscaSqlite(IIndiceBusca):
+    """
+    Índice de busca sobre a tabela virtual FTS5 `busca_conteudo`, que
+    indexa o texto de `conteudo_extraido` (tabela de conteúdo externo).
+    Triggers do schema mantêm o FTS sincronizado e removem o texto quando
+    o documento, a certidão ou o credor são excluídos.
+
+    Em outros bancos o texto continua sendo gravado em `conteudo_extraido`,
+    mas a busca levanta BuscaIndisponivelError
+    """
+    def __init__(self, database: IDatabase):
+        self.db = database
+
+    @property
+    def disponivel(self) -> bool:
+        return self.db.dialeto == 'sqlite'
+
+    def indexar(self, entidade: EntidadeJob, entidade_id: int, credor_id: int, texto: str):
+        self.db.execute(
+            """
+            INSERT INTO conteudo_extraido (entidade, entidade_id, credor_id, texto, extraido_em)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (entidade, entidade_id) DO UPDATE SET
+                credor_id = excluded.credor_id,
+                texto = excluded.texto,
+                extraido_em = excluded.extraido_em
+            """,
+            (entidade.value, entidade_id, credor_id, texto, datetime.now())
+        )
+
+    def remover(self, entidade: EntidadeJob, entidade_id: int) -> bool:
+        removido = self.db.execute_returning(
+            "DELETE FROM conteudo_extraido WHERE entidade = ? AND entidade_id = ? RETURNING id",
+            (entidade.value, entidade_id)
+        )
+        return removido is not None
+
+    def listar_pendentes(self) -> List[Tuple[EntidadeJob, int]]:
+        rows = self.db.fetch_all(
+            """
+            SELECT 'documento' AS entidade, d.id FROM documentos d
+            WHERE NOT EXISTS (
+                SELECT 1 FROM conteudo_extraido c
+                WHERE c.entidade = 'documento' AND c.entidade_id = d.id
+            )
+            UNION ALL
+            SELECT 'certidao' AS entidade, ce.id FROM certidoes ce
+            WHERE NOT EXISTS (
+                SELECT 1 FROM conteudo_extraido c
+                WHERE c.entidade = 'certidao' AND c.entidade_id = ce.id
+            )
+            """
+        )
+        return [(EntidadeJob(row['entidade']), row['id']) for row in rows]
+
+    def buscar(
+        self,
+        consulta: str,
+        limite: int = 20,
+        entidade: Optional[EntidadeJob] = None,
+        credor_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        if not self.disponivel:
+            raise BuscaIndisponivelError(
+                f"A busca textual requer SQLite (FTS5); o banco em uso é {self.db.dialeto}"
+            )
+        expressao = montar_consulta_fts(consulta)
+        if not expressao:
+            return []
+
+        filtros = ""
+        params: list = [expressao]
+        if entidade:
+            filtros += " AND c.entidade = ?"
+            params.append(entidade.value)
+        if credor_id is not None:
+            filtros += " AND c.credor_id = ?"
+            params.append(credor_id)
+        params.append(limite)
+
+        # bm25 retorna valores menores para os mais relevantes
+        rows = self.db.fetch_all(
+            f"""
+            SELECT c.entidade, c.entidade_id, c.credor_id,
+                   snippet(busca_conteudo, 0, '{INICIO_DESTAQUE}', '{FIM_DESTAQUE}', '…', {TOKENS_TRECHO}) AS trecho,
+                   bm25(busca_conteudo) AS relevancia
+            FROM busca_conteudo
+            JOIN conteudo_extraido c ON c.id = busca_conteudo.rowid
+            WHERE busca_conteudo MATCH ?{filtros}
+            ORDER BY relevancia
+            LIMIT ?
+            """,
+            tuple(params)
+        )
+        return [
+            {
+                'entidade': row['entidade'],
+                'entidade_id': row['entidade_id'],
+                'credor_id': row['credor_id'],
+                'trecho': row['trecho'],
+                'relevancia': round(-row['relevancia'], 4),
+            }
+            for row in rows
+        ]
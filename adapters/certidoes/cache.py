@@ -0,0 +1,252 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from core.entities.certidao import StatusCertidao, TipoCertidao
+from ports.interfaces.Icertidao import ICertidaoApiService
+from ports.database.conversao import para_datetime
+
+@dataclass
+class EntradaCache:
+    certidao: Optional[Dict]
+    expira_em: datetime
+    obsoleta_ate: datetime
+
+    @property
+    def negativa(self) -> bool:
+        return self.certidao is None
+
+class CertidaoApiCache(ICertidaoApiService):
+    """
+    Cache na frente de um ICertidaoApiService, com entradas por (cpf_cnpj, tipo).
+
+    - A entrada fica fresca até o `valida_ate` da certidão (limitado a
+      `ttl_maximo_segundos`)
+    - Tipos que a origem não retornou são guardados como resultado negativo
+      por `ttl_negativo_segundos`, evitando consultar de novo o que não existe
+    - Por até `janela_obsoleta_segundos` após expirar, a entrada ainda é
+      servida (stale-while-revalidate) enquanto uma thread consulta a origem
+    """
+    def __init__(
+        self,
+        servico: ICertidaoApiService,
+        ttl_maximo_segundos: int = 24 * 3600,
+        ttl_negativo_segundos: int = 300,
+        janela_obsoleta_segundos: int = 3600,
+        max_entradas: int = 10000,
+        agora: Callable[[], datetime] = datetime.now
+    ):
+        self.servico = servico
+        self.ttl_maximo = timedelta(seconds=ttl_maximo_segundos)
+        self.ttl_negativo = timedelta(seconds=ttl_negativo_segundos)
+        self.janela_obsoleta = timedelta(seconds=janela_obsoleta_segundos)
+        self.max_entradas = max_entradas
+        self.agora = agora
+        self._entradas: "OrderedDict[Tuple[str, str], EntradaCache]" = OrderedDict()
+        self._revalidando = set()
+        self._tarefas = set()
+        self._lock = threading.Lock()
+        self.metricas = {
+            'consultas': 0,
+            'acertos': 0,
+            'acertos_negativos': 0,
+            'obsoletas_servidas': 0,
+            'faltas': 0,
+            'chamadas_origem': 0,
+            'revalidacoes': 0,
+            'erros_origem': 0,
+        }
+
+    def _contar(self, metrica: str):
+        with self._lock:
+            self.metricas[metrica] += 1
+
+    def _criar_entrada(self, certidao: Optional[Dict], agora: datetime) -> EntradaCache:
+        """
+        Calcula a validade da entrada a partir da validade da certidão
+        """
+        if certidao is None:
+            # Resultado negativo não é servido obsoleto
+            expira_em = agora + self.ttl_negativo
+            return EntradaCache(None, expira_em, expira_em)
+
+        expira_em = agora + self.ttl_maximo
+        valida_ate = para_datetime(certidao.get('valida_ate'))
+        if valida_ate:
+            expira_em = min(expira_em, valida_ate)
+        return EntradaCache(certidao, expira_em, expira_em + self.janela_obsoleta)
+
+    def _gravar(self, cpf_cnpj: str, certidoes: List[Dict]) -> Dict[str, EntradaCache]:
+        """
+        Grava uma entrada (positiva ou negativa) por tipo a partir da resposta da origem
+        """
+        agora = self.agora()
+        por_tipo = {certidao['tipo']: certidao for certidao in certidoes}
+        entradas = {
+            tipo.value: self._criar_entrada(por_tipo.get(tipo.value), agora)
+            for tipo in TipoCertidao
+        }
+        with self._lock:
+            for tipo, entrada in entradas.items():
+                if entrada.certidao and 'erro' in entrada.certidao:
+                    # Falha de uma origem é repassada, mas não vai para o cache
+                    continue
+                self._entradas[(cpf_cnpj, tipo)] = entrada
+                self._entradas.move_to_end((cpf_cnpj, tipo))
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return entradas
+
+    def _consultar_origem(self, cpf_cnpj: str) -> Dict[str, EntradaCache]:
+        self._contar('chamadas_origem')
+        try:
+            certidoes = self.servico.buscar_certidoes(cpf_cnpj)
+        except Exception:
+            self._contar('erros_origem')
+            raise
+        return self._gravar(cpf_cnpj, certidoes)
+
+    async def _consultar_origem_async(self, cpf_cnpj: str) -> Dict[str, EntradaCache]:
+        self._contar('chamadas_origem')
+        try:
+            certidoes = await self.servico.buscar_certidoes_async(cpf_cnpj)
+        except Exception:
+            self._contar('erros_origem')
+            raise
+        return self._gravar(cpf_cnpj, certidoes)
+
+    def _reservar_revalidacao(self, cpf_cnpj: str) -> bool:
+        """
+        Garante no máximo uma revalidação por CPF/CNPJ de cada vez
+        """
+        with self._lock:
+            if cpf_cnpj in self._revalidando:
+                return False
+            self._revalidando.add(cpf_cnpj)
+            return True
+
+    def _revalidar(self, cpf_cnpj: str):
+        try:
+            self._consultar_origem(cpf_cnpj)
+            self._contar('revalidacoes')
+        except Exception as e:
+            print(f"Erro ao revalidar certidões em cache de {cpf_cnpj}: {str(e)}")
+        finally:
+            with self._lock:
+                self._revalidando.discard(cpf_cnpj)
+
+    async def _revalidar_async(self, cpf_cnpj: str):
+        try:
+            await self._consultar_origem_async(cpf_cnpj)
+            self._contar('revalidacoes')
+        except Exception as e:
+            print(f"Erro ao revalidar certidões em cache de {cpf_cnpj}: {str(e)}")
+        finally:
+            with self._lock:
+                self._revalidando.discard(cpf_cnpj)
+
+    def _consultar_cache(self, cpf_cnpj: str, tipos: List[str]) -> Tuple[Optional[Dict[str, EntradaCache]], bool]:
+        """
+        Retorna (entradas, obsoleta). `entradas` é None se algum tipo
+        não está em cache ou já passou da janela obsoleta
+        """
+        agora = self.agora()
+        entradas = {}
+        obsoleta = False
+        with self._lock:
+            self.metricas['consultas'] += 1
+            for tipo in tipos:
+                entrada = self._entradas.get((cpf_cnpj, tipo))
+                if entrada is None or agora >= entrada.obsoleta_ate:
+                    self.metricas['faltas'] += 1
+                    return None, False
+                self._entradas.move_to_end((cpf_cnpj, tipo))
+                obsoleta = obsoleta or agora >= entrada.expira_em
+                entradas[tipo] = entrada
+
+            if obsoleta:
+                self.metricas['obsoletas_servidas'] += 1
+            elif all(entrada.negativa for entrada in entradas.values()):
+                self.metricas['acertos_negativos'] += 1
+            else:
+                self.metricas['acertos'] += 1
+        return entradas, obsoleta
+
+    @staticmethod
+    def _resultado(entradas: Dict[str, EntradaCache], tipos: List[str]) -> List[Dict]:
+        return [
+            entradas[tipo].certidao for tipo in tipos
+            if not entradas[tipo].negativa
+        ]
+
+    def _buscar(self, cpf_cnpj: str, tipos: List[str]) -> List[Dict]:
+        entradas, obsoleta = self._consultar_cache(cpf_cnpj, tipos)
+        if entradas is None:
+            entradas = self._consultar_origem(cpf_cnpj)
+        elif obsoleta and self._reservar_revalidacao(cpf_cnpj):
+            threading.Thread(
+                target=self._revalidar,
+                args=(cpf_cnpj,),
+                name=f"revalidacao-cache-{cpf_cnpj}",
+                daemon=True
+            ).start()
+        return self._resultado(entradas, tipos)
+
+    async def _buscar_async(self, cpf_cnpj: str, tipos: List[str]) -> List[Dict]:
+        entradas, obsoleta = self._consultar_cache(cpf_cnpj, tipos)
+        if entradas is None:
+            entradas = await self._consultar_origem_async(cpf_cnpj)
+        elif obsoleta and self._reservar_revalidacao(cpf_cnpj):
+            # Guarda a referência para a tarefa não ser coletada antes de terminar
+            tarefa = asyncio.ensure_future(self._revalidar_async(cpf_cnpj))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+        return self._resultado(entradas, tipos)
+
+    def buscar_certidoes(self, cpf_cnpj: str) -> List[Dict]:
+        """
+        Busca as certidões de todos os tipos, consultando a origem apenas
+        se alguma delas não estiver em cache
+        """
+        return self._buscar(cpf_cnpj, [tipo.value for tipo in TipoCertidao])
+
+    async def buscar_certidoes_async(self, cpf_cnpj: str) -> List[Dict]:
+        return await self._buscar_async(cpf_cnpj, [tipo.value for tipo in TipoCertidao])
+
+    def buscar_certidao(self, cpf_cnpj: str, tipo: TipoCertidao) -> Optional[Dict]:
+        """
+        Busca a certidão de um único tipo. Retorna None se a origem não a possui
+        """
+        certidoes = self._buscar(cpf_cnpj, [tipo.value])
+        return certidoes[0] if certidoes else None
+
+    def invalidar(self, cpf_cnpj: str):
+        """
+        Remove do cache as certidões de um CPF/CNPJ
+        """
+        with self._lock:
+            for tipo in TipoCertidao:
+                self._entradas.pop((cpf_cnpj, tipo.value), None)
+
+    def validar_certidao(self, certidao_id: int) -> StatusCertidao:
+        return self.servico.validar_certidao(certidao_id)
+
+    def revalidar_certidoes_vencidas(self) -> int:
+        return self.servico.revalidar_certidoes_vencidas()
+
+    def estatisticas(self) -> dict:
+        """
+        Métricas do cache, incluindo as chamadas à origem economizadas
+        """
+        with self._lock:
+            metricas = dict(self.metricas)
+            metricas['entradas'] = len(self._entradas)
+        metricas['chamadas_economizadas'] = max(
+            metricas['consultas'] - metricas['faltas'], 0
+        )
+        metricas['taxa_acerto'] = round(
+            metricas['chamadas_economizadas'] / metricas['consultas'], 4
+        ) if metricas['consultas'] else 0.0
+        return metricas
@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, Optional
+
+class CircuitoAbertoError(Exception):
+    """
+    Chamada recusada porque o disjuntor da origem está aberto
+    """
+    def __init__(self, nome: str, espera: float):
+        super().__init__(f"Circuito '{nome}' aberto; nova tentativa em {espera:.1f}s")
+        self.nome = nome
+        self.espera = espera
+
+class Disjuntor:
+    """
+    Circuit breaker: após `limite_falhas` falhas consecutivas o circuito
+    abre e as chamadas falham imediatamente por `tempo_aberto_segundos`.
+    Depois disso uma única chamada de teste é liberada (meio aberto): se
+    tiver sucesso o circuito fecha, se falhar volta a abrir
+    """
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(
+        self,
+        nome: str,
+        limite_falhas: int = 5,
+        tempo_aberto_segundos: float = 30.0,
+        relogio: Callable[[], float] = time.monotonic
+    ):
+        if limite_falhas <= 0:
+            raise ValueError("O limite de falhas deve ser maior que zero")
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto_segundos = tempo_aberto_segundos
+        self.relogio = relogio
+        self._estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em: Optional[float] = None
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+        self.aberturas = 0
+        self.recusadas = 0
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            self._atualizar(self.relogio())
+            return self._estado
+
+    def _atualizar(self, agora: float):
+        if self._estado == self.ABERTO and agora - self._aberto_em >= self.tempo_aberto_segundos:
+            self._estado = self.MEIO_ABERTO
+            self._teste_em_andamento = False
+
+    def permitir(self):
+        """
+        Verifica se a chamada pode ser feita. Levanta CircuitoAbertoError se não
+        """
+        with self._lock:
+            agora = self.relogio()
+            self._atualizar(agora)
+            if self._estado == self.FECHADO:
+                return
+            if self._estado == self.MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return
+            self.recusadas += 1
+            espera = self.tempo_aberto_segundos
+            if self._aberto_em is not None:
+                espera = max(self._aberto_em + self.tempo_aberto_segundos - agora, 0.0)
+            raise CircuitoAbertoError(self.nome, espera)
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                if self._estado != self.ABERTO:
+                    self.aberturas += 1
+                self._estado = self.ABERTO
+                self._aberto_em = self.relogio()
+                self._teste_em_andamento = False
+
+    def estatisticas(self) -> dict:
+        return {
+            'estado': self.estado,
+            'falhas_consecutivas': self._falhas,
+            'aberturas': self.aberturas,
+            'recusadas': self.recusadas
+        }
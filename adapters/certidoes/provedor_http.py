@@ -0,0 +1,466 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from core.entities.certidao import StatusCertidao, TipoCertidao
+from ports.interfaces.Icertidao import ICertidaoApiService
+from adapters.certidoes.disjuntor import Disjuntor
+from adapters.runtime.prazo import (
+    CABECALHO_PRAZO, PrazoExcedidoError, limitar_ao_prazo, tempo_restante, verificar_prazo
+)
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # h2 é opcional: sem ele o cliente usa apenas HTTP/1.1
+    h2 = None
+
+if TYPE_CHECKING:
+    import httpx
+    from adapters.certidoes.revalidacao import AgendadorRevalidacao
+
+class ErroProvedorCertidoes(Exception):
+    """
+    A origem não respondeu com sucesso após todas as tentativas
+    """
+
+class EstatisticasOrigem:
+    """
+    Latências recentes e contadores de uma origem (um tipo de certidão)
+    """
+    def __init__(self, janela: int = 500):
+        self._latencias = deque(maxlen=janela)
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.hedges = 0
+        self.hedges_vencedores = 0
+
+    def registrar_latencia(self, segundos: float):
+        with self._lock:
+            self._latencias.append(segundos)
+
+    def contar(self, contador: str):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def percentil(self, p: float, minimo_amostras: int = 0) -> Optional[float]:
+        with self._lock:
+            if not self._latencias or len(self._latencias) < minimo_amostras:
+                return None
+            ordenadas = sorted(self._latencias)
+        return ordenadas[min(int(len(ordenadas) * p), len(ordenadas) - 1)]
+
+    def resumo(self) -> dict:
+        with self._lock:
+            contadores = {
+                'consultas': self.consultas,
+                'hedges': self.hedges,
+                'hedges_vencedores': self.hedges_vencedores,
+            }
+        return {
+            **contadores,
+            'p50_ms': self._em_ms(self.percentil(0.50)),
+            'p95_ms': self._em_ms(self.percentil(0.95)),
+            'p99_ms': self._em_ms(self.percentil(0.99)),
+        }
+
+    @staticmethod
+    def _em_ms(segundos: Optional[float]) -> Optional[float]:
+        return round(segundos * 1000, 1) if segundos is not None else None
+
+class CertidaoApiHttp(ICertidaoApiService):
+    """
+    Provedor de certidões que consulta uma API HTTP externa.
+
+    Cada tipo de certidão é tratado como uma origem independente
+    (GET /api/certidoes/{tipo}), com disjuntor e estatísticas de latência
+    próprios, e os tipos são consultados em paralelo: uma origem lenta ou
+    fora do ar não atrasa nem derruba as demais.
+
+    - Cliente httpx por processo com pool de conexões keep-alive
+      (HTTP/2 quando o pacote `h2` está instalado)
+    - Falhas transitórias (erros de rede, timeouts, 429 e 5xx) são
+      repetidas com backoff exponencial com jitter
+    - Hedging: se a resposta demora mais que o p95 recente da origem, uma
+      requisição duplicada é disparada e vale a primeira que responder
+    - Prazo: timeouts, esperas e duplicatas respeitam o prazo da requisição
+      atual (adapters/runtime/prazo.py), repassado à origem no cabeçalho
+      X-Prazo-Ms
+
+    O httpx só é importado quando o provedor é criado: sem
+    CERTIDOES_API_URL a aplicação não o carrega
+    """
+    def __init__(
+        self,
+        url_base: str,
+        timeout_segundos: float = 5.0,
+        max_conexoes: int = 100,
+        max_conexoes_ociosas: int = 20,
+        tentativas: int = 3,
+        backoff_base_segundos: float = 0.1,
+        backoff_maximo_segundos: float = 2.0,
+        limite_falhas_disjuntor: int = 5,
+        tempo_aberto_disjuntor_segundos: float = 30.0,
+        hedge: bool = True,
+        hedge_percentil: float = 0.95,
+        hedge_minimo_amostras: int = 20,
+        http2: bool = True,
+        transporte: Optional["httpx.BaseTransport"] = None
+    ):
+        import httpx
+
+        self.url_base = url_base.rstrip('/')
+        self.timeout_segundos = timeout_segundos
+        self.limites = httpx.Limits(
+            max_connections=max_conexoes,
+            max_keepalive_connections=max_conexoes_ociosas
+        )
+        self.tentativas = max(tentativas, 1)
+        self.backoff_base = backoff_base_segundos
+        self.backoff_maximo = backoff_maximo_segundos
+        self.hedge = hedge
+        self.hedge_percentil = hedge_percentil
+        self.hedge_minimo_amostras = hedge_minimo_amostras
+        self.disjuntores: Dict[str, Disjuntor] = {
+            tipo.value: Disjuntor(
+                f"certidoes_{tipo.value}",
+                limite_falhas=limite_falhas_disjuntor,
+                tempo_aberto_segundos=tempo_aberto_disjuntor_segundos
+            )
+            for tipo in TipoCertidao
+        }
+        self.origens: Dict[str, EstatisticasOrigem] = {
+            tipo.value: EstatisticasOrigem() for tipo in TipoCertidao
+        }
+        self.http2 = http2 and h2 is not None
+        # Transporte alternativo dos clientes (ex.: httpx.MockTransport nos testes)
+        self.transporte = transporte
+        self.agendador: Optional["AgendadorRevalidacao"] = None
+        self._cliente_async: Optional["httpx.AsyncClient"] = None
+        self._loop_cliente = None
+        self._cliente_sync: Optional["httpx.Client"] = None
+        self._lock = threading.Lock()
+        self.metricas = {
+            'requisicoes': 0,
+            'tentativas': 0,
+            'retentativas': 0,
+            'falhas': 0,
+            'prazos_excedidos': 0,
+        }
+
+    def _opcoes_cliente(self) -> dict:
+        import httpx
+
+        opcoes = {
+            'base_url': self.url_base,
+            'timeout': httpx.Timeout(self.timeout_segundos),
+            'limits': self.limites,
+            'http2': self.http2,
+        }
+        if self.transporte is not None:
+            opcoes['transport'] = self.transporte
+        return opcoes
+
+    def _obter_cliente_async(self) -> "httpx.AsyncClient":
+        """
+        O cliente assíncrono é criado no primeiro uso, dentro do event loop
+        do worker (um cliente não pode ser compartilhado entre loops)
+        """
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._cliente_async is None or self._loop_cliente is not loop:
+            self._cliente_async = httpx.AsyncClient(**self._opcoes_cliente())
+            self._loop_cliente = loop
+        return self._cliente_async
+
+    def _obter_cliente_sync(self) -> "httpx.Client":
+        import httpx
+
+        with self._lock:
+            if self._cliente_sync is None:
+                self._cliente_sync = httpx.Client(**self._opcoes_cliente())
+            return self._cliente_sync
+
+    def _contar(self, metrica: str):
+        with self._lock:
+            self.metricas[metrica] += 1
+
+    def _espera(self, tentativa: int, resposta: Optional["httpx.Response"]) -> float:
+        """
+        Backoff exponencial com jitter completo; respeita Retry-After da origem
+        """
+        if resposta is not None and 'Retry-After' in resposta.headers:
+            try:
+                return min(float(resposta.headers['Retry-After']), self.backoff_maximo)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_maximo, self.backoff_base * 2 ** tentativa))
+
+    def _parametros_requisicao(self) -> dict:
+        """
+        Timeout limitado ao prazo restante, que também é repassado à origem
+        """
+        verificar_prazo()
+        opcoes = {'timeout': limitar_ao_prazo(self.timeout_segundos)}
+        restante = tempo_restante()
+        if restante is not None:
+            opcoes['headers'] = {CABECALHO_PRAZO: str(int(restante * 1000))}
+        return opcoes
+
+    @staticmethod
+    def _transitoria(resposta: "httpx.Response") -> bool:
+        return resposta.status_code == 429 or resposta.status_code >= 500
+
+    def _avaliar(
+        self,
+        disjuntor: Disjuntor,
+        resposta: Optional["httpx.Response"],
+        erro: Optional[Exception]
+    ) -> Optional[str]:
+        """
+        Registra o resultado de uma tentativa no disjuntor da origem.
+        Retorna a descrição da falha, ou None se a resposta pode ser usada
+        """
+        if resposta is not None and not self._transitoria(resposta):
+            disjuntor.registrar_sucesso()
+            return None
+        disjuntor.registrar_falha()
+        self._contar('falhas')
+        if erro is not None:
+            return f"{type(erro).__name__}: {str(erro)}"
+        return f"status {resposta.status_code}"
+
+    async def _enviar_async(self, origem: str, caminho: str, params: Optional[Dict]) -> "httpx.Response":
+        """
+        Uma requisição à origem. Levanta ErroProvedorCertidoes em falha
+        transitória (com a resposta anexada, para o Retry-After)
+        """
+        import httpx
+
+        disjuntor = self.disjuntores[origem]
+        disjuntor.permitir()
+        self._contar('tentativas')
+        resposta, erro = None, None
+        inicio = time.monotonic()
+        try:
+            resposta = await self._obter_cliente_async().get(
+                caminho, params=params, **self._parametros_requisicao()
+            )
+        except httpx.TransportError as e:
+            erro = e
+        self.origens[origem].registrar_latencia(time.monotonic() - inicio)
+        falha = self._avaliar(disjuntor, resposta, erro)
+        if falha is not None:
+            excecao = ErroProvedorCertidoes(falha)
+            excecao.resposta = resposta
+            raise excecao
+        resposta.raise_for_status()
+        return resposta
+
+    async def _enviar_com_hedge(self, origem: str, caminho: str, params: Optional[Dict]) -> "httpx.Response":
+        """
+        Envia a requisição e, se ela passar do p95 recente da origem, dispara
+        uma duplicata; retorna a primeira resposta bem-sucedida.
+
+        A duplicata só é disparada com o disjuntor fechado: meio aberto, a
+        primária é a única chamada de teste permitida. Se as duas falharem,
+        vale o erro da primária (a duplicata pode ter sido recusada pelo
+        disjuntor aberto pela falha da primária)
+        """
+        disjuntor = self.disjuntores[origem]
+        estatisticas = self.origens[origem]
+        limiar = None
+        if self.hedge:
+            limiar = estatisticas.percentil(self.hedge_percentil, self.hedge_minimo_amostras)
+        primaria = asyncio.ensure_future(self._enviar_async(origem, caminho, params))
+        if limiar is None:
+            return await primaria
+
+        pendentes = {primaria}
+        try:
+            concluidas, _ = await asyncio.wait(pendentes, timeout=limiar)
+            restante = tempo_restante()
+            if (
+                not concluidas
+                and (restante is None or restante > limiar)
+                and disjuntor.estado == Disjuntor.FECHADO
+            ):
+                pendentes.add(asyncio.ensure_future(self._enviar_async(origem, caminho, params)))
+                estatisticas.contar('hedges')
+
+            erro = None
+            while pendentes:
+                concluidas, pendentes = await asyncio.wait(
+                    pendentes, return_when=asyncio.FIRST_COMPLETED
+                )
+                for tarefa in concluidas:
+                    if tarefa.exception() is None:
+                        if tarefa is not primaria:
+                            estatisticas.contar('hedges_vencedores')
+                        return tarefa.result()
+                    if erro is None or tarefa is primaria:
+                        erro = tarefa.exception()
+            raise erro
+        finally:
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+    async def _get_async(self, origem: str, caminho: str, params: Optional[Dict] = None) -> "httpx.Response":
+        self._contar('requisicoes')
+        self.origens[origem].contar('consultas')
+        falha = None
+        for tentativa in range(self.tentativas):
+            try:
+                return await self._enviar_com_hedge(origem, caminho, params)
+            except ErroProvedorCertidoes as e:
+                falha = e
+            espera = self._espera(tentativa, getattr(falha, 'resposta', None))
+            restante = tempo_restante()
+            if restante is not None and restante <= espera:
+                raise PrazoExcedidoError(f"Prazo excedido ao consultar {caminho}: {falha}")
+            if tentativa + 1 >= self.tentativas:
+                break
+            self._contar('retentativas')
+            await asyncio.sleep(espera)
+        raise ErroProvedorCertidoes(
+            f"Falha ao consultar {caminho} após {tentativa + 1} tentativas: {falha}"
+        )
+
+    def _get(self, origem: str, caminho: str, params: Optional[Dict] = None) -> "httpx.Response":
+        """
+        Versão síncrona (sem hedging), usada fora do event loop
+        """
+        import httpx
+
+        cliente = self._obter_cliente_sync()
+        disjuntor = self.disjuntores[origem]
+        self._contar('requisicoes')
+        falha = None
+        for tentativa in range(self.tentativas):
+            disjuntor.permitir()
+            self._contar('tentativas')
+            resposta, erro = None, None
+            inicio = time.monotonic()
+            try:
+                resposta = cliente.get(caminho, params=params, **self._parametros_requisicao())
+            except httpx.TransportError as e:
+                erro = e
+            self.origens[origem].registrar_latencia(time.monotonic() - inicio)
+            falha = self._avaliar(disjuntor, resposta, erro)
+            if falha is None:
+                resposta.raise_for_status()
+                return resposta
+            espera = self._espera(tentativa, resposta)
+            restante = tempo_restante()
+            if restante is not None and restante <= espera:
+                raise PrazoExcedidoError(f"Prazo excedido ao consultar {caminho}: {falha}")
+            if tentativa + 1 >= self.tentativas:
+                break
+            self._contar('retentativas')
+            time.sleep(espera)
+        raise ErroProvedorCertidoes(
+            f"Falha ao consultar {caminho} após {tentativa + 1} tentativas: {falha}"
+        )
+
+    @staticmethod
+    def _agregar(resultados: list) -> List[Dict]:
+        """
+        Junta as respostas das origens. Origens que falharam aparecem como
+        {"tipo": ..., "erro": ...}; se todas falharam, levanta o primeiro erro
+        """
+        certidoes = []
+        erros = []
+        for tipo, resultado in zip(TipoCertidao, resultados):
+            if isinstance(resultado, Exception):
+                erros.append(resultado)
+                certidoes.append({"tipo": tipo.value, "erro": str(resultado)})
+            elif resultado is not None:
+                certidoes.append(resultado)
+        if len(erros) == len(resultados):
+            raise erros[0]
+        return certidoes
+
+    def _certidao(self, resposta: "httpx.Response") -> Optional[Dict]:
+        return resposta.json().get("certidao")
+
+    def buscar_certidoes(self, cpf_cnpj: str) -> List[Dict]:
+        """
+        Busca certidões de todos os tipos na API externa
+        """
+        resultados = []
+        for tipo in TipoCertidao:
+            try:
+                resultados.append(self._certidao(self._get(
+                    tipo.value, f"/api/certidoes/{tipo.value}", {"cpf_cnpj": cpf_cnpj}
+                )))
+            except Exception as e:
+                resultados.append(e)
+        return self._agregar(resultados)
+
+    async def buscar_certidao_async(self, cpf_cnpj: str, tipo: TipoCertidao) -> Optional[Dict]:
+        """
+        Busca a certidão de um tipo na sua origem. Retorna None se ela não existe
+        """
+        resposta = await self._get_async(
+            tipo.value, f"/api/certidoes/{tipo.value}", {"cpf_cnpj": cpf_cnpj}
+        )
+        return self._certidao(resposta)
+
+    async def buscar_certidoes_async(self, cpf_cnpj: str) -> List[Dict]:
+        resultados = await asyncio.gather(
+            *(self.buscar_certidao_async(cpf_cnpj, tipo) for tipo in TipoCertidao),
+            return_exceptions=True
+        )
+        for resultado in resultados:
+            if isinstance(resultado, PrazoExcedidoError):
+                self._contar('prazos_excedidos')
+        return self._agregar(resultados)
+
+    def validar_certidao(self, certidao_id: int) -> StatusCertidao:
+        """
+        Consulta o status atual de uma certidão na API externa
+        """
+        resposta = self._get(
+            TipoCertidao.FEDERAL.value, f"/api/certidoes/{certidao_id}/status"
+        )
+        return StatusCertidao(resposta.json()["status"])
+
+    def set_agendador(self, agendador: "AgendadorRevalidacao"):
+        self.agendador = agendador
+
+    def revalidar_certidoes_vencidas(self) -> int:
+        """
+        Revalida as certidões cuja revalidação já venceu. O provedor não
+        acessa o banco: a varredura é delegada ao agendador de revalidação,
+        que consulta cada certidão nesta API
+        """
+        if not self.agendador:
+            raise ValueError("Agendador de revalidação não configurado")
+        return self.agendador.revalidar_vencidas()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            metricas = dict(self.metricas)
+        metricas['http2'] = self.http2
+        metricas['origens'] = {
+            origem: {
+                **self.origens[origem].resumo(),
+                'disjuntor': self.disjuntores[origem].estatisticas()
+            }
+            for origem in self.origens
+        }
+        return metricas
+
+    async def fechar(self):
+        """
+        Fecha os clientes HTTP e suas conexões
+        """
+        if self._cliente_async is not None:
+            await self._cliente_async.aclose()
+            self._cliente_async = None
+        if self._cliente_sync is not None:
+            self._cliente_sync.close()
+            self._cliente_sync = None
@@ -0,0 +1,221 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from core.entities.certidao import Certidao
+from ports.interfaces.Icertidao import ICertidaoRepository, ICertidaoApiService
+from adapters.admissao.limitador_taxa import TokenBucket
+
+class AgendadorRevalidacao:
+    """
+    Revalida cada certidão pouco antes de vencer, em vez de varrer todas
+    as que vencem nos próximos dias uma vez por dia.
+
+    Mantém em memória um min-heap de (momento da revalidação, id), com o
+    momento = valida_ate - antecedência. O heap é carregado uma vez ao
+    iniciar e atualizado pelo repositório a cada gravação/remoção
+    (o agendador é registrado como observador). Uma thread dorme até o
+    próximo vencimento e as revalidações passam por um token bucket, que
+    espaça as chamadas à API em no máximo `taxa_maxima` por segundo.
+
+    Com vários workers apenas o líder executa o agendador; gravações
+    feitas em outros processos são incorporadas na ressincronização
+    periódica (`intervalo_resincronizacao_segundos`)
+    """
+    def __init__(
+        self,
+        certidao_repo: ICertidaoRepository,
+        servico: ICertidaoApiService,
+        antecedencia_segundos: int = 24 * 3600,
+        validade_dias: int = 30,
+        taxa_maxima: float = 1.0,
+        espera_erro_segundos: int = 300,
+        intervalo_resincronizacao_segundos: int = 600,
+        agora: Callable[[], datetime] = datetime.now
+    ):
+        self.certidao_repo = certidao_repo
+        self.servico = servico
+        self.antecedencia = timedelta(seconds=antecedencia_segundos)
+        self.validade = timedelta(days=validade_dias)
+        self.espera_erro = timedelta(seconds=espera_erro_segundos)
+        self.intervalo_resincronizacao = intervalo_resincronizacao_segundos
+        self.agora = agora
+        # Capacidade 1: sem rajadas, as revalidações ficam igualmente espaçadas
+        self.balde = TokenBucket(taxa_maxima, 1)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._agendadas: Dict[int, datetime] = {}
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.revalidadas = 0
+        self.erros = 0
+        self.atraso_maximo_segundos = 0.0
+
+    def agendar(self, certidao_id: int, valida_ate: Optional[datetime]):
+        """
+        Agenda (ou reagenda) a revalidação da certidão. Entradas antigas
+        do heap ficam obsoletas e são descartadas ao chegar ao topo
+        """
+        if certidao_id is None or valida_ate is None:
+            return
+        momento = valida_ate - self.antecedencia
+        with self._condicao:
+            if self._agendadas.get(certidao_id) == momento:
+                return
+            self._agendadas[certidao_id] = momento
+            heapq.heappush(self._heap, (momento, certidao_id))
+            if self._heap[0] == (momento, certidao_id):
+                self._condicao.notify()
+
+    def remover(self, certidao_id: int):
+        with self._condicao:
+            self._agendadas.pop(certidao_id, None)
+
+    # Observador do CertidaoRepository
+    def certidao_gravada(self, certidao: Certidao):
+        self.agendar(certidao.id, certidao.valida_ate)
+
+    def certidao_removida(self, certidao_id: int):
+        self.remover(certidao_id)
+
+    def carregar(self) -> int:
+        """
+        Reconstrói o heap a partir do banco. Retorna a quantidade agendada
+        """
+        vencimentos = self.certidao_repo.listar_vencimentos()
+        heap = [
+            (valida_ate - self.antecedencia, certidao_id)
+            for certidao_id, valida_ate in vencimentos if valida_ate
+        ]
+        heapq.heapify(heap)
+        with self._condicao:
+            self._heap = heap
+            self._agendadas = {certidao_id: momento for momento, certidao_id in heap}
+            self._condicao.notify()
+        return len(heap)
+
+    def _proxima_vencida(self, limite_espera: float) -> Optional[int]:
+        """
+        Retorna o id da próxima certidão cuja revalidação venceu, esperando
+        no máximo `limite_espera` segundos
+        """
+        with self._condicao:
+            while self._heap:
+                momento, certidao_id = self._heap[0]
+                if self._agendadas.get(certidao_id) != momento:
+                    heapq.heappop(self._heap)
+                    continue
+                atraso = (self.agora() - momento).total_seconds()
+                if atraso >= 0:
+                    heapq.heappop(self._heap)
+                    del self._agendadas[certidao_id]
+                    self.atraso_maximo_segundos = max(self.atraso_maximo_segundos, atraso)
+                    return certidao_id
+                self._condicao.wait(min(-atraso, limite_espera))
+                return None
+            self._condicao.wait(limite_espera)
+            return None
+
+    def revalidar(self, certidao_id: int):
+        """
+        Consulta o novo status da certidão e renova sua validade
+        """
+        certidao = self.certidao_repo.buscar_por_id(certidao_id)
+        if not certidao:
+            return
+        agora = self.agora()
+        if certidao.valida_ate and certidao.valida_ate - self.antecedencia > agora:
+            # Renovada por outro processo desde o agendamento
+            self.agendar(certidao.id, certidao.valida_ate)
+            return
+        try:
+            certidao.status = self.servico.validar_certidao(certidao_id)
+            certidao.valida_ate = agora + self.validade
+            # A gravação notifica este agendador, que agenda a próxima revalidação
+            self.certidao_repo.atualizar(certidao)
+            self.revalidadas += 1
+        except Exception as e:
+            self.erros += 1
+            print(f"Erro ao revalidar certidão {certidao_id}: {str(e)}")
+            self.agendar(certidao_id, agora + self.espera_erro + self.antecedencia)
+
+    def revalidar_vencidas(self) -> int:
+        """
+        Revalida agora todas as certidões cuja revalidação já venceu,
+        respeitando o limite de taxa. Os vencimentos são relidos do banco
+        antes, pois fora do líder o heap não é carregado. Retorna a
+        quantidade processada
+        """
+        self.carregar()
+        quantidade = 0
+        while True:
+            certidao_id = self._proxima_vencida(0)
+            if certidao_id is None:
+                return quantidade
+            permitido, espera = self.balde.consumir()
+            while not permitido:
+                time.sleep(espera)
+                permitido, espera = self.balde.consumir()
+            self.revalidar(certidao_id)
+            quantidade += 1
+
+    def _executar(self):
+        proxima_resincronizacao = time.monotonic() + self.intervalo_resincronizacao
+        while not self._parar.is_set():
+            if time.monotonic() >= proxima_resincronizacao:
+                try:
+                    self.carregar()
+                except Exception as e:
+                    print(f"Erro ao ressincronizar revalidações: {str(e)}")
+                proxima_resincronizacao = time.monotonic() + self.intervalo_resincronizacao
+
+            certidao_id = self._proxima_vencida(
+                max(proxima_resincronizacao - time.monotonic(), 0.0)
+            )
+            if certidao_id is None:
+                continue
+
+            permitido, espera = self.balde.consumir()
+            while not permitido:
+                if self._parar.wait(espera):
+                    return
+                permitido, espera = self.balde.consumir()
+            self.revalidar(certidao_id)
+
+    def iniciar(self):
+        """
+        Carrega os vencimentos e inicia a thread de revalidação
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        print(f"Revalidação de certidões: {self.carregar()} certidões agendadas")
+        self._thread = threading.Thread(
+            target=self._executar,
+            name="revalidacao-certidoes",
+            daemon=True
+        )
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        with self._condicao:
+            self._condicao.notify_all()
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+
+    def estatisticas(self) -> dict:
+        with self._condicao:
+            pendentes = len(self._agendadas)
+            proxima = min(self._agendadas.values()) if self._agendadas else None
+        return {
+            'ativo': bool(self._thread and self._thread.is_alive()),
+            'agendadas': pendentes,
+            'proxima': proxima.isoformat() if proxima else None,
+            'revalidadas': self.revalidadas,
+            'erros': self.erros,
+            'atraso_maximo_segundos': round(self.atraso_maximo_segundos, 3),
+            'taxa_maxima': self.balde.taxa,
+        }
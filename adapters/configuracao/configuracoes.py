@@ -0,0 +1,380 @@
+import json
+import os
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Mapping, Optional, Union, get_args, get_origin, get_type_hints
+from urllib.parse import urlsplit, urlunsplit
+from core.entities.documento import Documento
+from core.entities.certidao import Certidao
+
+# Variáveis de ambiente que escolhem o perfil e o arquivo de configuração
+ENV_PERFIL = "PERFIL"
+ENV_ARQUIVO = "CONFIG_ARQUIVO"
+
+
+def _campo(padrao: Any, env: str, secreto: bool = False):
+    """
+    Campo com a variável de ambiente que o sobrescreve. Campos secretos
+    aparecem mascarados no diagnóstico
+    """
+    metadata = {"env": env, "secreto": secreto}
+    if isinstance(padrao, list):
+        return field(default_factory=lambda: list(padrao), metadata=metadata)
+    return field(default=padrao, metadata=metadata)
+
+
+@dataclass
+class ConfiguracoesBanco:
+    url: str = _campo("sqlite:///database.db", "DATABASE_URL", secreto=True)
+    # sqlite3 ou sqlalchemy; vazio escolhe pela URL
+    backend: Optional[str] = _campo(None, "DATABASE_BACKEND")
+    pool_size: int = _campo(5, "DB_POOL_SIZE")
+    busy_timeout: float = _campo(30.0, "DB_BUSY_TIMEOUT")
+    consulta_lenta_ms: float = _campo(100.0, "CONSULTA_LENTA_MS")
+    consultas_cabecalho: bool = _campo(False, "CONSULTAS_CABECALHO")
+    # PRAGMAs aplicados a cada conexão SQLite
+    journal_mode: str = _campo("WAL", "DB_JOURNAL_MODE")
+    synchronous: str = _campo("NORMAL", "DB_SYNCHRONOUS")
+    # Cache de páginas e mmap por conexão; 0 mantém o padrão do SQLite
+    cache_mb: int = _campo(0, "DB_CACHE_MB")
+    mmap_mb: int = _campo(0, "DB_MMAP_MB")
+    # MEMORY mantém tabelas temporárias e ordenações fora do disco
+    temp_store: str = _campo("", "DB_TEMP_STORE")
+
+    def pragmas(self) -> Dict[str, Any]:
+        pragmas: Dict[str, Any] = {"journal_mode": self.journal_mode, "synchronous": self.synchronous}
+        if self.cache_mb:
+            # Valor negativo: tamanho em KiB, e não em páginas
+            pragmas["cache_size"] = -self.cache_mb * 1024
+        if self.mmap_mb:
+            pragmas["mmap_size"] = self.mmap_mb * 1024 * 1024
+        if self.temp_store:
+            pragmas["temp_store"] = self.temp_store
+        return pragmas
+
+
+@dataclass
+class ConfiguracoesHttp:
+    prazo_requisicao_ms: float = _campo(30000.0, "PRAZO_REQUISICAO_MS")
+    # Limites por processo: com N workers o limite efetivo é N vezes maior
+    limite_rota_taxa: float = _campo(20.0, "LIMITE_ROTA_TAXA")
+    limite_rota_rajada: float = _campo(40.0, "LIMITE_ROTA_RAJADA")
+    limite_credor_taxa: float = _campo(0.2, "LIMITE_CREDOR_TAXA")
+    limite_credor_rajada: float = _campo(2.0, "LIMITE_CREDOR_RAJADA")
+    consultas_externas_max: int = _campo(8, "CONSULTAS_EXTERNAS_MAX")
+    consultas_externas_timeout_fila: float = _campo(5.0, "CONSULTAS_EXTERNAS_TIMEOUT_FILA")
+    idempotencia_ttl_horas: float = _campo(24.0, "IDEMPOTENCIA_TTL_HORAS")
+    idempotencia_espera_maxima: float = _campo(30.0, "IDEMPOTENCIA_ESPERA_MAXIMA")
+
+
+@dataclass
+class ConfiguracoesUploads:
+    diretorio_documentos: str = _campo("uploads/documentos", "UPLOAD_DIR_DOCUMENTOS")
+    diretorio_certidoes: str = _campo("uploads/certidoes", "UPLOAD_DIR_CERTIDOES")
+    documento_extensoes: List[str] = _campo([".pdf", ".jpg", ".jpeg", ".png"], "DOCUMENTO_EXTENSOES")
+    documento_tamanho_maximo_mb: float = _campo(10.0, "DOCUMENTO_TAMANHO_MAXIMO_MB")
+    certidao_extensoes: List[str] = _campo([".pdf"], "CERTIDAO_EXTENSOES")
+    certidao_tamanho_maximo_mb: float = _campo(5.0, "CERTIDAO_TAMANHO_MAXIMO_MB")
+    # Verificação estrutural dos arquivos no pool de processos
+    integridade_processos: int = _campo(2, "INTEGRIDADE_PROCESSOS")
+    integridade_fila: int = _campo(32, "INTEGRIDADE_FILA")
+    integridade_timeout: float = _campo(10.0, "INTEGRIDADE_TIMEOUT")
+
+
+@dataclass
+class ConfiguracoesArquivos:
+    # gzip ou zstd; vazio desativa a compactação de arquivos frios
+    compactacao: str = _campo("", "ARQUIVOS_COMPACTACAO")
+    compactacao_nivel: int = _campo(0, "ARQUIVOS_COMPACTACAO_NIVEL")
+    compactacao_intervalo: int = _campo(3600, "ARQUIVOS_COMPACTACAO_INTERVALO")
+    dias_frio: float = _campo(30.0, "ARQUIVOS_DIAS_FRIO")
+    acessos_para_descompactar: int = _campo(3, "ARQUIVOS_ACESSOS_PARA_DESCOMPACTAR")
+
+
+@dataclass
+class ConfiguracoesCertidoes:
+    api_url: Optional[str] = _campo(None, "CERTIDOES_API_URL", secreto=True)
+    api_timeout: float = _campo(5.0, "CERTIDOES_API_TIMEOUT")
+    api_max_conexoes: int = _campo(100, "CERTIDOES_API_MAX_CONEXOES")
+    api_tentativas: int = _campo(3, "CERTIDOES_API_TENTATIVAS")
+    api_hedge: bool = _campo(True, "CERTIDOES_API_HEDGE")
+    cache_ttl_maximo: int = _campo(24 * 3600, "CERTIDOES_CACHE_TTL_MAXIMO")
+    cache_ttl_negativo: int = _campo(300, "CERTIDOES_CACHE_TTL_NEGATIVO")
+    cache_janela_obsoleta: int = _campo(3600, "CERTIDOES_CACHE_JANELA_OBSOLETA")
+    # Validade das certidões enviadas ou obtidas sem data de validade
+    validade_padrao_dias: int = _campo(30, "CERTIDOES_VALIDADE_PADRAO_DIAS")
+    revalidacao_antecedencia_segundos: int = _campo(24 * 3600, "REVALIDACAO_ANTECEDENCIA_SEGUNDOS")
+    revalidacao_taxa_maxima: float = _campo(1.0, "REVALIDACAO_TAXA_MAXIMA")
+    # Varredura avulsa do mock (CertidaoApiMock.iniciar_revalidacao_periodica)
+    varredura_antecedencia_dias: int = _campo(5, "CERTIDOES_VARREDURA_ANTECEDENCIA_DIAS")
+    varredura_intervalo_horas: float = _campo(24.0, "CERTIDOES_VARREDURA_INTERVALO_HORAS")
+    historico_retencao_dias: int = _campo(90, "CERTIDOES_HISTORICO_RETENCAO_DIAS")
+
+
+@dataclass
+class ConfiguracoesJobs:
+    workers: int = _campo(2, "JOB_WORKERS")
+    # Espera de um worker sem jobs antes de consultar a fila de novo
+    intervalo_ociosidade: float = _campo(1.0, "JOB_INTERVALO_OCIOSIDADE")
+    timeout_orfaos_segundos: int = _campo(300, "JOB_TIMEOUT_ORFAOS")
+    backoff_base_segundos: int = _campo(2, "JOB_BACKOFF_BASE")
+
+
+@dataclass
+class ConfiguracoesEventos:
+    intervalo_ms: float = _campo(250.0, "EVENTOS_INTERVALO_MS")
+    retencao_dias: float = _campo(7.0, "EVENTOS_RETENCAO_DIAS")
+    espera_maxima: float = _campo(25.0, "EVENTOS_ESPERA_MAXIMA")
+    elegibilidade_intervalo: int = _campo(5, "ELEGIBILIDADE_INTERVALO")
+    # JSON com a curva e os parâmetros por foro da precificação
+    precificacao_parametros: Optional[str] = _campo(None, "PRECIFICACAO_PARAMETROS")
+
+
+@dataclass
+class ConfiguracoesSaude:
+    # Espaço livre mínimo no disco de static/ e do banco para /health/ready
+    disco_minimo_mb: int = _campo(512, "SAUDE_DISCO_MINIMO_MB")
+    # Tempo máximo de cada verificação e espera máxima pelo lock de escrita
+    timeout_ms: float = _campo(1000.0, "SAUDE_TIMEOUT_MS")
+    escrita_timeout_ms: float = _campo(200.0, "SAUDE_ESCRITA_TIMEOUT_MS")
+    # Atraso do event loop acima do qual o processo não recebe tráfego
+    atraso_laco_maximo_ms: float = _campo(500.0, "SAUDE_ATRASO_LACO_MAXIMO_MS")
+    intervalo_laco_ms: float = _campo(250.0, "SAUDE_INTERVALO_LACO_MS")
+    # Jobs pendentes acima dos quais o processo não recebe tráfego (0 desativa)
+    fila_jobs_maxima: int = _campo(0, "SAUDE_FILA_JOBS_MAXIMA")
+
+
+# Perfis de desempenho: valores aplicados sobre os padrões, antes do arquivo
+# e das variáveis de ambiente
+PERFIS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "padrao": {},
+    # Uma máquina de desenvolvimento: poucos processos e consultas expostas
+    "dev": {
+        "banco": {"pool_size": 2, "consulta_lenta_ms": 20.0, "consultas_cabecalho": True},
+        "uploads": {"integridade_processos": 1},
+        "jobs": {"workers": 1},
+    },
+    # Servidor com vários workers web (WEB_CONCURRENCY): mais conexões,
+    # cache de páginas maior (o cache é por conexão, então multiplique por
+    # pool_size e pelos workers) e leitura por mmap, compartilhado entre eles
+    "prod": {
+        "banco": {"pool_size": 8, "cache_mb": 16, "mmap_mb": 256},
+        "uploads": {"integridade_fila": 64},
+        "jobs": {"workers": 3},
+    },
+    # Importação em massa, com um único worker web: escrita sem fsync a cada
+    # transação (uma queda do sistema pode perder as últimas transações, então
+    # use apenas com cargas que podem ser refeitas), cache grande, jobs
+    # drenados sem espera e limites de taxa altos. A elegibilidade é
+    # atualizada com menos frequência
+    "carga": {
+        "banco": {
+            "pool_size": 4, "synchronous": "OFF", "cache_mb": 256, "mmap_mb": 1024,
+            "temp_store": "MEMORY", "consulta_lenta_ms": 1000.0
+        },
+        "http": {
+            "limite_rota_taxa": 1000.0, "limite_rota_rajada": 2000.0,
+            "limite_credor_taxa": 100.0, "limite_credor_rajada": 200.0
+        },
+        "uploads": {"integridade_processos": 4, "integridade_fila": 256},
+        "jobs": {"workers": 8, "intervalo_ociosidade": 0.1},
+        "eventos": {"elegibilidade_intervalo": 60},
+    },
+}
+
+PRAGMAS_VALIDOS = {
+    "journal_mode": {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"", "DEFAULT", "FILE", "MEMORY"},
+}
+
+
+def _converter(valor: Any, tipo: Any, nome: str) -> Any:
+    """
+    Converte um valor do arquivo ou do ambiente (texto) para o tipo do campo
+    """
+    if get_origin(tipo) is Union:
+        if valor is None or valor == "":
+            return None
+        tipo = next(argumento for argumento in get_args(tipo) if argumento is not type(None))
+    try:
+        if get_origin(tipo) in (list, List):
+            if isinstance(valor, str):
+                return [item.strip() for item in valor.split(",") if item.strip()]
+            return [str(item) for item in valor]
+        if tipo is bool:
+            if isinstance(valor, str):
+                return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+            return bool(valor)
+        if tipo is int:
+            return int(float(valor)) if isinstance(valor, str) else int(valor)
+        return tipo(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Valor inválido para {nome}: {valor!r}")
+
+
+def _ocultar(valor: Any) -> Any:
+    """
+    Mascara um valor secreto: em URLs apenas a senha
+    """
+    if not valor:
+        return valor
+    partes = urlsplit(str(valor))
+    if partes.scheme and "://" in str(valor):
+        if partes.password is None:
+            return valor
+        netloc = f"{partes.username}:***@{partes.hostname}" + (f":{partes.port}" if partes.port else "")
+        return urlunsplit(partes._replace(netloc=netloc))
+    return "***"
+
+
+def _ler_arquivo(caminho: str) -> Dict[str, Any]:
+    if caminho.endswith(".toml"):
+        # Importado sob demanda: só é necessário com arquivo TOML
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11: arquivos de configuração apenas em JSON
+            raise ValueError("Arquivos de configuração TOML exigem Python 3.11 ou superior")
+        with open(caminho, "rb") as arquivo:
+            return tomllib.load(arquivo)
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+@dataclass
+class Configuracoes:
+    """
+    Configurações da aplicação, em seções tipadas. Cada valor vem, em ordem
+    de prioridade crescente, do padrão do campo, do perfil (PERFIL: padrao,
+    dev, prod ou carga), do arquivo JSON ou TOML em CONFIG_ARQUIVO e da
+    variável de ambiente do campo. `origens` registra de onde veio cada
+    valor que não é o padrão
+    """
+    perfil: str = "padrao"
+    banco: ConfiguracoesBanco = field(default_factory=ConfiguracoesBanco)
+    http: ConfiguracoesHttp = field(default_factory=ConfiguracoesHttp)
+    uploads: ConfiguracoesUploads = field(default_factory=ConfiguracoesUploads)
+    arquivos: ConfiguracoesArquivos = field(default_factory=ConfiguracoesArquivos)
+    certidoes: ConfiguracoesCertidoes = field(default_factory=ConfiguracoesCertidoes)
+    jobs: ConfiguracoesJobs = field(default_factory=ConfiguracoesJobs)
+    eventos: ConfiguracoesEventos = field(default_factory=ConfiguracoesEventos)
+    saude: ConfiguracoesSaude = field(default_factory=ConfiguracoesSaude)
+    arquivo: Optional[str] = None
+    origens: Dict[str, str] = field(default_factory=dict)
+
+    def _secoes(self) -> Dict[str, Any]:
+        return {
+            campo.name: getattr(self, campo.name)
+            for campo in fields(self)
+            if campo.name not in ("perfil", "arquivo", "origens")
+        }
+
+    def _aplicar(self, valores: Mapping[str, Any], origem: str):
+        secoes = self._secoes()
+        for nome_secao, campos in valores.items():
+            if nome_secao not in secoes or not isinstance(campos, Mapping):
+                raise ValueError(f"Seção de configuração desconhecida: {nome_secao}")
+            secao = secoes[nome_secao]
+            tipos = get_type_hints(type(secao))
+            for nome, valor in campos.items():
+                if nome not in tipos:
+                    raise ValueError(f"Configuração desconhecida: {nome_secao}.{nome}")
+                setattr(secao, nome, _converter(valor, tipos[nome], f"{nome_secao}.{nome}"))
+                self.origens[f"{nome_secao}.{nome}"] = origem
+
+    def _aplicar_ambiente(self, ambiente: Mapping[str, str]):
+        for nome_secao, secao in self._secoes().items():
+            tipos = get_type_hints(type(secao))
+            for campo in fields(secao):
+                env = campo.metadata["env"]
+                if env in ambiente:
+                    setattr(secao, campo.name, _converter(ambiente[env], tipos[campo.name], env))
+                    self.origens[f"{nome_secao}.{campo.name}"] = f"env:{env}"
+
+    @classmethod
+    def carregar(cls, ambiente: Optional[Mapping[str, str]] = None) -> "Configuracoes":
+        """
+        Monta as configurações a partir do perfil, do arquivo e do ambiente
+        (por padrão, os.environ). Valores inválidos levantam ValueError
+        """
+        ambiente = os.environ if ambiente is None else ambiente
+        arquivo = ambiente.get(ENV_ARQUIVO) or None
+        dados = dict(_ler_arquivo(arquivo)) if arquivo else {}
+        perfil_arquivo = dados.pop("perfil", None)
+        perfil = ambiente.get(ENV_PERFIL) or perfil_arquivo or "padrao"
+        if perfil not in PERFIS:
+            raise ValueError(f"Perfil de configuração inválido: {perfil}. Use: {', '.join(PERFIS)}")
+
+        configuracoes = cls(perfil=perfil, arquivo=arquivo)
+        configuracoes._aplicar(PERFIS[perfil], f"perfil:{perfil}")
+        configuracoes._aplicar(dados, f"arquivo:{arquivo}")
+        configuracoes._aplicar_ambiente(ambiente)
+        erros = configuracoes.validar()
+        if erros:
+            raise ValueError(f"Configurações inválidas: {erros}")
+        return configuracoes
+
+    def validar(self) -> List[str]:
+        """
+        Retorna lista de erros de validação.
+        Lista vazia significa que está tudo válido.
+        """
+        erros = []
+        banco, uploads = self.banco, self.uploads
+        if banco.pool_size < 1:
+            erros.append("banco.pool_size deve ser ao menos 1")
+        for pragma, validos in PRAGMAS_VALIDOS.items():
+            valor = getattr(banco, pragma)
+            if valor.upper() not in validos:
+                erros.append(f"banco.{pragma} inválido: {valor}. Use: {', '.join(sorted(v for v in validos if v))}")
+        if banco.cache_mb < 0 or banco.mmap_mb < 0:
+            erros.append("banco.cache_mb e banco.mmap_mb não podem ser negativos")
+        for nome in ("documento", "certidao"):
+            if getattr(uploads, f"{nome}_tamanho_maximo_mb") <= 0:
+                erros.append(f"uploads.{nome}_tamanho_maximo_mb deve ser positivo")
+            extensoes = getattr(uploads, f"{nome}_extensoes")
+            if not extensoes or any(not extensao.startswith(".") for extensao in extensoes):
+                erros.append(f"uploads.{nome}_extensoes deve listar extensões iniciadas por ponto")
+        if uploads.integridade_processos < 1:
+            erros.append("uploads.integridade_processos deve ser ao menos 1")
+        if self.jobs.workers < 0:
+            erros.append("jobs.workers não pode ser negativo")
+        if self.certidoes.validade_padrao_dias <= 0:
+            erros.append("certidoes.validade_padrao_dias deve ser positivo")
+        if self.saude.timeout_ms <= 0 or self.saude.intervalo_laco_ms <= 0:
+            erros.append("saude.timeout_ms e saude.intervalo_laco_ms devem ser positivos")
+        return erros
+
+    def aplicar_limites(self):
+        """
+        Aplica às entidades os limites de upload e a validade padrão das
+        certidões
+        """
+        uploads = self.uploads
+        Documento.EXTENSOES_PERMITIDAS = [extensao.lower() for extensao in uploads.documento_extensoes]
+        Documento.TAMANHO_MAXIMO = int(uploads.documento_tamanho_maximo_mb * 1024 * 1024)
+        Certidao.EXTENSOES_PERMITIDAS = [extensao.lower() for extensao in uploads.certidao_extensoes]
+        Certidao.TAMANHO_MAXIMO = int(uploads.certidao_tamanho_maximo_mb * 1024 * 1024)
+        Certidao.VALIDADE_PADRAO_DIAS = self.certidoes.validade_padrao_dias
+
+    def to_dict(self, ocultar_segredos: bool = True) -> Dict[str, Any]:
+        resultado: Dict[str, Any] = {"perfil": self.perfil, "arquivo": self.arquivo}
+        for nome_secao, secao in self._secoes().items():
+            resultado[nome_secao] = {
+                campo.name: (
+                    _ocultar(getattr(secao, campo.name))
+                    if ocultar_segredos and campo.metadata["secreto"]
+                    else getattr(secao, campo.name)
+                )
+                for campo in fields(secao)
+            }
+        return resultado
+
+    def variaveis_ambiente(self) -> Dict[str, str]:
+        """
+        Variável de ambiente de cada configuração (secao.campo -> variável)
+        """
+        return {
+            f"{nome_secao}.{campo.name}": campo.metadata["env"]
+            for nome_secao, secao in self._secoes().items()
+            for campo in fields(secao)
+        }
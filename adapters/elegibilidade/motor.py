@@ -0,0 +1,229 @@
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from core.entities.elegibilidade import (
+    Elegibilidade, BITS_DOCUMENTO, BITS_CERTIDAO, TODOS_REQUISITOS
+)
+from core.entities.certidao import StatusCertidao
+from ports.interfaces.Idatabase import IDatabase, ITransacao
+from ports.database.conversao import para_datetime
+from adapters.eventos.outbox import FluxoEventos, CursorExpiradoError
+
+CONSUMIDOR = "elegibilidade"
+# Eventos que mudam a elegibilidade de um credor
+TIPOS_EVENTO = [
+    "credor.criado", "credor.removido",
+    "documento.criado", "documento.atualizado", "documento.removido",
+    "certidao.atualizada", "certidao.removida",
+]
+# Eventos lidos e credores recalculados por transação
+TAMANHO_LOTE = 500
+
+def _consulta(filtro: str = "") -> str:
+    """
+    Requisitos de cada credor em uma única passada: documentos e certidões
+    negativas são agregados por credor e cada tipo presente soma o seu bit
+    (ver core/entities/elegibilidade.py). `filtro` restringe a credores
+    específicos dentro de cada agregação, para que o recálculo incremental
+    leia apenas as linhas desses credores
+    """
+    bits_documento = " ".join(f"WHEN '{tipo.value}' THEN {bit}" for tipo, bit in BITS_DOCUMENTO.items())
+    bits_certidao = " ".join(f"WHEN '{tipo.value}' THEN {bit}" for tipo, bit in BITS_CERTIDAO.items())
+    return f"""
+        SELECT c.id AS credor_id,
+               COALESCE(d.requisitos, 0) + COALESCE(n.requisitos, 0) AS requisitos,
+               n.valida_ate AS valida_ate
+        FROM credores c
+        LEFT JOIN (
+            SELECT credor_id, SUM(DISTINCT CASE tipo {bits_documento} ELSE 0 END) AS requisitos
+            FROM documentos
+            WHERE arquivo_url <> '' {filtro.format(coluna='credor_id')}
+            GROUP BY credor_id
+        ) d ON d.credor_id = c.id
+        LEFT JOIN (
+            SELECT credor_id, SUM(CASE tipo {bits_certidao} ELSE 0 END) AS requisitos,
+                   MIN(valida_ate) AS valida_ate
+            FROM certidoes
+            WHERE status = '{StatusCertidao.NEGATIVA.value}' AND valida_ate IS NOT NULL
+                  {filtro.format(coluna='credor_id')}
+            GROUP BY credor_id
+        ) n ON n.credor_id = c.id
+        WHERE 1 = 1 {filtro.format(coluna='c.id')}
+    """
+
+CONSULTA_TODOS = _consulta()
+
+
+class MotorElegibilidade:
+    """
+    Elegibilidade de todos os credores materializada na tabela
+    `elegibilidade`: um inteiro com os requisitos atendidos e a menor
+    validade das certidões negativas. Estar apto é
+    `requisitos = TODOS_REQUISITOS AND valida_ate >= agora`, então o
+    vencimento de uma certidão não exige recálculo.
+
+    - recalcular_todos(): reconstrói a tabela com um INSERT ... SELECT
+    - atualizar(): consome os eventos do outbox desde o último cursor e
+      recalcula apenas os credores afetados, em lotes. Sem cursor gravado
+      (primeira execução) ou com o cursor expirado, reconstrói tudo
+    """
+    def __init__(self, db: IDatabase, fluxo: FluxoEventos):
+        self.db = db
+        self.fluxo = fluxo
+        self._lock = threading.Lock()
+        self.reconstrucoes = 0
+        self.credores_recalculados = 0
+        self.eventos_consumidos = 0
+        self.ultima_duracao_ms = 0.0
+
+    def _cursor(self) -> Optional[int]:
+        row = self.db.fetch_one(
+            "SELECT cursor FROM consumidores_eventos WHERE consumidor = ?", (CONSUMIDOR,)
+        )
+        return row['cursor'] if row else None
+
+    def _gravar_cursor(self, transacao: ITransacao, cursor: int):
+        # Nunca retrocede: outro processo pode ter avançado o cursor antes
+        transacao.execute(
+            """
+            INSERT INTO consumidores_eventos (consumidor, cursor, atualizado_em) VALUES (?, ?, ?)
+            ON CONFLICT (consumidor) DO UPDATE SET
+                cursor = excluded.cursor, atualizado_em = excluded.atualizado_em
+            WHERE consumidores_eventos.cursor < excluded.cursor
+            """,
+            (CONSUMIDOR, cursor, datetime.now())
+        )
+
+    def recalcular_todos(self) -> int:
+        """
+        Reconstrói a elegibilidade de todos os credores. Retorna a
+        quantidade de credores calculados
+        """
+        inicio = time.perf_counter()
+        with self._lock, self.db.transacao() as transacao:
+            # O DELETE abre a transação de escrita: o último evento lido em
+            # seguida já está refletido nos dados do INSERT ... SELECT
+            transacao.execute("DELETE FROM elegibilidade")
+            ultimo = transacao.fetch_one("SELECT MAX(id) AS ultimo FROM eventos")['ultimo'] or 0
+            transacao.execute(
+                f"""
+                INSERT INTO elegibilidade (credor_id, requisitos, valida_ate, calculada_em)
+                SELECT credor_id, requisitos, valida_ate, ? FROM ({CONSULTA_TODOS}) AS calculo
+                """,
+                (datetime.now(),)
+            )
+            total = transacao.fetch_one("SELECT COUNT(*) AS total FROM elegibilidade")['total']
+            self._gravar_cursor(transacao, ultimo)
+        self.reconstrucoes += 1
+        self.ultima_duracao_ms = (time.perf_counter() - inicio) * 1000
+        return total
+
+    def recalcular(self, credor_ids: Iterable[int], transacao: Optional[ITransacao] = None) -> int:
+        """
+        Recalcula os credores informados (os removidos saem da tabela)
+        """
+        ids = sorted(set(credor_ids))
+        if not ids:
+            return 0
+        if transacao is None:
+            with self.db.transacao() as transacao:
+                return self.recalcular(ids, transacao)
+
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            lote = tuple(ids[inicio:inicio + TAMANHO_LOTE])
+            marcadores = ", ".join("?" for _ in lote)
+            transacao.execute(f"DELETE FROM elegibilidade WHERE credor_id IN ({marcadores})", lote)
+            transacao.execute(
+                f"""
+                INSERT INTO elegibilidade (credor_id, requisitos, valida_ate, calculada_em)
+                SELECT credor_id, requisitos, valida_ate, ?
+                FROM ({_consulta(f"AND {{coluna}} IN ({marcadores})")}) AS calculo
+                """,
+                (datetime.now(), *lote, *lote, *lote)
+            )
+        self.credores_recalculados += len(ids)
+        return len(ids)
+
+    def atualizar(self) -> int:
+        """
+        Aplica os eventos pendentes. Retorna a quantidade de credores recalculados
+        """
+        cursor = self._cursor()
+        if cursor is None:
+            self.recalcular_todos()
+            return 0
+
+        inicio = time.perf_counter()
+        recalculados = 0
+        with self._lock:
+            while True:
+                try:
+                    eventos, novo_cursor = self.fluxo.buscar(cursor, TAMANHO_LOTE, tipos=TIPOS_EVENTO)
+                except CursorExpiradoError:
+                    break
+                if novo_cursor == cursor:
+                    self.ultima_duracao_ms = (time.perf_counter() - inicio) * 1000
+                    return recalculados
+                with self.db.transacao() as transacao:
+                    recalculados += self.recalcular(
+                        (evento['credor_id'] for evento in eventos if evento['credor_id'] is not None),
+                        transacao
+                    )
+                    self._gravar_cursor(transacao, novo_cursor)
+                self.eventos_consumidos += len(eventos)
+                cursor = novo_cursor
+
+        # Eventos removidos pela retenção antes de serem consumidos
+        print(f"Elegibilidade: cursor {cursor} expirado, recalculando todos os credores")
+        self.recalcular_todos()
+        return recalculados
+
+    def _elegibilidade(self, row) -> Elegibilidade:
+        return Elegibilidade(
+            credor_id=row['credor_id'],
+            requisitos=row['requisitos'],
+            valida_ate=para_datetime(row['valida_ate']),
+            calculada_em=para_datetime(row['calculada_em'])
+        )
+
+    def buscar(self, credor_id: int) -> Optional[Elegibilidade]:
+        row = self.db.fetch_one("SELECT * FROM elegibilidade WHERE credor_id = ?", (credor_id,))
+        return self._elegibilidade(row) if row else None
+
+    def listar_aptos(self, apos: int = 0, limite: int = 100) -> List[Elegibilidade]:
+        """
+        Credores aptos agora, em ordem de id a partir de `apos`
+        """
+        rows = self.db.fetch_all(
+            """
+            SELECT * FROM elegibilidade
+            WHERE requisitos = ? AND valida_ate >= ? AND credor_id > ?
+            ORDER BY credor_id
+            LIMIT ?
+            """,
+            (TODOS_REQUISITOS, datetime.now(), apos, limite)
+        )
+        return [self._elegibilidade(row) for row in rows]
+
+    def resumo(self) -> Tuple[int, int]:
+        """
+        (total de credores, credores aptos agora)
+        """
+        row = self.db.fetch_one(
+            """
+            SELECT COUNT(*) AS total,
+                   SUM(CASE WHEN requisitos = ? AND valida_ate >= ? THEN 1 ELSE 0 END) AS aptos
+            FROM elegibilidade
+            """,
+            (TODOS_REQUISITOS, datetime.now())
+        )
+        return row['total'], row['aptos'] or 0
+
+    def estatisticas(self) -> dict:
+        return {
+            'reconstrucoes': self.reconstrucoes,
+            'credores_recalculados': self.credores_recalculados,
+            'eventos_consumidos': self.eventos_consumidos,
+            'ultima_duracao_ms': round(self.ultima_duracao_ms, 2),
+        }
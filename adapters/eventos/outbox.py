@@ -0,0 +1,210 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ports.interfaces.Idatabase import IDatabase, ITransacao
+from ports.database.conversao import para_datetime
+from adapters.http.respostas import serializar
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele a leitura usa o json da biblioteca padrão
+    orjson = None
+
+LIMITE_MAXIMO = 1000
+
+
+class CursorExpiradoError(Exception):
+    """
+    O cursor aponta para eventos já removidos pela retenção: o consumidor
+    perdeu alterações e precisa recarregar o estado completo
+    """
+    def __init__(self, cursor: int, primeiro_id: int):
+        super().__init__(
+            f"Cursor {cursor} expirado: os eventos disponíveis começam em {primeiro_id}. "
+            "Recarregue o estado (ex.: /export/credores.ndjson) e continue a partir de /events?cursor=ultimo"
+        )
+        self.cursor = cursor
+        self.primeiro_id = primeiro_id
+
+
+def registrar_evento(
+    transacao: ITransacao,
+    tipo: str,
+    credor_id: Optional[int],
+    entidade_id: Optional[int],
+    dados: Optional[Dict[str, Any]] = None
+):
+    """
+    Grava um evento no outbox. Deve ser chamada na mesma transação da
+    alteração: o evento só existe se a alteração for confirmada, e toda
+    alteração confirmada tem o seu evento
+    """
+    transacao.execute(
+        """
+        INSERT INTO eventos (tipo, credor_id, entidade_id, dados, criado_em)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (tipo, credor_id, entidade_id, serializar(dados or {}).decode(), datetime.now())
+    )
+
+
+def _carregar(dados: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
+
+
+class FluxoEventos:
+    """
+    Leitura do outbox por cursor (o id do último evento recebido).
+
+    Consumidores que aguardam novos eventos (long-poll ou SSE) não
+    consultam o banco cada um por si: uma única tarefa por processo lê o
+    maior id a cada `intervalo_segundos`, enquanto houver alguém
+    aguardando, e acorda todos quando ele avança. Eventos gravados por
+    outros workers são vistos da mesma forma
+    """
+    def __init__(self, db: IDatabase, intervalo_segundos: float = 0.25, retencao_dias: float = 7):
+        self.db = db
+        self.intervalo_segundos = intervalo_segundos
+        self.retencao_dias = retencao_dias
+        self._ultimo_id = 0
+        self._mudou: Optional[asyncio.Event] = None
+        self._aguardando = 0
+        self._tarefa: Optional[asyncio.Task] = None
+        self.consultas_ultimo_id = 0
+        self.eventos_entregues = 0
+        self.removidos = 0
+
+    def ultimo_id(self) -> int:
+        row = self.db.fetch_one("SELECT MAX(id) AS ultimo FROM eventos")
+        return row['ultimo'] or 0
+
+    def buscar(
+        self,
+        cursor: int = 0,
+        limite: int = 100,
+        credor_id: Optional[int] = None,
+        tipos: Optional[Iterable[str]] = None
+    ) -> Tuple[List[dict], int]:
+        """
+        Eventos com id maior que o cursor, em ordem, e o novo cursor.
+        Com filtros e nenhum evento encontrado o cursor avança até o último
+        evento existente, para que a próxima leitura não percorra de novo
+        os eventos que não interessam ao consumidor
+        """
+        limite = min(max(limite, 1), LIMITE_MAXIMO)
+        tipos = [tipo for tipo in (tipos or []) if tipo]
+        if cursor > 0:
+            self._verificar_cursor(cursor)
+
+        # Lido antes da consulta: os ids até ele já estão confirmados
+        ultimo = self.ultimo_id() if credor_id is not None or tipos else None
+        query = "SELECT id, tipo, credor_id, entidade_id, dados, criado_em FROM eventos WHERE id > ?"
+        params: list = [cursor]
+        if credor_id is not None:
+            query += " AND credor_id = ?"
+            params.append(credor_id)
+        if tipos:
+            query += f" AND tipo IN ({', '.join('?' for _ in tipos)})"
+            params.extend(tipos)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limite)
+
+        eventos = [
+            {
+                'id': row['id'],
+                'tipo': row['tipo'],
+                'credor_id': row['credor_id'],
+                'entidade_id': row['entidade_id'],
+                'dados': _carregar(row['dados']),
+                'criado_em': para_datetime(row['criado_em'])
+            }
+            for row in self.db.fetch_all(query, tuple(params))
+        ]
+        self.eventos_entregues += len(eventos)
+        if eventos:
+            return eventos, eventos[-1]['id']
+        return eventos, max(cursor, ultimo or 0)
+
+    def _verificar_cursor(self, cursor: int):
+        # A retenção guarda o maior id removido: um cursor abaixo dele
+        # deixou de receber ao menos esse evento
+        row = self.db.fetch_one("SELECT valor FROM eventos_retencao WHERE chave = 'ultimo_removido'")
+        if row and cursor < row['valor']:
+            raise CursorExpiradoError(cursor, row['valor'] + 1)
+
+    async def aguardar(self, cursor: int, espera_segundos: float) -> bool:
+        """
+        Aguarda até existir um evento com id maior que o cursor ou a espera
+        terminar. Retorna se há eventos novos
+        """
+        if self._ultimo_id > cursor:
+            return True
+        loop = asyncio.get_running_loop()
+        fim = loop.time() + espera_segundos
+        self._aguardando += 1
+        try:
+            if self._tarefa is None or self._tarefa.done():
+                self._mudou = asyncio.Event()
+                self._tarefa = asyncio.create_task(self._acompanhar())
+            while self._ultimo_id <= cursor:
+                restante = fim - loop.time()
+                if restante <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(self._mudou.wait(), restante)
+                except asyncio.TimeoutError:
+                    return False
+            return True
+        finally:
+            self._aguardando -= 1
+
+    async def _acompanhar(self):
+        """
+        Lê o último id enquanto houver consumidores aguardando
+        """
+        while self._aguardando > 0:
+            try:
+                self.consultas_ultimo_id += 1
+                ultimo = await asyncio.to_thread(self.ultimo_id)
+            except Exception as e:
+                print(f"Erro ao consultar eventos: {str(e)}")
+                ultimo = self._ultimo_id
+            if ultimo > self._ultimo_id:
+                self._ultimo_id = ultimo
+                # Acorda quem aguarda e prepara a próxima espera
+                mudou, self._mudou = self._mudou, asyncio.Event()
+                mudou.set()
+            await asyncio.sleep(self.intervalo_segundos)
+
+    def limpar_antigos(self) -> int:
+        """
+        Remove os eventos mais antigos que a retenção e registra o maior id
+        removido, usado para recusar cursores que ficaram para trás
+        """
+        limite = datetime.now() - timedelta(days=self.retencao_dias)
+        with self.db.transacao() as transacao:
+            removidos = transacao.fetch_all(
+                "DELETE FROM eventos WHERE criado_em < ? RETURNING id", (limite,)
+            )
+            if removidos:
+                transacao.execute(
+                    """
+                    INSERT INTO eventos_retencao (chave, valor) VALUES ('ultimo_removido', ?)
+                    ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor
+                    """,
+                    (max(row['id'] for row in removidos),)
+                )
+        self.removidos += len(removidos)
+        return len(removidos)
+
+    def estatisticas(self) -> dict:
+        return {
+            'ultimo_id': self._ultimo_id,
+            'aguardando': self._aguardando,
+            'consultas_ultimo_id': self.consultas_ultimo_id,
+            'eventos_entregues': self.eventos_entregues,
+            'removidos': self.removidos,
+        }
@@ -0,0 +1,160 @@
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator
+from core.entities.certidao import TipoCertidao
+from ports.interfaces.Idatabase import IDatabase, Row
+from adapters.http.respostas import serializar
+
+# Tamanho aproximado de cada bloco entregue à resposta: poucas trocas de
+# thread por requisição sem acumular mais que isso na memória
+TAMANHO_BLOCO = 64 * 1024
+# Registros buscados no banco por vez
+TAMANHO_LOTE = 1000
+
+class FormatoExportacao(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+TIPOS_CONTEUDO = {
+    FormatoExportacao.NDJSON: "application/x-ndjson",
+    FormatoExportacao.CSV: "text/csv; charset=utf-8",
+}
+
+TIPOS_CERTIDAO = [tipo.value for tipo in TipoCertidao]
+
+COLUNAS_CREDOR = ["credor_id", "nome", "cpf_cnpj", "email", "telefone"]
+COLUNAS_PRECATORIO = [
+    "precatorio_numero", "precatorio_valor_nominal", "precatorio_foro", "precatorio_data_publicacao"
+]
+COLUNAS_CERTIDOES = [
+    f"certidao_{tipo}_{campo}" for tipo in TIPOS_CERTIDAO for campo in ("status", "valida_ate")
+]
+COLUNAS = COLUNAS_CREDOR + COLUNAS_PRECATORIO + COLUNAS_CERTIDOES
+
+def _consulta() -> str:
+    """
+    Uma linha por credor e precatório (credores sem precatório saem com as
+    colunas do precatório vazias), com o status corrente de cada tipo de
+    certidão em colunas. Cada junção com certidoes usa o índice único
+    (credor_id, tipo) e a ordem por id segue a chave primária, sem ordenação
+    """
+    juncoes = "\n".join(
+        f"LEFT JOIN certidoes c_{tipo} ON c_{tipo}.credor_id = c.id AND c_{tipo}.tipo = '{tipo}'"
+        for tipo in TIPOS_CERTIDAO
+    )
+    certidoes = ",\n".join(
+        f"c_{tipo}.status AS certidao_{tipo}_status, c_{tipo}.valida_ate AS certidao_{tipo}_valida_ate"
+        for tipo in TIPOS_CERTIDAO
+    )
+    return f"""
+        SELECT c.id AS credor_id, c.nome, c.cpf_cnpj, c.email, c.telefone,
+               p.numero_precatorio AS precatorio_numero,
+               p.valor_nominal AS precatorio_valor_nominal,
+               p.foro AS precatorio_foro,
+               p.data_publicacao AS precatorio_data_publicacao,
+               {certidoes}
+        FROM credores c
+        LEFT JOIN precatorios p ON p.credor_id = c.id
+        {juncoes}
+        ORDER BY c.id, p.id
+    """
+
+CONSULTA = _consulta()
+
+
+class ExportadorCredores:
+    """
+    Exportação completa dos credores com precatório e status das certidões,
+    gerada enquanto o cursor do banco avança: a memória usada não depende
+    do número de credores
+    """
+    def __init__(self, db: IDatabase):
+        self.db = db
+
+    def registros(self) -> Iterator[Row]:
+        return self.db.iterar(CONSULTA, tamanho_lote=TAMANHO_LOTE)
+
+    def gerar(self, formato: FormatoExportacao) -> Iterator[bytes]:
+        if formato == FormatoExportacao.CSV:
+            return self.gerar_csv()
+        return self.gerar_ndjson()
+
+    def gerar_ndjson(self) -> Iterator[bytes]:
+        """
+        Um objeto JSON por linha, com precatório e certidões aninhados
+        """
+        bloco = bytearray()
+        for registro in self.registros():
+            bloco += serializar(_objeto(registro))
+            bloco += b"\n"
+            if len(bloco) >= TAMANHO_BLOCO:
+                yield bytes(bloco)
+                bloco.clear()
+        if bloco:
+            yield bytes(bloco)
+
+    def gerar_csv(self) -> Iterator[bytes]:
+        """
+        CSV com cabeçalho e uma coluna por campo (ver COLUNAS)
+        """
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(COLUNAS)
+        for registro in self.registros():
+            escritor.writerow([_valor_csv(registro[coluna]) for coluna in COLUNAS])
+            if buffer.tell() >= TAMANHO_BLOCO:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+
+def comprimir_gzip(blocos: Iterable[bytes], nivel: int = 6) -> Iterator[bytes]:
+    """
+    Compacta os blocos em gzip conforme são gerados
+    """
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloco in blocos:
+        saida = compressor.compress(bloco)
+        if saida:
+            yield saida
+    yield compressor.flush()
+
+
+def _objeto(registro: Row) -> dict:
+    precatorio = None
+    if registro["precatorio_numero"] is not None:
+        precatorio = {
+            "numero": registro["precatorio_numero"],
+            "valor_nominal": registro["precatorio_valor_nominal"],
+            "foro": registro["precatorio_foro"],
+            "data_publicacao": registro["precatorio_data_publicacao"],
+        }
+    certidoes = {}
+    for tipo in TIPOS_CERTIDAO:
+        status = registro[f"certidao_{tipo}_status"]
+        certidoes[tipo] = {
+            "status": status,
+            "valida_ate": registro[f"certidao_{tipo}_valida_ate"],
+        } if status is not None else None
+    return {
+        "id": registro["credor_id"],
+        "nome": registro["nome"],
+        "cpf_cnpj": registro["cpf_cnpj"],
+        "email": registro["email"],
+        "telefone": registro["telefone"],
+        "precatorio": precatorio,
+        "certidoes": certidoes,
+    }
+
+
+def _valor_csv(valor: Any) -> Any:
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
@@ -0,0 +1,387 @@
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from core.entities.precificacao import ParametrosPrecificacao
+from ports.interfaces.Idatabase import IDatabase
+from ports.database.conversao import para_datetime
+from adapters.eventos.outbox import FluxoEventos, CursorExpiradoError
+
+# Eventos que mudam a fila de algum foro
+TIPOS_EVENTO = [
+    "credor.criado", "credor.removido",
+    "precatorio.criado", "precatorio.atualizado", "precatorio.removido",
+]
+# Eventos lidos e precatórios relidos do banco por vez
+TAMANHO_LOTE = 500
+COLUNAS = "id, credor_id, numero_precatorio, valor_nominal, foro, data_publicacao"
+
+# Posição de um precatório na fila: data de publicação, número e id
+Chave = Tuple[datetime, str, int]
+
+
+class _No:
+    __slots__ = ("chave", "valor", "prioridade", "esquerda", "direita", "tamanho", "soma")
+
+    def __init__(self, chave: Chave, valor: float, prioridade: float):
+        self.chave = chave
+        self.valor = valor
+        self.prioridade = prioridade
+        self.esquerda: Optional["_No"] = None
+        self.direita: Optional["_No"] = None
+        self.tamanho = 1
+        self.soma = valor
+
+    def recalcular(self):
+        self.tamanho = 1
+        self.soma = self.valor
+        if self.esquerda:
+            self.tamanho += self.esquerda.tamanho
+            self.soma += self.esquerda.soma
+        if self.direita:
+            self.tamanho += self.direita.tamanho
+            self.soma += self.direita.soma
+
+
+def _dividir(no: Optional[_No], chave: Chave) -> Tuple[Optional[_No], Optional[_No]]:
+    """
+    Separa a subárvore em (chaves menores que `chave`, demais chaves)
+    """
+    if no is None:
+        return None, None
+    if no.chave < chave:
+        no.direita, direita = _dividir(no.direita, chave)
+        no.recalcular()
+        return no, direita
+    esquerda, no.esquerda = _dividir(no.esquerda, chave)
+    no.recalcular()
+    return esquerda, no
+
+
+def _unir(esquerda: Optional[_No], direita: Optional[_No]) -> Optional[_No]:
+    """
+    Une duas subárvores em que todas as chaves da esquerda são menores
+    """
+    if esquerda is None:
+        return direita
+    if direita is None:
+        return esquerda
+    if esquerda.prioridade > direita.prioridade:
+        esquerda.direita = _unir(esquerda.direita, direita)
+        esquerda.recalcular()
+        return esquerda
+    direita.esquerda = _unir(esquerda, direita.esquerda)
+    direita.recalcular()
+    return direita
+
+
+class ArvoreOrdem:
+    """
+    Treap com a quantidade e a soma dos valores de cada subárvore: além de
+    inserir e remover, responde quantos itens e quanto valor vêm antes de
+    uma chave e localiza o k-ésimo item, tudo em O(log n) esperado (a
+    prioridade aleatória mantém a altura logarítmica com alta probabilidade)
+    """
+    def __init__(self, aleatorio: Optional[random.Random] = None):
+        self._raiz: Optional[_No] = None
+        self._aleatorio = aleatorio or random.Random()
+
+    def __len__(self) -> int:
+        return self._raiz.tamanho if self._raiz else 0
+
+    def soma(self) -> float:
+        return self._raiz.soma if self._raiz else 0.0
+
+    @classmethod
+    def construir(cls, itens: Iterable[Tuple[Chave, float]], aleatorio: Optional[random.Random] = None) -> "ArvoreOrdem":
+        """
+        Monta a árvore em O(n) a partir de itens já em ordem de chave,
+        com uma pilha pelo ramo direito (árvore cartesiana)
+        """
+        arvore = cls(aleatorio)
+        pilha: List[_No] = []
+        for chave, valor in itens:
+            no = _No(chave, valor, arvore._aleatorio.random())
+            anterior = None
+            while pilha and pilha[-1].prioridade < no.prioridade:
+                anterior = pilha.pop()
+                anterior.recalcular()
+            no.esquerda = anterior
+            if pilha:
+                pilha[-1].direita = no
+            pilha.append(no)
+        while pilha:
+            raiz = pilha.pop()
+            raiz.recalcular()
+            arvore._raiz = raiz
+        return arvore
+
+    def inserir(self, chave: Chave, valor: float):
+        esquerda, direita = _dividir(self._raiz, chave)
+        self._raiz = _unir(_unir(esquerda, _No(chave, valor, self._aleatorio.random())), direita)
+
+    def remover(self, chave: Chave) -> bool:
+        # Desce até a chave guardando o caminho, para recalcular os ancestrais
+        caminho: List[_No] = []
+        no = self._raiz
+        while no is not None and no.chave != chave:
+            caminho.append(no)
+            no = no.esquerda if chave < no.chave else no.direita
+        if no is None:
+            return False
+        substituto = _unir(no.esquerda, no.direita)
+        if not caminho:
+            self._raiz = substituto
+            return True
+        pai = caminho[-1]
+        if pai.esquerda is no:
+            pai.esquerda = substituto
+        else:
+            pai.direita = substituto
+        for ancestral in reversed(caminho):
+            ancestral.recalcular()
+        return True
+
+    def anteriores(self, chave: Chave) -> Tuple[int, float]:
+        """
+        Quantidade e soma dos valores dos itens com chave menor que `chave`
+        """
+        quantidade, soma = 0, 0.0
+        no = self._raiz
+        while no is not None:
+            if chave <= no.chave:
+                no = no.esquerda
+                continue
+            quantidade += 1
+            soma += no.valor
+            if no.esquerda:
+                quantidade += no.esquerda.tamanho
+                soma += no.esquerda.soma
+            no = no.direita
+        return quantidade, soma
+
+    def fatia(self, inicio: int, limite: int) -> List[Tuple[Chave, float]]:
+        """
+        Itens nas posições [inicio, inicio + limite) em ordem de chave.
+        Desce até o item `inicio` em O(log n) e segue em ordem a partir dele
+        """
+        itens: List[Tuple[Chave, float]] = []
+        pilha: List[_No] = []
+        no = self._raiz
+        # Ancestrais cujo item vem depois da posição inicial ficam na pilha
+        while no is not None:
+            antes = no.esquerda.tamanho if no.esquerda else 0
+            if inicio < antes:
+                pilha.append(no)
+                no = no.esquerda
+            elif inicio == antes:
+                pilha.append(no)
+                break
+            else:
+                inicio -= antes + 1
+                no = no.direita
+        while pilha and len(itens) < limite:
+            no = pilha.pop()
+            itens.append((no.chave, no.valor))
+            no = no.direita
+            while no is not None:
+                pilha.append(no)
+                no = no.esquerda
+        return itens
+
+
+class IndiceFilaPagamento:
+    """
+    Fila de pagamento de cada foro em memória: uma ArvoreOrdem por foro,
+    ordenada pela data de publicação e pelo número do precatório, com o
+    valor nominal como peso. A posição de um precatório na fila e o valor
+    à frente dele saem da árvore em O(log n), sem percorrer o foro.
+
+    O índice é montado na primeira consulta e acompanha os eventos do
+    outbox (ver adapters/eventos/outbox.py): precatórios criados,
+    alterados ou removidos, inclusive pela remoção do credor, são relidos
+    do banco e reposicionados. Cada processo mantém o próprio índice e o
+    próprio cursor; com o cursor expirado o índice é remontado
+    """
+    def __init__(self, db: IDatabase, fluxo: FluxoEventos):
+        self.db = db
+        self.fluxo = fluxo
+        self._lock = threading.Lock()
+        self._arvores: Dict[str, ArvoreOrdem] = {}
+        self._foros: Dict[str, str] = {}
+        # id -> (foro, chave, credor_id, valor)
+        self._entradas: Dict[int, Tuple[str, Chave, int, float]] = {}
+        self._por_credor: Dict[int, Set[int]] = {}
+        self._cursor: Optional[int] = None
+        self.carregamentos = 0
+        self.eventos_aplicados = 0
+        self.ultimo_carregamento_ms = 0.0
+
+    def _adicionar(self, row, chaves_foro: Optional[Dict[str, str]] = None) -> Tuple[str, Chave, float]:
+        nome = row['foro']
+        foro = chaves_foro.get(nome) if chaves_foro is not None else None
+        if foro is None:
+            foro = ParametrosPrecificacao.chave_foro(nome)
+            self._foros.setdefault(foro, nome.strip())
+            if chaves_foro is not None:
+                chaves_foro[nome] = foro
+        precatorio_id, credor_id = row['id'], row['credor_id']
+        chave = (para_datetime(row['data_publicacao']), row['numero_precatorio'], precatorio_id)
+        valor = float(row['valor_nominal'])
+        self._entradas[precatorio_id] = (foro, chave, credor_id, valor)
+        self._por_credor.setdefault(credor_id, set()).add(precatorio_id)
+        return foro, chave, valor
+
+    def _retirar(self, precatorio_id: int):
+        entrada = self._entradas.pop(precatorio_id, None)
+        if entrada is None:
+            return
+        foro, chave, credor_id, _ = entrada
+        self._arvores[foro].remover(chave)
+        if not self._arvores[foro]:
+            del self._arvores[foro]
+        ids = self._por_credor.get(credor_id)
+        if ids is not None:
+            ids.discard(precatorio_id)
+            if not ids:
+                del self._por_credor[credor_id]
+
+    def carregar(self):
+        """
+        Monta todas as filas a partir do banco
+        """
+        inicio = time.perf_counter()
+        with self._lock:
+            # Lido antes da carga: eventos posteriores serão reaplicados, e
+            # reaplicar um evento já refletido na carga não muda o índice
+            cursor = self.fluxo.ultimo_id()
+            self._arvores, self._foros, self._entradas, self._por_credor = {}, {}, {}, {}
+            # Já em ordem de pagamento: cada foro recebe os seus itens em ordem
+            por_foro: Dict[str, List[Tuple[Chave, float]]] = {}
+            chaves_foro: Dict[str, str] = {}
+            consulta = f"SELECT {COLUNAS} FROM precatorios ORDER BY data_publicacao, numero_precatorio, id"
+            for row in self.db.iterar(consulta, tamanho_lote=10000):
+                foro, chave, valor = self._adicionar(row, chaves_foro)
+                por_foro.setdefault(foro, []).append((chave, valor))
+            for foro, itens in por_foro.items():
+                self._arvores[foro] = ArvoreOrdem.construir(itens)
+            self._cursor = cursor
+        self.carregamentos += 1
+        self.ultimo_carregamento_ms = (time.perf_counter() - inicio) * 1000
+
+    def _reposicionar(self, ids: Iterable[int]):
+        """
+        Relê os precatórios do banco e os recoloca nas filas (os que não
+        existem mais só saem)
+        """
+        ids = sorted(set(ids))
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            lote = tuple(ids[inicio:inicio + TAMANHO_LOTE])
+            rows = self.db.fetch_all(
+                f"SELECT {COLUNAS} FROM precatorios WHERE id IN ({', '.join('?' for _ in lote)})", lote
+            )
+            for precatorio_id in lote:
+                self._retirar(precatorio_id)
+            for row in rows:
+                foro, chave, valor = self._adicionar(row)
+                self._arvores.setdefault(foro, ArvoreOrdem()).inserir(chave, valor)
+
+    def atualizar(self):
+        """
+        Aplica os eventos pendentes (na primeira chamada, monta o índice)
+        """
+        if self._cursor is None:
+            self.carregar()
+            return
+        with self._lock:
+            while True:
+                try:
+                    eventos, novo_cursor = self.fluxo.buscar(self._cursor, TAMANHO_LOTE, tipos=TIPOS_EVENTO)
+                except CursorExpiradoError:
+                    break
+                if novo_cursor == self._cursor:
+                    return
+                ids: Set[int] = set()
+                for evento in eventos:
+                    if evento['tipo'] == 'credor.removido':
+                        ids.update(self._por_credor.get(evento['credor_id'], ()))
+                    elif evento['tipo'] == 'credor.criado':
+                        precatorio = evento['dados'].get('precatorio') or {}
+                        if precatorio.get('id') is not None:
+                            ids.add(precatorio['id'])
+                    elif evento['entidade_id'] is not None:
+                        ids.add(evento['entidade_id'])
+                self._reposicionar(ids)
+                self.eventos_aplicados += len(eventos)
+                self._cursor = novo_cursor
+
+        # Eventos removidos pela retenção antes de serem aplicados
+        print(f"Fila de pagamento: cursor {self._cursor} expirado, recarregando o índice")
+        self.carregar()
+
+    def _item(self, posicao: int, chave: Chave, valor: float, valor_a_frente: float) -> Dict[str, Any]:
+        return {
+            "posicao": posicao,
+            "id": chave[2],
+            "credor_id": self._entradas[chave[2]][2],
+            "numero_precatorio": chave[1],
+            "data_publicacao": chave[0],
+            "valor_nominal": round(valor, 2),
+            "valor_a_frente": round(valor_a_frente, 2),
+        }
+
+    def posicao(self, precatorio_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Posição do precatório na fila do seu foro (1 é o próximo a ser
+        pago), com a quantidade e o valor nominal dos precatórios à frente
+        """
+        self.atualizar()
+        with self._lock:
+            entrada = self._entradas.get(precatorio_id)
+            if entrada is None:
+                return None
+            foro, chave, _, valor = entrada
+            arvore = self._arvores[foro]
+            a_frente, valor_a_frente = arvore.anteriores(chave)
+            return {
+                "foro": self._foros[foro],
+                "total_na_fila": len(arvore),
+                "valor_total_na_fila": round(arvore.soma(), 2),
+                "precatorios_a_frente": a_frente,
+                **self._item(a_frente + 1, chave, valor, valor_a_frente),
+            }
+
+    def fila(self, foro: str, apos: int = 0, limite: int = 100) -> Optional[Dict[str, Any]]:
+        """
+        Precatórios do foro em ordem de pagamento, a partir da posição
+        `apos` + 1
+        """
+        self.atualizar()
+        chave_foro = ParametrosPrecificacao.chave_foro(foro)
+        with self._lock:
+            arvore = self._arvores.get(chave_foro)
+            if arvore is None:
+                return None
+            itens = arvore.fatia(apos, limite)
+            precatorios = []
+            if itens:
+                _, valor_a_frente = arvore.anteriores(itens[0][0])
+                for posicao, (chave, valor) in enumerate(itens, start=apos + 1):
+                    precatorios.append(self._item(posicao, chave, valor, valor_a_frente))
+                    valor_a_frente += valor
+            return {
+                "foro": self._foros[chave_foro],
+                "total_na_fila": len(arvore),
+                "valor_total_na_fila": round(arvore.soma(), 2),
+                "precatorios": precatorios,
+            }
+
+    def estatisticas(self) -> dict:
+        return {
+            'foros': len(self._arvores),
+            'precatorios': len(self._entradas),
+            'carregamentos': self.carregamentos,
+            'eventos_aplicados': self.eventos_aplicados,
+            'ultimo_carregamento_ms': round(self.ultimo_carregamento_ms, 2),
+        }
@@ -0,0 +1,106 @@
+import dataclasses
+import functools
+import inspect
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Optional
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele a serialização usa o json da biblioteca padrão
+    orjson = None
+
+def converter(valor: Any) -> Any:
+    """
+    Converte os tipos que o serializador não conhece.
+
+    - Decimal vira texto, sem perder casas decimais de valores monetários
+    - Enums (TipoCertidao, StatusJob...) viram o seu valor
+    - datetime/date/time viram ISO 8601 (o orjson já faz isso sozinho)
+    - entidades com to_dict() e modelos pydantic viram dicionários
+    """
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, (set, frozenset, tuple)):
+        return list(valor)
+    if isinstance(valor, bytes):
+        return valor.decode()
+    if hasattr(valor, 'to_dict'):
+        return valor.to_dict()
+    if hasattr(valor, 'model_dump'):
+        return valor.model_dump(mode='json')
+    if dataclasses.is_dataclass(valor) and not isinstance(valor, type):
+        return dataclasses.asdict(valor)
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+def serializar(conteudo: Any) -> bytes:
+    """
+    Serializa o conteúdo de uma resposta direto para bytes JSON
+    """
+    if orjson is not None:
+        # OPT_NON_STR_KEYS: chaves int (ex.: ids) viram texto, como no json padrão
+        return orjson.dumps(conteudo, default=converter, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        conteudo, default=converter, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RespostaJSON(JSONResponse):
+    """
+    Resposta JSON serializada com orjson (ou json, se ausente), tratando
+    datetime, Decimal e os Enums das entidades sem pré-conversão
+    """
+    def render(self, content: Any) -> bytes:
+        return serializar(content)
+
+
+def _responder(endpoint: Callable, status_code: Optional[int]) -> Callable:
+    """
+    Envolve o endpoint para que o retorno (dict, lista, entidade) seja
+    entregue já como RespostaJSON
+    """
+    def empacotar(resultado):
+        if resultado is None or isinstance(resultado, Response):
+            return resultado
+        return RespostaJSON(resultado, status_code=status_code or 200)
+
+    # functools.wraps mantém a assinatura: parâmetros e dependências do
+    # FastAPI continuam sendo lidos do endpoint original
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def rota(*args, **kwargs):
+            return empacotar(await endpoint(*args, **kwargs))
+    else:
+        @functools.wraps(endpoint)
+        def rota(*args, **kwargs):
+            return empacotar(endpoint(*args, **kwargs))
+    return rota
+
+
+class RotaJSONRapida(APIRoute):
+    """
+    Rota cujo retorno vai direto para RespostaJSON.
+
+    No caminho padrão do FastAPI o retorno passa por jsonable_encoder (que
+    percorre e copia todo o conteúdo em Python) e, com response_model, é
+    validado de novo contra o modelo antes de ser serializado. Aqui o
+    conteúdo é serializado uma única vez; o response_model continua
+    documentando a resposta no OpenAPI, mas não é revalidado. Rotas com
+    outro response_class (ex.: HTMLResponse) seguem o caminho padrão
+    """
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        classe = kwargs.get("response_class")
+        if isinstance(classe, DefaultPlaceholder):
+            classe = classe.value
+        if classe is None or issubclass(classe, JSONResponse):
+            endpoint = _responder(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
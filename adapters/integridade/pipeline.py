@@ -0,0 +1,170 @@
+import asyncio
+import threading
+from concurrent.futures import BrokenExecutor, TimeoutError as FuturoTimeoutError
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Union
+from adapters.integridade.verificador import verificar_arquivo, verificar_conteudo
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+class FilaIntegridadeCheiaError(Exception):
+    """
+    Todas as vagas do pipeline estão ocupadas (verificações em andamento + fila)
+    """
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        super().__init__(f"Fila de verificação de integridade cheia ({capacidade} arquivos)")
+
+
+def _verificar(origem: Union[str, bytes], tipos_permitidos: Optional[tuple]) -> Dict:
+    if isinstance(origem, bytes):
+        return verificar_conteudo(origem, tipos_permitidos)
+    return verificar_arquivo(origem, tipos_permitidos)
+
+
+class PipelineIntegridade:
+    """
+    Executa as verificações de integridade em um pool de processos, fora
+    do event loop e sem disputar o GIL com as requisições.
+
+    - Fila limitada: no máximo `max_processos + max_fila` arquivos ao mesmo
+      tempo; além disso a verificação é recusada com FilaIntegridadeCheiaError
+      (a rota responde 503) em vez de acumular trabalho sem limite.
+    - Timeout por arquivo: um arquivo que estoura `timeout_segundos` é
+      considerado inválido. Como um processo ocupado não pode ser
+      cancelado, o pool é descartado (processos encerrados) e recriado
+      na próxima verificação. O mesmo vale para um processo que morre
+      durante a verificação (ex.: falta de memória).
+
+    Com `max_processos=0` a verificação roda no próprio processo (útil
+    em testes e em ambientes sem suporte a multiprocessing)
+    """
+    def __init__(self, max_processos: int = 2, max_fila: int = 32, timeout_segundos: float = 10):
+        self.max_processos = max_processos
+        self.capacidade = max(max_processos, 1) + max_fila
+        self.timeout_segundos = timeout_segundos
+        self._vagas = threading.BoundedSemaphore(self.capacidade)
+        self._executor: Optional["ProcessPoolExecutor"] = None
+        self._lock = threading.Lock()
+        self.verificados = 0
+        self.invalidos = 0
+        self.timeouts = 0
+        self.recusados = 0
+
+    def _obter_executor(self) -> "ProcessPoolExecutor":
+        with self._lock:
+            if self._executor is None:
+                # Importados sob demanda: multiprocessing e o pool de processos
+                # só pesam na importação da aplicação quando há verificações
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # O processo da API tem threads (workers, agendador) e fork com
+                # threads ativas pode herdar locks travados. O forkserver cria
+                # os processos a partir de um servidor limpo, sem reexecutar
+                # o módulo principal como o spawn
+                metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_processos,
+                    mp_context=multiprocessing.get_context(metodo)
+                )
+            return self._executor
+
+    def _descartar_executor(self, executor: "ProcessPoolExecutor"):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # Não há API pública para interromper uma tarefa em execução
+        for processo in list((executor._processes or {}).values()):
+            processo.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reservar_vaga(self):
+        if not self._vagas.acquire(blocking=False):
+            self.recusados += 1
+            raise FilaIntegridadeCheiaError(self.capacidade)
+
+    def _registrar(self, resultado: Dict) -> Dict:
+        self.verificados += 1
+        if not resultado['valido']:
+            self.invalidos += 1
+        return resultado
+
+    def _falha_processo(self, executor: "ProcessPoolExecutor", motivo: str) -> Dict:
+        self._descartar_executor(executor)
+        return self._registrar({'valido': False, 'tipo': None, 'erros': [motivo]})
+
+    def _tempo_excedido(self, executor: "ProcessPoolExecutor") -> Dict:
+        self.timeouts += 1
+        return self._falha_processo(executor, f"Verificação excedeu {self.timeout_segundos}s")
+
+    def verificar(
+        self,
+        caminho: Optional[str] = None,
+        tipos_permitidos: Optional[Iterable[str]] = None,
+        conteudo: Optional[bytes] = None
+    ) -> Dict:
+        """
+        Verifica um arquivo (por caminho ou conteúdo), bloqueando a thread
+        atual até o resultado ou o timeout
+        """
+        origem = conteudo if conteudo is not None else caminho
+        tipos = tuple(tipos_permitidos) if tipos_permitidos is not None else None
+        self._reservar_vaga()
+        try:
+            if self.max_processos == 0:
+                return self._registrar(_verificar(origem, tipos))
+            executor = self._obter_executor()
+            try:
+                futuro = executor.submit(_verificar, origem, tipos)
+                return self._registrar(futuro.result(timeout=self.timeout_segundos))
+            except FuturoTimeoutError:
+                return self._tempo_excedido(executor)
+            except BrokenExecutor:  # BrokenProcessPool
+                return self._falha_processo(executor, "Processo de verificação encerrado inesperadamente")
+        finally:
+            self._vagas.release()
+
+    async def verificar_async(
+        self,
+        caminho: Optional[str] = None,
+        tipos_permitidos: Optional[Iterable[str]] = None,
+        conteudo: Optional[bytes] = None
+    ) -> Dict:
+        """
+        Versão para rotas async: aguarda o processo sem ocupar o event loop
+        nem uma thread do threadpool
+        """
+        origem = conteudo if conteudo is not None else caminho
+        tipos = tuple(tipos_permitidos) if tipos_permitidos is not None else None
+        self._reservar_vaga()
+        try:
+            if self.max_processos == 0:
+                return self._registrar(await asyncio.to_thread(_verificar, origem, tipos))
+            executor = self._obter_executor()
+            try:
+                futuro = asyncio.wrap_future(executor.submit(_verificar, origem, tipos))
+                return self._registrar(await asyncio.wait_for(futuro, self.timeout_segundos))
+            except asyncio.TimeoutError:
+                return self._tempo_excedido(executor)
+            except BrokenExecutor:  # BrokenProcessPool
+                return self._falha_processo(executor, "Processo de verificação encerrado inesperadamente")
+        finally:
+            self._vagas.release()
+
+    def fechar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def estatisticas(self) -> Dict:
+        return {
+            'processos': self.max_processos,
+            'capacidade': self.capacidade,
+            'verificados': self.verificados,
+            'invalidos': self.invalidos,
+            'timeouts': self.timeouts,
+            'recusados': self.recusados,
+        }
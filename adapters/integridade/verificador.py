@@ -0,0 +1,437 @@
+"""
+Verificação estrutural de arquivos enviados (PDF, PNG e JPEG).
+
+As funções deste módulo são puras (recebem bytes ou um caminho e retornam
+um dicionário), para poderem rodar em processos separados
+(ver adapters/integridade/pipeline.py)
+"""
+import io
+import os
+import re
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele apenas a estrutura das imagens é verificada
+    Image = None
+
+ASSINATURA_PNG = b'\x89PNG\r\n\x1a\n'
+ASSINATURA_JPEG = b'\xff\xd8\xff'
+
+EXTENSOES = {
+    '.pdf': 'pdf',
+    '.png': 'png',
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+}
+
+# Limite de revisões (/Prev) seguidas, contra cadeias circulares ou muito longas
+MAX_REVISOES_PDF = 64
+
+OBJETO = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj\b')
+SUBSECAO_XREF = re.compile(rb'\s*(\d+)\s+(\d+)[ \t]*\r?\n?')
+ENTRADA_XREF = re.compile(rb'\s*(\d{10})\s+(\d{5})\s+([nf])')
+
+
+def detectar_tipo(dados: bytes) -> Optional[str]:
+    """
+    Identifica o formato pelos magic bytes
+    """
+    if b'%PDF-' in dados[:1024]:
+        return 'pdf'
+    if dados.startswith(ASSINATURA_PNG):
+        return 'png'
+    if dados.startswith(ASSINATURA_JPEG):
+        return 'jpeg'
+    return None
+
+
+def _inteiro(dicionario: bytes, chave: bytes) -> Optional[int]:
+    encontrado = re.search(rb'/' + chave + rb'\s+(\d+)', dicionario)
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def ler_dicionario(dados: bytes, inicio: int) -> bytes:
+    """
+    Extrai o dicionário << ... >> que começa em `inicio`, respeitando aninhamento
+    """
+    abertura = dados.find(b'<<', inicio)
+    if abertura < 0:
+        return b''
+    nivel, pos = 0, abertura
+    while pos < len(dados) - 1:
+        par = dados[pos:pos + 2]
+        if par == b'<<':
+            nivel += 1
+            pos += 2
+        elif par == b'>>':
+            nivel -= 1
+            pos += 2
+            if nivel == 0:
+                return dados[abertura:pos]
+        else:
+            pos += 1
+    return b''
+
+
+def _tabela_xref(dados: bytes, offset: int) -> Tuple[Dict[int, int], bytes]:
+    """
+    Lê uma tabela xref clássica. Retorna ({objeto: offset}, trailer)
+    """
+    entradas = {}
+    pos = offset + len(b'xref')
+    while True:
+        if dados[pos:pos + 64].lstrip().startswith(b'trailer'):
+            break
+        subsecao = SUBSECAO_XREF.match(dados, pos)
+        if not subsecao:
+            raise ValueError("Tabela xref malformada")
+        primeiro, quantidade = int(subsecao.group(1)), int(subsecao.group(2))
+        pos = subsecao.end()
+        for numero in range(primeiro, primeiro + quantidade):
+            entrada = ENTRADA_XREF.match(dados, pos)
+            if not entrada:
+                raise ValueError(f"Entrada {numero} da tabela xref malformada")
+            if entrada.group(3) == b'n':
+                entradas[numero] = int(entrada.group(1))
+            pos = entrada.end()
+    trailer = ler_dicionario(dados, dados.find(b'trailer', pos))
+    if not trailer:
+        raise ValueError("Trailer ausente ou malformado")
+    return entradas, trailer
+
+
+def _desfazer_preditor(linhas: bytes, colunas: int) -> bytes:
+    """
+    Desfaz o preditor PNG (filtros None, Sub e Up) usado em streams xref
+    """
+    resultado = bytearray()
+    anterior = bytearray(colunas)
+    largura = colunas + 1
+    for inicio in range(0, len(linhas) - largura + 1, largura):
+        filtro = linhas[inicio]
+        linha = bytearray(linhas[inicio + 1:inicio + largura])
+        if filtro == 1:
+            for i in range(1, colunas):
+                linha[i] = (linha[i] + linha[i - 1]) & 0xFF
+        elif filtro == 2:
+            for i in range(colunas):
+                linha[i] = (linha[i] + anterior[i]) & 0xFF
+        elif filtro != 0:
+            raise ValueError(f"Preditor PNG {filtro} não suportado no stream xref")
+        resultado.extend(linha)
+        anterior = linha
+    return bytes(resultado)
+
+
+def _stream_xref(dados: bytes, offset: int) -> Tuple[Dict[int, int], bytes]:
+    """
+    Lê um stream xref (PDF 1.5+). Retorna ({objeto: offset}, dicionário do stream)
+    """
+    dicionario = ler_dicionario(dados, offset)
+    if not re.search(rb'/Type\s*/XRef', dicionario):
+        raise ValueError("startxref não aponta para uma tabela ou stream xref")
+    larguras = re.search(rb'/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]', dicionario)
+    tamanho = _inteiro(dicionario, b'Size')
+    comprimento = _inteiro(dicionario, b'Length')
+    if not larguras or tamanho is None or comprimento is None:
+        raise ValueError("Stream xref sem /W, /Size ou /Length")
+
+    inicio = dados.find(b'stream', offset + len(dicionario))
+    inicio += len(b'stream')
+    inicio += 2 if dados[inicio:inicio + 2] == b'\r\n' else 1
+    conteudo = dados[inicio:inicio + comprimento]
+    if b'/FlateDecode' in dicionario:
+        try:
+            conteudo = zlib.decompress(conteudo)
+        except zlib.error:
+            raise ValueError("Stream xref corrompido (FlateDecode)")
+
+    w = [int(larguras.group(i)) for i in (1, 2, 3)]
+    largura_linha = sum(w)
+    preditor = _inteiro(dicionario, b'Predictor') or 1
+    if preditor >= 10:
+        conteudo = _desfazer_preditor(conteudo, _inteiro(dicionario, b'Columns') or largura_linha)
+
+    indice = re.search(rb'/Index\s*\[([\d\s]+)\]', dicionario)
+    numeros = [int(n) for n in indice.group(1).split()] if indice else [0, tamanho]
+
+    entradas = {}
+    pos = 0
+    for primeiro, quantidade in zip(numeros[0::2], numeros[1::2]):
+        for numero in range(primeiro, primeiro + quantidade):
+            linha = conteudo[pos:pos + largura_linha]
+            if len(linha) < largura_linha:
+                raise ValueError("Stream xref truncado")
+            pos += largura_linha
+            campos, cursor = [], 0
+            for largura in w:
+                campos.append(int.from_bytes(linha[cursor:cursor + largura], 'big'))
+                cursor += largura
+            tipo = campos[0] if w[0] else 1
+            if tipo == 1:
+                entradas[numero] = campos[1]
+            elif tipo == 2:
+                # Objeto comprimido dentro de um object stream: sem offset próprio
+                entradas[numero] = -1
+    return entradas, dicionario
+
+
+def verificar_pdf(dados: bytes) -> Dict:
+    """
+    Verifica cabeçalho, startxref, tabelas/streams xref (seguindo /Prev),
+    trailer com /Root e se cada objeto em uso começa no offset declarado
+    """
+    erros: List[str] = []
+    resultado = {'tipo': 'pdf'}
+
+    versao = re.search(rb'%PDF-(\d\.\d)', dados[:1024])
+    if not versao:
+        return {**resultado, 'valido': False, 'erros': ["Cabeçalho %PDF- ausente"]}
+    resultado['versao_pdf'] = versao.group(1).decode()
+    base = versao.start()
+
+    if b'%%EOF' not in dados[-2048:]:
+        erros.append("Marcador %%EOF ausente no final do arquivo")
+    posicao_startxref = dados.rfind(b'startxref')
+    encontrado = re.match(rb'startxref\s+(\d+)', dados[posicao_startxref:]) if posicao_startxref >= 0 else None
+    if not encontrado:
+        return {**resultado, 'valido': False, 'erros': erros + ["startxref ausente"]}
+
+    objetos: Dict[int, int] = {}
+    raiz = None
+    formato = None
+    revisoes = 0
+    offset: Optional[int] = int(encontrado.group(1)) + base
+    visitados: Set[int] = set()
+    try:
+        while offset is not None and revisoes < MAX_REVISOES_PDF:
+            if offset in visitados or offset >= len(dados):
+                raise ValueError(f"Offset de xref inválido: {offset}")
+            visitados.add(offset)
+            if dados[offset:offset + 4] == b'xref':
+                entradas, trailer = _tabela_xref(dados, offset)
+                formato = formato or 'tabela'
+            else:
+                entradas, trailer = _stream_xref(dados, offset)
+                formato = formato or 'stream'
+            # Revisões mais recentes têm precedência sobre as anteriores
+            for numero, posicao in entradas.items():
+                objetos.setdefault(numero, posicao)
+            raiz = raiz or re.search(rb'/Root\s+(\d+)\s+\d+\s+R', trailer)
+            if b'/Encrypt' in trailer:
+                resultado['criptografado'] = True
+            anterior = _inteiro(trailer, b'Prev')
+            offset = anterior + base if anterior is not None else None
+            revisoes += 1
+    except ValueError as e:
+        erros.append(str(e))
+
+    if not erros:
+        if raiz is None:
+            erros.append("Trailer sem /Root")
+        elif int(raiz.group(1)) not in objetos:
+            erros.append("Objeto /Root ausente da xref")
+
+        invalidos = [
+            numero for numero, posicao in objetos.items()
+            if posicao >= 0 and not (
+                (objeto := OBJETO.match(dados, posicao + base)) and int(objeto.group(1)) == numero
+            )
+        ]
+        if invalidos:
+            erros.append(
+                f"{len(invalidos)} objeto(s) fora do offset declarado na xref "
+                f"(ex.: {', '.join(map(str, invalidos[:5]))})"
+            )
+
+    resultado.update({
+        'valido': not erros,
+        'erros': erros,
+        'xref': formato,
+        'objetos': len(objetos),
+        'revisoes': revisoes,
+    })
+    return resultado
+
+
+def verificar_png(dados: bytes) -> Dict:
+    """
+    Verifica os chunks (tamanho e CRC), o IHDR e se os dados IDAT
+    descomprimem para o tamanho esperado da imagem
+    """
+    erros: List[str] = []
+    resultado = {'tipo': 'png'}
+    pos = len(ASSINATURA_PNG)
+    cabecalho = None
+    idat = bytearray()
+    fim = False
+    while pos + 8 <= len(dados):
+        tamanho, tipo = struct.unpack('>I4s', dados[pos:pos + 8])
+        corpo = dados[pos + 8:pos + 8 + tamanho]
+        crc = dados[pos + 8 + tamanho:pos + 12 + tamanho]
+        if len(corpo) < tamanho or len(crc) < 4:
+            erros.append(f"Chunk {tipo.decode('latin-1')} truncado")
+            break
+        if zlib.crc32(tipo + corpo) != struct.unpack('>I', crc)[0]:
+            erros.append(f"CRC inválido no chunk {tipo.decode('latin-1')}")
+        if cabecalho is None and tipo != b'IHDR':
+            erros.append("Primeiro chunk não é IHDR")
+            break
+        if tipo == b'IHDR':
+            cabecalho = struct.unpack('>IIBBBBB', corpo[:13])
+        elif tipo == b'IDAT':
+            idat.extend(corpo)
+        elif tipo == b'IEND':
+            fim = True
+            break
+        pos += 12 + tamanho
+
+    if cabecalho is None:
+        erros.append("IHDR ausente")
+    if not fim:
+        erros.append("IEND ausente")
+
+    if cabecalho and not erros:
+        largura, altura, profundidade, tipo_cor, _, _, entrelacado = cabecalho
+        resultado.update({'largura': largura, 'altura': altura})
+        if largura == 0 or altura == 0:
+            erros.append("Dimensões inválidas no IHDR")
+        else:
+            try:
+                descomprimido = zlib.decompress(bytes(idat))
+            except zlib.error:
+                descomprimido = None
+                erros.append("Dados IDAT corrompidos")
+            canais = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(tipo_cor)
+            if canais is None:
+                erros.append(f"Tipo de cor {tipo_cor} inválido")
+            elif descomprimido is not None and not entrelacado:
+                bytes_linha = (largura * canais * profundidade + 7) // 8
+                esperado = altura * (bytes_linha + 1)
+                if len(descomprimido) != esperado:
+                    erros.append(
+                        f"IDAT com {len(descomprimido)} bytes; esperado {esperado}"
+                    )
+
+    resultado.update({'valido': not erros, 'erros': erros})
+    return resultado
+
+
+# SOF0-SOF15, exceto DHT (C4), JPG (C8) e DAC (CC)
+MARCADORES_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def verificar_jpeg(dados: bytes) -> Dict:
+    """
+    Percorre os segmentos do JPEG: exige SOF com dimensões válidas,
+    ao menos um SOS e o marcador EOI
+    """
+    erros: List[str] = []
+    resultado = {'tipo': 'jpeg'}
+    pos = 2
+    quadro = None
+    varreduras = 0
+    fim = False
+    while pos < len(dados) - 1:
+        if dados[pos] != 0xFF:
+            erros.append(f"Marcador esperado no byte {pos}")
+            break
+        marcador = dados[pos + 1]
+        if marcador == 0xFF:
+            pos += 1
+            continue
+        if marcador == 0xD9:
+            fim = True
+            break
+        if marcador == 0x01 or 0xD0 <= marcador <= 0xD8:
+            pos += 2
+            continue
+        if pos + 4 > len(dados):
+            erros.append("Segmento truncado")
+            break
+        tamanho = struct.unpack('>H', dados[pos + 2:pos + 4])[0]
+        if tamanho < 2 or pos + 2 + tamanho > len(dados):
+            erros.append(f"Segmento 0x{marcador:02X} truncado")
+            break
+        if marcador in MARCADORES_SOF and tamanho >= 8:
+            _, altura, largura, componentes = struct.unpack('>BHHB', dados[pos + 4:pos + 10])
+            quadro = (largura, altura, componentes)
+        pos += 2 + tamanho
+        if marcador == 0xDA:
+            varreduras += 1
+            # Dados comprimidos até o próximo marcador que não seja
+            # byte escapado (FF00) nem reinício (FFD0-FFD7)
+            while True:
+                pos = dados.find(b'\xff', pos)
+                if pos < 0 or pos + 1 >= len(dados):
+                    pos = len(dados)
+                    break
+                seguinte = dados[pos + 1]
+                if seguinte == 0x00 or 0xD0 <= seguinte <= 0xD7 or seguinte == 0xFF:
+                    pos += 1 if seguinte == 0xFF else 2
+                    continue
+                break
+
+    if not erros:
+        if quadro is None:
+            erros.append("Segmento SOF ausente")
+        elif quadro[0] == 0 or quadro[1] == 0 or quadro[2] == 0:
+            erros.append("Dimensões inválidas no SOF")
+        if varreduras == 0:
+            erros.append("Segmento SOS ausente")
+        if not fim:
+            erros.append("Marcador EOI ausente")
+    if quadro:
+        resultado.update({'largura': quadro[0], 'altura': quadro[1]})
+
+    resultado.update({'valido': not erros, 'erros': erros})
+    return resultado
+
+
+VERIFICADORES = {
+    'pdf': verificar_pdf,
+    'png': verificar_png,
+    'jpeg': verificar_jpeg,
+}
+
+
+def verificar_conteudo(dados: bytes, tipos_permitidos: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Detecta o formato pelos magic bytes e verifica sua estrutura
+    """
+    tipo = detectar_tipo(dados)
+    if tipo is None:
+        return {'valido': False, 'tipo': None, 'erros': ["Formato de arquivo não reconhecido"]}
+    if tipos_permitidos is not None and tipo not in tipos_permitidos:
+        return {'valido': False, 'tipo': tipo, 'erros': [f"Arquivo do tipo {tipo} não é permitido"]}
+
+    resultado = VERIFICADORES[tipo](dados)
+    if resultado['valido'] and tipo != 'pdf' and Image is not None:
+        try:
+            with Image.open(io.BytesIO(dados)) as imagem:
+                imagem.verify()
+        except Exception as e:
+            resultado['valido'] = False
+            resultado['erros'].append(f"Imagem não decodifica: {str(e)}")
+    resultado['tamanho'] = len(dados)
+    return resultado
+
+
+def verificar_arquivo(caminho: str, tipos_permitidos: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Verifica um arquivo em disco, conferindo também se a extensão
+    corresponde ao conteúdo
+    """
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    resultado = verificar_conteudo(dados, tipos_permitidos)
+    esperado = EXTENSOES.get(os.path.splitext(caminho)[1].lower())
+    if resultado['tipo'] and esperado and esperado != resultado['tipo']:
+        resultado['valido'] = False
+        resultado['erros'].append(
+            f"Extensão não corresponde ao conteúdo (arquivo {resultado['tipo']})"
+        )
+    return resultado
@@ -0,0 +1,196 @@
+import json
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta
+from core.entities.job import Job, TipoJob, EntidadeJob, StatusJob
+from ports.interfaces.Ifila import IFilaJobs
+from ports.interfaces.Idatabase import IDatabase
+from ports.database.conversao import para_datetime
+
+class FilaJobsSqlite(IFilaJobs):
+    """
+    Fila de jobs persistida na tabela `jobs` do SQLite
+    """
+    def __init__(self, database: IDatabase, backoff_base_segundos: int = 2):
+        self.db = database
+        self.backoff_base_segundos = backoff_base_segundos
+
+    def _row_to_job(self, row) -> Job:
+        """
+        Converte um registro da tabela jobs em entidade
+        """
+        return Job(
+            id=row['id'],
+            tipo=TipoJob(row['tipo']),
+            entidade=EntidadeJob(row['entidade']),
+            entidade_id=row['entidade_id'],
+            payload=json.loads(row['payload']) if row['payload'] else {},
+            status=StatusJob(row['status']),
+            tentativas=row['tentativas'],
+            max_tentativas=row['max_tentativas'],
+            resultado=json.loads(row['resultado']) if row['resultado'] else None,
+            erro=row['erro'],
+            worker=row['worker'],
+            disponivel_em=para_datetime(row['disponivel_em']),
+            iniciado_em=para_datetime(row['iniciado_em']),
+            finalizado_em=para_datetime(row['finalizado_em'])
+        )
+
+    def enfileirar(
+        self,
+        tipo: TipoJob,
+        entidade: EntidadeJob,
+        entidade_id: int,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        Adiciona um novo job pendente na fila
+        """
+        job = Job(
+            tipo=tipo,
+            entidade=entidade,
+            entidade_id=entidade_id,
+            payload=payload or {},
+            disponivel_em=datetime.now()
+        )
+        erros = job.validar()
+        if erros:
+            raise ValueError(erros)
+
+        query = """
+            INSERT INTO jobs (
+                tipo, entidade, entidade_id, payload,
+                status, max_tentativas, disponivel_em
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        job.id = self.db.execute(
+            query,
+            (
+                job.tipo.value, job.entidade.value, job.entidade_id,
+                json.dumps(job.payload), job.status.value,
+                job.max_tentativas, job.disponivel_em
+            )
+        )
+        return job
+
+    def reservar_proximo(self, worker: str) -> Optional[Job]:
+        """
+        Reserva atomicamente o próximo job disponível para o worker.
+        O UPDATE ... RETURNING garante que dois workers nunca peguem o mesmo job
+        """
+        agora = datetime.now()
+        query = """
+            UPDATE jobs
+            SET status = ?, worker = ?, iniciado_em = ?,
+                tentativas = tentativas + 1, updated_at = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = ? AND disponivel_em <= ?
+                ORDER BY disponivel_em, id
+                LIMIT 1
+            )
+            AND status = ?
+            RETURNING *
+        """
+        row = self.db.execute_returning(
+            query,
+            (
+                StatusJob.EXECUTANDO.value, worker, agora, agora,
+                StatusJob.PENDENTE.value, agora,
+                StatusJob.PENDENTE.value
+            )
+        )
+        return self._row_to_job(row) if row else None
+
+    def concluir(self, job: Job, resultado: Dict[str, Any]) -> Job:
+        """
+        Marca o job como concluído com o resultado informado
+        """
+        job.status = StatusJob.CONCLUIDO
+        job.resultado = resultado
+        job.erro = None
+        job.finalizado_em = datetime.now()
+
+        query = """
+            UPDATE jobs
+            SET status = ?, resultado = ?, erro = NULL,
+                finalizado_em = ?, updated_at = ?
+            WHERE id = ?
+        """
+        self.db.execute(
+            query,
+            (
+                job.status.value, json.dumps(resultado, default=str),
+                job.finalizado_em, job.finalizado_em, job.id
+            )
+        )
+        return job
+
+    def falhar(self, job: Job, erro: str) -> Job:
+        """
+        Registra uma falha no job, reagendando-o com backoff exponencial
+        enquanto houver tentativas
+        """
+        agora = datetime.now()
+        job.erro = erro
+
+        if job.pode_tentar_novamente():
+            job.status = StatusJob.PENDENTE
+            job.disponivel_em = agora + timedelta(
+                seconds=self.backoff_base_segundos ** job.tentativas
+            )
+        else:
+            job.status = StatusJob.FALHOU
+            job.finalizado_em = agora
+
+        query = """
+            UPDATE jobs
+            SET status = ?, erro = ?, disponivel_em = ?,
+                finalizado_em = ?, updated_at = ?
+            WHERE id = ?
+        """
+        self.db.execute(
+            query,
+            (
+                job.status.value, erro, job.disponivel_em,
+                job.finalizado_em, agora, job.id
+            )
+        )
+        return job
+
+    def buscar_por_entidade(self, entidade: EntidadeJob, entidade_id: int) -> List[Job]:
+        """
+        Busca todos os jobs de um documento ou certidão
+        """
+        query = "SELECT * FROM jobs WHERE entidade = ? AND entidade_id = ? ORDER BY id"
+        results = self.db.fetch_all(query, (entidade.value, entidade_id))
+        return [self._row_to_job(row) for row in results]
+
+    def recuperar_orfaos(self, timeout_segundos: int) -> int:
+        """
+        Devolve para a fila jobs presos em execução (ex.: worker reiniciado)
+        """
+        agora = datetime.now()
+        query = """
+            UPDATE jobs
+            SET status = ?, worker = NULL, disponivel_em = ?, updated_at = ?
+            WHERE status = ? AND iniciado_em <= ?
+            RETURNING id
+        """
+        with self.db.transacao() as transacao:
+            recuperados = transacao.fetch_all(
+                query,
+                (
+                    StatusJob.PENDENTE.value, agora, agora,
+                    StatusJob.EXECUTANDO.value,
+                    agora - timedelta(seconds=timeout_segundos)
+                )
+            )
+        return len(recuperados)
+
+    def contar_pendentes(self) -> int:
+        """
+        Retorna a quantidade de jobs aguardando execução
+        """
+        query = "SELECT COUNT(*) AS total FROM jobs WHERE status = ?"
+        result = self.db.fetch_one(query, (StatusJob.PENDENTE.value,))
+        return result['total'] if result else 0
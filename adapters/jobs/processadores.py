@@ -0,0 +1,180 @@
+import io
+import os
+import base64
+import hashlib
+from typing import Dict, Any, Optional
+from core.entities.job import Job, TipoJob, EntidadeJob
+from core.entities.certidao import StatusCertidao
+from ports.interfaces.Idocumento import IDocumentoRepository
+from ports.interfaces.Icertidao import ICertidaoRepository
+from ports.interfaces.Ibusca import IIndiceBusca
+from ports.interfaces.Iarmazenamento import IArmazenamento
+from adapters.armazenamento.local import ArmazenamentoLocal
+from adapters.busca.extracao import extrair_texto
+from adapters.integridade.verificador import verificar_conteudo
+from adapters.integridade.pipeline import PipelineIntegridade
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele as miniaturas não são geradas
+    Image = None
+
+TAMANHO_MINIATURA = (256, 256)
+
+class ProcessadoresUpload:
+    """
+    Processamentos executados de forma assíncrona após o upload de arquivos
+    """
+    def __init__(
+        self,
+        documento_repo: IDocumentoRepository,
+        certidao_repo: ICertidaoRepository,
+        integridade: Optional[PipelineIntegridade] = None,
+        indice: Optional[IIndiceBusca] = None,
+        armazenamento: Optional[IArmazenamento] = None
+    ):
+        self.documento_repo = documento_repo
+        self.certidao_repo = certidao_repo
+        self.integridade = integridade
+        self.indice = indice
+        self.armazenamento = armazenamento or ArmazenamentoLocal()
+
+    def registrar(self) -> Dict[TipoJob, Any]:
+        """
+        Retorna o mapeamento tipo de job -> processador
+        """
+        return {
+            TipoJob.HASH: self.calcular_hash,
+            TipoJob.INTEGRIDADE: self.verificar_integridade,
+            TipoJob.MINIATURA: self.gerar_miniatura,
+            TipoJob.STATUS_CERTIDAO: self.extrair_status_certidao,
+            TipoJob.TEXTO: self.indexar_texto,
+        }
+
+    def _caminho_arquivo(self, job: Job) -> str:
+        """
+        Resolve o caminho do arquivo associado ao job
+        """
+        if job.entidade == EntidadeJob.DOCUMENTO:
+            entidade = self.documento_repo.buscar_por_id(job.entidade_id)
+        else:
+            entidade = self.certidao_repo.buscar_por_id(job.entidade_id)
+
+        if not entidade:
+            raise ValueError(f"{job.entidade.value.title()} {job.entidade_id} não encontrado(a)")
+        if not self.armazenamento.existe(entidade.arquivo_url):
+            raise ValueError(f"Arquivo não encontrado: {entidade.arquivo_url}")
+        return entidade.arquivo_url
+
+    def calcular_hash(self, job: Job) -> Dict[str, Any]:
+        """
+        Calcula o SHA-256 do arquivo em blocos, sem carregá-lo inteiro na memória
+        """
+        caminho = self._caminho_arquivo(job)
+        sha256 = hashlib.sha256()
+        tamanho = 0
+        with self.armazenamento.abrir(caminho) as arquivo:
+            for bloco in iter(lambda: arquivo.read(64 * 1024), b''):
+                sha256.update(bloco)
+                tamanho += len(bloco)
+        return {'sha256': sha256.hexdigest(), 'tamanho': tamanho}
+
+    def verificar_integridade(self, job: Job) -> Dict[str, Any]:
+        """
+        Verifica a estrutura do arquivo (PDF, PNG ou JPEG) no pool de
+        processos de integridade, quando configurado
+        """
+        # O arquivo pode estar compactado ou em um armazenamento remoto:
+        # a verificação é feita sobre o conteúdo
+        arquivo_url = self._caminho_arquivo(job)
+        if not self.armazenamento.existe(arquivo_url):
+            raise ValueError(f"Arquivo não encontrado: {arquivo_url}")
+        conteudo = self.armazenamento.ler(arquivo_url)
+        if self.integridade:
+            resultado = self.integridade.verificar(conteudo=conteudo)
+        else:
+            resultado = verificar_conteudo(conteudo)
+        if not resultado['valido']:
+            raise ValueError(resultado['erros'])
+
+        detalhes = {k: v for k, v in resultado.items() if k not in ('valido', 'erros')}
+        return {'verificado': True, **detalhes}
+
+    def gerar_miniatura(self, job: Job) -> Dict[str, Any]:
+        """
+        Gera miniatura PNG para documentos de imagem
+        """
+        caminho = self._caminho_arquivo(job)
+        nome_base, extensao = os.path.splitext(caminho)
+        if extensao.lower() not in ('.jpg', '.jpeg', '.png'):
+            return {'gerada': False, 'motivo': 'Miniatura disponível apenas para imagens'}
+        if Image is None:
+            return {'gerada': False, 'motivo': 'Pillow não instalado'}
+
+        caminho_miniatura = f"{nome_base}_miniatura.png"
+        # O Pillow precisa de um arquivo com seek, o que streams remotos não têm
+        miniatura = io.BytesIO()
+        with Image.open(io.BytesIO(self.armazenamento.ler(caminho))) as imagem:
+            imagem.thumbnail(TAMANHO_MINIATURA)
+            imagem.save(miniatura, 'PNG')
+        miniatura.seek(0)
+        self.armazenamento.salvar(caminho_miniatura, miniatura, 'image/png')
+        return {'gerada': True, 'arquivo_url': caminho_miniatura}
+
+    def extrair_status_certidao(self, job: Job) -> Dict[str, Any]:
+        """
+        Carrega o conteúdo da certidão e extrai o status a partir do texto
+        """
+        certidao = self.certidao_repo.buscar_por_id(job.entidade_id)
+        if not certidao:
+            raise ValueError(f"Certidão {job.entidade_id} não encontrada")
+
+        arquivo_url = certidao.arquivo_url
+        if not self.armazenamento.existe(arquivo_url):
+            raise ValueError(f"Arquivo não encontrado: {arquivo_url}")
+        conteudo = self.armazenamento.ler(arquivo_url)
+
+        # PDFs costumam ter o texto comprimido: o status é procurado no texto extraído
+        texto = (extrair_texto(conteudo) or conteudo.decode('latin-1')).lower()
+        if 'nada consta' in texto or 'negativa' in texto:
+            status = StatusCertidao.NEGATIVA
+        elif 'positiva' in texto:
+            status = StatusCertidao.POSITIVA
+        else:
+            status = certidao.status
+
+        certidao.status = status
+        certidao.conteudo_base64 = base64.b64encode(conteudo).decode()
+        # Se a certidão foi substituída enquanto o arquivo era lido, o
+        # status extraído não vale para o arquivo atual
+        if self.certidao_repo.atualizar(certidao, arquivo_esperado=arquivo_url) is None:
+            return {'status': status.value, 'descartado': True}
+        return {'status': status.value}
+
+    def indexar_texto(self, job: Job) -> Dict[str, Any]:
+        """
+        Extrai o texto do arquivo (ou do conteúdo recebido da API, no caso
+        de certidões) e o grava no índice de busca
+        """
+        if self.indice is None:
+            return {'indexado': False, 'motivo': 'Índice de busca não configurado'}
+
+        if job.entidade == EntidadeJob.CERTIDAO:
+            entidade = self.certidao_repo.buscar_por_id(job.entidade_id)
+        else:
+            entidade = self.documento_repo.buscar_por_id(job.entidade_id)
+        if not entidade:
+            raise ValueError(f"{job.entidade.value.title()} {job.entidade_id} não encontrado(a)")
+
+        if self.armazenamento.existe(entidade.arquivo_url):
+            conteudo = self.armazenamento.ler(entidade.arquivo_url)
+        elif getattr(entidade, 'conteudo_base64', None):
+            conteudo = base64.b64decode(entidade.conteudo_base64)
+        else:
+            raise ValueError(f"Arquivo não encontrado: {entidade.arquivo_url}")
+
+        texto = extrair_texto(conteudo)
+        if texto is None:
+            return {'indexado': False, 'motivo': 'Formato sem texto extraível'}
+        self.indice.indexar(job.entidade, job.entidade_id, entidade.credor_id, texto)
+        return {'indexado': True, 'caracteres': len(texto)}
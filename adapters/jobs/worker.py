@@ -0,0 +1,114 @@
+import os
+import threading
+import traceback
+from typing import Callable, Dict, List, Any
+from core.entities.job import Job, TipoJob
+from ports.interfaces.Ifila import IFilaJobs
+
+Processador = Callable[[Job], Dict[str, Any]]
+
+class PoolWorkers:
+    """
+    Pool de threads que consome a fila de jobs persistente
+    """
+    def __init__(
+        self,
+        fila: IFilaJobs,
+        processadores: Dict[TipoJob, Processador],
+        num_workers: int = 2,
+        intervalo_ociosidade: float = 1.0,
+        timeout_orfaos_segundos: int = 300
+    ):
+        self.fila = fila
+        self.processadores = processadores
+        self.num_workers = num_workers
+        self.intervalo_ociosidade = intervalo_ociosidade
+        self.timeout_orfaos_segundos = timeout_orfaos_segundos
+        self._threads: List[threading.Thread] = []
+        self._parar = threading.Event()
+        self._novo_job = threading.Event()
+
+    @property
+    def rodando(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def estatisticas(self) -> dict:
+        return {
+            'workers': self.num_workers,
+            'vivos': sum(thread.is_alive() for thread in self._threads)
+        }
+
+    def iniciar(self):
+        """
+        Recupera jobs órfãos e inicia as threads de processamento
+        """
+        if self.rodando:
+            return
+
+        recuperados = self.fila.recuperar_orfaos(self.timeout_orfaos_segundos)
+        if recuperados:
+            print(f"Jobs órfãos devolvidos para a fila: {recuperados}")
+
+        self._parar.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._executar,
+                name=f"job-worker-{os.getpid()}-{indice}",
+                daemon=True
+            )
+            for indice in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def parar(self, timeout: float = 5.0):
+        """
+        Sinaliza as threads para encerrar e aguarda o término
+        """
+        self._parar.set()
+        self._novo_job.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notificar(self):
+        """
+        Acorda os workers ociosos após um novo job ser enfileirado
+        """
+        self._novo_job.set()
+
+    def processar(self, job: Job):
+        """
+        Executa um job e registra o resultado na fila
+        """
+        processador = self.processadores.get(job.tipo)
+        if not processador:
+            self.fila.falhar(job, f"Nenhum processador registrado para {job.tipo.value}")
+            return
+
+        try:
+            resultado = processador(job)
+            self.fila.concluir(job, resultado or {})
+        except Exception as e:
+            print(f"Erro ao processar job {job.id} ({job.tipo.value}): {str(e)}")
+            print(traceback.format_exc())
+            self.fila.falhar(job, str(e))
+
+    def _executar(self):
+        """
+        Loop principal de cada worker
+        """
+        nome = threading.current_thread().name
+        while not self._parar.is_set():
+            try:
+                job = self.fila.reservar_proximo(nome)
+            except Exception as e:
+                print(f"Erro ao reservar job: {str(e)}")
+                job = None
+
+            if job:
+                self.processar(job)
+                continue
+
+            self._novo_job.wait(self.intervalo_ociosidade)
+            self._novo_job.clear()
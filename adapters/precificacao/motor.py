@@ -0,0 +1,314 @@
+import bisect
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from core.entities.precificacao import ParametrosPrecificacao
+from ports.interfaces.Idatabase import IDatabase
+from adapters.eventos.outbox import CursorExpiradoError, FluxoEventos
+
+# NumPy é opcional (sem ele o cálculo é feito linha a linha em Python) e só
+# é importado no primeiro cálculo, não na inicialização da aplicação
+_NAO_IMPORTADO = object()
+np: Any = _NAO_IMPORTADO
+
+DIAS_ANO = 365.25
+DIAS_MES = DIAS_ANO / 12
+# Registros lidos do banco por vez ao montar as colunas
+TAMANHO_LOTE = 10000
+CONSULTA = "SELECT id, credor_id, valor_nominal, foro, data_publicacao FROM precatorios ORDER BY id"
+# Eventos do outbox que mudam os precatórios carregados
+TIPOS_EVENTO = [
+    "credor.criado", "credor.removido",
+    "precatorio.criado", "precatorio.atualizado", "precatorio.removido",
+]
+
+def _numpy():
+    """
+    O módulo numpy, importado na primeira chamada, ou None se não estiver
+    instalado
+    """
+    global np
+    if np is _NAO_IMPORTADO:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+def _dia(valor: Any) -> str:
+    """
+    Data AAAA-MM-DD de um valor lido do banco (texto no SQLite,
+    date/datetime nos demais bancos)
+    """
+    if isinstance(valor, str):
+        return valor[:10]
+    return valor.isoformat()[:10]
+
+def _interpolar(x: float, xs: List[float], ys: List[float]) -> float:
+    """
+    Interpolação linear com extremos constantes, como numpy.interp
+    """
+    if x <= xs[0]:
+        return ys[0]
+    if x >= xs[-1]:
+        return ys[-1]
+    indice = bisect.bisect_right(xs, x)
+    x0, x1, y0, y1 = xs[indice - 1], xs[indice], ys[indice - 1], ys[indice]
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+class ColunasPrecatorios:
+    """
+    Precatórios em colunas, em ordem de id: um array NumPy por campo (ou
+    listas, sem NumPy). O foro vira um código inteiro que indexa `foros`,
+    para que os parâmetros de cada foro sejam aplicados por indexação
+    """
+    def __init__(self, ids, credor_ids, valores, codigos_foro, foros: List[str], publicacao):
+        self.ids = ids
+        self.credor_ids = credor_ids
+        self.valores = valores
+        self.codigos_foro = codigos_foro
+        self.foros = foros
+        self.publicacao = publicacao
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def carregar(cls, db: IDatabase) -> "ColunasPrecatorios":
+        ids, credor_ids, valores, codigos, dias = [], [], [], [], []
+        indices: Dict[str, int] = {}
+        for row in db.iterar(CONSULTA, tamanho_lote=TAMANHO_LOTE):
+            ids.append(row['id'])
+            credor_ids.append(row['credor_id'])
+            valores.append(float(row['valor_nominal']))
+            codigos.append(indices.setdefault(row['foro'], len(indices)))
+            dias.append(_dia(row['data_publicacao']))
+        foros = list(indices)
+
+        if _numpy() is None:
+            return cls(ids, credor_ids, valores, codigos, foros, [date.fromisoformat(dia) for dia in dias])
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(credor_ids, dtype=np.int64),
+            np.array(valores, dtype=np.float64),
+            np.array(codigos, dtype=np.int32),
+            foros,
+            np.array(dias, dtype="datetime64[D]")
+        )
+
+
+class Avaliacao:
+    """
+    Resultado da precificação, coluna a coluna, alinhado com as colunas de
+    entrada: data esperada de pagamento, prazo até ela (anos), valor
+    corrigido no pagamento e valor presente na data-base
+    """
+    def __init__(self, colunas: ColunasPrecatorios, data_base: date, pagamento, prazo_anos, corrigido, presente, vetorizada: bool):
+        self.colunas = colunas
+        self.data_base = data_base
+        self.pagamento = pagamento
+        self.prazo_anos = prazo_anos
+        self.corrigido = corrigido
+        self.presente = presente
+        self.vetorizada = vetorizada
+
+    def _somar_por_foro(self, valores=None) -> List[float]:
+        """
+        Soma os valores (ou conta os precatórios, sem valores) por foro
+        """
+        codigos = self.colunas.codigos_foro
+        if self.vetorizada:
+            return np.bincount(codigos, weights=valores, minlength=len(self.colunas.foros)).tolist()
+        somas = [0.0] * len(self.colunas.foros)
+        for indice, codigo in enumerate(codigos):
+            somas[codigo] += 1 if valores is None else valores[indice]
+        return somas
+
+    def resumo(self) -> Dict[str, Any]:
+        """
+        Totais da carteira e por foro
+        """
+        quantidades = self._somar_por_foro()
+        nominais = self._somar_por_foro(self.colunas.valores)
+        presentes = self._somar_por_foro(self.presente)
+        # Prazo médio ponderado pelo valor presente
+        if self.vetorizada:
+            ponderado = float(np.dot(self.prazo_anos, self.presente))
+        else:
+            ponderado = sum(prazo * valor for prazo, valor in zip(self.prazo_anos, self.presente))
+        total_presente = sum(presentes)
+        return {
+            "data_base": self.data_base,
+            "quantidade": len(self.colunas),
+            "valor_nominal": round(sum(nominais), 2),
+            "valor_presente": round(total_presente, 2),
+            "prazo_medio_anos": round(ponderado / total_presente, 4) if total_presente else None,
+            "por_foro": [
+                {
+                    "foro": foro,
+                    "quantidade": int(quantidades[codigo]),
+                    "valor_nominal": round(nominais[codigo], 2),
+                    "valor_presente": round(presentes[codigo], 2),
+                }
+                for codigo, foro in enumerate(self.colunas.foros)
+                if quantidades[codigo]
+            ],
+        }
+
+    def itens(self, apos: int = 0, limite: int = 100) -> List[Dict[str, Any]]:
+        """
+        Precatórios precificados em ordem de id, a partir de `apos`
+        """
+        colunas = self.colunas
+        if self.vetorizada:
+            inicio = int(np.searchsorted(colunas.ids, apos, side="right"))
+        else:
+            inicio = bisect.bisect_right(colunas.ids, apos)
+        fim = min(inicio + limite, len(colunas))
+        return [
+            {
+                "id": int(colunas.ids[i]),
+                "credor_id": int(colunas.credor_ids[i]),
+                "foro": colunas.foros[colunas.codigos_foro[i]],
+                "valor_nominal": round(float(colunas.valores[i]), 2),
+                "data_publicacao": str(colunas.publicacao[i]),
+                "data_pagamento_esperada": str(self.pagamento[i]),
+                "prazo_anos": round(float(self.prazo_anos[i]), 4),
+                "valor_corrigido": round(float(self.corrigido[i]), 2),
+                "valor_presente": round(float(self.presente[i]), 2),
+            }
+            for i in range(inicio, fim)
+        ]
+
+
+def _filtrar(colunas: ColunasPrecatorios, foro: str) -> ColunasPrecatorios:
+    chave = ParametrosPrecificacao.chave_foro(foro)
+    codigos = [codigo for codigo, nome in enumerate(colunas.foros) if ParametrosPrecificacao.chave_foro(nome) == chave]
+    if _numpy() is not None:
+        mascara = np.isin(colunas.codigos_foro, codigos)
+        return ColunasPrecatorios(
+            colunas.ids[mascara], colunas.credor_ids[mascara], colunas.valores[mascara],
+            colunas.codigos_foro[mascara], colunas.foros, colunas.publicacao[mascara]
+        )
+    linhas = [i for i, codigo in enumerate(colunas.codigos_foro) if codigo in codigos]
+    return ColunasPrecatorios(
+        *([coluna[i] for i in linhas] for coluna in (colunas.ids, colunas.credor_ids, colunas.valores, colunas.codigos_foro)),
+        colunas.foros,
+        [colunas.publicacao[i] for i in linhas]
+    )
+
+
+def precificar(colunas: ColunasPrecatorios, parametros: ParametrosPrecificacao, data_base: date) -> Avaliacao:
+    """
+    Valor presente de cada precatório na data-base.
+
+    - Pagamento esperado: publicação mais o atraso médio da fila do foro;
+      se essa data já passou, a data-base (o precatório está atrasado)
+    - Valor corrigido: valor nominal com a correção anual da publicação
+      até o pagamento
+    - Valor presente: valor corrigido descontado pela taxa da curva no
+      prazo até o pagamento, mais o spread do foro
+    """
+    por_foro = [parametros.do_foro(foro) for foro in colunas.foros]
+    curva = parametros.curva
+    if _numpy() is None:
+        return _precificar_python(colunas, parametros, por_foro, data_base)
+
+    atraso_dias = np.round(np.array([p.atraso_meses for p in por_foro]) * DIAS_MES).astype("timedelta64[D]")
+    spread = np.array([p.spread for p in por_foro])
+    base = np.datetime64(data_base, "D")
+
+    pagamento = np.maximum(colunas.publicacao + atraso_dias[colunas.codigos_foro], base)
+    prazo_anos = (pagamento - base).astype(np.float64) / DIAS_ANO
+    anos_correcao = (pagamento - colunas.publicacao).astype(np.float64) / DIAS_ANO
+    corrigido = colunas.valores * (1 + parametros.correcao_anual) ** anos_correcao
+    taxa = np.interp(prazo_anos, curva.prazos_anos, curva.taxas) + spread[colunas.codigos_foro]
+    presente = corrigido / (1 + taxa) ** prazo_anos
+    return Avaliacao(colunas, data_base, pagamento, prazo_anos, corrigido, presente, vetorizada=True)
+
+
+def _precificar_python(colunas, parametros, por_foro, data_base: date) -> Avaliacao:
+    atrasos = [timedelta(days=round(p.atraso_meses * DIAS_MES)) for p in por_foro]
+    curva = parametros.curva
+    pagamento, prazo_anos, corrigido, presente = [], [], [], []
+    for valor, codigo, publicacao in zip(colunas.valores, colunas.codigos_foro, colunas.publicacao):
+        data = max(publicacao + atrasos[codigo], data_base)
+        prazo = (data - data_base).days / DIAS_ANO
+        valor_corrigido = valor * (1 + parametros.correcao_anual) ** ((data - publicacao).days / DIAS_ANO)
+        taxa = _interpolar(prazo, curva.prazos_anos, curva.taxas) + por_foro[codigo].spread
+        pagamento.append(data)
+        prazo_anos.append(prazo)
+        corrigido.append(valor_corrigido)
+        presente.append(valor_corrigido / (1 + taxa) ** prazo)
+    return Avaliacao(colunas, data_base, pagamento, prazo_anos, corrigido, presente, vetorizada=False)
+
+
+class MotorPrecificacao:
+    """
+    Precificação da carteira de precatórios. As colunas ficam em memória e
+    só são recarregadas do banco quando o outbox registra um evento que
+    altera precatórios (ver adapters/eventos/outbox.py), então avaliações
+    seguidas com outra data-base, foro ou página não voltam ao banco, nem
+    as que seguem eventos de documentos ou certidões
+    """
+    def __init__(self, db: IDatabase, parametros: ParametrosPrecificacao, fluxo: Optional[FluxoEventos] = None):
+        erros = parametros.validar()
+        if erros:
+            raise ValueError(f"Parâmetros de precificação inválidos: {erros}")
+        self.db = db
+        self.parametros = parametros
+        self.fluxo = fluxo
+        self._lock = threading.Lock()
+        self._colunas: Optional[ColunasPrecatorios] = None
+        self._versao: Optional[int] = None
+        self.carregamentos = 0
+        self.ultimo_carregamento_ms = 0.0
+        self.ultimo_calculo_ms = 0.0
+
+    def _desatualizadas(self) -> bool:
+        """
+        Se houve evento de precatório desde a última carga. Eventos de
+        outros tipos só avançam o cursor
+        """
+        if self._colunas is None or self.fluxo is None:
+            return True
+        try:
+            eventos, cursor = self.fluxo.buscar(self._versao, 1, tipos=TIPOS_EVENTO)
+        except CursorExpiradoError:
+            return True
+        if eventos:
+            return True
+        self._versao = cursor
+        return False
+
+    def colunas(self) -> ColunasPrecatorios:
+        with self._lock:
+            if self._desatualizadas():
+                inicio = time.perf_counter()
+                # Lido antes da carga: eventos posteriores provocam outra carga
+                self._versao = self.fluxo.ultimo_id() if self.fluxo else None
+                self._colunas = ColunasPrecatorios.carregar(self.db)
+                self.carregamentos += 1
+                self.ultimo_carregamento_ms = (time.perf_counter() - inicio) * 1000
+            return self._colunas
+
+    def avaliar(self, data_base: Optional[date] = None, foro: Optional[str] = None) -> Avaliacao:
+        colunas = self.colunas()
+        if foro:
+            colunas = _filtrar(colunas, foro)
+        inicio = time.perf_counter()
+        avaliacao = precificar(colunas, self.parametros, data_base or datetime.now().date())
+        self.ultimo_calculo_ms = (time.perf_counter() - inicio) * 1000
+        return avaliacao
+
+    def estatisticas(self) -> dict:
+        return {
+            'vetorizada': _numpy() is not None,
+            'precatorios': len(self._colunas) if self._colunas is not None else None,
+            'carregamentos': self.carregamentos,
+            'ultimo_carregamento_ms': round(self.ultimo_carregamento_ms, 2),
+            'ultimo_calculo_ms': round(self.ultimo_calculo_ms, 2),
+        }
@@ -1,27 +1,38 @@
 import os
 import json
 import base64
-from typing import Optional, List, Dict, BinaryIO
+from typing import Optional, List, Dict, BinaryIO, Tuple
 from datetime import datetime, timedelta
 import hashlib
-import requests
+import uuid
 import asyncio
-from apscheduler.schedulers.background import BackgroundScheduler
 from core.entities.certidao import (
     Certidao, TipoCertidao, OrigemCertidao, StatusCertidao
 )
 from ports.interfaces.Icertidao import ICertidaoRepository, ICertidaoApiService
-from ports.database.database import Database
+from ports.interfaces.Iarmazenamento import IArmazenamento
+from ports.interfaces.Idatabase import IDatabase, ITransacao
+from ports.database.conversao import para_datetime
+from adapters.armazenamento.local import ArmazenamentoLocal
+from adapters.integridade.verificador import verificar_conteudo
+from adapters.integridade.pipeline import PipelineIntegridade
+from adapters.eventos.outbox import registrar_evento
 
 class CertidaoApiMock(ICertidaoApiService):
     """
     Mock da API de certidões
     """
-    def __init__(self):
-        self.db: Optional[Database] = None
-        self.scheduler = BackgroundScheduler()
+    def __init__(self, antecedencia_dias: int = 5, intervalo_horas: float = 24):
+        self.db: Optional[IDatabase] = None
+        # Varredura avulsa: certidões que vencem em até `antecedencia_dias`,
+        # a cada `intervalo_horas`
+        self.antecedencia_dias = antecedencia_dias
+        self.intervalo_horas = intervalo_horas
+        # Criado apenas ao iniciar a revalidação, para não carregar o
+        # APScheduler na importação da aplicação
+        self.scheduler = None
         
-    def set_database(self, database: Database):
+    def set_database(self, database: IDatabase):
         """
         Configura a conexão com o banco de dados
         """
@@ -50,7 +61,8 @@ class CertidaoApiMock(ICertidaoApiService):
                 "status": status[hash_value % len(status)],
                 "conteudo_base64": base64.b64encode(
                     f"Certidão {tipo.title()} para {cpf_cnpj}".encode()
-                ).decode()
+                ).decode(),
+                "valida_ate": Certidao.validade_padrao().isoformat()
             })
         
         return certidoes
@@ -71,14 +83,16 @@ class CertidaoApiMock(ICertidaoApiService):
         if not self.db:
             raise ValueError("Database não configurada")
 
-        # Busca certidões que vencem em até 5 dias
+        # Busca certidões que vencem em até `antecedencia_dias` dias
+        # (datas calculadas em Python para funcionar em qualquer backend)
+        agora = datetime.now()
         query = """
-            SELECT id FROM certidoes 
-            WHERE valida_ate <= datetime('now', '+5 days')
-            AND valida_ate >= datetime('now')
+            SELECT id, credor_id, tipo FROM certidoes 
+            WHERE valida_ate <= ?
+            AND valida_ate >= ?
         """
         
-        results = self.db.fetch_all(query)
+        results = self.db.fetch_all(query, (agora + timedelta(days=self.antecedencia_dias), agora))
         quantidade = 0
         
         for row in results:
@@ -88,24 +102,38 @@ class CertidaoApiMock(ICertidaoApiService):
             # Atualiza status e validade
             update_query = """
                 UPDATE certidoes
-                SET status = ?, valida_ate = datetime('now', '+30 days')
+                SET status = ?, valida_ate = ?
                 WHERE id = ?
             """
-            
-            self.db.execute(update_query, (novo_status.value, certidao_id))
+            valida_ate = Certidao.validade_padrao()
+            with self.db.transacao() as transacao:
+                transacao.execute(update_query, (novo_status.value, valida_ate, certidao_id))
+                registrar_evento(transacao, 'certidao.atualizada', row['credor_id'], certidao_id, {
+                    'tipo': row['tipo'],
+                    'status': novo_status.value,
+                    'valida_ate': valida_ate
+                })
             quantidade += 1
             
         return quantidade
 
     def iniciar_revalidacao_periodica(self):
         """
-        Inicia o job periódico de revalidação usando APScheduler
+        Inicia a varredura periódica de revalidação (a cada
+        `intervalo_horas`) usando APScheduler.
+        A aplicação usa o agendador por vencimento
+        (adapters/certidoes/revalidacao.py); esta varredura fica disponível
+        para execuções avulsas
         """
-        if not self.scheduler.running:
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        if not self.scheduler or not self.scheduler.running:
+            # Um scheduler encerrado não pode ser reiniciado
+            self.scheduler = BackgroundScheduler()
             self.scheduler.add_job(
                 self.revalidar_certidoes_vencidas,
                 'interval',
-                hours=24,
+                hours=self.intervalo_horas,
                 id='revalidacao_certidoes'
             )
             self.scheduler.start()
@@ -114,40 +142,96 @@ class CertidaoApiMock(ICertidaoApiService):
         """
         Para o job periódico de revalidação
         """
-        if self.scheduler.running:
-            self.scheduler.shutdown()
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
 
 class CertidaoRepository(ICertidaoRepository):
-    def __init__(self, database: Database, upload_dir: str = "uploads/certidoes"):
+    def __init__(
+        self,
+        database: IDatabase,
+        upload_dir: str = "uploads/certidoes",
+        integridade: Optional[PipelineIntegridade] = None,
+        armazenamento: Optional[IArmazenamento] = None
+    ):
         self.db = database
         self.upload_dir = upload_dir
+        self.integridade = integridade
+        self.armazenamento = armazenamento or ArmazenamentoLocal()
         self.api_service = CertidaoApiMock()
         self.api_service.set_database(database)
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Inicia job de revalidação
-        self.api_service.iniciar_revalidacao_periodica()
+        self._observadores = []
+
+    def adicionar_observador(self, observador):
+        """
+        Registra um objeto notificado após cada gravação confirmada
+        (`certidao_gravada(certidao)`) e remoção (`certidao_removida(id)`)
+        """
+        self._observadores.append(observador)
+
+    def _notificar(self, evento: str, *args):
+        for observador in self._observadores:
+            try:
+                getattr(observador, evento)(*args)
+            except Exception as e:
+                print(f"Erro ao notificar observador de certidões: {str(e)}")
 
     def _salvar_arquivo(self, arquivo: BinaryIO, nome_arquivo: str) -> str:
         """
-        Salva o arquivo no sistema de arquivos e retorna o caminho
+        Salva o arquivo no armazenamento e retorna o caminho (chave)
         """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         nome_base, extensao = os.path.splitext(nome_arquivo)
-        hash_nome = hashlib.md5(f"{nome_base}{timestamp}".encode()).hexdigest()
+        # O sufixo aleatório evita que dois uploads com o mesmo nome no mesmo
+        # segundo gravem no mesmo arquivo
+        hash_nome = hashlib.md5(f"{nome_base}{timestamp}{uuid.uuid4().hex}".encode()).hexdigest()
         novo_nome = f"{hash_nome}{extensao}"
         
         caminho_arquivo = os.path.join(self.upload_dir, novo_nome)
-        
-        with open(caminho_arquivo, 'wb') as destino:
-            arquivo.seek(0)
-            destino.write(arquivo.read())
-            
-        return caminho_arquivo
+        arquivo.seek(0)  # Volta para o início do arquivo
+        return self.armazenamento.salvar(caminho_arquivo, arquivo)
+
+    def _registrar_historico(self, transacao: ITransacao, certidao: Certidao):
+        """
+        Acrescenta a versão atual da certidão ao histórico (append-only).
+        O conteúdo em base64 não é copiado: o histórico guarda apenas
+        status, validade e a referência ao arquivo
+        """
+        query = """
+            INSERT INTO certidoes_historico (
+                certidao_id, credor_id, tipo, origem, arquivo_url,
+                status, recebida_em, valida_ate, registrada_em
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        transacao.execute(
+            query,
+            (
+                certidao.id, certidao.credor_id, certidao.tipo.value,
+                certidao.origem.value, certidao.arquivo_url,
+                certidao.status.value, certidao.recebida_em,
+                certidao.valida_ate, datetime.now()
+            )
+        )
+
+    def _registrar_evento(self, transacao: ITransacao, certidao: Certidao):
+        """
+        Evento com o estado corrente da certidão (sem o conteúdo do arquivo)
+        """
+        registrar_evento(transacao, 'certidao.atualizada', certidao.credor_id, certidao.id, {
+            'tipo': certidao.tipo.value,
+            'origem': certidao.origem.value,
+            'status': certidao.status.value,
+            'arquivo_url': certidao.arquivo_url,
+            'recebida_em': certidao.recebida_em,
+            'valida_ate': certidao.valida_ate
+        })
 
     def criar(self, certidao: Certidao, arquivo: Optional[BinaryIO] = None) -> Certidao:
         """
-        Cria uma nova certidão, opcionalmente com arquivo anexo
+        Grava a certidão corrente do credor para o tipo, opcionalmente com
+        arquivo anexo. Se o credor já possui uma certidão desse tipo ela é
+        substituída no lugar (mesmo id) e a nova versão vai para o histórico.
+        Um resultado da API não substitui uma certidão enviada manualmente:
+        nesse caso nada é gravado e a certidão manual é retornada
         """
         if arquivo:
             erros = self.validar_arquivo(arquivo, arquivo.filename)
@@ -155,24 +239,46 @@ class CertidaoRepository(ICertidaoRepository):
                 raise ValueError(erros)
             certidao.arquivo_url = self._salvar_arquivo(arquivo, arquivo.filename)
 
+        certidao.valida_ate = certidao.valida_ate or Certidao.validade_padrao()
         query = """
             INSERT INTO certidoes (
                 credor_id, tipo, origem, arquivo_url,
                 conteudo_base64, status, recebida_em,
                 valida_ate
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        certidao_id = self.db.execute(
-            query,
-            (
-                certidao.credor_id, certidao.tipo.value,
-                certidao.origem.value, certidao.arquivo_url,
-                certidao.conteudo_base64, certidao.status.value,
-                certidao.recebida_em,
-                certidao.valida_ate or (datetime.now() + timedelta(days=30))
+            ON CONFLICT (credor_id, tipo) DO UPDATE SET
+                origem = excluded.origem,
+                arquivo_url = excluded.arquivo_url,
+                conteudo_base64 = excluded.conteudo_base64,
+                status = excluded.status,
+                recebida_em = excluded.recebida_em,
+                valida_ate = excluded.valida_ate,
+                updated_at = excluded.updated_at
+            WHERE NOT (excluded.origem = ? AND certidoes.origem = ?)
+            RETURNING id
+        """
+        with self.db.transacao() as transacao:
+            result = transacao.execute_returning(
+                query,
+                (
+                    certidao.credor_id, certidao.tipo.value,
+                    certidao.origem.value, certidao.arquivo_url,
+                    certidao.conteudo_base64, certidao.status.value,
+                    certidao.recebida_em, certidao.valida_ate,
+                    OrigemCertidao.API.value, OrigemCertidao.MANUAL.value
+                )
             )
-        )
-        certidao.id = certidao_id
+            if result is None:
+                preservada = True
+            else:
+                preservada = False
+                certidao.id = result['id']
+                self._registrar_historico(transacao, certidao)
+                self._registrar_evento(transacao, certidao)
+        if preservada:
+            self.armazenamento.remover(certidao.arquivo_url)
+            return self.buscar_por_tipo(certidao.credor_id, certidao.tipo)
+        self._notificar('certidao_gravada', certidao)
         return certidao
 
     def buscar_por_id(self, certidao_id: int) -> Optional[Certidao]:
@@ -191,8 +297,8 @@ class CertidaoRepository(ICertidaoRepository):
                 arquivo_url=result['arquivo_url'],
                 conteudo_base64=result['conteudo_base64'],
                 status=StatusCertidao(result['status']),
-                recebida_em=datetime.fromisoformat(result['recebida_em']),
-                valida_ate=datetime.fromisoformat(result['valida_ate']) if result['valida_ate'] else None
+                recebida_em=para_datetime(result['recebida_em']),
+                valida_ate=para_datetime(result['valida_ate'])
             )
         return None
 
@@ -212,8 +318,8 @@ class CertidaoRepository(ICertidaoRepository):
                 arquivo_url=row['arquivo_url'],
                 conteudo_base64=row['conteudo_base64'],
                 status=StatusCertidao(row['status']),
-                recebida_em=datetime.fromisoformat(row['recebida_em']),
-                valida_ate=datetime.fromisoformat(row['valida_ate']) if row['valida_ate'] else None
+                recebida_em=para_datetime(row['recebida_em']),
+                valida_ate=para_datetime(row['valida_ate'])
             )
             for row in results
         ]
@@ -234,8 +340,8 @@ class CertidaoRepository(ICertidaoRepository):
                 arquivo_url=result['arquivo_url'],
                 conteudo_base64=result['conteudo_base64'],
                 status=StatusCertidao(result['status']),
-                recebida_em=datetime.fromisoformat(result['recebida_em']),
-                valida_ate=datetime.fromisoformat(result['valida_ate']) if result['valida_ate'] else None
+                recebida_em=para_datetime(result['recebida_em']),
+                valida_ate=para_datetime(result['valida_ate'])
             )
         return None
 
@@ -255,23 +361,30 @@ class CertidaoRepository(ICertidaoRepository):
                 arquivo_url=row['arquivo_url'],
                 conteudo_base64=row['conteudo_base64'],
                 status=StatusCertidao(row['status']),
-                recebida_em=datetime.fromisoformat(row['recebida_em']),
-                valida_ate=datetime.fromisoformat(row['valida_ate']) if row['valida_ate'] else None
+                recebida_em=para_datetime(row['recebida_em']),
+                valida_ate=para_datetime(row['valida_ate'])
             )
             for row in results
         ]
 
-    def atualizar(self, certidao: Certidao, arquivo: Optional[BinaryIO] = None) -> Certidao:
-        """
-        Atualiza os dados de uma certidão e opcionalmente o arquivo
+    def atualizar(
+        self,
+        certidao: Certidao,
+        arquivo: Optional[BinaryIO] = None,
+        arquivo_esperado: Optional[str] = None
+    ) -> Optional[Certidao]:
+        """
+        Atualiza os dados de uma certidão e opcionalmente o arquivo. Com
+        arquivo_esperado a gravação só acontece se a certidão ainda aponta
+        para esse arquivo (ex.: um job que leu o arquivo antes de um novo
+        upload); caso contrário nada é gravado e o retorno é None
         """
         if arquivo:
             erros = self.validar_arquivo(arquivo, arquivo.filename)
             if erros:
                 raise ValueError(erros)
 
-            if os.path.exists(certidao.arquivo_url or ''):
-                os.remove(certidao.arquivo_url)
+            self.armazenamento.remover(certidao.arquivo_url)
 
             certidao.arquivo_url = self._salvar_arquivo(arquivo, arquivo.filename)
 
@@ -282,28 +395,118 @@ class CertidaoRepository(ICertidaoRepository):
                 valida_ate = ?, updated_at = ?
             WHERE id = ?
         """
-        self.db.execute(
-            query,
-            (
-                certidao.tipo.value, certidao.origem.value,
-                certidao.arquivo_url, certidao.conteudo_base64,
-                certidao.status.value, certidao.recebida_em,
-                certidao.valida_ate, datetime.now(),
-                certidao.id
-            )
+        params = (
+            certidao.tipo.value, certidao.origem.value,
+            certidao.arquivo_url, certidao.conteudo_base64,
+            certidao.status.value, certidao.recebida_em,
+            certidao.valida_ate, datetime.now(),
+            certidao.id
         )
+        if arquivo_esperado is not None:
+            query += " AND arquivo_url = ?"
+            params += (arquivo_esperado,)
+        with self.db.transacao() as transacao:
+            if transacao.execute_returning(query + " RETURNING id", params) is None:
+                return None
+            self._registrar_historico(transacao, certidao)
+            self._registrar_evento(transacao, certidao)
+        self._notificar('certidao_gravada', certidao)
         return certidao
 
+    def listar_vencimentos(self) -> List[Tuple[int, Optional[datetime]]]:
+        """
+        Lista (id, valida_ate) de todas as certidões correntes, sem carregar o conteúdo
+        """
+        return [
+            (row['id'], para_datetime(row['valida_ate']))
+            for row in self.db.fetch_all("SELECT id, valida_ate FROM certidoes")
+        ]
+
+    def buscar_historico(self, credor_id: int, tipo: Optional[TipoCertidao] = None) -> List[dict]:
+        """
+        Busca as versões registradas das certidões de um credor, mais recentes primeiro
+        """
+        query = "SELECT * FROM certidoes_historico WHERE credor_id = ?"
+        params = [credor_id]
+        if tipo:
+            query += " AND tipo = ?"
+            params.append(tipo.value)
+        query += " ORDER BY id DESC"
+
+        return [
+            {
+                'certidao_id': row['certidao_id'],
+                'tipo': row['tipo'],
+                'origem': row['origem'],
+                'arquivo_url': row['arquivo_url'],
+                'status': row['status'],
+                'recebida_em': para_datetime(row['recebida_em']),
+                'valida_ate': para_datetime(row['valida_ate']),
+                'registrada_em': para_datetime(row['registrada_em'])
+            }
+            for row in self.db.fetch_all(query, tuple(params))
+        ]
+
+    def compactar_historico(self, retencao_dias: int = 90, manter_minimo: int = 1) -> int:
+        """
+        Remove do histórico as versões mais antigas que o período de retenção,
+        preservando sempre as `manter_minimo` versões mais recentes de cada
+        (credor, tipo). Os arquivos das versões removidas que não são mais
+        referenciados pela certidão corrente nem por outra versão são
+        apagados do armazenamento. Retorna a quantidade de versões removidas
+        """
+        query = """
+            DELETE FROM certidoes_historico
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, registrada_em,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY credor_id, tipo ORDER BY id DESC
+                           ) AS ordem
+                    FROM certidoes_historico
+                ) AS versoes
+                WHERE versoes.registrada_em < ? AND versoes.ordem > ?
+            )
+            RETURNING id, arquivo_url
+        """
+        limite = datetime.now() - timedelta(days=retencao_dias)
+        orfaos = set()
+        with self.db.transacao() as transacao:
+            removidas = transacao.fetch_all(query, (limite, manter_minimo))
+            arquivos = list({row['arquivo_url'] for row in removidas if row['arquivo_url']})
+            for inicio in range(0, len(arquivos), 500):
+                lote = arquivos[inicio:inicio + 500]
+                marcadores = ", ".join("?" * len(lote))
+                referenciados = transacao.fetch_all(
+                    f"SELECT arquivo_url FROM certidoes WHERE arquivo_url IN ({marcadores}) "
+                    f"UNION SELECT arquivo_url FROM certidoes_historico WHERE arquivo_url IN ({marcadores})",
+                    tuple(lote) * 2
+                )
+                orfaos.update(set(lote) - {row['arquivo_url'] for row in referenciados})
+        # Apenas após o commit: se a transação falhar os arquivos continuam referenciados
+        for arquivo_url in orfaos:
+            try:
+                self.armazenamento.remover(arquivo_url)
+            except Exception as e:
+                print(f"Erro ao remover arquivo do histórico de certidões {arquivo_url}: {str(e)}")
+        return len(removidas)
+
     def deletar(self, certidao_id: int) -> bool:
         """
         Deleta uma certidão e seu arquivo
         """
         certidao = self.buscar_por_id(certidao_id)
-        if certidao and certidao.arquivo_url and os.path.exists(certidao.arquivo_url):
-            os.remove(certidao.arquivo_url)
+        if certidao:
+            self.armazenamento.remover(certidao.arquivo_url)
 
         query = "DELETE FROM certidoes WHERE id = ?"
-        self.db.execute(query, (certidao_id,))
+        with self.db.transacao() as transacao:
+            transacao.execute(query, (certidao_id,))
+            if certidao:
+                registrar_evento(transacao, 'certidao.removida', certidao.credor_id, certidao_id, {
+                    'tipo': certidao.tipo.value
+                })
+        self._notificar('certidao_removida', certidao_id)
         return True
 
     def validar_arquivo(self, arquivo: BinaryIO, nome_arquivo: str) -> List[str]:
@@ -314,8 +517,8 @@ class CertidaoRepository(ICertidaoRepository):
         
         # Valida extensão
         _, extensao = os.path.splitext(nome_arquivo.lower())
-        if extensao not in ['.pdf']:
-            erros.append("Apenas arquivos PDF são permitidos")
+        if extensao not in Certidao.extensoes_permitidas():
+            erros.append(f"Extensão não permitida. Use: {Certidao.extensoes_permitidas()}")
 
         # Valida tamanho
         arquivo.seek(0, os.SEEK_END)
@@ -325,6 +528,16 @@ class CertidaoRepository(ICertidaoRepository):
         if tamanho > Certidao.tamanho_maximo():
             erros.append(f"Arquivo muito grande. Máximo: {Certidao.tamanho_maximo()/1024/1024}MB")
 
+        # Valida estrutura (magic bytes, xref e trailer)
+        if not erros:
+            conteudo = arquivo.read()
+            arquivo.seek(0)
+            if self.integridade:
+                resultado = self.integridade.verificar(conteudo=conteudo, tipos_permitidos=['pdf'])
+            else:
+                resultado = verificar_conteudo(conteudo, ['pdf'])
+            erros.extend(resultado['erros'])
+
         return erros
 
     def gerar_url_arquivo(self, certidao_id: int) -> str:
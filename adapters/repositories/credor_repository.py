@@ -1,16 +1,42 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
-from core.entities.credor import Credor
+from core.entities.credor import Credor, normalizar_cpf_cnpj, normalizar_email, classificar_busca
 from core.entities.precatorio import Precatorio
 from core.entities.documento import Documento
 from core.entities.certidao import Certidao
+from adapters.busca.indice import montar_consulta_fts
+from adapters.eventos.outbox import registrar_evento
 from ports.interfaces.Icredor import ICredorRepository
-from ports.database.database import Database
+from ports.interfaces.Idatabase import IDatabase
+
+def _proximo_prefixo(prefixo: str) -> str:
+    """
+    Menor string maior que todas as iniciadas por `prefixo`, para buscas
+    por prefixo como intervalo (usa o índice em qualquer banco)
+    """
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
 
 class CredorRepository(ICredorRepository):
-    def __init__(self, database: Database):
+    def __init__(self, database: IDatabase):
         self.db = database
 
+    def _credor(self, row) -> Credor:
+        return Credor(
+            id=row['id'],
+            nome=row['nome'],
+            cpf_cnpj=row['cpf_cnpj'],
+            email=row['email'],
+            telefone=row['telefone']
+        )
+
+    def _dados_evento(self, credor: Credor) -> dict:
+        return {
+            'nome': credor.nome,
+            'cpf_cnpj': credor.cpf_cnpj,
+            'email': credor.email,
+            'telefone': credor.telefone
+        }
+
     def criar(self, credor: Credor, precatorio: Precatorio) -> Credor:
         """
         Cria um novo credor com seu precatório associado
@@ -20,32 +46,50 @@ class CredorRepository(ICredorRepository):
         if credor_existente:
             raise ValueError(f"Já existe um credor cadastrado com o CPF/CNPJ {credor.cpf_cnpj}")
 
-        # Criar credor
-        credor_query = """
-            INSERT INTO credores (nome, cpf_cnpj, email, telefone)
-            VALUES (?, ?, ?, ?)
-        """
-        credor_id = self.db.execute(
-            credor_query,
-            (credor.nome, credor.cpf_cnpj, credor.email, credor.telefone)
-        )
-        
-        # Criar precatório
-        precatorio.credor_id = credor_id
-        precatorio_query = """
-            INSERT INTO precatorios (
-                credor_id, numero_precatorio, valor_nominal,
-                foro, data_publicacao
-            ) VALUES (?, ?, ?, ?, ?)
-        """
-        self.db.execute(
-            precatorio_query,
-            (
-                credor_id, precatorio.numero_precatorio,
-                float(precatorio.valor_nominal), precatorio.foro,
-                precatorio.data_publicacao
+        # Credor e precatório são gravados na mesma transação
+        with self.db.transacao() as transacao:
+            # Criar credor
+            credor_query = """
+                INSERT INTO credores (
+                    nome, cpf_cnpj, email, telefone,
+                    cpf_cnpj_normalizado, email_normalizado
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+            """
+            credor_id = transacao.execute(
+                credor_query,
+                (
+                    credor.nome, credor.cpf_cnpj, credor.email, credor.telefone,
+                    normalizar_cpf_cnpj(credor.cpf_cnpj), normalizar_email(credor.email)
+                )
             )
-        )
+            
+            # Criar precatório
+            precatorio.credor_id = credor_id
+            precatorio_query = """
+                INSERT INTO precatorios (
+                    credor_id, numero_precatorio, valor_nominal,
+                    foro, data_publicacao
+                ) VALUES (?, ?, ?, ?, ?)
+            """
+            precatorio.id = transacao.execute(
+                precatorio_query,
+                (
+                    credor_id, precatorio.numero_precatorio,
+                    float(precatorio.valor_nominal), precatorio.foro,
+                    precatorio.data_publicacao
+                )
+            )
+            registrar_evento(transacao, 'credor.criado', credor_id, credor_id, {
+                **self._dados_evento(credor),
+                'precatorio': {
+                    'id': precatorio.id,
+                    'numero': precatorio.numero_precatorio,
+                    'valor': precatorio.valor_nominal,
+                    'foro': precatorio.foro,
+                    'data_publicacao': precatorio.data_publicacao
+                }
+            })
         
         credor.id = credor_id
         return credor
@@ -69,21 +113,92 @@ class CredorRepository(ICredorRepository):
 
     def buscar_por_cpf_cnpj(self, cpf_cnpj: str) -> Optional[Credor]:
         """
-        Busca um credor por CPF/CNPJ
+        Busca um credor por CPF/CNPJ, com ou sem pontuação
         """
-        query = "SELECT * FROM credores WHERE cpf_cnpj = ?"
-        result = self.db.fetch_one(query, (cpf_cnpj,))
+        query = "SELECT * FROM credores WHERE cpf_cnpj_normalizado = ?"
+        result = self.db.fetch_one(query, (normalizar_cpf_cnpj(cpf_cnpj),))
         
         if result:
-            return Credor(
-                id=result['id'],
-                nome=result['nome'],
-                cpf_cnpj=result['cpf_cnpj'],
-                email=result['email'],
-                telefone=result['telefone']
-            )
+            return self._credor(result)
         return None
 
+    def _buscar_por_prefixo(self, coluna: str, prefixo: str, limite: int) -> List[Credor]:
+        if not prefixo:
+            return []
+        query = f"""
+            SELECT * FROM credores
+            WHERE {coluna} >= ? AND {coluna} < ?
+            ORDER BY {coluna}
+            LIMIT ?
+        """
+        results = self.db.fetch_all(query, (prefixo, _proximo_prefixo(prefixo), limite))
+        return [self._credor(row) for row in results]
+
+    def buscar_por_prefixo_cpf_cnpj(self, prefixo: str, limite: int = 20) -> List[Credor]:
+        """
+        Busca credores cujo CPF/CNPJ (apenas dígitos) começa pelo prefixo
+        """
+        return self._buscar_por_prefixo('cpf_cnpj_normalizado', normalizar_cpf_cnpj(prefixo), limite)
+
+    def buscar_por_email(self, email: str, limite: int = 20) -> List[Credor]:
+        """
+        Busca credores pelo email (ou início dele), sem distinção de maiúsculas
+        """
+        return self._buscar_por_prefixo('email_normalizado', normalizar_email(email), limite)
+
+    def buscar_por_nome(self, nome: str, limite: int = 20) -> List[Credor]:
+        """
+        Busca credores cujo nome contém as palavras informadas (a última
+        pode estar incompleta), sem distinção de acentos ou maiúsculas
+        """
+        if self.db.dialeto != 'sqlite':
+            return self._buscar_por_nome_like(nome, limite)
+        expressao = montar_consulta_fts(nome)
+        if not expressao:
+            return []
+        # Sem ordenação por relevância: o FTS5 percorre os resultados em
+        # ordem de id e para no limite, sem pontuar todos os nomes. Só o
+        # último termo é prefixo, e prefixos de até 8 letras são lidos
+        # direto do índice em vez de unir as listas de vários tokens
+        query = """
+            SELECT c.* FROM credores_busca
+            JOIN credores c ON c.id = credores_busca.rowid
+            WHERE credores_busca MATCH ?
+            LIMIT ?
+        """
+        results = self.db.fetch_all(query, (expressao, limite))
+        return [self._credor(row) for row in results]
+
+    def _buscar_por_nome_like(self, nome: str, limite: int) -> List[Credor]:
+        """
+        Busca por nome nos bancos sem FTS5: cada palavra precisa aparecer no
+        nome, em qualquer posição, sem distinção de maiúsculas. Ao contrário
+        do FTS5, acentos são considerados. Percorre a tabela, a menos que o
+        banco tenha um índice de trigramas em LOWER(nome) (pg_trgm no PostgreSQL)
+        """
+        termos = [
+            termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            for termo in nome.lower().split()
+        ]
+        if not termos:
+            return []
+        filtros = " AND ".join("LOWER(nome) LIKE ? ESCAPE '\\'" for _ in termos)
+        query = f"SELECT * FROM credores WHERE {filtros} ORDER BY id LIMIT ?"
+        results = self.db.fetch_all(query, tuple(f"%{termo}%" for termo in termos) + (limite,))
+        return [self._credor(row) for row in results]
+
+    def pesquisar(self, termo: str, limite: int = 20) -> Tuple[str, List[Credor]]:
+        """
+        Busca livre: identifica se o termo é CPF/CNPJ, email ou nome.
+        Retorna (critério, credores)
+        """
+        criterio = classificar_busca(termo)
+        if criterio == 'cpf_cnpj':
+            return criterio, self.buscar_por_prefixo_cpf_cnpj(termo, limite)
+        if criterio == 'email':
+            return criterio, self.buscar_por_email(termo, limite)
+        return criterio, self.buscar_por_nome(termo, limite)
+
     def listar_todos(self) -> List[Credor]:
         """
         Lista todos os credores
@@ -164,16 +279,20 @@ class CredorRepository(ICredorRepository):
         query = """
             UPDATE credores
             SET nome = ?, cpf_cnpj = ?, email = ?, telefone = ?,
+                cpf_cnpj_normalizado = ?, email_normalizado = ?,
                 updated_at = ?
             WHERE id = ?
         """
-        self.db.execute(
-            query,
-            (
-                credor.nome, credor.cpf_cnpj, credor.email,
-                credor.telefone, datetime.now(), credor.id
+        with self.db.transacao() as transacao:
+            transacao.execute(
+                query,
+                (
+                    credor.nome, credor.cpf_cnpj, credor.email, credor.telefone,
+                    normalizar_cpf_cnpj(credor.cpf_cnpj), normalizar_email(credor.email),
+                    datetime.now(), credor.id
+                )
             )
-        )
+            registrar_evento(transacao, 'credor.atualizado', credor.id, credor.id, self._dados_evento(credor))
         return credor
 
     def deletar(self, credor_id: int) -> bool:
@@ -181,5 +300,7 @@ class CredorRepository(ICredorRepository):
         Deleta um credor e seus dados relacionados
         """
         query = "DELETE FROM credores WHERE id = ?"
-        self.db.execute(query, (credor_id,))
+        with self.db.transacao() as transacao:
+            transacao.execute(query, (credor_id,))
+            registrar_evento(transacao, 'credor.removido', credor_id, credor_id)
         return True
\ No newline at end of file
@@ -2,59 +2,81 @@ import os
 from typing import Optional, List, BinaryIO
 from datetime import datetime
 import hashlib
+import uuid
 from core.entities.documento import Documento, TipoDocumento
 from ports.interfaces.Idocumento import IDocumentoRepository
-from ports.database.database import Database
+from ports.interfaces.Iarmazenamento import IArmazenamento
+from ports.interfaces.Idatabase import IDatabase, ITransacao
+from ports.database.conversao import para_datetime
+from adapters.armazenamento.local import ArmazenamentoLocal
+from adapters.integridade.verificador import verificar_conteudo
+from adapters.integridade.pipeline import PipelineIntegridade
+from adapters.eventos.outbox import registrar_evento
 
 class DocumentoRepository(IDocumentoRepository):
-    def __init__(self, database: Database, upload_dir: str = "uploads/documentos"):
+    def __init__(
+        self,
+        database: IDatabase,
+        upload_dir: str = "uploads/documentos",
+        integridade: Optional[PipelineIntegridade] = None,
+        armazenamento: Optional[IArmazenamento] = None
+    ):
         self.db = database
         self.upload_dir = upload_dir
-        os.makedirs(upload_dir, exist_ok=True)
+        self.integridade = integridade
+        self.armazenamento = armazenamento or ArmazenamentoLocal()
 
     def _salvar_arquivo(self, arquivo: BinaryIO, nome_arquivo: str) -> str:
         """
-        Salva o arquivo no sistema de arquivos e retorna o caminho
+        Salva o arquivo no armazenamento e retorna o caminho (chave)
         """
         # Gera um hash único para o nome do arquivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         nome_base, extensao = os.path.splitext(nome_arquivo)
-        hash_nome = hashlib.md5(f"{nome_base}{timestamp}".encode()).hexdigest()
+        # O sufixo aleatório evita que dois uploads com o mesmo nome no mesmo
+        # segundo gravem no mesmo arquivo
+        hash_nome = hashlib.md5(f"{nome_base}{timestamp}{uuid.uuid4().hex}".encode()).hexdigest()
         novo_nome = f"{hash_nome}{extensao}"
         
         caminho_arquivo = os.path.join(self.upload_dir, novo_nome)
-        
-        with open(caminho_arquivo, 'wb') as destino:
-            arquivo.seek(0)  # Volta para o início do arquivo
-            destino.write(arquivo.read())
-            
-        return caminho_arquivo
+        arquivo.seek(0)  # Volta para o início do arquivo
+        return self.armazenamento.salvar(caminho_arquivo, arquivo)
 
-    def criar(self, documento: Documento, arquivo: BinaryIO) -> Documento:
+    def _registrar_evento(self, transacao: ITransacao, tipo: str, documento: Documento):
+        registrar_evento(transacao, tipo, documento.credor_id, documento.id, {
+            'tipo': documento.tipo.value,
+            'arquivo_url': documento.arquivo_url,
+            'enviado_em': documento.enviado_em
+        })
+
+    def criar(self, documento: Documento, arquivo: Optional[BinaryIO] = None) -> Documento:
         """
-        Cria um novo documento e salva o arquivo
+        Cria um novo documento, salvando o arquivo quando informado.
+        Sem arquivo, assume que documento.arquivo_url já aponta para o arquivo salvo
         """
-        # Valida e salva o arquivo
-        erros = self.validar_arquivo(arquivo, arquivo.filename)
-        if erros:
-            raise ValueError(erros)
+        if arquivo:
+            # Valida e salva o arquivo
+            erros = self.validar_arquivo(arquivo, arquivo.filename)
+            if erros:
+                raise ValueError(erros)
 
-        caminho_arquivo = self._salvar_arquivo(arquivo, arquivo.filename)
-        documento.arquivo_url = caminho_arquivo
+            caminho_arquivo = self._salvar_arquivo(arquivo, arquivo.filename)
+            documento.arquivo_url = caminho_arquivo
 
         query = """
             INSERT INTO documentos (
                 credor_id, tipo, arquivo_url, enviado_em
             ) VALUES (?, ?, ?, ?)
         """
-        documento_id = self.db.execute(
-            query,
-            (
-                documento.credor_id, documento.tipo.value,
-                documento.arquivo_url, documento.enviado_em
+        with self.db.transacao() as transacao:
+            documento.id = transacao.execute(
+                query,
+                (
+                    documento.credor_id, documento.tipo.value,
+                    documento.arquivo_url, documento.enviado_em
+                )
             )
-        )
-        documento.id = documento_id
+            self._registrar_evento(transacao, 'documento.criado', documento)
         return documento
 
     def buscar_por_id(self, documento_id: int) -> Optional[Documento]:
@@ -70,7 +92,7 @@ class DocumentoRepository(IDocumentoRepository):
                 credor_id=result['credor_id'],
                 tipo=TipoDocumento(result['tipo']),
                 arquivo_url=result['arquivo_url'],
-                enviado_em=datetime.fromisoformat(result['enviado_em'])
+                enviado_em=para_datetime(result['enviado_em'])
             )
         return None
 
@@ -87,7 +109,7 @@ class DocumentoRepository(IDocumentoRepository):
                 credor_id=row['credor_id'],
                 tipo=TipoDocumento(row['tipo']),
                 arquivo_url=row['arquivo_url'],
-                enviado_em=datetime.fromisoformat(row['enviado_em'])
+                enviado_em=para_datetime(row['enviado_em'])
             )
             for row in results
         ]
@@ -105,7 +127,7 @@ class DocumentoRepository(IDocumentoRepository):
                 credor_id=result['credor_id'],
                 tipo=TipoDocumento(result['tipo']),
                 arquivo_url=result['arquivo_url'],
-                enviado_em=datetime.fromisoformat(result['enviado_em'])
+                enviado_em=para_datetime(result['enviado_em'])
             )
         return None
 
@@ -122,7 +144,7 @@ class DocumentoRepository(IDocumentoRepository):
                 credor_id=row['credor_id'],
                 tipo=TipoDocumento(row['tipo']),
                 arquivo_url=row['arquivo_url'],
-                enviado_em=datetime.fromisoformat(row['enviado_em'])
+                enviado_em=para_datetime(row['enviado_em'])
             )
             for row in results
         ]
@@ -137,9 +159,8 @@ class DocumentoRepository(IDocumentoRepository):
             if erros:
                 raise ValueError(erros)
 
-            # Remove o arquivo antigo
-            if os.path.exists(documento.arquivo_url):
-                os.remove(documento.arquivo_url)
+            # Remove o arquivo antigo (e a versão compactada, se houver)
+            self.armazenamento.remover(documento.arquivo_url)
 
             # Salva o novo arquivo
             documento.arquivo_url = self._salvar_arquivo(arquivo, arquivo.filename)
@@ -149,14 +170,16 @@ class DocumentoRepository(IDocumentoRepository):
             SET tipo = ?, arquivo_url = ?, enviado_em = ?, updated_at = ?
             WHERE id = ?
         """
-        self.db.execute(
-            query,
-            (
-                documento.tipo.value, documento.arquivo_url,
-                documento.enviado_em, datetime.now(),
-                documento.id
+        with self.db.transacao() as transacao:
+            transacao.execute(
+                query,
+                (
+                    documento.tipo.value, documento.arquivo_url,
+                    documento.enviado_em, datetime.now(),
+                    documento.id
+                )
             )
-        )
+            self._registrar_evento(transacao, 'documento.atualizado', documento)
         return documento
 
     def deletar(self, documento_id: int) -> bool:
@@ -165,11 +188,14 @@ class DocumentoRepository(IDocumentoRepository):
         """
         # Busca o documento para obter o caminho do arquivo
         documento = self.buscar_por_id(documento_id)
-        if documento and os.path.exists(documento.arquivo_url):
-            os.remove(documento.arquivo_url)
+        if documento:
+            self.armazenamento.remover(documento.arquivo_url)
 
         query = "DELETE FROM documentos WHERE id = ?"
-        self.db.execute(query, (documento_id,))
+        with self.db.transacao() as transacao:
+            transacao.execute(query, (documento_id,))
+            if documento:
+                self._registrar_evento(transacao, 'documento.removido', documento)
         return True
 
     def validar_arquivo(self, arquivo: BinaryIO, nome_arquivo: str) -> List[str]:
@@ -191,6 +217,16 @@ class DocumentoRepository(IDocumentoRepository):
         if tamanho > Documento.tamanho_maximo():
             erros.append(f"Arquivo muito grande. Máximo: {Documento.tamanho_maximo()/1024/1024}MB")
 
+        # Valida estrutura: o conteúdo precisa ser um PDF/PNG/JPEG íntegro
+        if not erros:
+            conteudo = arquivo.read()
+            arquivo.seek(0)
+            if self.integridade:
+                resultado = self.integridade.verificar(conteudo=conteudo)
+            else:
+                resultado = verificar_conteudo(conteudo)
+            erros.extend(resultado['erros'])
+
         return erros
 
     def gerar_url_arquivo(self, documento_id: int) -> str:
@@ -3,12 +3,22 @@ from datetime import datetime
 from decimal import Decimal
 from core.entities.precatorio import Precatorio
 from ports.interfaces.Iprecatorio import IPrecatorioRepository
-from ports.database.database import Database
+from ports.interfaces.Idatabase import IDatabase, ITransacao
+from ports.database.conversao import para_datetime
+from adapters.eventos.outbox import registrar_evento
 
 class PrecatorioRepository(IPrecatorioRepository):
-    def __init__(self, database: Database):
+    def __init__(self, database: IDatabase):
         self.db = database
 
+    def _registrar_evento(self, transacao: ITransacao, tipo: str, precatorio: Precatorio):
+        registrar_evento(transacao, tipo, precatorio.credor_id, precatorio.id, {
+            'numero': precatorio.numero_precatorio,
+            'valor': precatorio.valor_nominal,
+            'foro': precatorio.foro,
+            'data_publicacao': precatorio.data_publicacao
+        })
+
     def criar(self, precatorio: Precatorio) -> Precatorio:
         """
         Cria um novo precatório
@@ -19,15 +29,16 @@ class PrecatorioRepository(IPrecatorioRepository):
                 foro, data_publicacao
             ) VALUES (?, ?, ?, ?, ?)
         """
-        precatorio_id = self.db.execute(
-            query,
-            (
-                precatorio.credor_id, precatorio.numero_precatorio,
-                float(precatorio.valor_nominal), precatorio.foro,
-                precatorio.data_publicacao
+        with self.db.transacao() as transacao:
+            precatorio.id = transacao.execute(
+                query,
+                (
+                    precatorio.credor_id, precatorio.numero_precatorio,
+                    float(precatorio.valor_nominal), precatorio.foro,
+                    precatorio.data_publicacao
+                )
             )
-        )
-        precatorio.id = precatorio_id
+            self._registrar_evento(transacao, 'precatorio.criado', precatorio)
         return precatorio
 
     def buscar_por_id(self, precatorio_id: int) -> Optional[Precatorio]:
@@ -44,7 +55,7 @@ class PrecatorioRepository(IPrecatorioRepository):
                 numero_precatorio=result['numero_precatorio'],
                 valor_nominal=Decimal(str(result['valor_nominal'])),
                 foro=result['foro'],
-                data_publicacao=datetime.fromisoformat(result['data_publicacao'])
+                data_publicacao=para_datetime(result['data_publicacao'])
             )
         return None
 
@@ -62,7 +73,7 @@ class PrecatorioRepository(IPrecatorioRepository):
                 numero_precatorio=result['numero_precatorio'],
                 valor_nominal=Decimal(str(result['valor_nominal'])),
                 foro=result['foro'],
-                data_publicacao=datetime.fromisoformat(result['data_publicacao'])
+                data_publicacao=para_datetime(result['data_publicacao'])
             )
         return None
 
@@ -80,7 +91,7 @@ class PrecatorioRepository(IPrecatorioRepository):
                 numero_precatorio=row['numero_precatorio'],
                 valor_nominal=Decimal(str(row['valor_nominal'])),
                 foro=row['foro'],
-                data_publicacao=datetime.fromisoformat(row['data_publicacao'])
+                data_publicacao=para_datetime(row['data_publicacao'])
             )
             for row in results
         ]
@@ -99,7 +110,7 @@ class PrecatorioRepository(IPrecatorioRepository):
                 numero_precatorio=row['numero_precatorio'],
                 valor_nominal=Decimal(str(row['valor_nominal'])),
                 foro=row['foro'],
-                data_publicacao=datetime.fromisoformat(row['data_publicacao'])
+                data_publicacao=para_datetime(row['data_publicacao'])
             )
             for row in results
         ]
@@ -114,30 +125,36 @@ class PrecatorioRepository(IPrecatorioRepository):
                 foro = ?, data_publicacao = ?, updated_at = ?
             WHERE id = ?
         """
-        self.db.execute(
-            query,
-            (
-                precatorio.credor_id, precatorio.numero_precatorio,
-                float(precatorio.valor_nominal), precatorio.foro,
-                precatorio.data_publicacao, datetime.now(),
-                precatorio.id
+        with self.db.transacao() as transacao:
+            transacao.execute(
+                query,
+                (
+                    precatorio.credor_id, precatorio.numero_precatorio,
+                    float(precatorio.valor_nominal), precatorio.foro,
+                    precatorio.data_publicacao, datetime.now(),
+                    precatorio.id
+                )
             )
-        )
+            self._registrar_evento(transacao, 'precatorio.atualizado', precatorio)
         return precatorio
 
     def deletar(self, precatorio_id: int) -> bool:
         """
         Deleta um precatório
         """
-        query = "DELETE FROM precatorios WHERE id = ?"
-        self.db.execute(query, (precatorio_id,))
+        query = "DELETE FROM precatorios WHERE id = ? RETURNING credor_id"
+        with self.db.transacao() as transacao:
+            removido = transacao.execute_returning(query, (precatorio_id,))
+            if removido:
+                registrar_evento(transacao, 'precatorio.removido', removido['credor_id'], precatorio_id)
         return True
 
     def buscar_por_foro(self, foro: str) -> List[Precatorio]:
         """
-        Busca precatórios por foro
+        Busca precatórios por foro, em ordem de pagamento (data de
+        publicação e número)
         """
-        query = "SELECT * FROM precatorios WHERE foro = ?"
+        query = "SELECT * FROM precatorios WHERE foro = ? ORDER BY data_publicacao, numero_precatorio, id"
         results = self.db.fetch_all(query, (foro,))
         
         return [
@@ -147,7 +164,7 @@ class PrecatorioRepository(IPrecatorioRepository):
                 numero_precatorio=row['numero_precatorio'],
                 valor_nominal=Decimal(str(row['valor_nominal'])),
                 foro=row['foro'],
-                data_publicacao=datetime.fromisoformat(row['data_publicacao'])
+                data_publicacao=para_datetime(row['data_publicacao'])
             )
             for row in results
         ]
\ No newline at end of file
@@ -0,0 +1,88 @@
+import inspect
+import time
+import traceback
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class Etapa:
+    nome: str
+    iniciar: Callable[[], Any]
+    parar: Optional[Callable[[], Any]] = None
+
+async def _executar(funcao: Callable[[], Any]):
+    """
+    Executa a função da etapa, aguardando o resultado se for uma corrotina
+    """
+    resultado = funcao()
+    if inspect.isawaitable(resultado):
+        await resultado
+
+class CicloDeVida:
+    """
+    Subsistema de inicialização da aplicação.
+
+    A importação de main.py apenas constrói os objetos; nada toca o banco,
+    o disco ou inicia threads. As etapas registradas aqui rodam no lifespan
+    do FastAPI, em ordem, e são encerradas na ordem inversa. Uma etapa
+    pode ser uma função comum ou uma corrotina
+    """
+    def __init__(self):
+        self._etapas: List[Etapa] = []
+        self._iniciadas: List[Etapa] = []
+        self.duracoes_ms: Dict[str, float] = {}
+
+    def registrar(
+        self,
+        nome: str,
+        iniciar: Callable[[], Any],
+        parar: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Registra uma etapa de inicialização e, opcionalmente, seu encerramento
+        """
+        self._etapas.append(Etapa(nome, iniciar, parar))
+
+    @property
+    def iniciado(self) -> bool:
+        """
+        Todas as etapas iniciadas e nenhuma encerrada ainda
+        """
+        return len(self._iniciadas) == len(self._etapas)
+
+    async def iniciar(self):
+        """
+        Executa as etapas em ordem, medindo a duração de cada uma
+        """
+        for etapa in self._etapas:
+            inicio = time.perf_counter()
+            await _executar(etapa.iniciar)
+            self.duracoes_ms[etapa.nome] = (time.perf_counter() - inicio) * 1000
+            self._iniciadas.append(etapa)
+
+    async def parar(self):
+        """
+        Encerra as etapas iniciadas na ordem inversa. Falhas em uma etapa
+        não impedem o encerramento das demais
+        """
+        while self._iniciadas:
+            etapa = self._iniciadas.pop()
+            if not etapa.parar:
+                continue
+            try:
+                await _executar(etapa.parar)
+            except Exception as e:
+                print(f"Erro ao encerrar etapa '{etapa.nome}': {str(e)}")
+                print(traceback.format_exc())
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """
+        Lifespan para o FastAPI
+        """
+        try:
+            await self.iniciar()
+            yield
+        finally:
+            await self.parar()
@@ -0,0 +1,136 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from ports.interfaces.Idatabase import IDatabase
+
+class EleicaoLider:
+    """
+    Eleição de líder entre processos baseada em lease na tabela `lideranca`.
+    Apenas o processo líder executa tarefas que não podem rodar em paralelo,
+    como o agendador de revalidação de certidões. Se o líder morrer, o lease
+    expira e outro worker assume
+    """
+    def __init__(
+        self,
+        database: IDatabase,
+        nome: str,
+        ao_assumir: Optional[Callable[[], None]] = None,
+        ao_perder: Optional[Callable[[], None]] = None,
+        ttl_segundos: int = 30,
+        agora: Callable[[], datetime] = datetime.now
+    ):
+        self.db = database
+        self.nome = nome
+        self.ao_assumir = ao_assumir
+        self.ao_perder = ao_perder
+        self.ttl_segundos = ttl_segundos
+        self.agora = agora
+        self.identificador = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lider = False
+        # Verdadeiro enquanto os callbacks de troca de papel executam
+        self.em_transicao = False
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tentar_assumir(self) -> bool:
+        """
+        Tenta adquirir ou renovar o lease. Retorna True se este processo é o líder
+        """
+        agora = self.agora()
+        query = """
+            INSERT INTO lideranca (nome, dono, expira_em, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(nome) DO UPDATE
+            SET dono = excluded.dono,
+                expira_em = excluded.expira_em,
+                updated_at = excluded.updated_at
+            WHERE lideranca.dono = excluded.dono
+               OR lideranca.expira_em < ?
+        """
+        self.db.execute(
+            query,
+            (
+                self.nome, self.identificador,
+                agora + timedelta(seconds=self.ttl_segundos), agora,
+                agora
+            )
+        )
+        result = self.db.fetch_one(
+            "SELECT dono FROM lideranca WHERE nome = ?", (self.nome,)
+        )
+        return bool(result and result['dono'] == self.identificador)
+
+    def renunciar(self):
+        """
+        Libera o lease para que outro processo assuma imediatamente
+        """
+        self.db.execute(
+            "DELETE FROM lideranca WHERE nome = ? AND dono = ?",
+            (self.nome, self.identificador)
+        )
+
+    def _atualizar_estado(self, lider: bool):
+        """
+        Dispara os callbacks quando o papel deste processo muda
+        """
+        if lider == self.lider:
+            return
+        self.em_transicao = True
+        try:
+            if lider:
+                self.lider = True
+                print(f"Processo {self.identificador} assumiu a liderança de '{self.nome}'")
+                if self.ao_assumir:
+                    self.ao_assumir()
+            else:
+                self.lider = False
+                print(f"Processo {self.identificador} perdeu a liderança de '{self.nome}'")
+                if self.ao_perder:
+                    self.ao_perder()
+        finally:
+            self.em_transicao = False
+
+    def _executar(self):
+        """
+        Renova o lease periodicamente (a cada terço do TTL)
+        """
+        while not self._parar.is_set():
+            try:
+                self._atualizar_estado(self.tentar_assumir())
+            except Exception as e:
+                print(f"Erro na eleição de líder '{self.nome}': {str(e)}")
+                self._atualizar_estado(False)
+            self._parar.wait(self.ttl_segundos / 3)
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def iniciar(self):
+        """
+        Inicia a thread de eleição/renovação
+        """
+        if self.ativo:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._executar,
+            name=f"lideranca-{self.nome}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def parar(self):
+        """
+        Encerra a thread e libera a liderança
+        """
+        self._parar.set()
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+        if self.lider:
+            self._atualizar_estado(False)
+            self.renunciar()
@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Instante (time.monotonic) em que o trabalho da requisição atual deve
+# terminar. Propaga automaticamente para tarefas asyncio e para
+# asyncio.to_thread, que copiam o contexto
+_prazo_final: ContextVar[Optional[float]] = ContextVar("prazo_final", default=None)
+
+CABECALHO_PRAZO = "X-Prazo-Ms"
+
+class PrazoExcedidoError(Exception):
+    """
+    O prazo da requisição terminou antes de o trabalho ser concluído
+    """
+
+def tempo_restante() -> Optional[float]:
+    """
+    Segundos até o fim do prazo atual, ou None se não há prazo
+    """
+    prazo_final = _prazo_final.get()
+    if prazo_final is None:
+        return None
+    return prazo_final - time.monotonic()
+
+def verificar_prazo():
+    """
+    Levanta PrazoExcedidoError se o prazo atual já terminou
+    """
+    restante = tempo_restante()
+    if restante is not None and restante <= 0:
+        raise PrazoExcedidoError("Prazo da requisição excedido")
+
+def limitar_ao_prazo(segundos: float) -> float:
+    """
+    Reduz um timeout ao tempo que resta do prazo atual
+    """
+    restante = tempo_restante()
+    if restante is None:
+        return segundos
+    return max(min(segundos, restante), 0.0)
+
+@contextmanager
+def prazo(segundos: Optional[float]):
+    """
+    Define o prazo do bloco. Um prazo interno nunca ultrapassa o externo
+    """
+    if segundos is None:
+        yield
+        return
+    novo = time.monotonic() + segundos
+    atual = _prazo_final.get()
+    token = _prazo_final.set(novo if atual is None else min(novo, atual))
+    try:
+        yield
+    finally:
+        _prazo_final.reset(token)
@@ -0,0 +1,218 @@
+import asyncio
+import gc
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # resource não existe no Windows: sem o pico de memória
+    resource = None
+
+Verificacao = Callable[[], Dict[str, Any]]
+
+
+class MonitorLacoEventos:
+    """
+    Mede o atraso do event loop: uma tarefa dorme `intervalo_segundos` e
+    compara o momento em que acordou com o esperado. Código síncrono
+    rodando no loop (CPU, I/O bloqueante) aparece como atraso. Custa um
+    despertar por intervalo; as últimas `janela` amostras ficam em memória
+    """
+    def __init__(self, intervalo_segundos: float = 0.25, janela: int = 240):
+        self.intervalo_segundos = intervalo_segundos
+        self._amostras: deque = deque(maxlen=janela)
+        self.ultimo_ms = 0.0
+        self.maximo_ms = 0.0
+        self._tarefa: Optional[asyncio.Task] = None
+
+    async def iniciar(self):
+        if self._tarefa and not self._tarefa.done():
+            return
+        self._tarefa = asyncio.get_running_loop().create_task(self._medir())
+
+    async def parar(self):
+        if self._tarefa:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def _medir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            inicio = loop.time()
+            await asyncio.sleep(self.intervalo_segundos)
+            atraso_ms = max(0.0, loop.time() - inicio - self.intervalo_segundos) * 1000
+            self._amostras.append(atraso_ms)
+            self.ultimo_ms = atraso_ms
+            self.maximo_ms = max(self.maximo_ms, atraso_ms)
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self._tarefa and not self._tarefa.done())
+
+    def estatisticas(self) -> dict:
+        amostras = sorted(self._amostras)
+        return {
+            'ativo': self.ativo,
+            'intervalo_ms': self.intervalo_segundos * 1000,
+            'ultimo_ms': round(self.ultimo_ms, 3),
+            'media_ms': round(sum(amostras) / len(amostras), 3) if amostras else None,
+            'p99_ms': round(amostras[int(len(amostras) * 0.99)], 3) if amostras else None,
+            'maximo_janela_ms': round(amostras[-1], 3) if amostras else None,
+            'maximo_ms': round(self.maximo_ms, 3),
+            'amostras': len(amostras)
+        }
+
+
+def memoria_processo() -> dict:
+    """
+    Memória residente atual (/proc, apenas Linux) e pico (getrusage) do
+    processo, em MB, com os contadores do coletor de lixo
+    """
+    rss = None
+    try:
+        with open("/proc/self/statm") as arquivo:
+            rss = int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    pico = None
+    if resource is not None:
+        # ru_maxrss é em KB no Linux e em bytes no macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        'rss_mb': round(rss / 2 ** 20, 1) if rss is not None else None,
+        'pico_rss_mb': round(pico / 2 ** 20, 1) if pico is not None else None,
+        'gc_contadores': list(gc.get_count()),
+        'threads': threading.active_count()
+    }
+
+
+def espaco_disco(caminhos: Iterable[str], minimo_mb: float = 0) -> dict:
+    """
+    Espaço livre no sistema de arquivos de cada caminho (um statvfs por
+    caminho). Caminhos que ainda não existem usam o diretório pai mais
+    próximo
+    """
+    discos = {}
+    for caminho in caminhos:
+        existente = os.path.abspath(caminho)
+        while not os.path.exists(existente) and os.path.dirname(existente) != existente:
+            existente = os.path.dirname(existente)
+        uso = shutil.disk_usage(existente)
+        discos[caminho] = {
+            'livre_mb': round(uso.free / 2 ** 20, 1),
+            'total_mb': round(uso.total / 2 ** 20, 1),
+            'uso_percentual': round(100 * uso.used / uso.total, 1) if uso.total else None
+        }
+    return {
+        'ok': all(disco['livre_mb'] >= minimo_mb for disco in discos.values()),
+        'minimo_mb': minimo_mb,
+        'caminhos': discos
+    }
+
+
+def estado_scheduler(scheduler) -> dict:
+    """
+    Estado de um BackgroundScheduler do APScheduler: se a thread está viva
+    e a próxima execução de cada job. Aceita None (scheduler não criado)
+    """
+    if scheduler is None:
+        return {'criado': False, 'rodando': False, 'thread_viva': False, 'jobs': []}
+    thread = getattr(scheduler, "_thread", None)
+    jobs = scheduler.get_jobs() if scheduler.running else []
+    return {
+        'criado': True,
+        'rodando': bool(scheduler.running),
+        'thread_viva': bool(thread and thread.is_alive()),
+        'jobs': [
+            {
+                'id': job.id,
+                'proxima_execucao': job.next_run_time.isoformat() if job.next_run_time else None,
+                'intervalo_segundos': (
+                    job.trigger.interval.total_seconds() if hasattr(job.trigger, "interval") else None
+                )
+            }
+            for job in jobs
+        ]
+    }
+
+
+class VerificadorSaude:
+    """
+    Verificações de prontidão registradas pelos subsistemas. Cada verificação
+    é uma função sem argumentos que retorna um dicionário com a chave "ok".
+
+    As verificações rodam em paralelo em um executor próprio, para não
+    disputar threads com as rotas, e cada uma tem `timeout_segundos` para
+    responder. Uma verificação que não terminou (ex.: banco travado) não é
+    disparada de novo: as consultas seguintes aguardam a mesma execução, e
+    o polling não acumula threads presas. Verificações não críticas são
+    reportadas mas não tiram o processo da prontidão
+    """
+    def __init__(self, timeout_segundos: float = 1.0):
+        self.timeout_segundos = timeout_segundos
+        self._verificacoes: List[Tuple[str, Verificacao, bool]] = []
+        self._em_andamento: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.iniciado_em = time.time()
+
+    def registrar(self, nome: str, verificacao: Verificacao, critica: bool = True):
+        self._verificacoes.append((nome, verificacao, critica))
+
+    def _obter_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(len(self._verificacoes), 1), thread_name_prefix="saude"
+            )
+        return self._executor
+
+    async def _executar(self, nome: str, verificacao: Verificacao) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        execucao = self._em_andamento.get(nome)
+        if execucao is None or execucao.done() or execucao.get_loop() is not loop:
+            execucao = loop.run_in_executor(self._obter_executor(), verificacao)
+            self._em_andamento[nome] = execucao
+        inicio = time.perf_counter()
+        try:
+            resultado = dict(await asyncio.wait_for(asyncio.shield(execucao), self.timeout_segundos))
+        except asyncio.TimeoutError:
+            return {'ok': False, 'erro': f"sem resposta em {self.timeout_segundos * 1000:.0f} ms"}
+        except Exception as e:
+            return {'ok': False, 'erro': str(e)}
+        resultado.setdefault('ok', True)
+        resultado['duracao_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+        return resultado
+
+    async def verificar(self) -> dict:
+        """
+        Executa todas as verificações. O processo está pronto se todas as
+        críticas estiverem ok
+        """
+        resultados = await asyncio.gather(*(
+            self._executar(nome, verificacao) for nome, verificacao, _ in self._verificacoes
+        ))
+        pronto = all(
+            resultado['ok']
+            for (_, _, critica), resultado in zip(self._verificacoes, resultados)
+            if critica
+        )
+        return {
+            'pronto': pronto,
+            'pid': os.getpid(),
+            'uptime_segundos': round(time.time() - self.iniciado_em, 1),
+            'verificacoes': {nome: resultado for (nome, _, _), resultado in zip(self._verificacoes, resultados)}
+        }
+
+    def fechar(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
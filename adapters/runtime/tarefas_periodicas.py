@@ -0,0 +1,36 @@
+from typing import Callable, List, Tuple
+
+class TarefasPeriodicas:
+    """
+    Tarefas de manutenção executadas em intervalo fixo (APScheduler).
+    O scheduler só é criado ao iniciar, para não carregar o APScheduler na
+    importação da aplicação. Com vários workers deve ser iniciado apenas
+    pelo processo líder (ver adapters/runtime/lideranca.py)
+    """
+    def __init__(self):
+        self._tarefas: List[Tuple[str, Callable[[], None], int]] = []
+        self.scheduler = None
+
+    def registrar(self, nome: str, funcao: Callable[[], None], intervalo_segundos: int):
+        self._tarefas.append((nome, funcao, intervalo_segundos))
+
+    def iniciar(self):
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        if self.scheduler and self.scheduler.running:
+            return
+        # Um scheduler encerrado não pode ser reiniciado
+        self.scheduler = BackgroundScheduler()
+        for nome, funcao, intervalo_segundos in self._tarefas:
+            self.scheduler.add_job(
+                funcao, 'interval', seconds=intervalo_segundos, id=nome, replace_existing=True
+            )
+        self.scheduler.start()
+
+    def parar(self):
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    @property
+    def rodando(self) -> bool:
+        return bool(self.scheduler and self.scheduler.running)
@@ -0,0 +1,126 @@
+"""
+Benchmark do armazenamento de arquivos em bucket S3/MinIO.
+
+Mede, contra um endpoint compatível com S3:
+- vazão do upload multipart de um arquivo grande com 1, 4 e 8 partes em
+  paralelo (a partir do caminho, como no upload da API, e a partir de um
+  stream sem seek);
+- custo na API de um download: gerar a URL assinada (o cliente baixa
+  direto do bucket) contra transmitir os bytes pela API (backend local).
+
+Para subir um MinIO local:
+    docker compose --profile s3 up -d minio
+    pip install boto3
+    AWS_ACCESS_KEY_ID=mercatorio AWS_SECRET_ACCESS_KEY=mercatorio123 \\
+        python benchmarks/bench_armazenamento.py --endpoint-url http://localhost:9000
+
+Uso:
+    python benchmarks/bench_armazenamento.py --endpoint-url URL --tamanho-mb 64 --paralelismo 1,4,8
+"""
+import argparse
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from adapters.armazenamento.local import ArmazenamentoLocal  # noqa: E402
+from adapters.armazenamento.s3 import ArmazenamentoS3  # noqa: E402
+
+
+class _SemSeek(io.RawIOBase):
+    """
+    Stream somente leitura, como o corpo de uma requisição
+    """
+    def __init__(self, caminho: str):
+        self.arquivo = open(caminho, 'rb')
+
+    def readable(self):
+        return True
+
+    def read(self, tamanho=-1):
+        return self.arquivo.read(tamanho)
+
+    def close(self):
+        self.arquivo.close()
+        super().close()
+
+
+def medir_upload(armazenamento: ArmazenamentoS3, origem: str, tamanho: int, repeticoes: int, stream: bool) -> float:
+    tempos = []
+    for indice in range(repeticoes):
+        copia = f"{origem}.{indice}"
+        shutil.copyfile(origem, copia)
+        inicio = time.perf_counter()
+        if stream:
+            with _SemSeek(copia) as corpo:
+                armazenamento.salvar(f"bench/stream_{indice}.bin", corpo)
+            os.remove(copia)
+        else:
+            armazenamento.salvar_arquivo(f"bench/arquivo_{indice}.bin", copia)
+        tempos.append(time.perf_counter() - inicio)
+    return tamanho / 2 ** 20 / statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url", required=True)
+    parser.add_argument("--bucket", default="mercatorio-bench")
+    parser.add_argument("--regiao", default="us-east-1")
+    parser.add_argument("--tamanho-mb", type=int, default=64)
+    parser.add_argument("--tamanho-parte-mb", type=int, default=8)
+    parser.add_argument("--paralelismo", default="1,4,8")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--downloads", type=int, default=1000)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_armazenamento_")
+    try:
+        origem = os.path.join(pasta, "origem.bin")
+        tamanho = args.tamanho_mb * 2 ** 20
+        with open(origem, 'wb') as arquivo:
+            for _ in range(args.tamanho_mb):
+                arquivo.write(os.urandom(2 ** 20))
+
+        print(f"Upload de {args.tamanho_mb} MB em partes de {args.tamanho_parte_mb} MB")
+        print(f"{'partes paralelas':>16} {'caminho (MB/s)':>15} {'stream (MB/s)':>14}")
+        armazenamento = None
+        for paralelas in [int(p) for p in args.paralelismo.split(",")]:
+            armazenamento = ArmazenamentoS3(
+                args.bucket, endpoint_url=args.endpoint_url, regiao=args.regiao,
+                tamanho_parte=args.tamanho_parte_mb * 2 ** 20, partes_paralelas=paralelas,
+                criar_bucket=True
+            )
+            armazenamento.iniciar()
+            caminho = medir_upload(armazenamento, origem, tamanho, args.repeticoes, stream=False)
+            stream = medir_upload(armazenamento, origem, tamanho, args.repeticoes, stream=True)
+            print(f"{paralelas:>16} {caminho:>15.1f} {stream:>14.1f}")
+
+        # Download: custo na API por requisição
+        inicio = time.perf_counter()
+        for _ in range(args.downloads):
+            armazenamento.url_download("bench/arquivo_0.bin", "arquivo.bin")
+        assinatura_us = (time.perf_counter() - inicio) / args.downloads * 1e6
+
+        local = ArmazenamentoLocal(pasta)
+        repeticoes = max(1, args.downloads // 100)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            with local.abrir("origem.bin") as arquivo:
+                while arquivo.read(64 * 1024):
+                    pass
+        proxy_us = (time.perf_counter() - inicio) / repeticoes * 1e6
+        print(f"Download pela API: URL assinada {assinatura_us:.0f} µs por requisição; "
+              f"transmitir {args.tamanho_mb} MB pela API {proxy_us / 1000:.0f} ms "
+              f"(só a leitura do disco, sem a rede)")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
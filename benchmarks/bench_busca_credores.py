@@ -0,0 +1,154 @@
+"""
+Benchmark da busca de credores por CPF/CNPJ, email e nome.
+
+Cria um banco temporário com N credores (nomes combinando prenomes e
+sobrenomes comuns, metade dos CPFs com pontuação) e mede a latência de
+CredorRepository.pesquisar para cada tipo de consulta: CPF completo com e
+sem pontuação, prefixo de CPF, email com maiúsculas, nome completo e
+prefixos de nome curtos (que casam com muitos credores).
+
+Falha (exit code 1) se o p99 de alguma consulta ultrapassar o orçamento.
+
+Uso:
+    python benchmarks/bench_busca_credores.py --credores 1000000 --orcamento-ms 10
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from core.entities.credor import normalizar_cpf_cnpj, normalizar_email  # noqa: E402
+from ports.database.database import Database  # noqa: E402
+from adapters.repositories.credor_repository import CredorRepository  # noqa: E402
+
+PRENOMES = [
+    "Maria", "José", "Ana", "João", "Antônio", "Francisco", "Carlos", "Paulo",
+    "Pedro", "Lucas", "Luiz", "Marcos", "Luís", "Gabriel", "Rafael", "Daniel",
+    "Marcelo", "Bruno", "Eduardo", "Felipe", "Raimundo", "Rodrigo", "Juliana",
+    "Márcia", "Fernanda", "Patrícia", "Aline", "Sandra", "Camila", "Amanda",
+    "Bruna", "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana",
+    "Gabriela", "Vera", "Vitória", "Larissa", "Cláudia", "Beatriz", "Rita",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+    "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa", "Rocha",
+    "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado",
+    "Mendes", "Freitas", "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira",
+]
+
+
+def formatar_cpf(digitos: str) -> str:
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+
+def gerar_credores(quantidade: int, semente: int):
+    aleatorio = random.Random(semente)
+    cpfs = aleatorio.sample(range(10 ** 10, 10 ** 11), quantidade)
+    for indice, cpf in enumerate(cpfs):
+        digitos = str(cpf)
+        nome = " ".join([
+            aleatorio.choice(PRENOMES),
+            aleatorio.choice(SOBRENOMES),
+            aleatorio.choice(SOBRENOMES),
+        ])
+        email = f"{nome.split()[0].lower()}.{indice}@Exemplo.com"
+        cpf_cnpj = formatar_cpf(digitos) if indice % 2 else digitos
+        yield (
+            nome, cpf_cnpj, email, "11999999999",
+            normalizar_cpf_cnpj(cpf_cnpj), normalizar_email(email)
+        )
+
+
+def carregar(db: Database, quantidade: int, semente: int, lote: int = 50_000):
+    query = """
+        INSERT INTO credores (
+            nome, cpf_cnpj, email, telefone,
+            cpf_cnpj_normalizado, email_normalizado
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """
+    buffer = []
+    for linha in gerar_credores(quantidade, semente):
+        buffer.append(linha)
+        if len(buffer) >= lote:
+            db.execute_many(query, buffer)
+            buffer = []
+    if buffer:
+        db.execute_many(query, buffer)
+
+
+def medir(funcao, repeticoes: int) -> dict:
+    funcao()  # aquece o cache de páginas
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    latencias.sort()
+    return {
+        "p50_ms": statistics.median(latencias),
+        "p99_ms": latencias[min(int(len(latencias) * 0.99), len(latencias) - 1)],
+        "resultados": len(resultado[1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--credores", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--orcamento-ms", type=float, default=10.0)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_credores_")
+    try:
+        db = Database(os.path.join(pasta, "database.db"), pool_size=1)
+        db.inicializar()
+        inicio = time.perf_counter()
+        carregar(db, args.credores, args.semente)
+        print(f"{args.credores} credores carregados em {time.perf_counter() - inicio:.1f}s")
+
+        repo = CredorRepository(db)
+        amostra = db.fetch_one("SELECT * FROM credores WHERE id = ?", (args.credores // 2,))
+        digitos = amostra["cpf_cnpj_normalizado"]
+        consultas = {
+            "cpf sem pontuação": digitos,
+            "cpf com pontuação": formatar_cpf(digitos),
+            "prefixo de cpf": digitos[:5],
+            "email (maiúsculas)": amostra["email"].upper(),
+            "nome completo": amostra["nome"],
+            "prefixo de nome (2 letras)": "ma",
+            "prenome + sobrenome parcial": "maria sil",
+            "sobrenome sem acento": "goncalves",
+        }
+
+        estouros = []
+        print(f"{'consulta':<30} {'critério':<9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'resultados':>11}")
+        for nome, termo in consultas.items():
+            criterio = repo.pesquisar(termo, args.limite)[0]
+            resultado = medir(lambda: repo.pesquisar(termo, args.limite), args.repeticoes)
+            print(
+                f"{nome:<30} {criterio:<9} {resultado['p50_ms']:>9.3f} "
+                f"{resultado['p99_ms']:>9.3f} {resultado['resultados']:>11}"
+            )
+            if resultado["p99_ms"] > args.orcamento_ms:
+                estouros.append(nome)
+        db.fechar()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    if estouros:
+        print(f"p99 acima de {args.orcamento_ms}ms: {', '.join(estouros)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark do armazenamento compactado de arquivos (espaço x CPU).
+
+Gera um conjunto de arquivos parecido com os enviados pelos credores:
+- PDFs com o texto sem compressão interna (comum em certidões geradas por
+  sistemas antigos);
+- PDFs com streams FlateDecode (já comprimidos);
+- imagens (conteúdo incompressível, como JPEG/PNG).
+
+Para cada codec e nível mede a taxa de compactação por tipo, a vazão de
+compactação (ciclo de manutenção) e a de leitura descompactada (download de
+um cliente sem gzip e leituras dos jobs). Downloads de arquivos gzip para
+clientes que aceitam gzip não custam CPU: os bytes são enviados como estão.
+
+Com --pasta, usa os arquivos de uma pasta real (ex.: static) no lugar dos
+gerados.
+
+Uso:
+    python benchmarks/bench_compactacao.py --arquivos 60 --tamanho-kb 256
+    python benchmarks/bench_compactacao.py --pasta static
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from adapters.arquivos.compactacao import codecs_disponiveis, compactar_arquivo, ler  # noqa: E402
+
+NIVEIS = {
+    'gzip': [1, 6, 9],
+    'zstd': [1, 3, 19],
+}
+
+PALAVRAS = (
+    "certidão negativa de débitos relativos aos tributos federais e à dívida ativa "
+    "da união processo precatório credor cpf cnpj emitida em são paulo valor nominal "
+    "tribunal de justiça foro requisição pagamento autenticidade código controle"
+).split()
+
+
+def montar_pdf(aleatorio: random.Random, tamanho: int, comprimido: bool) -> bytes:
+    linhas = []
+    total = 0
+    while total < tamanho:
+        texto = " ".join(aleatorio.choice(PALAVRAS) for _ in range(12))
+        linha = f"({texto} {aleatorio.randint(0, 10 ** 9)}) Tj 0 -14 Td\n".encode("latin-1", "replace")
+        linhas.append(linha)
+        total += len(linha)
+    conteudo = b"BT /F1 10 Tf 72 800 Td\n" + b"".join(linhas) + b"ET"
+    filtro = b""
+    if comprimido:
+        conteudo = zlib.compress(conteudo)
+        filtro = b" /Filter /FlateDecode"
+    return (
+        b"%PDF-1.4\n1 0 obj\n<< /Type /Page /Contents 2 0 R >>\nendobj\n"
+        + b"2 0 obj\n<< /Length %d%s >>\nstream\n" % (len(conteudo), filtro)
+        + conteudo + b"\nendstream\nendobj\n%%EOF\n"
+    )
+
+
+def gerar_arquivos(pasta: str, quantidade: int, tamanho: int, semente: int) -> dict:
+    aleatorio = random.Random(semente)
+    arquivos = {"pdf_texto": [], "pdf_flate": [], "imagem": []}
+    for indice in range(quantidade):
+        tipo = list(arquivos)[indice % 3]
+        if tipo == "imagem":
+            dados = b"\x89PNG\r\n\x1a\n" + os.urandom(tamanho)
+            nome = f"{indice}.png"
+        else:
+            dados = montar_pdf(aleatorio, tamanho, comprimido=tipo == "pdf_flate")
+            nome = f"{indice}.pdf"
+        caminho = os.path.join(pasta, nome)
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(dados)
+        arquivos[tipo].append(caminho)
+    return arquivos
+
+
+def copiar_pasta(origem: str, destino: str) -> dict:
+    arquivos = {}
+    for pasta, _, nomes in os.walk(origem):
+        for nome in nomes:
+            tipo = os.path.splitext(nome)[1].lower().lstrip(".") or "sem_extensao"
+            alvo = os.path.join(destino, f"{len(sum(arquivos.values(), []))}_{nome}")
+            shutil.copy2(os.path.join(pasta, nome), alvo)
+            arquivos.setdefault(tipo, []).append(alvo)
+    return arquivos
+
+
+def executar(arquivos: dict, codec: str, nivel: int, trabalho: str) -> dict:
+    """
+    Compacta uma cópia dos arquivos e lê todos de volta
+    """
+    copias = {}
+    for tipo, caminhos in arquivos.items():
+        copias[tipo] = []
+        for caminho in caminhos:
+            copia = os.path.join(trabalho, os.path.basename(caminho))
+            shutil.copyfile(caminho, copia)
+            copias[tipo].append(copia)
+
+    resultado = {"tipos": {}, "original": 0, "final": 0, "t_compactar": 0.0, "t_ler": 0.0, "lidos": 0}
+    for tipo, caminhos in copias.items():
+        original = final = 0
+        for caminho in caminhos:
+            tamanho = os.path.getsize(caminho)
+            inicio = time.process_time()
+            compactado = compactar_arquivo(caminho, codec, nivel)
+            resultado["t_compactar"] += time.process_time() - inicio
+            original += tamanho
+            final += compactado if compactado is not None else tamanho
+        resultado["tipos"][tipo] = final / original if original else 1.0
+        resultado["original"] += original
+        resultado["final"] += final
+
+    for caminhos in copias.values():
+        for caminho in caminhos:
+            inicio = time.process_time()
+            resultado["lidos"] += len(ler(caminho))
+            resultado["t_ler"] += time.process_time() - inicio
+    for nome in os.listdir(trabalho):
+        os.remove(os.path.join(trabalho, nome))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--arquivos", type=int, default=60)
+    parser.add_argument("--tamanho-kb", type=int, default=256)
+    parser.add_argument("--pasta", help="usa os arquivos desta pasta no lugar dos gerados")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench_compactacao_")
+    try:
+        originais = os.path.join(base, "originais")
+        trabalho = os.path.join(base, "trabalho")
+        os.makedirs(originais)
+        os.makedirs(trabalho)
+        if args.pasta:
+            arquivos = copiar_pasta(args.pasta, originais)
+        else:
+            arquivos = gerar_arquivos(originais, args.arquivos, args.tamanho_kb * 1024, args.semente)
+        total_mb = sum(os.path.getsize(c) for cs in arquivos.values() for c in cs) / 2 ** 20
+        print(f"{sum(len(c) for c in arquivos.values())} arquivos, {total_mb:.1f} MB")
+        if "zstd" not in codecs_disponiveis():
+            print("zstandard não instalado: apenas gzip")
+
+        tipos = list(arquivos)
+        cabecalho = f"{'codec':<8} {'nível':>5} " + " ".join(f"{t:>10}" for t in tipos)
+        cabecalho += f" {'total':>7} {'economia':>9} {'compacta':>11} {'lê':>11}"
+        print("taxa = tamanho final / original; vazões em MB/s de dados originais (tempo de CPU)")
+        print(cabecalho)
+        for codec in codecs_disponiveis():
+            for nivel in NIVEIS[codec]:
+                r = executar(arquivos, codec, nivel, trabalho)
+                mb = r["original"] / 2 ** 20
+                linha = f"{codec:<8} {nivel:>5} " + " ".join(f"{r['tipos'][t]:>10.3f}" for t in tipos)
+                linha += f" {r['final'] / r['original']:>7.3f}"
+                linha += f" {(r['original'] - r['final']) / 2 ** 20:>7.1f}MB"
+                linha += f" {mb / max(r['t_compactar'], 1e-9):>8.1f}MB/s"
+                linha += f" {r['lidos'] / 2 ** 20 / max(r['t_ler'], 1e-9):>8.1f}MB/s"
+                print(linha)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
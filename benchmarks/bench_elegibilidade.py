@@ -0,0 +1,139 @@
+"""
+Benchmark do cálculo de elegibilidade dos credores.
+
+Cria um banco temporário com N credores, documentos e certidões em parte
+dos tipos (parte das certidões negativas e já vencidas), e compara:
+- o cálculo por credor em Python: carregar documentos e certidões de cada
+  credor pelos repositórios e aplicar core.entities.elegibilidade.avaliar;
+- a reconstrução da tabela materializada em um único INSERT ... SELECT;
+- a atualização incremental depois de K certidões alteradas pelo
+  repositório (consumo dos eventos e recálculo dos credores afetados);
+- a leitura dos credores aptos na tabela materializada.
+Os dois cálculos completos precisam chegar aos mesmos credores aptos.
+
+Uso:
+    python benchmarks/bench_elegibilidade.py --credores 50000 --alteracoes 200
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from core.entities.documento import TipoDocumento  # noqa: E402
+from core.entities.certidao import TipoCertidao, StatusCertidao  # noqa: E402
+from core.entities.elegibilidade import avaliar  # noqa: E402
+from ports.database.database import Database  # noqa: E402
+from adapters.eventos.outbox import FluxoEventos  # noqa: E402
+from adapters.elegibilidade.motor import MotorElegibilidade  # noqa: E402
+from adapters.repositories.credor_repository import CredorRepository  # noqa: E402
+from adapters.repositories.documento_repository import DocumentoRepository  # noqa: E402
+from adapters.repositories.certidao_repository import CertidaoRepository  # noqa: E402
+
+
+def popular(db: Database, quantidade: int, semente: int):
+    aleatorio = random.Random(semente)
+    agora = datetime.now()
+    db.execute_many(
+        "INSERT INTO credores (id, nome, cpf_cnpj, email, telefone) VALUES (?, ?, ?, ?, ?)",
+        (
+            (indice, f"Credor {indice}", f"{10 ** 10 + indice}", f"credor{indice}@exemplo.com", "11999999999")
+            for indice in range(1, quantidade + 1)
+        )
+    )
+    db.execute_many(
+        "INSERT INTO documentos (credor_id, tipo, arquivo_url, enviado_em) VALUES (?, ?, ?, ?)",
+        (
+            (indice, tipo.value, f"static/documentos/{indice}/{tipo.value}.pdf", agora)
+            for indice in range(1, quantidade + 1)
+            for tipo in TipoDocumento
+            if aleatorio.random() < 0.9
+        )
+    )
+    # Maioria negativa, algumas vencidas, para que parte dos credores fique apta
+    status = [StatusCertidao.NEGATIVA] * 8 + [StatusCertidao.POSITIVA, StatusCertidao.PENDENTE]
+    db.execute_many(
+        "INSERT INTO certidoes (credor_id, tipo, origem, status, recebida_em, valida_ate) VALUES (?, ?, 'api', ?, ?, ?)",
+        (
+            (
+                indice, tipo.value, aleatorio.choice(status).value, agora,
+                agora + timedelta(days=aleatorio.randrange(-5, 60))
+            )
+            for indice in range(1, quantidade + 1)
+            for tipo in TipoCertidao
+            if aleatorio.random() < 0.95
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--credores", type=int, default=50000)
+    parser.add_argument("--alteracoes", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_elegibilidade_")
+    try:
+        db = Database(os.path.join(pasta, "bench.db"), pool_size=2, consulta_lenta_ms=60000)
+        db.inicializar()
+        popular(db, args.credores, args.semente)
+        credores = CredorRepository(db)
+        documentos = DocumentoRepository(db)
+        certidoes = CertidaoRepository(db)
+        motor = MotorElegibilidade(db, FluxoEventos(db))
+
+        inicio = time.perf_counter()
+        aptos_python = {
+            credor.id
+            for credor in credores.listar_todos()
+            if avaliar(credor.id, documentos.buscar_por_credor(credor.id), certidoes.buscar_por_credor(credor.id)).esta_apto()
+        }
+        tempo_python = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        motor.recalcular_todos()
+        tempo_lote = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        aptos_lote = set()
+        ultimo = 0
+        while True:
+            pagina = motor.listar_aptos(ultimo, 1000)
+            if not pagina:
+                break
+            aptos_lote.update(elegibilidade.credor_id for elegibilidade in pagina)
+            ultimo = pagina[-1].credor_id
+        tempo_leitura = time.perf_counter() - inicio
+        assert aptos_lote == aptos_python, "cálculo em lote diverge da regra em Python"
+
+        aleatorio = random.Random(args.semente)
+        alterados = aleatorio.sample(range(1, args.credores + 1), args.alteracoes)
+        for credor_id in alterados:
+            certidao = certidoes.buscar_por_tipo(credor_id, TipoCertidao.FEDERAL)
+            if certidao:
+                certidao.status = StatusCertidao.POSITIVA
+                certidoes.atualizar(certidao)
+        inicio = time.perf_counter()
+        recalculados = motor.atualizar()
+        tempo_incremental = time.perf_counter() - inicio
+
+        print(f"{args.credores} credores, {len(aptos_lote)} aptos")
+        print(f"{'cálculo':>36} {'tempo (ms)':>11} {'credores/s':>11}")
+        print(f"{'Python por credor (repositórios)':>36} {tempo_python * 1000:>11.0f} {args.credores / tempo_python:>11.0f}")
+        print(f"{'SQL em lote (INSERT ... SELECT)':>36} {tempo_lote * 1000:>11.0f} {args.credores / tempo_lote:>11.0f}")
+        print(f"{'leitura dos aptos (materializada)':>36} {tempo_leitura * 1000:>11.0f}")
+        print(f"{f'incremental ({recalculados} credores)':>36} {tempo_incremental * 1000:>11.1f}")
+        print(f"Aceleração do lote sobre o cálculo em Python: {tempo_python / tempo_lote:.0f}x")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
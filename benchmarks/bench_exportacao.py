@@ -0,0 +1,119 @@
+"""
+Benchmark da exportação de credores (/export/credores.ndjson e .csv).
+
+Cria um banco temporário com N credores, cada um com um precatório e
+certidões em parte dos tipos, e mede para NDJSON, CSV e as duas versões
+em gzip:
+- vazão da geração (registros por segundo e MB gerados);
+- pico de memória Python (tracemalloc) durante a exportação, comparado
+  com carregar o resultado inteiro com fetch_all antes de serializar.
+
+Uso:
+    python benchmarks/bench_exportacao.py --credores 200000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from core.entities.certidao import TipoCertidao, StatusCertidao  # noqa: E402
+from ports.database.database import Database  # noqa: E402
+from adapters.exportacao.credores import (  # noqa: E402
+    CONSULTA, ExportadorCredores, FormatoExportacao, comprimir_gzip
+)
+
+
+def popular(db: Database, quantidade: int, semente: int):
+    aleatorio = random.Random(semente)
+    base = datetime(2024, 1, 1)
+    db.execute_many(
+        "INSERT INTO credores (id, nome, cpf_cnpj, email, telefone) VALUES (?, ?, ?, ?, ?)",
+        (
+            (indice, f"Credor {indice} da Silva", f"{10 ** 10 + indice}", f"credor{indice}@exemplo.com", "11999999999")
+            for indice in range(1, quantidade + 1)
+        )
+    )
+    db.execute_many(
+        "INSERT INTO precatorios (credor_id, numero_precatorio, valor_nominal, foro, data_publicacao) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                indice, f"{indice:07d}-45.2024.1.00.0000", aleatorio.randrange(10 ** 5, 10 ** 9) / 100,
+                "São Paulo", (base + timedelta(days=aleatorio.randrange(365))).isoformat(sep=" ")
+            )
+            for indice in range(1, quantidade + 1)
+        )
+    )
+    db.execute_many(
+        "INSERT INTO certidoes (credor_id, tipo, origem, status, recebida_em, valida_ate) VALUES (?, ?, 'api', ?, ?, ?)",
+        (
+            (
+                indice, tipo.value, aleatorio.choice(list(StatusCertidao)).value,
+                base.isoformat(sep=" "), (base + timedelta(days=aleatorio.randrange(30, 365))).isoformat(sep=" ")
+            )
+            for indice in range(1, quantidade + 1)
+            for tipo in TipoCertidao
+            if aleatorio.random() < 0.7
+        )
+    )
+
+
+def consumir(blocos) -> int:
+    return sum(len(bloco) for bloco in blocos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--credores", type=int, default=200000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_exportacao_")
+    try:
+        db = Database(os.path.join(pasta, "bench.db"))
+        db.inicializar()
+        inicio = time.perf_counter()
+        popular(db, args.credores, args.semente)
+        print(f"{args.credores} credores gerados em {time.perf_counter() - inicio:.1f}s")
+        exportador = ExportadorCredores(db)
+
+        print(f"{'exportação':>12} {'registros/s':>12} {'MB':>8} {'MB/s':>7} {'pico memória (MB)':>18}")
+        for formato in FormatoExportacao:
+            for gzip in (False, True):
+                nome = formato.value + (".gz" if gzip else "")
+                inicio = time.perf_counter()
+                blocos = exportador.gerar(formato)
+                tamanho = consumir(comprimir_gzip(blocos) if gzip else blocos)
+                duracao = time.perf_counter() - inicio
+
+                tracemalloc.start()
+                blocos = exportador.gerar(formato)
+                consumir(comprimir_gzip(blocos) if gzip else blocos)
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{nome:>12} {args.credores / duracao:>12.0f} {tamanho / 2 ** 20:>8.1f} "
+                      f"{tamanho / 2 ** 20 / duracao:>7.1f} {pico / 2 ** 20:>18.1f}")
+
+        # Referência: o resultado inteiro em memória antes do primeiro byte
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        registros = db.fetch_all(CONSULTA)
+        duracao = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"fetch_all: {len(registros)} registros em {duracao:.1f}s, pico de memória "
+              f"{pico / 2 ** 20:.1f} MB antes de serializar")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
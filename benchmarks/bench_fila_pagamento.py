@@ -0,0 +1,128 @@
+"""
+Benchmark do índice de fila de pagamento por foro (/precatorios/{id}/fila).
+
+Cria um banco temporário com N precatórios distribuídos entre poucos foros
+e mede:
+- a montagem do índice a partir do banco;
+- a posição na fila e o valor à frente de precatórios aleatórios pelo
+  índice (treap com tamanho e soma por subárvore);
+- a mesma resposta em SQL, com COUNT/SUM sobre o índice
+  (foro, data_publicacao, numero_precatorio), que percorre todos os
+  precatórios à frente;
+- inserções e remoções no índice.
+As duas formas de calcular a posição precisam chegar aos mesmos valores.
+
+Uso:
+    python benchmarks/bench_fila_pagamento.py --precatorios 200000 --consultas 2000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from ports.database.database import Database  # noqa: E402
+from adapters.eventos.outbox import FluxoEventos  # noqa: E402
+from adapters.fila_pagamento.indice import IndiceFilaPagamento  # noqa: E402
+
+FOROS = ["TJSP", "TJRJ", "TJMG", "TRF1", "TRF3"]
+CONSULTA_SQL = """
+    SELECT COUNT(*) AS quantidade, COALESCE(SUM(valor_nominal), 0) AS soma
+    FROM precatorios
+    WHERE foro = ? AND (data_publicacao, numero_precatorio, id) < (?, ?, ?)
+"""
+
+
+def popular(db: Database, quantidade: int, semente: int):
+    aleatorio = random.Random(semente)
+    base = datetime(2015, 1, 1)
+    db.execute_many(
+        "INSERT INTO precatorios (id, credor_id, numero_precatorio, valor_nominal, foro, data_publicacao) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                indice, indice, f"{indice:07d}-45.2024.1.00.0000", aleatorio.randrange(10 ** 5, 10 ** 8) / 100,
+                aleatorio.choice(FOROS), (base + timedelta(days=aleatorio.randrange(3650))).isoformat(sep=" ")
+            )
+            for indice in range(1, quantidade + 1)
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--precatorios", type=int, default=200000)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_fila_")
+    try:
+        db = Database(os.path.join(pasta, "bench.db"), pool_size=2, consulta_lenta_ms=600000)
+        db.inicializar()
+        popular(db, args.precatorios, args.semente)
+        indice = IndiceFilaPagamento(db, FluxoEventos(db))
+
+        inicio = time.perf_counter()
+        indice.carregar()
+        tempo_carga = time.perf_counter() - inicio
+
+        aleatorio = random.Random(args.semente)
+        ids = aleatorio.sample(range(1, args.precatorios + 1), args.consultas)
+
+        inicio = time.perf_counter()
+        pelo_indice = [indice.posicao(precatorio_id) for precatorio_id in ids]
+        tempo_indice = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        pelo_sql = []
+        for precatorio_id in ids:
+            row = db.fetch_one(
+                "SELECT foro, data_publicacao, numero_precatorio FROM precatorios WHERE id = ?", (precatorio_id,)
+            )
+            pelo_sql.append(db.fetch_one(
+                CONSULTA_SQL, (row['foro'], row['data_publicacao'], row['numero_precatorio'], precatorio_id)
+            ))
+        tempo_sql = time.perf_counter() - inicio
+
+        for posicao, row in zip(pelo_indice, pelo_sql):
+            assert posicao["precatorios_a_frente"] == row['quantidade']
+            assert abs(posicao["valor_a_frente"] - row['soma']) < 0.01 * max(row['quantidade'], 1)
+
+        # Inserções e remoções direto na árvore do maior foro
+        arvore = max(indice._arvores.values(), key=len)
+        chaves = [
+            (datetime(2015, 1, 1) + timedelta(days=aleatorio.randrange(3650)), f"novo-{i}", -i)
+            for i in range(1, args.consultas + 1)
+        ]
+        inicio = time.perf_counter()
+        for chave in chaves:
+            arvore.inserir(chave, 1000.0)
+        for chave in chaves:
+            arvore.remover(chave)
+        tempo_escrita = time.perf_counter() - inicio
+
+        # Altura da árvore, para conferir o equilíbrio da treap
+        def altura(no):
+            return 1 + max(altura(no.esquerda), altura(no.direita)) if no else 0
+
+        n = args.consultas
+        print(f"{args.precatorios} precatórios em {len(FOROS)} foros; maior fila {len(arvore)}, altura {altura(arvore._raiz)}")
+        print(f"{'operação':>34} {'tempo (ms)':>11} {'por operação (µs)':>18}")
+        print(f"{'montagem do índice':>34} {tempo_carga * 1000:>11.0f}")
+        print(f"{f'{n} posições pelo índice':>34} {tempo_indice * 1000:>11.1f} {tempo_indice / n * 1e6:>18.1f}")
+        print(f"{f'{n} posições em SQL (COUNT/SUM)':>34} {tempo_sql * 1000:>11.1f} {tempo_sql / n * 1e6:>18.1f}")
+        print(f"{f'{n} inserções + {n} remoções':>34} {tempo_escrita * 1000:>11.1f} {tempo_escrita / (2 * n) * 1e6:>18.1f}")
+        print(f"Aceleração do índice sobre o SQL: {tempo_sql / tempo_indice:.0f}x")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
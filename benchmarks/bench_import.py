@@ -0,0 +1,123 @@
+"""
+Benchmark do custo de importação de main.py.
+
+Importa a aplicação em processos novos (com `python -X importtime`) e mede o
+tempo total e o tempo gasto nos módulos do próprio projeto. Também verifica
+que a importação não tem efeitos colaterais: nenhum arquivo de banco ou pasta
+de upload pode ser criado, nenhuma thread pode ser iniciada e as dependências
+pesadas usadas só por alguns recursos (SQLAlchemy, APScheduler, httpx, numpy,
+boto3, pool de processos) não podem ser carregadas.
+
+Falha (exit code 1) se a mediana ultrapassar o orçamento, para uso no CI.
+
+Uso:
+    python benchmarks/bench_import.py --repeticoes 5 --orcamento-ms 1200
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACOTES_PROJETO = ("main", "adapters", "core", "ports")
+# Importados sob demanda pelos recursos que os usam
+MODULOS_SOB_DEMANDA = (
+    "sqlalchemy", "apscheduler", "httpx", "numpy", "boto3",
+    "multiprocessing", "concurrent.futures.process", "tomllib",
+)
+
+SCRIPT = (
+    "import sys, threading, main; "
+    "print('CARREGADOS', ' '.join(m for m in %r if m in sys.modules)); "
+    "print('THREADS', threading.active_count())"
+) % (MODULOS_SOB_DEMANDA,)
+
+
+def medir_importacao(pasta: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=RAIZ, PYTHONDONTWRITEBYTECODE="1")
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        cwd=pasta, env=env, capture_output=True, text=True, check=True
+    )
+
+    total_us = 0
+    projeto_us = 0
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        partes = [p.strip() for p in linha[len("import time:"):].split("|")]
+        if not partes[0].isdigit():
+            continue
+        proprio, cumulativo, modulo = int(partes[0]), int(partes[1]), partes[2]
+        nome = modulo.strip()
+        if nome == "main":
+            total_us = cumulativo
+        if nome.split(".")[0] in PACOTES_PROJETO:
+            projeto_us += proprio
+
+    threads = int(resultado.stdout.split("THREADS")[-1].strip())
+    carregados = resultado.stdout.split("CARREGADOS")[-1].split("THREADS")[0].split()
+    return {
+        "total_ms": total_us / 1000, "projeto_ms": projeto_us / 1000,
+        "threads": threads, "carregados": carregados
+    }
+
+
+def verificar_efeitos_colaterais(pasta: str, medicao: dict) -> list:
+    problemas = []
+    for nome in ("database.db", "uploads"):
+        if os.path.exists(os.path.join(pasta, nome)):
+            problemas.append(f"importação criou '{nome}'")
+    if medicao["threads"] > 1:
+        problemas.append(f"importação iniciou {medicao['threads'] - 1} thread(s)")
+    for modulo in medicao["carregados"]:
+        problemas.append(f"importação carregou '{modulo}'")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--orcamento-ms", type=float,
+                        default=float(os.getenv("IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--saida", help="Arquivo JSON com o resultado (para histórico no CI)")
+    args = parser.parse_args()
+
+    medicoes = []
+    problemas = []
+    for _ in range(args.repeticoes):
+        pasta = tempfile.mkdtemp(prefix="bench_import_")
+        os.makedirs(os.path.join(pasta, "static"))
+        try:
+            medicao = medir_importacao(pasta)
+            problemas.extend(verificar_efeitos_colaterais(pasta, medicao))
+            medicoes.append(medicao)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    resultado = {
+        "total_ms": statistics.median(m["total_ms"] for m in medicoes),
+        "projeto_ms": statistics.median(m["projeto_ms"] for m in medicoes),
+        "orcamento_ms": args.orcamento_ms,
+        "problemas": sorted(set(problemas)),
+    }
+    print(f"import main: {resultado['total_ms']:.1f} ms "
+          f"(módulos do projeto: {resultado['projeto_ms']:.1f} ms, "
+          f"orçamento: {args.orcamento_ms:.0f} ms)")
+    for problema in resultado["problemas"]:
+        print(f"ERRO: {problema}")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+    if resultado["problemas"] or resultado["total_ms"] > args.orcamento_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark da serialização das respostas JSON.
+
+Monta respostas grandes no formato das rotas (lista de credores com
+precatório, documentos e certidões; detalhe de um credor com muitos
+documentos e certidões), com datetime, Decimal e os Enums das entidades,
+e compara o tempo para transformá-las no corpo da resposta:
+
+- padrão: jsonable_encoder + json da biblioteca padrão (JSONResponse),
+  o caminho das rotas que retornam dicionários no FastAPI
+- response_model: validação no modelo pydantic + serialização pelo
+  pydantic, o caminho das rotas com response_model
+- RespostaJSON: serialização direta com orjson (adapters/http/respostas.py)
+
+Uso:
+    python benchmarks/bench_json.py --credores 2000 --itens 20 --repeticoes 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import BaseModel, TypeAdapter  # noqa: E402
+
+from core.entities.documento import TipoDocumento  # noqa: E402
+from core.entities.certidao import TipoCertidao, StatusCertidao  # noqa: E402
+from adapters.http import respostas  # noqa: E402
+from adapters.http.respostas import RespostaJSON  # noqa: E402
+
+
+class PrecatorioModelo(BaseModel):
+    numero: str
+    valor: Decimal
+    foro: str
+    data_publicacao: datetime
+
+class DocumentoModelo(BaseModel):
+    tipo: TipoDocumento
+    arquivo_url: str
+    enviado_em: datetime
+
+class CertidaoModelo(BaseModel):
+    tipo: TipoCertidao
+    status: StatusCertidao
+    valida_ate: Optional[datetime]
+
+class CredorModelo(BaseModel):
+    id: int
+    nome: str
+    cpf_cnpj: str
+    email: str
+    telefone: str
+    precatorio: Optional[PrecatorioModelo]
+    documentos: List[DocumentoModelo]
+    certidoes: List[CertidaoModelo]
+
+
+def gerar_credor(indice: int, itens: int, aleatorio: random.Random) -> dict:
+    base = datetime(2024, 1, 1)
+    return {
+        'id': indice,
+        'nome': f"Credor {indice} da Silva",
+        'cpf_cnpj': f"{aleatorio.randrange(10 ** 10, 10 ** 11)}",
+        'email': f"credor{indice}@exemplo.com",
+        'telefone': "11999999999",
+        'precatorio': {
+            'numero': f"{indice:07d}-45.2024.1.00.0000",
+            'valor': Decimal(aleatorio.randrange(10 ** 5, 10 ** 9)) / 100,
+            'foro': "São Paulo",
+            'data_publicacao': base + timedelta(days=aleatorio.randrange(365))
+        },
+        'documentos': [
+            {
+                'tipo': aleatorio.choice(list(TipoDocumento)),
+                'arquivo_url': f"static/documentos/{indice}/documento_{item}.pdf",
+                'enviado_em': base + timedelta(seconds=aleatorio.randrange(10 ** 7))
+            }
+            for item in range(itens)
+        ],
+        'certidoes': [
+            {
+                'tipo': aleatorio.choice(list(TipoCertidao)),
+                'status': aleatorio.choice(list(StatusCertidao)),
+                'valida_ate': base + timedelta(days=aleatorio.randrange(30, 365))
+            }
+            for _ in range(itens)
+        ]
+    }
+
+
+def medir(funcao, conteudo, repeticoes: int) -> tuple:
+    tempos = []
+    corpo = b""
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        corpo = funcao(conteudo)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000, len(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--credores", type=int, default=2000, help="Credores na resposta em lista")
+    parser.add_argument("--itens", type=int, default=20, help="Documentos e certidões por credor")
+    parser.add_argument("--itens-detalhe", type=int, default=5000, help="Documentos e certidões no detalhe")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(42)
+    cargas = {
+        f"lista ({args.credores} credores)": [
+            gerar_credor(indice, args.itens, aleatorio) for indice in range(args.credores)
+        ],
+        f"detalhe ({args.itens_detalhe} itens)": gerar_credor(1, args.itens_detalhe, aleatorio),
+    }
+    modelos = {
+        nome: TypeAdapter(List[CredorModelo] if isinstance(conteudo, list) else CredorModelo)
+        for nome, conteudo in cargas.items()
+    }
+
+    print(f"orjson: {'sim' if respostas.orjson is not None else 'não (json da biblioteca padrão)'}")
+    print(f"{'resposta':>26} {'caminho':>15} {'mediana (ms)':>13} {'MB':>7} {'aceleração':>11}")
+    for nome, conteudo in cargas.items():
+        modelo = modelos[nome]
+        caminhos = {
+            "padrão": lambda c: JSONResponse(jsonable_encoder(c)).body,
+            "response_model": lambda c, m=modelo: m.dump_json(m.validate_python(c)),
+            "RespostaJSON": lambda c: RespostaJSON(c).body,
+        }
+        # Os três caminhos devem produzir o mesmo documento (exceto Decimal,
+        # que o jsonable_encoder converte em float)
+        assert json.loads(caminhos["RespostaJSON"](conteudo)) == json.loads(
+            json.dumps(jsonable_encoder(conteudo, custom_encoder={Decimal: str}))
+        )
+        resultados = {caminho: medir(funcao, conteudo, args.repeticoes) for caminho, funcao in caminhos.items()}
+        referencia = resultados["padrão"][0]
+        for caminho, (mediana, tamanho) in resultados.items():
+            print(f"{nome:>26} {caminho:>15} {mediana:>13.1f} {tamanho / 2 ** 20:>7.1f} {referencia / mediana:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark da precificação de precatórios (/precatorios/valuation).
+
+Cria um banco temporário com N precatórios distribuídos entre foros com
+atrasos de fila e spreads diferentes e mede:
+- a carga do banco para as colunas (arrays NumPy);
+- o cálculo vetorizado do valor presente e da data esperada de pagamento;
+- o mesmo cálculo linha a linha em Python (o caminho sem NumPy), que
+  precisa chegar aos mesmos valores;
+- o resumo da carteira por foro sobre o resultado.
+
+Uso:
+    python benchmarks/bench_precificacao.py --precatorios 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from core.entities.precificacao import ParametrosPrecificacao  # noqa: E402
+from ports.database.database import Database  # noqa: E402
+from adapters.precificacao import motor  # noqa: E402
+from adapters.precificacao.motor import ColunasPrecatorios, precificar  # noqa: E402
+
+FOROS = {
+    "TJSP": {"atraso_meses": 120, "spread": 0.05},
+    "TJRJ": {"atraso_meses": 72, "spread": 0.04},
+    "TJMG": {"atraso_meses": 48, "spread": 0.035},
+    "TRF1": {"atraso_meses": 18, "spread": 0.01},
+    "TRF3": {"atraso_meses": 18, "spread": 0.01},
+}
+
+
+def popular(db: Database, quantidade: int, semente: int):
+    aleatorio = random.Random(semente)
+    base = datetime(2015, 1, 1)
+    foros = list(FOROS) + ["Comarca sem parâmetros"]
+    # Só a tabela de precatórios: a precificação não lê os credores
+    db.execute_many(
+        "INSERT INTO precatorios (id, credor_id, numero_precatorio, valor_nominal, foro, data_publicacao) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                indice, indice, f"{indice:07d}-45.2024.1.00.0000", aleatorio.randrange(10 ** 5, 10 ** 9) / 100,
+                aleatorio.choice(foros), (base + timedelta(days=aleatorio.randrange(3650))).isoformat(sep=" ")
+            )
+            for indice in range(1, quantidade + 1)
+        )
+    )
+
+
+def medir(funcao, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--precatorios", type=int, default=1000000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    np = motor._numpy()
+    if np is None:
+        print("NumPy não instalado: pip install numpy")
+        return
+
+    pasta = tempfile.mkdtemp(prefix="bench_precificacao_")
+    try:
+        db = Database(os.path.join(pasta, "bench.db"), pool_size=2, consulta_lenta_ms=600000)
+        db.inicializar()
+        popular(db, args.precatorios, args.semente)
+        parametros = ParametrosPrecificacao.from_dict({"foros": FOROS})
+        data_base = date(2025, 1, 1)
+
+        tempo_carga, colunas = medir(lambda: ColunasPrecatorios.carregar(db), 1)
+        tempo_numpy, avaliacao = medir(lambda: precificar(colunas, parametros, data_base), args.repeticoes)
+        tempo_resumo, resumo = medir(avaliacao.resumo, args.repeticoes)
+
+        # Mesmas colunas como listas, para o caminho sem NumPy
+        listas = ColunasPrecatorios(
+            colunas.ids.tolist(), colunas.credor_ids.tolist(), colunas.valores.tolist(),
+            colunas.codigos_foro.tolist(), colunas.foros, colunas.publicacao.astype(object).tolist()
+        )
+        motor.np = None
+        try:
+            tempo_python, referencia = medir(lambda: precificar(listas, parametros, data_base), 1)
+        finally:
+            motor.np = np
+        assert np.allclose(avaliacao.presente, referencia.presente), "cálculo vetorizado diverge do cálculo em Python"
+        assert [str(dia) for dia in avaliacao.pagamento[:1000]] == [str(dia) for dia in referencia.pagamento[:1000]]
+
+        n = args.precatorios
+        print(f"{n} precatórios em {len(colunas.foros)} foros, valor presente total {resumo['valor_presente']:,.2f}")
+        print(f"{'etapa':>32} {'tempo (ms)':>11} {'precatórios/s':>14}")
+        print(f"{'carga do banco para colunas':>32} {tempo_carga * 1000:>11.0f} {n / tempo_carga:>14,.0f}")
+        print(f"{'cálculo vetorizado (NumPy)':>32} {tempo_numpy * 1000:>11.1f} {n / tempo_numpy:>14,.0f}")
+        print(f"{'cálculo linha a linha (Python)':>32} {tempo_python * 1000:>11.0f} {n / tempo_python:>14,.0f}")
+        print(f"{'resumo por foro':>32} {tempo_resumo * 1000:>11.1f}")
+        print(f"Aceleração do cálculo vetorizado: {tempo_python / tempo_numpy:.0f}x")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
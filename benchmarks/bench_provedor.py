@@ -0,0 +1,164 @@
+"""
+Benchmark do provedor HTTP de certidões contra o servidor local de certidões.
+
+Sobe benchmarks/servidor_certidoes.py com a latência e a taxa de erros
+informadas e dispara consultas concorrentes (cada consulta busca os quatro
+tipos de certidão em paralelo), comparando:
+- sem_pool: um cliente httpx novo por consulta, sem retentativas
+- pool: CertidaoApiHttp sem hedging (keep-alive, retentativas e disjuntores)
+- hedge: CertidaoApiHttp com requisições duplicadas após o p95 de cada origem
+
+Reporta throughput, latências p50/p95/p99, consultas com alguma origem
+faltando (parciais) e falhas de cada modo. Com --prazo-ms cada consulta
+roda com esse prazo, como se viesse de uma requisição com X-Prazo-Ms.
+
+Uso:
+    python benchmarks/bench_provedor.py --consultas 2000 --concorrencia 50 \
+        --latencia-ms 20 --cauda-prob 0.02 --cauda-ms 500 --erro-prob 0.02
+
+    # Uma origem sempre lenta: com prazo, as demais respondem a tempo
+    python benchmarks/bench_provedor.py --origem-lenta municipal --cauda-ms 3000 --prazo-ms 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from adapters.certidoes.provedor_http import CertidaoApiHttp  # noqa: E402
+from adapters.runtime.prazo import prazo  # noqa: E402
+
+TIPOS = ["federal", "estadual", "municipal", "trabalhista"]
+
+
+def aguardar_servidor(url: str, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            httpx.get(f"{url}/contadores", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("Servidor de certidões não respondeu a tempo")
+
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+async def disparar(consultar, consultas: int, concorrencia: int, prazo_ms: float = None) -> dict:
+    latencias, falhas, parciais = [], 0, 0
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def uma(indice: int):
+        nonlocal falhas, parciais
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                with prazo(prazo_ms / 1000 if prazo_ms else None):
+                    certidoes = await consultar(f"{indice:011d}")
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                if any("erro" in certidao for certidao in certidoes):
+                    parciais += 1
+            except Exception:
+                falhas += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma(indice) for indice in range(consultas)))
+    duracao = time.perf_counter() - inicio
+    return {
+        "throughput": consultas / duracao,
+        "p50": statistics.median(latencias) if latencias else 0.0,
+        "p95": percentil(latencias, 0.95),
+        "p99": percentil(latencias, 0.99),
+        "parciais": parciais,
+        "falhas": falhas,
+    }
+
+
+async def executar(url: str, consultas: int, concorrencia: int, prazo_ms: float) -> dict:
+    async def sem_pool(cpf_cnpj: str):
+        async with httpx.AsyncClient(base_url=url, timeout=5.0) as cliente:
+            respostas = await asyncio.gather(*(
+                cliente.get(f"/api/certidoes/{tipo}", params={"cpf_cnpj": cpf_cnpj})
+                for tipo in TIPOS
+            ))
+            for resposta in respostas:
+                resposta.raise_for_status()
+            return [resposta.json()["certidao"] for resposta in respostas]
+
+    resultados = {"sem_pool": await disparar(sem_pool, consultas, concorrencia)}
+    for modo, hedge in (("pool", False), ("hedge", True)):
+        provedor = CertidaoApiHttp(
+            url,
+            max_conexoes=concorrencia * len(TIPOS) * 2,
+            max_conexoes_ociosas=concorrencia * len(TIPOS),
+            limite_falhas_disjuntor=50,
+            tempo_aberto_disjuntor_segundos=1.0,
+            hedge=hedge
+        )
+        resultados[modo] = await disparar(
+            provedor.buscar_certidoes_async, consultas, concorrencia, prazo_ms
+        )
+        resultados[modo]["provedor"] = provedor.estatisticas()
+        await provedor.fechar()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--porta", type=int, default=8100)
+    parser.add_argument("--latencia-ms", type=float, default=20.0)
+    parser.add_argument("--cauda-prob", type=float, default=0.02)
+    parser.add_argument("--cauda-ms", type=float, default=500.0)
+    parser.add_argument("--erro-prob", type=float, default=0.02)
+    parser.add_argument("--origem-lenta", choices=TIPOS)
+    parser.add_argument("--origem-fora", choices=TIPOS)
+    parser.add_argument("--prazo-ms", type=float, help="prazo de cada consulta nos modos pool e hedge")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.porta}"
+    servidor = subprocess.Popen([
+        sys.executable, os.path.join(RAIZ, "benchmarks", "servidor_certidoes.py"),
+        "--porta", str(args.porta),
+        "--latencia-ms", str(args.latencia_ms),
+        "--cauda-prob", str(args.cauda_prob),
+        "--cauda-ms", str(args.cauda_ms),
+        "--erro-prob", str(args.erro_prob),
+    ] + (["--origem-lenta", args.origem_lenta] if args.origem_lenta else [])
+      + (["--origem-fora", args.origem_fora] if args.origem_fora else []))
+    try:
+        aguardar_servidor(url)
+        resultados = asyncio.run(executar(url, args.consultas, args.concorrencia, args.prazo_ms))
+    finally:
+        servidor.terminate()
+        servidor.wait(10)
+
+    print(f"{'modo':<10}{'consultas/s':>14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'parciais':>10}{'falhas':>8}")
+    for modo, resultado in resultados.items():
+        print(
+            f"{modo:<10}{resultado['throughput']:>14.0f}{resultado['p50']:>10.1f}"
+            f"{resultado['p95']:>10.1f}{resultado['p99']:>10.1f}"
+            f"{resultado['parciais']:>10}{resultado['falhas']:>8}"
+        )
+    for modo in ("pool", "hedge"):
+        print(f"\n{modo}:")
+        for origem, estatisticas in resultados[modo]["provedor"]["origens"].items():
+            print(f"  {origem:<12} {estatisticas}")
+
+
+if __name__ == "__main__":
+    main()
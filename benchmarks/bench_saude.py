@@ -0,0 +1,108 @@
+"""
+Benchmark das verificações de saúde (/health/ready e /debug/runtime).
+
+Cria um banco temporário com N jobs (uma parte pendente) e mede o custo
+de cada verificação, isolada e pelo VerificadorSaude, que as executa em
+paralelo:
+- sonda do banco (leitura e lock de escrita, sem gravar nada);
+- profundidade da fila de jobs;
+- espaço livre em disco;
+- memória do processo.
+Depois segura o lock de escrita em outra conexão para mostrar o tempo até
+o banco ser reportado como bloqueado.
+
+Uso:
+    python benchmarks/bench_saude.py --jobs 100000 --repeticoes 1000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from ports.database.database import Database  # noqa: E402
+from adapters.jobs.fila_sqlite import FilaJobsSqlite  # noqa: E402
+from adapters.runtime.saude import VerificadorSaude, espaco_disco, memoria_processo  # noqa: E402
+
+
+def popular(db: Database, quantidade: int):
+    agora = datetime.now()
+    db.execute_many(
+        "INSERT INTO jobs (tipo, entidade, entidade_id, status, disponivel_em, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            ("integridade", "documento", indice, "pendente" if indice % 10 == 0 else "concluido", agora, agora, agora)
+            for indice in range(1, quantidade + 1)
+        )
+    )
+
+
+def medir(funcao, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--repeticoes", type=int, default=1000)
+    parser.add_argument("--escrita-timeout-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_saude_")
+    try:
+        db = Database(os.path.join(pasta, "bench.db"), pool_size=2, consulta_lenta_ms=600000)
+        db.inicializar()
+        popular(db, args.jobs)
+        fila = FilaJobsSqlite(db)
+        verificacoes = {
+            "banco": lambda: db.sondar(args.escrita_timeout_ms),
+            "fila_jobs": lambda: {"pendentes": fila.contar_pendentes()},
+            "disco": lambda: espaco_disco([pasta, RAIZ]),
+            "memoria": memoria_processo,
+        }
+        verificador = VerificadorSaude(timeout_segundos=5)
+        for nome, verificacao in verificacoes.items():
+            verificador.registrar(nome, verificacao)
+
+        n = args.repeticoes
+        print(f"{args.jobs} jobs ({fila.contar_pendentes()} pendentes), {n} repetições")
+        print(f"{'verificação':>28} {'por chamada (µs)':>17}")
+        for nome, verificacao in verificacoes.items():
+            print(f"{nome:>28} {medir(verificacao, n) * 1e6:>17.1f}")
+
+        async def rodadas():
+            inicio = time.perf_counter()
+            for _ in range(n):
+                resultado = await verificador.verificar()
+                assert resultado["pronto"], resultado
+            return (time.perf_counter() - inicio) / n
+
+        print(f"{'todas (VerificadorSaude)':>28} {asyncio.run(rodadas()) * 1e6:>17.1f}")
+        verificador.fechar()
+
+        outra = sqlite3.connect(db.db_path, isolation_level=None)
+        outra.execute("BEGIN IMMEDIATE")
+        inicio = time.perf_counter()
+        sonda = db.sondar(args.escrita_timeout_ms)
+        tempo_bloqueio = time.perf_counter() - inicio
+        outra.execute("ROLLBACK")
+        outra.close()
+        assert sonda["bloqueado"], "o lock de escrita de outra conexão não foi detectado"
+        print(f"Banco com o lock de escrita ocupado: bloqueado reportado em {tempo_bloqueio * 1000:.0f} ms")
+        db.fechar()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
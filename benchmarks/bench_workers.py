@@ -0,0 +1,132 @@
+"""
+Benchmark de escalabilidade da API com múltiplos workers.
+
+Sobe a aplicação com gunicorn para cada quantidade de workers, cadastra um
+credor e dispara requisições concorrentes de GET /credores/{id}, reportando
+throughput e latências.
+
+Uso:
+    python benchmarks/bench_workers.py --workers 1 2 4 --duracao 10 --concorrencia 64
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CREDOR = {
+    "nome": "Credor Benchmark",
+    "cpf_cnpj": "12345678901",
+    "email": "bench@email.com",
+    "telefone": "11999999999",
+    "precatorio": {
+        "numero_precatorio": "0000123-45.2024.1.00.0000",
+        "valor_nominal": "50000.00",
+        "foro": "São Paulo",
+        "data_publicacao": "2024-05-24T00:00:00"
+    }
+}
+
+
+def aguardar_servidor(url: str, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            httpx.get(f"{url}/docs", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+
+def disparar_carga(url: str, caminho: str, duracao: float, concorrencia: int):
+    latencias = []
+    erros = [0]
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def cliente():
+        locais = []
+        falhas = 0
+        with httpx.Client(base_url=url, timeout=10.0) as http:
+            while time.monotonic() < fim:
+                inicio = time.perf_counter()
+                try:
+                    resposta = http.get(caminho)
+                    if resposta.status_code != 200:
+                        falhas += 1
+                except httpx.HTTPError:
+                    falhas += 1
+                locais.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(locais)
+            erros[0] += falhas
+
+    threads = [threading.Thread(target=cliente) for _ in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencias, erros[0]
+
+
+def executar(workers: int, duracao: float, concorrencia: int, porta: int) -> dict:
+    pasta = tempfile.mkdtemp(prefix="bench_workers_")
+    os.makedirs(os.path.join(pasta, "static"))
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{porta}",
+               PYTHONPATH=RAIZ)
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(RAIZ, "gunicorn.conf.py"),
+         "--access-logfile", "/dev/null", "main:app"],
+        cwd=pasta, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{porta}"
+    try:
+        aguardar_servidor(url)
+        credor_id = httpx.post(f"{url}/credores", json=CREDOR).json()["id"]
+        latencias, erros = disparar_carga(url, f"/credores/{credor_id}", duracao, concorrencia)
+    finally:
+        processo.terminate()
+        processo.wait(30)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    latencias.sort()
+    return {
+        "workers": workers,
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "rps": len(latencias) / duracao,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p99_ms": latencias[int(len(latencias) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--duracao", type=float, default=10.0)
+    parser.add_argument("--concorrencia", type=int, default=64)
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    resultados = []
+    for workers in sorted(set(args.workers)):
+        resultados.append(executar(workers, args.duracao, args.concorrencia, args.porta))
+
+    base = resultados[0]["rps"] or 1
+    print(f"{'workers':>8} {'req/s':>10} {'escala':>8} {'p50 ms':>8} {'p99 ms':>8} {'erros':>6}")
+    for r in resultados:
+        print(f"{r['workers']:>8} {r['rps']:>10.1f} {r['rps'] / base:>7.2f}x "
+              f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['erros']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Servidor local que substitui a API externa de certidões em testes e benchmarks.
+
+Responde no mesmo formato da API mock da aplicação, simulando latência
+(com cauda longa) e erros, para medir throughput e latências de cauda do
+provedor HTTP (adapters/certidoes/provedor_http.py) sem depender da rede.
+Cada tipo de certidão é uma origem (GET /api/certidoes/{tipo}); uma delas
+pode ser configurada como lenta ou fora do ar. O prazo recebido no
+cabeçalho X-Prazo-Ms é respeitado: a origem desiste e responde 504.
+
+Uso:
+    python benchmarks/servidor_certidoes.py --porta 8100 \
+        --latencia-ms 50 --cauda-prob 0.05 --cauda-ms 1000 --erro-prob 0.02 \
+        --origem-lenta municipal --origem-fora trabalhista
+
+    CERTIDOES_API_URL=http://127.0.0.1:8100 uvicorn main:app
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Response
+
+TIPOS = ["federal", "estadual", "municipal", "trabalhista"]
+STATUS = ["positiva", "negativa", "pendente"]
+
+app = FastAPI(title="Stand-in da API de certidões")
+app.state.config = argparse.Namespace(
+    latencia_ms=50.0, cauda_prob=0.0, cauda_ms=1000.0, erro_prob=0.0,
+    origem_lenta=None, origem_fora=None
+)
+app.state.contadores = {"requisicoes": 0, "erros": 0, "lentas": 0, "prazos_excedidos": 0}
+
+
+def _escolher(valor: str, opcoes: list) -> str:
+    hash_value = int(hashlib.md5(valor.encode()).hexdigest(), 16)
+    return opcoes[hash_value % len(opcoes)]
+
+
+def _certidao(cpf_cnpj: str, tipo: str) -> dict:
+    return {
+        "tipo": tipo,
+        "status": _escolher(f"{cpf_cnpj}_{tipo}", STATUS),
+        "conteudo_base64": base64.b64encode(
+            f"Certidão {tipo.title()} para {cpf_cnpj}".encode()
+        ).decode(),
+        "valida_ate": (datetime.now() + timedelta(days=30)).isoformat()
+    }
+
+
+async def _simular_origem(tipo: Optional[str] = None, prazo_ms: Optional[str] = None):
+    """
+    Aplica a latência simulada e, com a probabilidade configurada, falha
+    """
+    config = app.state.config
+    contadores = app.state.contadores
+    contadores["requisicoes"] += 1
+
+    if tipo is not None and tipo == config.origem_fora:
+        contadores["erros"] += 1
+        raise HTTPException(status_code=503, detail=f"Origem {tipo} fora do ar")
+
+    # Latência com variação exponencial em torno da média, mais a cauda longa
+    latencia = random.expovariate(1 / config.latencia_ms) if config.latencia_ms > 0 else 0.0
+    if random.random() < config.cauda_prob or (tipo is not None and tipo == config.origem_lenta):
+        contadores["lentas"] += 1
+        latencia += config.cauda_ms
+
+    if prazo_ms is not None and latencia > float(prazo_ms):
+        await asyncio.sleep(float(prazo_ms) / 1000)
+        contadores["prazos_excedidos"] += 1
+        raise HTTPException(status_code=504, detail="Prazo excedido")
+    await asyncio.sleep(latencia / 1000)
+
+    if random.random() < config.erro_prob:
+        contadores["erros"] += 1
+        raise HTTPException(status_code=503, detail="Origem indisponível")
+
+
+@app.get("/api/certidoes")
+async def consultar(cpf_cnpj: str, x_prazo_ms: Optional[str] = Header(None)):
+    await _simular_origem(prazo_ms=x_prazo_ms)
+    return {
+        "cpf_cnpj": cpf_cnpj,
+        "certidoes": [_certidao(cpf_cnpj, tipo) for tipo in TIPOS]
+    }
+
+
+@app.get("/api/certidoes/{certidao_id}/status")
+async def status(certidao_id: int, x_prazo_ms: Optional[str] = Header(None)):
+    await _simular_origem(prazo_ms=x_prazo_ms)
+    return {"status": _escolher(str(certidao_id), STATUS)}
+
+
+@app.get("/api/certidoes/{tipo}")
+async def consultar_origem(tipo: str, cpf_cnpj: str, x_prazo_ms: Optional[str] = Header(None)):
+    if tipo not in TIPOS:
+        raise HTTPException(status_code=404, detail="Tipo de certidão desconhecido")
+    await _simular_origem(tipo, x_prazo_ms)
+    return {"cpf_cnpj": cpf_cnpj, "certidao": _certidao(cpf_cnpj, tipo)}
+
+
+@app.get("/contadores")
+async def contadores(response: Response):
+    response.headers["Cache-Control"] = "no-store"
+    return app.state.contadores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8100)
+    parser.add_argument("--latencia-ms", type=float, default=50.0, help="latência média")
+    parser.add_argument("--cauda-prob", type=float, default=0.0, help="probabilidade de resposta lenta")
+    parser.add_argument("--cauda-ms", type=float, default=1000.0, help="atraso extra das respostas lentas")
+    parser.add_argument("--erro-prob", type=float, default=0.0, help="probabilidade de responder 503")
+    parser.add_argument("--origem-lenta", choices=TIPOS, help="tipo cujas respostas sempre têm o atraso da cauda")
+    parser.add_argument("--origem-fora", choices=TIPOS, help="tipo que sempre responde 503")
+    args = parser.parse_args()
+
+    app.state.config = args
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
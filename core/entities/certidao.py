@@ -1,6 +1,6 @@
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, timedelta
+from typing import ClassVar, Optional, List
 from enum import Enum
 
 class TipoCertidao(Enum):
@@ -33,6 +33,13 @@ class Certidao:
     created_at: datetime = datetime.now()
     updated_at: datetime = datetime.now()
 
+    # Limites de upload e validade das certidões sem data de validade,
+    # ajustados na inicialização pelas configurações
+    # (ver adapters/configuracao/configuracoes.py)
+    EXTENSOES_PERMITIDAS: ClassVar[List[str]] = ['.pdf']
+    TAMANHO_MAXIMO: ClassVar[int] = 5 * 1024 * 1024
+    VALIDADE_PADRAO_DIAS: ClassVar[int] = 30
+
     def validar_arquivo_ou_conteudo(self) -> bool:
         """
         Valida se possui arquivo_url OU conteudo_base64
@@ -92,17 +99,24 @@ class Certidao:
 
         return erros
 
-    @staticmethod
-    def extensoes_permitidas() -> List[str]:
+    @classmethod
+    def extensoes_permitidas(cls) -> List[str]:
         """
         Retorna lista de extensões de arquivo permitidas
         """
-        return ['.pdf']
+        return list(cls.EXTENSOES_PERMITIDAS)
 
-    @staticmethod
-    def tamanho_maximo() -> int:
+    @classmethod
+    def tamanho_maximo(cls) -> int:
         """
         Retorna tamanho máximo permitido para arquivos em bytes
-        5MB = 5 * 1024 * 1024
+        (padrão: 5MB)
+        """
+        return cls.TAMANHO_MAXIMO
+
+    @classmethod
+    def validade_padrao(cls) -> datetime:
+        """
+        Validade de uma certidão recebida agora sem data de validade
         """
-        return 5 * 1024 * 1024
\ No newline at end of file
+        return datetime.now() + timedelta(days=cls.VALIDADE_PADRAO_DIAS)
\ No newline at end of file
@@ -2,6 +2,32 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
 
+def normalizar_cpf_cnpj(cpf_cnpj: str) -> str:
+    """
+    Mantém apenas os dígitos: "123.456.789-00" e "12345678900" são o mesmo CPF
+    """
+    return ''.join(filter(str.isdigit, cpf_cnpj or ''))
+
+def normalizar_email(email: str) -> str:
+    """
+    Email sem espaços nas pontas e sem distinção de maiúsculas
+    """
+    return (email or '').strip().casefold()
+
+def classificar_busca(termo: str) -> str:
+    """
+    Identifica o critério de uma busca livre de credores:
+    - 'cpf_cnpj': apenas dígitos e pontuação de CPF/CNPJ
+    - 'email': contém @
+    - 'nome': demais casos
+    """
+    termo = termo.strip()
+    if '@' in termo:
+        return 'email'
+    if termo and normalizar_cpf_cnpj(termo) and not termo.strip('0123456789.-/ '):
+        return 'cpf_cnpj'
+    return 'nome'
+
 @dataclass
 class Credor:
     id: Optional[int] = None
@@ -17,7 +43,7 @@ class Credor:
         Valida o formato do CPF/CNPJ.
         Apenas verifica se contém somente números e tem tamanho correto.
         """
-        numeros = ''.join(filter(str.isdigit, self.cpf_cnpj))
+        numeros = normalizar_cpf_cnpj(self.cpf_cnpj)
         return len(numeros) in [11, 14]  # 11 para CPF, 14 para CNPJ
     
     def validar_email(self) -> bool:
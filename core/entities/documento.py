@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List
+from typing import ClassVar, Optional, List
 from enum import Enum
 
 class TipoDocumento(Enum):
@@ -17,6 +17,11 @@ class Documento:
     enviado_em: datetime = datetime.now()
     created_at: datetime = datetime.now()
     updated_at: datetime = datetime.now()
+
+    # Limites de upload, ajustados na inicialização pelas configurações
+    # (ver adapters/configuracao/configuracoes.py)
+    EXTENSOES_PERMITIDAS: ClassVar[List[str]] = ['.pdf', '.jpg', '.jpeg', '.png']
+    TAMANHO_MAXIMO: ClassVar[int] = 10 * 1024 * 1024
     
     def validar_arquivo_url(self) -> bool:
         """
@@ -51,17 +56,17 @@ class Documento:
             
         return erros
 
-    @staticmethod
-    def extensoes_permitidas() -> List[str]:
+    @classmethod
+    def extensoes_permitidas(cls) -> List[str]:
         """
         Retorna lista de extensões de arquivo permitidas
         """
-        return ['.pdf', '.jpg', '.jpeg', '.png']
+        return list(cls.EXTENSOES_PERMITIDAS)
 
-    @staticmethod
-    def tamanho_maximo() -> int:
+    @classmethod
+    def tamanho_maximo(cls) -> int:
         """
         Retorna tamanho máximo permitido para arquivos em bytes
-        10MB = 10 * 1024 * 1024
+        (padrão: 10MB)
         """
-        return 10 * 1024 * 1024
\ No newline at end of file
+        return cls.TAMANHO_MAXIMO
\ No newline at end of file
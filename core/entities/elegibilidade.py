@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable
+from core.entities.documento import Documento, TipoDocumento
+from core.entities.certidao import Certidao, TipoCertidao, StatusCertidao
+
+# Cada requisito da compra é um bit: um documento de cada tipo e uma
+# certidão negativa de cada tipo. O credor está apto quando tem todos
+BITS_DOCUMENTO: Dict[TipoDocumento, int] = {
+    tipo: 1 << indice for indice, tipo in enumerate(TipoDocumento)
+}
+BITS_CERTIDAO: Dict[TipoCertidao, int] = {
+    tipo: 1 << (len(BITS_DOCUMENTO) + indice) for indice, tipo in enumerate(TipoCertidao)
+}
+TODOS_REQUISITOS = sum(BITS_DOCUMENTO.values()) + sum(BITS_CERTIDAO.values())
+
+@dataclass
+class Elegibilidade:
+    credor_id: int
+    requisitos: int = 0
+    # Menor validade entre as certidões negativas: depois dela o credor
+    # deixa de estar apto, sem nenhuma gravação no banco
+    valida_ate: Optional[datetime] = None
+    calculada_em: Optional[datetime] = None
+
+    def esta_apto(self, agora: Optional[datetime] = None) -> bool:
+        """
+        Verifica se o credor tem todos os requisitos e se as certidões
+        continuam válidas (mesma regra de Certidao.esta_valida)
+        """
+        if self.requisitos != TODOS_REQUISITOS or not self.valida_ate:
+            return False
+        return (agora or datetime.now()) <= self.valida_ate
+
+    def pendencias(self, agora: Optional[datetime] = None) -> List[str]:
+        """
+        Retorna a lista do que falta para o credor estar apto.
+        Lista vazia significa que está apto.
+        """
+        pendencias = [
+            f"documento_{tipo.value}"
+            for tipo, bit in BITS_DOCUMENTO.items() if not self.requisitos & bit
+        ]
+        pendencias.extend(
+            f"certidao_{tipo.value}_negativa"
+            for tipo, bit in BITS_CERTIDAO.items() if not self.requisitos & bit
+        )
+        if self.valida_ate and (agora or datetime.now()) > self.valida_ate:
+            pendencias.append("certidoes_vencidas")
+        return pendencias
+
+    def to_dict(self, agora: Optional[datetime] = None) -> Dict[str, Any]:
+        return {
+            'credor_id': self.credor_id,
+            'apto': self.esta_apto(agora),
+            'pendencias': self.pendencias(agora),
+            'valida_ate': self.valida_ate,
+            'calculada_em': self.calculada_em,
+        }
+
+def avaliar(credor_id: int, documentos: Iterable[Documento], certidoes: Iterable[Certidao]) -> Elegibilidade:
+    """
+    Avalia um credor a partir das entidades carregadas. É a regra de
+    referência do cálculo em lote feito em SQL
+    """
+    requisitos = 0
+    for documento in documentos:
+        if documento.validar_arquivo_url():
+            requisitos |= BITS_DOCUMENTO.get(documento.tipo, 0)
+
+    validades = []
+    for certidao in certidoes:
+        if certidao.status == StatusCertidao.NEGATIVA and certidao.valida_ate:
+            requisitos |= BITS_CERTIDAO.get(certidao.tipo, 0)
+            validades.append(certidao.valida_ate)
+
+    return Elegibilidade(
+        credor_id=credor_id,
+        requisitos=requisitos,
+        valida_ate=min(validades) if validades else None
+    )
@@ -0,0 +1,86 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+from enum import Enum
+
+class TipoJob(Enum):
+    HASH = "hash"
+    INTEGRIDADE = "integridade"
+    MINIATURA = "miniatura"
+    STATUS_CERTIDAO = "status_certidao"
+    TEXTO = "texto"
+
+class EntidadeJob(Enum):
+    DOCUMENTO = "documento"
+    CERTIDAO = "certidao"
+
+class StatusJob(Enum):
+    PENDENTE = "pendente"
+    EXECUTANDO = "executando"
+    CONCLUIDO = "concluido"
+    FALHOU = "falhou"
+
+@dataclass
+class Job:
+    id: Optional[int] = None
+    tipo: TipoJob = TipoJob.HASH
+    entidade: EntidadeJob = EntidadeJob.DOCUMENTO
+    entidade_id: int = 0
+    payload: Dict[str, Any] = field(default_factory=dict)
+    status: StatusJob = StatusJob.PENDENTE
+    tentativas: int = 0
+    max_tentativas: int = 3
+    resultado: Optional[Dict[str, Any]] = None
+    erro: Optional[str] = None
+    worker: Optional[str] = None
+    disponivel_em: datetime = datetime.now()
+    iniciado_em: Optional[datetime] = None
+    finalizado_em: Optional[datetime] = None
+
+    def esta_finalizado(self) -> bool:
+        """
+        Verifica se o job terminou (com sucesso ou falha definitiva)
+        """
+        return self.status in (StatusJob.CONCLUIDO, StatusJob.FALHOU)
+
+    def pode_tentar_novamente(self) -> bool:
+        """
+        Verifica se ainda restam tentativas para o job
+        """
+        return self.tentativas < self.max_tentativas
+
+    def validar(self) -> List[str]:
+        """
+        Retorna lista de erros de validação.
+        Lista vazia significa que está tudo válido.
+        """
+        erros = []
+
+        if not isinstance(self.tipo, TipoJob):
+            erros.append("Tipo de job inválido")
+
+        if not isinstance(self.entidade, EntidadeJob):
+            erros.append("Entidade do job inválida")
+
+        if not self.entidade_id:
+            erros.append("Entidade do job é obrigatória")
+
+        if self.max_tentativas < 1:
+            erros.append("Número máximo de tentativas deve ser maior que zero")
+
+        return erros
+
+    def to_dict(self) -> dict:
+        """
+        Converte o job para dicionário serializável
+        """
+        return {
+            'id': self.id,
+            'tipo': self.tipo.value,
+            'status': self.status.value,
+            'tentativas': self.tentativas,
+            'resultado': self.resultado,
+            'erro': self.erro,
+            'iniciado_em': self.iniciado_em,
+            'finalizado_em': self.finalizado_em
+        }
@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+
+@dataclass
+class CurvaDesconto:
+    """
+    Taxas anuais de desconto por prazo (em anos), interpoladas linearmente
+    entre os vértices e constantes fora deles
+    """
+    prazos_anos: List[float] = field(default_factory=lambda: [0.0, 1.0, 2.0, 3.0, 5.0, 10.0])
+    taxas: List[float] = field(default_factory=lambda: [0.105, 0.11, 0.115, 0.118, 0.12, 0.122])
+
+    def validar(self) -> List[str]:
+        erros = []
+        if not self.prazos_anos or len(self.prazos_anos) != len(self.taxas):
+            erros.append("A curva precisa de uma taxa para cada prazo")
+        elif any(a >= b for a, b in zip(self.prazos_anos, self.prazos_anos[1:])):
+            erros.append("Os prazos da curva devem ser crescentes")
+        return erros
+
+@dataclass
+class ParametrosForo:
+    # Tempo médio entre a publicação e o pagamento na fila do foro
+    atraso_meses: float = 36.0
+    # Prêmio sobre a curva pelo risco do ente devedor
+    spread: float = 0.03
+
+@dataclass
+class ParametrosPrecificacao:
+    curva: CurvaDesconto = field(default_factory=CurvaDesconto)
+    # Correção monetária anual do valor até o pagamento
+    correcao_anual: float = 0.045
+    padrao: ParametrosForo = field(default_factory=ParametrosForo)
+    foros: Dict[str, ParametrosForo] = field(default_factory=dict)
+
+    @staticmethod
+    def chave_foro(foro: str) -> str:
+        return (foro or "").strip().upper()
+
+    def do_foro(self, foro: str) -> ParametrosForo:
+        """
+        Parâmetros do foro, ou os padrão para foros sem parâmetros próprios
+        """
+        return self.foros.get(self.chave_foro(foro), self.padrao)
+
+    def validar(self) -> List[str]:
+        """
+        Retorna lista de erros de validação.
+        Lista vazia significa que está tudo válido.
+        """
+        erros = self.curva.validar()
+        for nome, parametros in [("padrão", self.padrao), *self.foros.items()]:
+            if parametros.atraso_meses < 0:
+                erros.append(f"Atraso negativo para o foro {nome}")
+        return erros
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> "ParametrosPrecificacao":
+        """
+        Monta os parâmetros a partir do JSON de configuração (chaves ausentes
+        ficam com os valores padrão)
+        """
+        padrao = ParametrosForo(**dados.get("padrao", {}))
+        return cls(
+            curva=CurvaDesconto(**dados["curva"]) if "curva" in dados else CurvaDesconto(),
+            correcao_anual=dados.get("correcao_anual", 0.045),
+            padrao=padrao,
+            foros={
+                cls.chave_foro(foro): ParametrosForo(**{**padrao.__dict__, **valores})
+                for foro, valores in dados.get("foros", {}).items()
+            }
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "curva": {"prazos_anos": self.curva.prazos_anos, "taxas": self.curva.taxas},
+            "correcao_anual": self.correcao_anual,
+            "padrao": self.padrao.__dict__,
+            "foros": {foro: parametros.__dict__ for foro, parametros in self.foros.items()},
+        }
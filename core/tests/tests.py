@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
-from core.entities.credor import Credor
+from core.entities.credor import Credor, normalizar_cpf_cnpj, normalizar_email, classificar_busca
 from core.entities.precatorio import Precatorio
 from core.entities.documento import Documento, TipoDocumento
 from core.entities.certidao import (
@@ -9,6 +9,28 @@ from core.entities.certidao import (
     OrigemCertidao,
     StatusCertidao
 )
+from core.entities.job import Job, TipoJob, EntidadeJob, StatusJob
+from adapters.admissao.limitador_taxa import LimitadorTaxa
+from adapters.certidoes.cache import CertidaoApiCache
+from adapters.certidoes.revalidacao import AgendadorRevalidacao
+from adapters.repositories.certidao_repository import CertidaoApiMock
+from adapters.integridade.verificador import verificar_conteudo
+from adapters.busca.extracao import extrair_texto, ler_cmap, texto_conteudo, Fonte
+from adapters.busca.indice import montar_consulta_fts, IndiceBuscaSqlite, BuscaIndisponivelError
+from adapters.arquivos import compactacao
+from adapters.armazenamento.local import ArmazenamentoLocal
+from adapters.http.respostas import RespostaJSON, RotaJSONRapida
+from ports.database.perfil import perfil_requisicao
+from adapters.admissao.idempotencia import Idempotencia, MiddlewareIdempotencia
+from adapters.exportacao.credores import ExportadorCredores, FormatoExportacao, COLUNAS, comprimir_gzip
+from adapters.eventos.outbox import FluxoEventos, CursorExpiradoError
+from core.entities.elegibilidade import avaliar
+from adapters.elegibilidade.motor import MotorElegibilidade
+from core.entities.precificacao import ParametrosPrecificacao
+from adapters.precificacao import motor as precificacao
+from adapters.fila_pagamento.indice import ArvoreOrdem, IndiceFilaPagamento
+from adapters.configuracao.configuracoes import Configuracoes
+from adapters.runtime.saude import MonitorLacoEventos, VerificadorSaude, espaco_disco, estado_scheduler
 
 def test_validacao_credor():
     # Credor válido
@@ -121,4 +143,1409 @@ def test_validade_certidao():
         recebida_em=datetime.now() - timedelta(days=60),
         valida_ate=datetime.now() - timedelta(days=30)
     )
-    assert certidao_vencida.esta_valida() is False
\ No newline at end of file
+    assert certidao_vencida.esta_valida() is False
+
+def test_job():
+    # Job válido com tentativas restantes
+    job = Job(
+        tipo=TipoJob.HASH,
+        entidade=EntidadeJob.DOCUMENTO,
+        entidade_id=1,
+        tentativas=1
+    )
+    assert len(job.validar()) == 0
+    assert job.pode_tentar_novamente() is True
+    assert job.esta_finalizado() is False
+
+    # Job sem tentativas restantes
+    job.tentativas = 3
+    job.status = StatusJob.FALHOU
+    assert job.pode_tentar_novamente() is False
+    assert job.esta_finalizado() is True
+
+    # Job inválido
+    job_invalido = Job(
+        tipo="tipo_invalido",
+        entidade="entidade_invalida",
+        entidade_id=0,
+        max_tentativas=0
+    )
+    erros = job_invalido.validar()
+    assert len(erros) == 4
+
+
+def test_limitador_taxa():
+    limitador = LimitadorTaxa(taxa=1, capacidade=2)
+
+    # Rajada até a capacidade do balde
+    assert limitador.consumir("credor_1")[0] is True
+    assert limitador.consumir("credor_1")[0] is True
+
+    # Balde vazio: rejeita e informa a espera
+    permitido, espera = limitador.consumir("credor_1")
+    assert permitido is False
+    assert 0 < espera <= 1
+    assert limitador.rejeitadas == 1
+
+    # Cada chave tem seu próprio balde
+    assert limitador.consumir("credor_2")[0] is True
+
+def test_cache_certidoes():
+    class ServicoFalso(CertidaoApiMock):
+        chamadas = 0
+
+        def buscar_certidoes(self, cpf_cnpj):
+            self.chamadas += 1
+            return [{
+                "tipo": "federal",
+                "status": "negativa",
+                "conteudo_base64": "",
+                "valida_ate": agora + timedelta(hours=1)
+            }]
+
+    agora = datetime(2024, 1, 1, 12, 0)
+    relogio = [agora]
+    servico = ServicoFalso()
+    cache = CertidaoApiCache(
+        servico,
+        ttl_negativo_segundos=60,
+        janela_obsoleta_segundos=600,
+        agora=lambda: relogio[0]
+    )
+
+    assert len(cache.buscar_certidoes("12345678900")) == 1
+    assert cache.buscar_certidao("12345678900", TipoCertidao.FEDERAL)["status"] == "negativa"
+    # Tipo ausente na origem fica em cache negativo
+    assert cache.buscar_certidao("12345678900", TipoCertidao.MUNICIPAL) is None
+    assert servico.chamadas == 1
+
+    # Resultado negativo expira antes da certidão
+    relogio[0] = agora + timedelta(minutes=2)
+    assert cache.buscar_certidao("12345678900", TipoCertidao.FEDERAL) is not None
+    assert servico.chamadas == 1
+    assert cache.buscar_certidao("12345678900", TipoCertidao.MUNICIPAL) is None
+    assert servico.chamadas == 2
+
+    # Após a validade e além da janela obsoleta, consulta a origem
+    relogio[0] = agora + timedelta(hours=2)
+    cache.buscar_certidoes("12345678900")
+    assert servico.chamadas == 3
+
+    metricas = cache.estatisticas()
+    assert metricas["consultas"] == 6
+    assert metricas["faltas"] == 3
+    assert metricas["acertos_negativos"] == 1
+    assert metricas["chamadas_economizadas"] == 3
+
+def test_agendador_revalidacao():
+    agora = datetime(2024, 1, 10)
+
+    class RepositorioFalso:
+        def __init__(self):
+            self.certidoes = {
+                1: Certidao(id=1, valida_ate=agora + timedelta(days=3)),
+                2: Certidao(id=2, valida_ate=agora + timedelta(hours=12)),
+                3: Certidao(id=3, valida_ate=agora + timedelta(hours=20)),
+            }
+
+        def listar_vencimentos(self):
+            return [(c.id, c.valida_ate) for c in self.certidoes.values()]
+
+        def buscar_por_id(self, certidao_id):
+            return self.certidoes.get(certidao_id)
+
+        def atualizar(self, certidao):
+            agendador.certidao_gravada(certidao)
+
+    class ServicoFalso:
+        def validar_certidao(self, certidao_id):
+            return StatusCertidao.NEGATIVA
+
+    agendador = AgendadorRevalidacao(
+        RepositorioFalso(), ServicoFalso(), antecedencia_segundos=24 * 3600,
+        agora=lambda: agora
+    )
+    assert agendador.carregar() == 3
+
+    # Vencem primeiro as que expiram em menos de 24h, em ordem de validade
+    assert agendador._proxima_vencida(0) == 2
+    agendador.revalidar(2)
+    assert agendador._proxima_vencida(0) == 3
+    assert agendador._proxima_vencida(0) is None
+
+    # A certidão revalidada foi reagendada para 30 dias depois
+    assert agendador.estatisticas()["agendadas"] == 2
+    assert agendador.revalidadas == 1
+
+def test_verificador_integridade():
+    import struct
+    import zlib
+
+    # PDF mínimo com xref apontando para os offsets reais dos objetos
+    objetos = [
+        b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n",
+        b"2 0 obj\n<< /Type /Pages /Kids [] /Count 0 >>\nendobj\n",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for objeto in objetos:
+        offsets.append(len(pdf))
+        pdf += objeto
+    xref = len(pdf)
+    pdf += b"xref\n0 3\n0000000000 65535 f \n"
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size 3 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref
+
+    resultado = verificar_conteudo(pdf, ["pdf"])
+    assert resultado["valido"], resultado["erros"]
+    assert resultado["objetos"] == 2 and resultado["versao_pdf"] == "1.4"
+
+    # Offsets deslocados e arquivo truncado são detectados
+    assert not verificar_conteudo(pdf.replace(b"%PDF-1.4\n", b"%PDF-1.4\n\n"))["valido"]
+    assert not verificar_conteudo(pdf[:xref])["valido"]
+    # Tipo fora dos permitidos
+    assert not verificar_conteudo(pdf, ["png"])["valido"]
+
+    # PNG 1x1 RGB
+    def chunk(tipo, dados):
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+    png = (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00"))
+        + chunk(b"IEND", b"")
+    )
+    assert verificar_conteudo(png)["valido"]
+    corrompido = bytearray(png)
+    corrompido[40] ^= 0xFF
+    assert not verificar_conteudo(bytes(corrompido))["valido"]
+
+    # Conteúdo que não corresponde a nenhum formato
+    assert not verificar_conteudo(b"texto qualquer")["valido"]
+
+def test_extracao_texto():
+    import zlib
+
+    # Content stream comprimido com Tj, TJ (espaçamento vira espaço) e escapes
+    conteudo = zlib.compress(
+        b"BT /F1 12 Tf 72 720 Td (Certid\\343o NEGATIVA) Tj 0 -14 Td "
+        b"[(Processo) -300 (n\\272 0001234-56.2023)] TJ ET"
+    )
+    pdf = (
+        b"%PDF-1.4\n1 0 obj\n<< /Type /Page /Contents 2 0 R >>\nendobj\n"
+        + b"2 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(conteudo)
+        + conteudo + b"\nendstream\nendobj\n%%EOF\n"
+    )
+    assert extrair_texto(pdf) == "Certidão NEGATIVA\nProcesso nº 0001234-56.2023"
+
+    # Fonte composta: códigos de 2 bytes mapeados pelo CMap /ToUnicode
+    mapa, bytes_codigo = ler_cmap(
+        b"begincodespacerange <0000> <FFFF> endcodespacerange "
+        b"beginbfchar <0001> <0046> endbfchar beginbfrange <0002> <0003> <00E9> endbfrange"
+    )
+    fonte = Fonte(mapa, bytes_codigo, composta=True)
+    assert texto_conteudo(b"BT /F2 10 Tf <000100020003> Tj ET", {b"F2": fonte}) == "Féê\n"
+
+    # Conteúdo que não é PDF é tratado como texto; imagens não têm texto
+    assert extrair_texto("Certidão Federal".encode()) == "Certidão Federal"
+    assert extrair_texto(b"\x89PNG\r\n\x1a\n") is None
+
+    # Cada termo vira uma frase (sem sintaxe FTS do usuário) e o último casa por prefixo
+    assert montar_consulta_fts('certidao "x" OR') == '"certidao" """x""" "OR"*'
+    assert montar_consulta_fts("   ") == ""
+
+    # Sem FTS5 (bancos que não são SQLite) a busca é recusada explicitamente
+    import os
+    import tempfile
+    import pytest
+    from ports.database.database import Database
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "busca.db"))
+        indice = IndiceBuscaSqlite(db)
+        assert indice.disponivel and indice.buscar("certidao") == []
+        db.dialeto = "postgresql"
+        assert not indice.disponivel
+        with pytest.raises(BuscaIndisponivelError):
+            indice.buscar("certidao")
+        db.fechar()
+
+def test_busca_credores():
+    # Mesmo CPF/CNPJ com ou sem pontuação gera a mesma chave
+    assert normalizar_cpf_cnpj("123.456.789-01") == normalizar_cpf_cnpj("12345678901") == "12345678901"
+    assert normalizar_cpf_cnpj("12.345.678/0001-90") == "12345678000190"
+    assert normalizar_email("  Joao@Email.COM ") == "joao@email.com"
+
+    # Busca livre: o critério é deduzido do formato do termo
+    assert classificar_busca("123.456") == "cpf_cnpj"
+    assert classificar_busca("12.345.678/0001-90") == "cpf_cnpj"
+    assert classificar_busca("joao@") == "email"
+    assert classificar_busca("João da Silva") == "nome"
+    assert classificar_busca("Rua 12") == "nome"
+    assert classificar_busca("---") == "nome"
+
+    # Nome: FTS5 no SQLite e LIKE por palavra nos demais bancos
+    import os
+    import tempfile
+    from ports.database.database import Database
+    from adapters.repositories.credor_repository import CredorRepository
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "busca.db"))
+        credores = CredorRepository(db)
+        for indice, nome in enumerate(["José Gonçalves", "Maria Gonzaga", "Ana 100%_Silva"], start=1):
+            credores.criar(
+                Credor(nome=nome, cpf_cnpj=f"1234567890{indice}", email=f"{indice}@x.com", telefone="1"),
+                Precatorio(numero_precatorio=str(indice), valor_nominal=Decimal("1"), foro="SP", data_publicacao=datetime(2024, 1, 1))
+            )
+        assert [c.nome for c in credores.buscar_por_nome("jose gonc")] == ["José Gonçalves"]
+        db.dialeto = "postgresql"
+        assert [c.nome for c in credores.buscar_por_nome("GON")] == ["José Gonçalves", "Maria Gonzaga"]
+        assert [c.nome for c in credores.buscar_por_nome("josé gonç")] == ["José Gonçalves"]
+        assert [c.nome for c in credores.buscar_por_nome("0%_s")] == ["Ana 100%_Silva"]
+        assert credores.buscar_por_nome("0_%s") == []
+        assert credores.pesquisar("maria")[1][0].nome == "Maria Gonzaga"
+
+def test_compactacao_arquivos():
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "certidao.pdf")
+        conteudo = b"%PDF-1.4 certidao negativa " * 200
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(conteudo)
+
+        # Compactado: o original some, mas a leitura pelo caminho original continua igual
+        assert compactacao.compactar_arquivo(caminho, 'gzip') < len(conteudo)
+        assert os.listdir(pasta) == ["certidao.pdf.gz"]
+        assert compactacao.existe(caminho)
+        assert compactacao.ler(caminho) == conteudo
+
+        assert compactacao.descompactar_arquivo(caminho)
+        assert os.listdir(pasta) == ["certidao.pdf"]
+        assert compactacao.ler(caminho) == conteudo
+
+        # Conteúdo incompressível permanece como está
+        imagem = os.path.join(pasta, "foto.png")
+        with open(imagem, "wb") as arquivo:
+            arquivo.write(os.urandom(4096))
+        assert compactacao.compactar_arquivo(imagem, 'gzip') is None
+        assert sorted(os.listdir(pasta)) == ["certidao.pdf", "foto.png"]
+
+        compactacao.remover(caminho)
+        assert not compactacao.existe(caminho)
+
+def test_armazenamento_local():
+    import io
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as pasta:
+        armazenamento = ArmazenamentoLocal(pasta)
+        chave = "static/documentos/1/rg.pdf"
+        armazenamento.salvar(chave, io.BytesIO(b"%PDF-1.4 rg"))
+        assert armazenamento.existe(chave)
+        assert armazenamento.ler(chave) == b"%PDF-1.4 rg"
+
+        # Upload já gravado em disco é movido para a chave
+        enviado = os.path.join(pasta, "upload.tmp")
+        with open(enviado, "wb") as arquivo:
+            arquivo.write(b"%PDF-1.4 certidao")
+        armazenamento.salvar_arquivo("static/certidoes/1/c.pdf", enviado)
+        assert not os.path.exists(enviado)
+        assert armazenamento.ler("static/certidoes/1/c.pdf") == b"%PDF-1.4 certidao"
+
+        # Sem URL assinada: o download passa pela API
+        assert armazenamento.url_download(chave) is None
+        armazenamento.remover(chave)
+        assert not armazenamento.existe(chave)
+        assert not armazenamento.existe(None)
+
+def test_resposta_json():
+    import json
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    conteudo = {
+        "valor": Decimal("1234567.89"),
+        "publicado_em": datetime(2024, 5, 24, 10, 30),
+        "tipo": TipoCertidao.FEDERAL,
+        "status": StatusJob.CONCLUIDO,
+        1: "chave inteira",
+    }
+    assert json.loads(RespostaJSON(conteudo).body) == {
+        "valor": "1234567.89",
+        "publicado_em": "2024-05-24T10:30:00",
+        "tipo": "federal",
+        "status": "concluido",
+        "1": "chave inteira",
+    }
+
+    app = FastAPI(default_response_class=RespostaJSON)
+    app.router.route_class = RotaJSONRapida
+
+    @app.post("/itens", status_code=201)
+    async def criar():
+        return {"valor": Decimal("10.50")}
+
+    @app.delete("/itens/{item_id}", status_code=204)
+    def remover(item_id: int):
+        pass
+
+    with TestClient(app) as cliente:
+        resposta = cliente.post("/itens")
+        assert resposta.status_code == 201
+        assert resposta.json() == {"valor": "10.50"}
+        assert cliente.delete("/itens/1").status_code == 204
+        assert cliente.delete("/itens/x").status_code == 422
+
+def test_exportacao_credores():
+    import csv
+    import gzip
+    import json
+    import os
+    import tempfile
+    from ports.database.database import Database
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "export.db"))
+        db.execute("INSERT INTO credores (nome, cpf_cnpj, email, telefone) VALUES ('Maria, \"Silva\"', '12345678900', 'm@x.com', '11999999999')")
+        db.execute("INSERT INTO credores (nome, cpf_cnpj, email, telefone) VALUES ('José', '98765432100', 'j@x.com', '11999999999')")
+        db.execute(
+            "INSERT INTO precatorios (credor_id, numero_precatorio, valor_nominal, foro, data_publicacao) "
+            "VALUES (1, '0001234-56.2020.8.26.0050', 50000.5, 'SP', '2024-05-24')"
+        )
+        db.execute(
+            "INSERT INTO certidoes (credor_id, tipo, origem, status, recebida_em, valida_ate) "
+            "VALUES (1, 'federal', 'api', 'negativa', '2024-05-24', '2024-06-23')"
+        )
+        exportador = ExportadorCredores(db)
+
+        linhas = [json.loads(linha) for linha in b"".join(exportador.gerar(FormatoExportacao.NDJSON)).splitlines()]
+        assert [linha["id"] for linha in linhas] == [1, 2]
+        assert linhas[0]["precatorio"]["valor_nominal"] == 50000.5
+        assert linhas[0]["certidoes"]["federal"] == {"status": "negativa", "valida_ate": "2024-06-23"}
+        assert linhas[0]["certidoes"]["estadual"] is None
+        assert linhas[1]["precatorio"] is None
+
+        # gzip gerado em blocos descompacta para o mesmo CSV
+        conteudo = gzip.decompress(b"".join(comprimir_gzip(exportador.gerar(FormatoExportacao.CSV))))
+        registros = list(csv.DictReader(conteudo.decode("utf-8").splitlines()))
+        assert list(registros[0].keys()) == COLUNAS
+        assert registros[0]["nome"] == 'Maria, "Silva"'
+        assert registros[0]["certidao_federal_status"] == "negativa"
+        assert registros[1]["precatorio_numero"] == ""
+
+def test_perfil_consultas(capsys):
+    import os
+    import tempfile
+    from ports.database.database import Database
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "perfil.db"), consulta_lenta_ms=1000)
+        db.execute("INSERT INTO credores (nome, cpf_cnpj, email, telefone) VALUES ('Maria', '12345678900', 'm@x.com', '1')")
+
+        with perfil_requisicao() as perfil:
+            db.fetch_one("SELECT * FROM credores WHERE id = ?", (1,))
+            with db.transacao() as transacao:
+                transacao.fetch_all("SELECT * FROM credores WHERE nome = ?", ("Maria",))
+            assert len(list(db.iterar("SELECT * FROM credores"))) == 1
+        # Fora da requisição a consulta só entra no agregado do processo
+        db.fetch_one("SELECT * FROM credores WHERE id = ?", (2,))
+
+        assert perfil.total == 3
+        assert {consulta["linhas"] for consulta in perfil.mais_lentas()} == {1}
+        # Os valores dos parâmetros não aparecem, apenas a impressão digital
+        assert all("12345678900" not in str(consulta) for consulta in perfil.mais_lentas())
+
+        estatisticas = db.estatisticas_consultas()
+        assert estatisticas["consultas"] == 5
+        assert estatisticas["lentas"] == 0
+        por_id = next(c for c in estatisticas["mais_custosas"] if c["sql"] == "SELECT * FROM credores WHERE id = ?")
+        assert por_id["execucoes"] == 2 and por_id["linhas"] == 1
+
+        # Consulta lenta vai para o log com o plano de execução
+        db.perfilador.limite_lento_ms = 0
+        db.fetch_all("SELECT * FROM credores WHERE nome = ?", ("Maria",))
+        saida = capsys.readouterr().out
+        assert "Consulta lenta" in saida
+        assert "plano: SCAN credores" in saida
+
+def test_idempotencia():
+    import asyncio
+    import os
+    import tempfile
+    import httpx
+    from ports.database.database import Database
+
+    execucoes = []
+
+    async def app(scope, receive, send):
+        corpo = (await receive())["body"]
+        execucoes.append(corpo)
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"id": %d}' % len(execucoes)})
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "idempotencia.db"))
+        # Dois processos compartilhando o banco
+        processo_a = Idempotencia(db)
+        processo_b = Idempotencia(db, intervalo_espera=0.01)
+
+        async def cenario():
+            clientes = [
+                httpx.AsyncClient(transport=httpx.ASGITransport(app=MiddlewareIdempotencia(app, servico, [r"/itens"])), base_url="http://teste")
+                for servico in (processo_a, processo_b)
+            ]
+            cabecalhos = {"Idempotency-Key": "chave-1"}
+            respostas = await asyncio.gather(
+                clientes[0].post("/itens", json={"nome": "a"}, headers=cabecalhos),
+                clientes[0].post("/itens", json={"nome": "a"}, headers=cabecalhos),
+                clientes[1].post("/itens", json={"nome": "a"}, headers=cabecalhos),
+            )
+            outra = await clientes[1].post("/itens", json={"nome": "b"}, headers=cabecalhos)
+            sem_chave = await clientes[1].post("/itens", json={"nome": "a"})
+            for cliente in clientes:
+                await cliente.aclose()
+            return respostas, outra, sem_chave
+
+        respostas, outra, sem_chave = asyncio.run(cenario())
+        # Concorrentes no mesmo processo e em outro aguardam a primeira execução
+        assert [r.status_code for r in respostas] == [201, 201, 201]
+        assert {r.json()["id"] for r in respostas} == {1}
+        assert sorted(r.headers.get("idempotent-replayed", "false") for r in respostas) == ["false", "true", "true"]
+        # A mesma chave com outro corpo é rejeitada; sem a chave a rota executa
+        assert outra.status_code == 422
+        assert sem_chave.json() == {"id": 2}
+        assert len(execucoes) == 2
+        assert processo_a.limpar_expiradas() == 0
+
+        # Com o banco travado por outro processo, a reserva espera em uma
+        # thread e o event loop continua atendendo
+        async def banco_travado():
+            import sqlite3
+            outra = sqlite3.connect(db.db_path, isolation_level=None)
+            outra.execute("BEGIN IMMEDIATE")
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.3, outra.execute, "ROLLBACK")
+            intervalos = []
+
+            async def pulso():
+                anterior = loop.time()
+                for _ in range(20):
+                    await asyncio.sleep(0.02)
+                    intervalos.append(loop.time() - anterior)
+                    anterior = loop.time()
+
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=MiddlewareIdempotencia(app, processo_a, [r"/itens"])),
+                base_url="http://teste"
+            ) as cliente:
+                resposta, _ = await asyncio.gather(
+                    cliente.post("/itens", json={"nome": "c"}, headers={"Idempotency-Key": "chave-2"}),
+                    pulso()
+                )
+            outra.close()
+            return resposta, max(intervalos)
+
+        resposta, maior_intervalo = asyncio.run(banco_travado())
+        assert resposta.status_code == 201
+        assert maior_intervalo < 0.2
+
+def test_eventos():
+    import asyncio
+    import os
+    import tempfile
+    import pytest
+    from ports.database.database import Database
+    from adapters.repositories.credor_repository import CredorRepository
+    from adapters.repositories.certidao_repository import CertidaoRepository
+
+    def precatorio(numero):
+        return Precatorio(
+            numero_precatorio=numero, valor_nominal=Decimal("1000.50"),
+            foro="SP", data_publicacao=datetime(2024, 5, 24)
+        )
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "eventos.db"))
+        credores = CredorRepository(db)
+        certidoes = CertidaoRepository(db, upload_dir=pasta)
+        fluxo = FluxoEventos(db, intervalo_segundos=0.01)
+
+        maria = credores.criar(Credor(nome="Maria", cpf_cnpj="12345678900", email="m@x.com", telefone="1"), precatorio("1"))
+        # Falha no meio da transação: nem o credor nem o evento são gravados
+        with pytest.raises(Exception):
+            credores.criar(Credor(nome="José", cpf_cnpj="98765432100", email="j@x.com", telefone="1"), precatorio("1"))
+        certidoes.criar(Certidao(
+            credor_id=maria.id, tipo=TipoCertidao.FEDERAL, origem=OrigemCertidao.API,
+            status=StatusCertidao.NEGATIVA, recebida_em=datetime.now()
+        ))
+
+        eventos, cursor = fluxo.buscar(0)
+        assert [evento["tipo"] for evento in eventos] == ["credor.criado", "certidao.atualizada"]
+        assert eventos[0]["dados"]["precatorio"]["valor"] == "1000.50"
+        assert eventos[1]["dados"]["status"] == "negativa"
+        # Sem eventos do credor filtrado, o cursor avança até o último evento
+        assert fluxo.buscar(0, credor_id=999) == ([], cursor)
+
+        async def aguardar_alteracao():
+            espera = asyncio.create_task(fluxo.aguardar(cursor, 5))
+            await asyncio.sleep(0.05)
+            credores.deletar(maria.id)
+            return await espera, await fluxo.aguardar(cursor + 1, 0.05)
+
+        assert asyncio.run(aguardar_alteracao()) == (True, False)
+        eventos, cursor = fluxo.buscar(cursor)
+        assert [(evento["tipo"], evento["credor_id"]) for evento in eventos] == [("credor.removido", maria.id)]
+
+        # Cursores anteriores à retenção são recusados
+        db.execute("UPDATE eventos SET criado_em = ? WHERE id <= 2", (datetime(2000, 1, 1),))
+        assert fluxo.limpar_antigos() == 2
+        with pytest.raises(CursorExpiradoError):
+            fluxo.buscar(1)
+        assert fluxo.buscar(2)[1] == cursor
+        assert [evento["id"] for evento in fluxo.buscar(0)[0]] == [3]
+
+def test_elegibilidade():
+    import os
+    import tempfile
+    from ports.database.database import Database
+    from adapters.repositories.credor_repository import CredorRepository
+    from adapters.repositories.documento_repository import DocumentoRepository
+    from adapters.repositories.certidao_repository import CertidaoRepository
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "elegibilidade.db"))
+        credores = CredorRepository(db)
+        documentos = DocumentoRepository(db, upload_dir=pasta)
+        certidoes = CertidaoRepository(db, upload_dir=pasta)
+        motor = MotorElegibilidade(db, FluxoEventos(db))
+
+        def cadastrar(indice, tipos_documento, status_certidoes, valida_ate):
+            credor = credores.criar(
+                Credor(nome=f"Credor {indice}", cpf_cnpj=f"{indice:011d}", email="c@x.com", telefone="1"),
+                Precatorio(numero_precatorio=str(indice), valor_nominal=Decimal("1000"), foro="SP", data_publicacao=datetime(2024, 5, 24))
+            )
+            for tipo in tipos_documento:
+                documentos.criar(Documento(credor_id=credor.id, tipo=tipo, arquivo_url=f"doc_{indice}.pdf"))
+            for tipo, status in zip(TipoCertidao, status_certidoes):
+                certidoes.criar(Certidao(
+                    credor_id=credor.id, tipo=tipo, origem=OrigemCertidao.API,
+                    status=status, recebida_em=datetime.now(), valida_ate=valida_ate
+                ))
+            return credor.id
+
+        amanha = datetime.now() + timedelta(days=1)
+        negativas = [StatusCertidao.NEGATIVA] * 4
+        apto = cadastrar(1, list(TipoDocumento), negativas, amanha)
+        sem_documento = cadastrar(2, [TipoDocumento.IDENTIDADE, TipoDocumento.OUTROS], negativas, amanha)
+        positiva = cadastrar(3, list(TipoDocumento), negativas[:3] + [StatusCertidao.POSITIVA], amanha)
+        vencida = cadastrar(4, list(TipoDocumento), negativas, datetime.now() - timedelta(days=1))
+
+        # Primeira execução: cálculo em lote igual à regra em Python
+        assert motor.atualizar() == 0
+        for credor_id in (apto, sem_documento, positiva, vencida):
+            esperado = avaliar(credor_id, documentos.buscar_por_credor(credor_id), certidoes.buscar_por_credor(credor_id))
+            calculado = motor.buscar(credor_id)
+            assert (calculado.requisitos, calculado.valida_ate) == (esperado.requisitos, esperado.valida_ate)
+        assert [e.credor_id for e in motor.listar_aptos()] == [apto]
+        assert motor.buscar(sem_documento).pendencias() == ["documento_comprovante_residencia"]
+        assert motor.buscar(positiva).pendencias() == ["certidao_trabalhista_negativa"]
+        assert motor.buscar(vencida).pendencias() == ["certidoes_vencidas"]
+
+        # Gravações seguintes recalculam só os credores afetados
+        certidao = certidoes.buscar_por_tipo(positiva, TipoCertidao.TRABALHISTA)
+        certidao.status = StatusCertidao.NEGATIVA
+        certidoes.atualizar(certidao)
+        credores.deletar(apto)
+        assert motor.atualizar() == 2
+        assert motor.atualizar() == 0
+        assert [e.credor_id for e in motor.listar_aptos()] == [positiva]
+        assert motor.buscar(apto) is None
+        assert motor.resumo() == (3, 1)
+
+def test_precificacao(monkeypatch):
+    import os
+    import tempfile
+    from datetime import date
+    from ports.database.database import Database
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "precificacao.db"))
+        for indice, (valor, foro, publicacao) in enumerate([
+            (1000, "TJSP", "2024-01-01 00:00:00"),
+            (2500.5, "Comarca X", "2024-01-01 00:00:00"),
+            (300, " tjsp", "2023-06-15 00:00:00"),
+        ], start=1):
+            db.execute(
+                "INSERT INTO precatorios (credor_id, numero_precatorio, valor_nominal, foro, data_publicacao) VALUES (?, ?, ?, ?, ?)",
+                (indice, str(indice), valor, foro, publicacao)
+            )
+        parametros = ParametrosPrecificacao.from_dict({
+            "curva": {"prazos_anos": [0, 10], "taxas": [0.1, 0.1]},
+            "correcao_anual": 0.05,
+            "padrao": {"atraso_meses": 0, "spread": 0.0},
+            "foros": {"TJSP": {"atraso_meses": 24, "spread": 0.02}}
+        })
+        base = date(2025, 1, 1)
+
+        def avaliar():
+            motor = precificacao.MotorPrecificacao(db, parametros)
+            return motor.avaliar(base).itens(), motor.avaliar(base, foro="TJSP").resumo()
+
+        itens, resumo_tjsp = avaliar()
+        # Fila do TJSP: 730 dias após a publicação, descontado a 10% + 2%
+        assert itens[0]["data_pagamento_esperada"] == "2025-12-31"
+        assert itens[0]["valor_presente"] == round(1000 * 1.05 ** (730 / 365.25) / 1.12 ** (364 / 365.25), 2)
+        # Sem parâmetros do foro e com o atraso vencido: pagamento na data-base, sem desconto
+        assert itens[1]["data_pagamento_esperada"] == "2025-01-01"
+        assert itens[1]["valor_presente"] == round(2500.5 * 1.05 ** (366 / 365.25), 2)
+        assert [foro["quantidade"] for foro in resumo_tjsp["por_foro"]] == [1, 1]
+
+        # O cálculo linha a linha (sem NumPy) chega aos mesmos valores
+        monkeypatch.setattr(precificacao, "np", None)
+        assert avaliar() == (itens, resumo_tjsp)
+
+        # Com o outbox, só eventos que alteram precatórios recarregam as colunas
+        from adapters.eventos.outbox import registrar_evento
+        motor = precificacao.MotorPrecificacao(db, parametros, FluxoEventos(db))
+        motor.colunas()
+        with db.transacao() as transacao:
+            registrar_evento(transacao, "documento.criado", 1, 1)
+            registrar_evento(transacao, "certidao.atualizada", 1, 1)
+        motor.colunas()
+        assert motor.carregamentos == 1
+        db.execute("UPDATE precatorios SET valor_nominal = 2000 WHERE id = 1")
+        with db.transacao() as transacao:
+            registrar_evento(transacao, "precatorio.atualizado", 1, 1)
+        assert motor.colunas().valores[0] == 2000
+        motor.colunas()
+        assert motor.carregamentos == 2
+
+def test_fila_pagamento():
+    import os
+    import random
+    import tempfile
+    from ports.database.database import Database
+    from adapters.repositories.credor_repository import CredorRepository
+    from adapters.repositories.precatorio_repository import PrecatorioRepository
+
+    # A árvore responde como uma lista ordenada, após inserções e remoções
+    aleatorio = random.Random(7)
+    chaves = sorted((datetime(2024, 1, 1) + timedelta(days=aleatorio.randrange(60)), str(i), i) for i in range(300))
+    valores = {chave: float(aleatorio.randrange(1, 1000)) for chave in chaves}
+    arvore = ArvoreOrdem.construir(((chave, valores[chave]) for chave in chaves[::2]), aleatorio)
+    for chave in chaves[1::2]:
+        arvore.inserir(chave, valores[chave])
+    for chave in aleatorio.sample(chaves, 100):
+        assert arvore.remover(chave)
+        chaves.remove(chave)
+    assert not arvore.remover((datetime(2000, 1, 1), "x", -1))
+    assert len(arvore) == len(chaves) and arvore.soma() == sum(valores[chave] for chave in chaves)
+    for posicao, chave in enumerate(chaves):
+        assert arvore.anteriores(chave) == (posicao, sum(valores[c] for c in chaves[:posicao]))
+    assert [chave for chave, _ in arvore.fatia(37, 20)] == chaves[37:57]
+    assert arvore.fatia(len(chaves), 5) == []
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "fila.db"))
+        credores = CredorRepository(db)
+        precatorios = PrecatorioRepository(db)
+        indice = IndiceFilaPagamento(db, FluxoEventos(db))
+
+        def cadastrar(numero, foro, publicacao, valor):
+            credor = credores.criar(
+                Credor(nome=f"Credor {numero}", cpf_cnpj=f"{numero:011d}", email="c@x.com", telefone="1"),
+                Precatorio(numero_precatorio=str(numero), valor_nominal=Decimal(valor), foro=foro, data_publicacao=publicacao)
+            )
+            return credor.id, precatorios.buscar_por_numero(str(numero)).id
+
+        _, primeiro = cadastrar(1, "TJSP", datetime(2020, 3, 1), "100")
+        credor_terceiro, terceiro = cadastrar(2, "TJSP", datetime(2021, 1, 1), "300")
+        _, outro_foro = cadastrar(3, "TJRJ", datetime(2019, 1, 1), "50")
+        _, segundo = cadastrar(4, " tjsp", datetime(2020, 3, 1), "200")
+
+        posicao = indice.posicao(segundo)
+        assert (posicao["posicao"], posicao["valor_a_frente"], posicao["total_na_fila"]) == (2, 100, 3)
+        assert indice.posicao(outro_foro)["posicao"] == 1
+        assert indice.posicao(999) is None
+
+        # Criação, alteração e remoção chegam pelos eventos
+        _, novo = cadastrar(5, "TJSP", datetime(2019, 6, 1), "1000")
+        assert indice.posicao(terceiro)["valor_a_frente"] == 1300
+        precatorio = precatorios.buscar_por_id(outro_foro)
+        precatorio.foro = "TJSP"
+        precatorios.atualizar(precatorio)
+        precatorios.deletar(primeiro)
+        fila = indice.fila("tjsp")
+        assert [(p["id"], p["posicao"], p["valor_a_frente"]) for p in fila["precatorios"]] == [
+            (outro_foro, 1, 0), (novo, 2, 50), (segundo, 3, 1050), (terceiro, 4, 1250)
+        ]
+        assert [p["id"] for p in indice.fila("TJSP", apos=2, limite=1)["precatorios"]] == [segundo]
+        assert indice.fila("TJRJ") is None
+
+        # Remover o credor tira os seus precatórios da fila (o SQLite não
+        # aplica o ON DELETE CASCADE, então a cascata é feita aqui)
+        credores.deletar(credor_terceiro)
+        db.execute("DELETE FROM precatorios WHERE credor_id = ?", (credor_terceiro,))
+        assert indice.posicao(terceiro) is None
+        assert indice.fila("TJSP")["total_na_fila"] == 3
+        assert indice.estatisticas()["carregamentos"] == 1
+        assert [p.id for p in precatorios.buscar_por_foro("TJSP")] == [outro_foro, novo]
+
+def test_configuracoes(monkeypatch):
+    import json
+    import os
+    import tempfile
+    import pytest
+    from ports.database.database import Database
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "config.json")
+        with open(arquivo, "w") as saida:
+            json.dump({
+                "perfil": "carga",
+                "banco": {"pool_size": 6, "url": "postgresql+psycopg://app:segredo@db:5432/app"},
+                "uploads": {"certidao_extensoes": [".PDF", ".p7s"], "certidao_tamanho_maximo_mb": 1}
+            }, saida)
+
+        # Padrão < perfil < arquivo < ambiente
+        configuracoes = Configuracoes.carregar({
+            "CONFIG_ARQUIVO": arquivo, "DB_POOL_SIZE": "9", "JOB_WORKERS": "3",
+            "CERTIDOES_API_HEDGE": "0", "CERTIDOES_VALIDADE_PADRAO_DIAS": "10"
+        })
+        assert configuracoes.perfil == "carga"
+        assert configuracoes.banco.synchronous == "OFF"
+        assert configuracoes.banco.pool_size == 9
+        assert (configuracoes.jobs.workers, configuracoes.jobs.intervalo_ociosidade) == (3, 0.1)
+        assert configuracoes.certidoes.api_hedge is False
+        assert configuracoes.http.prazo_requisicao_ms == 30000
+        assert configuracoes.origens["banco.synchronous"] == "perfil:carga"
+        assert configuracoes.origens["uploads.certidao_tamanho_maximo_mb"] == f"arquivo:{arquivo}"
+        assert configuracoes.origens["banco.pool_size"] == "env:DB_POOL_SIZE"
+        assert "http.prazo_requisicao_ms" not in configuracoes.origens
+        assert configuracoes.to_dict()["banco"]["url"] == "postgresql+psycopg://app:***@db:5432/app"
+        assert Configuracoes().to_dict()["banco"]["url"] == "sqlite:///database.db"
+        assert configuracoes.variaveis_ambiente()["jobs.workers"] == "JOB_WORKERS"
+
+        # Limites aplicados às entidades (restaurados ao fim do teste)
+        for atributo in ("EXTENSOES_PERMITIDAS", "TAMANHO_MAXIMO", "VALIDADE_PADRAO_DIAS"):
+            monkeypatch.setattr(Certidao, atributo, getattr(Certidao, atributo))
+        for atributo in ("EXTENSOES_PERMITIDAS", "TAMANHO_MAXIMO"):
+            monkeypatch.setattr(Documento, atributo, getattr(Documento, atributo))
+        configuracoes.aplicar_limites()
+        assert Certidao.extensoes_permitidas() == [".pdf", ".p7s"]
+        assert Certidao.tamanho_maximo() == 1024 * 1024
+        assert (Certidao.validade_padrao() - datetime.now()).days == 9
+        assert Documento.tamanho_maximo() == 10 * 1024 * 1024
+
+        # PRAGMAs do perfil em cada conexão SQLite
+        db = Database(os.path.join(pasta, "config.db"), pragmas=configuracoes.banco.pragmas())
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -256 * 1024
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        db.fechar()
+
+        for ambiente, erro in [
+            ({"PERFIL": "turbo"}, "Perfil de configuração inválido"),
+            ({"DB_POOL_SIZE": "muitos"}, "Valor inválido para DB_POOL_SIZE"),
+            ({"DB_SYNCHRONOUS": "SEMPRE"}, "banco.synchronous inválido"),
+            ({"DOCUMENTO_EXTENSOES": "pdf"}, "uploads.documento_extensoes"),
+        ]:
+            with pytest.raises(ValueError, match=erro):
+                Configuracoes.carregar(ambiente)
+        with open(arquivo, "w") as saida:
+            json.dump({"banco": {"tamanho_pool": 3}}, saida)
+        with pytest.raises(ValueError, match="Configuração desconhecida: banco.tamanho_pool"):
+            Configuracoes.carregar({"CONFIG_ARQUIVO": arquivo})
+
+
+def test_saude():
+    import asyncio
+    import os
+    import sqlite3
+    import tempfile
+    import threading
+    import time
+    from ports.database.database import Database
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "saude.db"))
+        db.inicializar()
+        sonda = db.sondar()
+        assert sonda["bloqueado"] is False and sonda["leitura_ms"] >= 0
+
+        # Outro processo segurando o lock de escrita
+        outra = sqlite3.connect(db.db_path, isolation_level=None)
+        outra.execute("BEGIN IMMEDIATE")
+        sonda = db.sondar(timeout_escrita_ms=50)
+        assert sonda["bloqueado"] is True and sonda["escrita_ms"] >= 40
+        outra.execute("ROLLBACK")
+        outra.close()
+        assert db.sondar()["bloqueado"] is False
+        # O busy_timeout da conexão volta ao configurado
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+        db.fechar()
+
+        disco = espaco_disco([pasta, os.path.join(pasta, "ainda", "nao", "existe")])
+        assert disco["ok"] and disco["caminhos"][pasta]["livre_mb"] > 0
+        assert espaco_disco([pasta], minimo_mb=float("inf"))["ok"] is False
+    assert estado_scheduler(None) == {"criado": False, "rodando": False, "thread_viva": False, "jobs": []}
+
+    liberar = threading.Event()
+    chamadas = []
+
+    def travada():
+        chamadas.append(1)
+        liberar.wait(5)
+        return {"ok": True}
+
+    verificador = VerificadorSaude(timeout_segundos=0.05)
+    verificador.registrar("rapida", lambda: {"valor": 1})
+    verificador.registrar("travada", travada)
+    verificador.registrar("falha", lambda: 1 / 0, critica=False)
+
+    async def cenario():
+        monitor = MonitorLacoEventos(intervalo_segundos=0.01)
+        await monitor.iniciar()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # bloqueia o loop
+        await asyncio.sleep(0.03)
+        estatisticas = monitor.estatisticas()
+        await monitor.parar()
+        assert not monitor.ativo
+        assert estatisticas["maximo_ms"] >= 80
+
+        primeira = await verificador.verificar()
+        segunda = await verificador.verificar()
+        liberar.set()
+        await asyncio.sleep(0.05)
+        terceira = await verificador.verificar()
+        return primeira, segunda, terceira
+
+    primeira, segunda, terceira = asyncio.run(cenario())
+    verificador.fechar()
+    assert primeira["verificacoes"]["rapida"]["valor"] == 1
+    assert primeira["verificacoes"]["falha"]["ok"] is False
+    assert primeira["verificacoes"]["travada"]["erro"].startswith("sem resposta")
+    assert primeira["pronto"] is False and segunda["pronto"] is False
+    # A verificação travada não é disparada de novo enquanto não terminar
+    assert terceira["pronto"] is True and len(chamadas) == 2
+
+
+def test_certidoes_corrente_e_historico():
+    import io
+    import os
+    import tempfile
+    from ports.database.database import Database
+    from adapters.repositories.credor_repository import CredorRepository
+    from adapters.repositories.certidao_repository import CertidaoRepository
+    from adapters.armazenamento.local import ArmazenamentoLocal
+
+    class Upload(io.BytesIO):
+        filename = "certidao.pdf"
+
+    def pdf(texto):
+        conteudo = b"%PDF-1.4\n"
+        offsets = []
+        for objeto in (b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [] /Count 0 >>"):
+            offsets.append(len(conteudo))
+            conteudo += b"%d 0 obj\n%s\nendobj\n" % (len(offsets), objeto)
+        conteudo += b"% " + texto.encode() + b"\n"
+        xref = len(conteudo)
+        conteudo += b"xref\n0 3\n0000000000 65535 f \n" + b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        conteudo += b"trailer\n<< /Size 3 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref
+        return Upload(conteudo)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "certidoes.db"))
+        credor = CredorRepository(db).criar(
+            Credor(nome="Maria", cpf_cnpj="12345678900", email="m@x.com", telefone="1"),
+            Precatorio(numero_precatorio="1", valor_nominal=Decimal("10"), foro="SP", data_publicacao=datetime(2024, 1, 1))
+        )
+        armazenamento = ArmazenamentoLocal(pasta)
+        certidoes = CertidaoRepository(db, upload_dir="certidoes", armazenamento=armazenamento)
+
+        def da_api(status):
+            return certidoes.criar(Certidao(
+                credor_id=credor.id, tipo=TipoCertidao.FEDERAL, origem=OrigemCertidao.API,
+                conteudo_base64="eA==", status=status, recebida_em=datetime.now()
+            ))
+
+        # Upsert: a API substitui a certidão da API no lugar (mesmo id)
+        primeira = da_api(StatusCertidao.PENDENTE)
+        segunda = da_api(StatusCertidao.NEGATIVA)
+        assert segunda.id == primeira.id
+        assert len(certidoes.buscar_por_credor(credor.id)) == 1
+
+        # Upload manual substitui a da API; a API não substitui o upload
+        manual = certidoes.criar(Certidao(
+            credor_id=credor.id, tipo=TipoCertidao.FEDERAL, origem=OrigemCertidao.MANUAL,
+            status=StatusCertidao.NEGATIVA, recebida_em=datetime.now()
+        ), pdf("nada consta"))
+        assert manual.id == primeira.id and armazenamento.existe(manual.arquivo_url)
+        preservada = da_api(StatusCertidao.PENDENTE)
+        assert preservada.origem == OrigemCertidao.MANUAL
+        assert (preservada.status, preservada.arquivo_url) == (StatusCertidao.NEGATIVA, manual.arquivo_url)
+
+        # Um job que leu o arquivo antigo não sobrescreve um upload mais novo
+        novo = certidoes.criar(Certidao(
+            credor_id=credor.id, tipo=TipoCertidao.FEDERAL, origem=OrigemCertidao.MANUAL,
+            status=StatusCertidao.PENDENTE, recebida_em=datetime.now()
+        ), pdf("positiva"))
+        manual.status = StatusCertidao.POSITIVA
+        assert certidoes.atualizar(manual, arquivo_esperado=manual.arquivo_url) is None
+        assert certidoes.buscar_por_id(manual.id).arquivo_url == novo.arquivo_url
+
+        historico = certidoes.buscar_historico(credor.id, TipoCertidao.FEDERAL)
+        assert [versao["origem"] for versao in historico] == ["manual", "manual", "api", "api"]
+        assert historico[1]["arquivo_url"] == manual.arquivo_url
+
+        # Compactação: remove as versões antigas e os arquivos não mais referenciados
+        db.execute("UPDATE certidoes_historico SET registrada_em = ?", (datetime(2000, 1, 1),))
+        assert certidoes.compactar_historico(retencao_dias=30) == 3
+        assert [versao["arquivo_url"] for versao in certidoes.buscar_historico(credor.id)] == [novo.arquivo_url]
+        assert not armazenamento.existe(manual.arquivo_url)
+        assert armazenamento.existe(novo.arquivo_url)
+        assert certidoes.compactar_historico(retencao_dias=30) == 0
+
+        # Jobs do upload: a verificação de integridade lê o arquivo da certidão
+        import pytest
+        from adapters.repositories.documento_repository import DocumentoRepository
+        from adapters.jobs.processadores import ProcessadoresUpload
+
+        processadores = ProcessadoresUpload(
+            DocumentoRepository(db, upload_dir="documentos", armazenamento=armazenamento),
+            certidoes, armazenamento=armazenamento
+        ).registrar()
+        job = Job(tipo=TipoJob.INTEGRIDADE, entidade=EntidadeJob.CERTIDAO, entidade_id=novo.id)
+        resultado = processadores[TipoJob.INTEGRIDADE](job)
+        assert resultado["verificado"] and resultado["tipo"] == "pdf"
+        with open(os.path.join(pasta, novo.arquivo_url), "r+b") as arquivo:
+            arquivo.truncate(20)
+        with pytest.raises(ValueError):
+            processadores[TipoJob.INTEGRIDADE](job)
+
+def test_sqlalchemy_database():
+    import os
+    import tempfile
+    from ports.database.sqlalchemy_database import SqlAlchemyDatabase
+    from ports.database.schema import APENAS_SQLITE, MIGRACOES, SCHEMA_VERSION
+    from adapters.repositories.credor_repository import CredorRepository
+    from adapters.repositories.precatorio_repository import PrecatorioRepository
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # "?" vira o paramstyle do driver, exceto dentro de literais
+        db = SqlAlchemyDatabase(f"sqlite:///{os.path.join(pasta, 'preparar.db')}")
+        consulta = "SELECT * FROM credores WHERE nome LIKE '%?%' AND id = ? AND email = ?"
+        assert db.preparar(consulta) == (consulta, False)
+        db._comandos.clear()
+        db.paramstyle = "format"
+        assert db.preparar(consulta)[0] == "SELECT * FROM credores WHERE nome LIKE '%%?%%' AND id = %s AND email = %s"
+        db._comandos.clear()
+        db.paramstyle = "numeric"
+        assert db.preparar(consulta)[0] == "SELECT * FROM credores WHERE nome LIKE '%?%' AND id = :1 AND email = :2"
+
+        # Sem lastrowid, INSERTs em tabelas com id ganham RETURNING id
+        db._comandos.clear()
+        db.paramstyle = "qmark"
+        db.dialeto = "postgresql"
+        assert db.preparar("INSERT INTO credores (nome) VALUES (?);", inserir_returning=True) == (
+            "INSERT INTO credores (nome) VALUES (?) RETURNING id", True
+        )
+        assert db.preparar("INSERT INTO credores (nome) VALUES (?)") == ("INSERT INTO credores (nome) VALUES (?)", False)
+        assert db.preparar("INSERT INTO eventos_retencao (chave, valor) VALUES (?, ?)", inserir_returning=True)[1] is False
+        assert db.preparar("INSERT INTO jobs (tipo) VALUES (?) RETURNING id, tipo", inserir_returning=True)[1] is False
+
+        # DDL exclusivo do SQLite é ignorado nos demais bancos
+        comandos = [comando for _, _, lista in MIGRACOES for comando in lista]
+        exclusivos = [comando for comando in comandos if comando.lstrip().startswith(APENAS_SQLITE)]
+        assert exclusivos and all(db.traduzir_ddl(comando) is None for comando in exclusivos)
+        assert "SERIAL PRIMARY KEY" in db.traduzir_ddl(comandos[0])
+        db.dialeto = "sqlite"
+        assert all(db.traduzir_ddl(comando) == comando for comando in comandos)
+        db.fechar()
+
+        # Repositórios sobre o backend SQLAlchemy: no SQLite e simulando um
+        # banco servidor (schema_versao, RETURNING id, sem FTS5)
+        for dialeto in ("sqlite", "servidor"):
+            db = SqlAlchemyDatabase(f"sqlite:///{os.path.join(pasta, dialeto)}.db")
+            db.dialeto = dialeto
+            credores = CredorRepository(db)
+            precatorios = PrecatorioRepository(db)
+            for indice, nome in enumerate(["José Gonçalves", "Maria Gonzaga"], start=1):
+                credor = credores.criar(
+                    Credor(nome=nome, cpf_cnpj=f"123.456.789-0{indice}", email=f"{indice}@x.com", telefone="1"),
+                    Precatorio(numero_precatorio=str(indice), valor_nominal=Decimal("10.5"), foro="TJSP", data_publicacao=datetime(2024, 1, 1))
+                )
+                assert credor.id == indice
+            assert credores.buscar_por_cpf_cnpj("12345678902").nome == "Maria Gonzaga"
+            assert [c.nome for c in credores.buscar_por_nome("gon")] == ["José Gonçalves", "Maria Gonzaga"]
+            assert precatorios.buscar_por_credor(1)[0].valor_nominal == Decimal("10.5")
+            assert [p.credor_id for p in precatorios.buscar_por_foro("TJSP")] == [1, 2]
+            assert [evento['tipo'] for evento in FluxoEventos(db).buscar(0)[0]] == ["credor.criado"] * 2
+
+            tabelas = {row['name'] for row in db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if dialeto == "sqlite":
+                assert "busca_conteudo" in tabelas and "schema_versao" not in tabelas
+                assert db.fetch_one("PRAGMA user_version")['user_version'] == SCHEMA_VERSION
+            else:
+                assert "busca_conteudo" not in tabelas and "credores_busca" not in tabelas
+                assert db.fetch_one("SELECT MAX(versao) AS versao FROM schema_versao")['versao'] == SCHEMA_VERSION
+            db.fechar()
+
+def test_provedor_http(monkeypatch):
+    import asyncio
+    import time
+    import httpx
+    import pytest
+    from adapters.certidoes import provedor_http
+    from adapters.certidoes.provedor_http import CertidaoApiHttp, ErroProvedorCertidoes
+    from adapters.runtime.prazo import CABECALHO_PRAZO, PrazoExcedidoError, prazo
+
+    # Respostas de cada origem em ordem; a última se repete
+    respostas = {}
+    recebidas = []
+
+    def responder(request):
+        caminho = request.url.path
+        if caminho.endswith("/status"):
+            return httpx.Response(200, json={"status": "negativa"})
+        tipo = caminho.rsplit("/", 1)[-1]
+        recebidas.append((tipo, request.headers.get(CABECALHO_PRAZO), request.extensions["timeout"]["read"]))
+        fila = respostas.get(tipo) or [(200, {})]
+        status, cabecalhos = fila.pop(0) if len(fila) > 1 else fila[0]
+        if status != 200:
+            return httpx.Response(status, headers=cabecalhos)
+        return httpx.Response(200, json={"certidao": {"tipo": tipo, "status": "negativa"}})
+
+    def provedor():
+        return CertidaoApiHttp(
+            "http://certidoes", backoff_base_segundos=0.001, hedge=False, http2=False,
+            transporte=httpx.MockTransport(responder)
+        )
+
+    # Falhas transitórias são repetidas; esgotadas as tentativas, só a
+    # origem que falhou aparece com erro
+    esperas = []
+    monkeypatch.setattr(provedor_http.time, "sleep", esperas.append)
+    api = provedor()
+    respostas["federal"] = [(503, {}), (502, {}), (200, {})]
+    assert len(api.buscar_certidoes("1")) == 4
+    assert api.metricas["retentativas"] == 2 and api.metricas["tentativas"] == 6
+    respostas["estadual"] = [(500, {})]
+    certidoes = api.buscar_certidoes("1")
+    assert certidoes[1]["tipo"] == "estadual" and set(certidoes[1]) == {"tipo", "erro"}
+    assert "após 3 tentativas" in certidoes[1]["erro"]
+    assert [c["status"] for c in certidoes if "erro" not in c] == ["negativa"] * 3
+    respostas.clear()
+
+    # Retry-After da origem define a espera, limitada ao backoff máximo
+    esperas.clear()
+    respostas["municipal"] = [(429, {"Retry-After": "1.5"}), (503, {"Retry-After": "30"}), (429, {"Retry-After": "x"}), (200, {})]
+    api = provedor()
+    api.tentativas = 4
+    api.buscar_certidoes("1")
+    assert esperas[:2] == [1.5, 2.0] and 0 <= esperas[2] <= 0.004
+    monkeypatch.undo()
+
+    # Falha parcial também na consulta paralela; todas falhando, levanta o erro
+    async def consultar(api, **kwargs):
+        try:
+            return await api.buscar_certidoes_async("1")
+        finally:
+            await api.fechar()
+
+    respostas["trabalhista"] = [(500, {})]
+    certidoes = asyncio.run(consultar(provedor()))
+    assert [c.get("erro") is not None for c in certidoes] == [False, False, False, True]
+    for tipo in TipoCertidao:
+        respostas[tipo.value] = [(500, {})]
+    with pytest.raises(ErroProvedorCertidoes):
+        asyncio.run(consultar(provedor()))
+    respostas.clear()
+
+    # O prazo da requisição limita o timeout e é repassado à origem
+    async def com_prazo(api, segundos):
+        try:
+            with prazo(segundos):
+                return await api.buscar_certidoes_async("1")
+        finally:
+            await api.fechar()
+
+    recebidas.clear()
+    asyncio.run(com_prazo(provedor(), 0.5))
+    assert len(recebidas) == 4
+    for _, cabecalho, timeout in recebidas:
+        assert 0 < int(cabecalho) <= 500 and timeout <= 0.5
+
+    # Uma espera que passaria do prazo não é feita: a consulta falha na hora
+    for tipo in TipoCertidao:
+        respostas[tipo.value] = [(503, {"Retry-After": "1"})]
+    api = provedor()
+    inicio = time.monotonic()
+    with pytest.raises(PrazoExcedidoError):
+        asyncio.run(com_prazo(api, 0.3))
+    assert time.monotonic() - inicio < 0.3
+    assert api.metricas["prazos_excedidos"] == 4 and api.metricas["retentativas"] == 0
+    respostas.clear()
+
+    # A revalidação de vencidas é delegada ao agendador
+    agora = datetime.now()
+
+    class RepositorioFalso:
+        certidoes = {1: Certidao(id=1, valida_ate=agora + timedelta(hours=1))}
+
+        def listar_vencimentos(self):
+            return [(c.id, c.valida_ate) for c in self.certidoes.values()]
+
+        def buscar_por_id(self, certidao_id):
+            return self.certidoes.get(certidao_id)
+
+        def atualizar(self, certidao):
+            self.certidoes[certidao.id] = certidao
+
+    api = provedor()
+    with pytest.raises(ValueError):
+        api.revalidar_certidoes_vencidas()
+    api.set_agendador(AgendadorRevalidacao(RepositorioFalso(), api, taxa_maxima=1000))
+    assert api.revalidar_certidoes_vencidas() == 1
+    assert RepositorioFalso.certidoes[1].status == StatusCertidao.NEGATIVA
+    assert api.revalidar_certidoes_vencidas() == 0
+
+def test_disjuntor_e_hedge():
+    import asyncio
+    import httpx
+    import pytest
+    from adapters.certidoes.disjuntor import CircuitoAbertoError, Disjuntor
+    from adapters.certidoes.provedor_http import CertidaoApiHttp
+
+    relogio = [0.0]
+    disjuntor = Disjuntor("teste", limite_falhas=3, tempo_aberto_segundos=10, relogio=lambda: relogio[0])
+
+    # Fechado -> aberto após 3 falhas consecutivas (um sucesso zera a contagem)
+    disjuntor.registrar_falha()
+    disjuntor.registrar_sucesso()
+    disjuntor.registrar_falha()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.FECHADO
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    relogio[0] = 4
+    with pytest.raises(CircuitoAbertoError) as erro:
+        disjuntor.permitir()
+    assert erro.value.espera == 6
+
+    # Aberto -> meio aberto: uma única chamada de teste; se falhar, reabre
+    relogio[0] = 10
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+    disjuntor.permitir()
+    with pytest.raises(CircuitoAbertoError):
+        disjuntor.permitir()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.ABERTO and disjuntor.aberturas == 2
+
+    # Meio aberto -> fechado quando a chamada de teste tem sucesso
+    relogio[0] = 20
+    disjuntor.permitir()
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == Disjuntor.FECHADO
+    assert disjuntor.estatisticas() == {'estado': 'fechado', 'falhas_consecutivas': 0, 'aberturas': 2, 'recusadas': 2}
+
+    # Hedging: atraso e status de cada requisição, na ordem de chegada;
+    # sem roteiro a origem responde na hora
+    roteiro = []
+
+    async def responder(request):
+        atraso, status = roteiro.pop(0) if roteiro else (0, 200)
+        await asyncio.sleep(atraso)
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(200, json={"certidao": {"tipo": "federal", "status": "negativa"}})
+
+    api = CertidaoApiHttp(
+        "http://certidoes", backoff_base_segundos=0.001, hedge_minimo_amostras=5, http2=False,
+        transporte=httpx.MockTransport(responder)
+    )
+    api.disjuntores["federal"] = disjuntor = Disjuntor(
+        "federal", limite_falhas=1, tempo_aberto_segundos=10, relogio=lambda: relogio[0]
+    )
+    estatisticas = api.origens["federal"]
+
+    async def consultar(quantidade=1):
+        try:
+            return [await api.buscar_certidao_async("1", TipoCertidao.FEDERAL) for _ in range(quantidade)]
+        finally:
+            await api.fechar()
+
+    # Sem amostras suficientes não há duplicata; depois, a primária lenta
+    # perde para a duplicata
+    asyncio.run(consultar(5))
+    assert estatisticas.hedges == 0
+    roteiro.append((0.5, 200))
+    assert asyncio.run(consultar())[0]["status"] == "negativa"
+    assert (estatisticas.hedges, estatisticas.hedges_vencedores) == (1, 1)
+
+    # Meio aberto, a primária é a única chamada de teste: nenhuma duplicata
+    # é disparada (seria recusada pelo disjuntor) e o sucesso fecha o circuito
+    disjuntor.registrar_falha()
+    relogio[0] = 30
+    roteiro.append((0.2, 200))
+    assert asyncio.run(consultar())[0]["status"] == "negativa"
+    assert estatisticas.hedges == 1 and disjuntor.estado == Disjuntor.FECHADO
+
+    # Chamada de teste lenta que falha: reabre o circuito, e a retentativa
+    # é recusada na hora
+    disjuntor.registrar_falha()
+    relogio[0] = 40
+    roteiro.append((0.2, 503))
+    with pytest.raises(CircuitoAbertoError):
+        asyncio.run(consultar())
+    assert estatisticas.hedges == 1 and disjuntor.estado == Disjuntor.ABERTO
+    assert estatisticas.resumo()["consultas"] == 8
+
+def test_eleicao_lider():
+    import os
+    import tempfile
+    from ports.database.database import Database
+    from adapters.runtime.lideranca import EleicaoLider
+
+    relogio = [datetime(2024, 1, 1)]
+    trocas = []
+
+    def eleitor(nome):
+        return EleicaoLider(
+            db, "agendador", ttl_segundos=30, agora=lambda: relogio[0],
+            ao_assumir=lambda: trocas.append((nome, "assumiu")),
+            ao_perder=lambda: trocas.append((nome, "perdeu"))
+        )
+
+    def rodada(*eleitores):
+        # Uma iteração da thread de eleição de cada processo
+        for processo in eleitores:
+            processo._atualizar_estado(processo.tentar_assumir())
+
+    def avancar(segundos):
+        relogio[0] += timedelta(seconds=segundos)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(os.path.join(pasta, "lideranca.db"))
+        a, b = eleitor("a"), eleitor("b")
+
+        # Aquisição: o primeiro fica com o lease, o segundo não
+        rodada(a, b)
+        assert (a.lider, b.lider) == (True, False)
+
+        # Renovação: enquanto a renova, b não assume, mesmo depois do TTL
+        # original
+        for _ in range(4):
+            avancar(10)
+            rodada(a, b)
+        assert (a.lider, b.lider) == (True, False)
+        assert trocas == [("a", "assumiu")]
+
+        # Queda do líder: sem renovação, b só assume quando o lease expira
+        avancar(29)
+        rodada(b)
+        assert not b.lider
+        avancar(2)
+        rodada(b)
+        assert b.lider
+
+        # O antigo líder volta, percebe que perdeu o lease e não o retoma
+        rodada(a)
+        assert (a.lider, b.lider) == (False, True)
+        assert trocas == [("a", "assumiu"), ("b", "assumiu"), ("a", "perdeu")]
+
+        # Ao parar, o líder renuncia e o outro assume na rodada seguinte,
+        # sem esperar o lease expirar
+        b.parar()
+        rodada(a)
+        assert (a.lider, b.lider) == (True, False)
+        assert trocas[-2:] == [("b", "perdeu"), ("a", "assumiu")]
+        db.fechar()
+
+def test_ciclo_de_vida(capsys):
+    import asyncio
+    import os
+    import sqlite3
+    import tempfile
+    import pytest
+    from adapters.runtime.ciclo_vida import CicloDeVida
+    from ports.database.database import Database
+    from ports.database.schema import MIGRACOES, SCHEMA_VERSION, aplicar_migracoes_sqlite
+
+    ordem = []
+
+    def acao(descricao, erro=False):
+        def executar():
+            ordem.append(descricao)
+            if erro:
+                raise RuntimeError(f"falha em {descricao}")
+        return executar
+
+    async def iniciar_b():
+        await asyncio.sleep(0)
+        ordem.append("iniciar b")
+
+    # Inicialização em ordem e encerramento na ordem inversa; a falha ao
+    # encerrar uma etapa não impede o encerramento das anteriores
+    ciclo = CicloDeVida()
+    ciclo.registrar("a", acao("iniciar a"), acao("parar a"))
+    ciclo.registrar("b", iniciar_b, acao("parar b"))
+    ciclo.registrar("c", acao("iniciar c"), acao("parar c", erro=True))
+    ciclo.registrar("d", acao("iniciar d"))
+
+    async def executar(ciclo):
+        async with ciclo.lifespan(None):
+            assert ciclo.iniciado
+            ordem.append("atendendo")
+
+    asyncio.run(executar(ciclo))
+    assert ordem == [
+        "iniciar a", "iniciar b", "iniciar c", "iniciar d", "atendendo",
+        "parar c", "parar b", "parar a"
+    ]
+    assert list(ciclo.duracoes_ms) == ["a", "b", "c", "d"] and not ciclo.iniciado
+    assert "Erro ao encerrar etapa 'c': falha em parar c" in capsys.readouterr().out
+
+    # Falha na inicialização: só as etapas já iniciadas são encerradas
+    ordem.clear()
+    ciclo = CicloDeVida()
+    ciclo.registrar("a", acao("iniciar a"), acao("parar a"))
+    ciclo.registrar("b", acao("iniciar b", erro=True), acao("parar b"))
+    ciclo.registrar("c", acao("iniciar c"), acao("parar c"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(executar(ciclo))
+    assert ordem == ["iniciar a", "iniciar b", "parar a"]
+
+    # Migrações: um banco já migrado não executa DDL ao inicializar
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "ciclo.db")
+        db = Database(caminho)
+        db.inicializar()
+        db.fechar()
+        assert f"Aplicando migração {SCHEMA_VERSION}" in capsys.readouterr().out
+
+        db = Database(caminho)
+        db.inicializar()
+        db.fechar()
+        assert capsys.readouterr().out == ""
+
+        conn = sqlite3.connect(caminho)
+        comandos = []
+        conn.set_trace_callback(comandos.append)
+        assert aplicar_migracoes_sqlite(conn) == SCHEMA_VERSION
+        assert comandos == ["PRAGMA user_version"]
+
+        # Versão anterior: apenas as migrações pendentes são aplicadas
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+        assert aplicar_migracoes_sqlite(conn) == SCHEMA_VERSION
+        assert capsys.readouterr().out == f"Aplicando migração {SCHEMA_VERSION}: {MIGRACOES[-1][1]}\n"
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
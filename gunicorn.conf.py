@@ -0,0 +1,24 @@
+import multiprocessing
+import os
+
+# Configuração do gunicorn para servir a API com vários processos.
+# Uso: gunicorn -c gunicorn.conf.py main:app
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Cada worker importa a aplicação após o fork. Assim conexões SQLite,
+# threads de jobs e o scheduler nunca são compartilhados entre processos
+preload_app = False
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recicla workers periodicamente para limitar crescimento de memória
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
@@ -1,20 +1,20 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends, Request
 import asyncio
-import random
+import json
+import math
+import time
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from typing import List, Optional, Dict
-import uvicorn
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field
 from decimal import Decimal
-import base64
 import traceback
-from datetime import timedelta
 from enum import Enum
 import os
+import shutil
+import sys
+import threading
 from typing import Optional, Union
 
 # Importações das entidades
@@ -22,19 +22,93 @@ from core.entities.credor import Credor
 from core.entities.precatorio import Precatorio
 from core.entities.documento import Documento, TipoDocumento
 from core.entities.certidao import Certidao, TipoCertidao, OrigemCertidao, StatusCertidao
+from core.entities.job import TipoJob, EntidadeJob
 
 # Importações dos repositórios
-from ports.database.database import Database
+from ports.database.fabrica import criar_database
+from ports.database.conversao import para_datetime
+from ports.database.perfil import CABECALHO_CONSULTAS, perfil_requisicao
 from adapters.repositories.credor_repository import CredorRepository
 from adapters.repositories.precatorio_repository import PrecatorioRepository
 from adapters.repositories.documento_repository import DocumentoRepository
 from adapters.repositories.certidao_repository import CertidaoRepository, CertidaoApiMock
 
+# Importações da fila de jobs
+from adapters.jobs.fila_sqlite import FilaJobsSqlite
+from adapters.jobs.worker import PoolWorkers
+from adapters.jobs.processadores import ProcessadoresUpload
+from adapters.runtime.lideranca import EleicaoLider
+from adapters.runtime.ciclo_vida import CicloDeVida
+from adapters.runtime.tarefas_periodicas import TarefasPeriodicas
+from adapters.runtime.prazo import CABECALHO_PRAZO, PrazoExcedidoError, limitar_ao_prazo, prazo
+from adapters.runtime.saude import (
+    MonitorLacoEventos, VerificadorSaude, espaco_disco, estado_scheduler, memoria_processo
+)
+
+# Cache na frente do serviço de certidões
+from adapters.certidoes.cache import CertidaoApiCache
+from adapters.certidoes.disjuntor import CircuitoAbertoError
+from adapters.certidoes.provedor_http import CertidaoApiHttp, ErroProvedorCertidoes
+from adapters.certidoes.revalidacao import AgendadorRevalidacao
+
+# Importações do controle de admissão
+from adapters.admissao.limitador_taxa import LimitadorTaxa
+from adapters.admissao.coalescedor import Coalescedor
+from adapters.admissao.idempotencia import Idempotencia, MiddlewareIdempotencia
+
+# Verificação de integridade de arquivos em pool de processos
+from adapters.integridade.pipeline import PipelineIntegridade, FilaIntegridadeCheiaError
+
+# Busca textual no conteúdo de documentos e certidões
+from adapters.busca.indice import BuscaIndisponivelError, IndiceBuscaSqlite
+
+# Armazenamento dos arquivos enviados (disco local ou S3) e compactação
+# dos arquivos que deixaram de ser acessados
+from adapters.armazenamento.fabrica import criar_armazenamento
+from adapters.armazenamento.local import ArmazenamentoLocal
+from adapters.arquivos.compactacao import ArmazenamentoCompactado
+from adapters.arquivos.estaticos import ArquivosEstaticos, aceita_gzip, resposta_arquivo
+
+# Serialização das respostas
+from adapters.http.respostas import RespostaJSON, RotaJSONRapida, serializar
+
+# Exportação
+from adapters.exportacao.credores import ExportadorCredores, FormatoExportacao, TIPOS_CONTEUDO, comprimir_gzip
+
+# Eventos de alteração (outbox)
+from adapters.eventos.outbox import CursorExpiradoError, FluxoEventos
+
+# Elegibilidade dos credores para compra
+from adapters.elegibilidade.motor import MotorElegibilidade
+
+# Precificação dos precatórios
+from core.entities.precificacao import ParametrosPrecificacao
+from adapters.precificacao.motor import MotorPrecificacao
+
+# Fila de pagamento dos precatórios por foro
+from adapters.fila_pagamento.indice import IndiceFilaPagamento
+
+# Configurações
+from adapters.configuracao.configuracoes import Configuracoes
+
+# Configurações tipadas (ver adapters/configuracao/configuracoes.py): o
+# perfil vem de PERFIL (dev, prod ou carga), o arquivo JSON/TOML de
+# CONFIG_ARQUIVO e cada valor pode ser sobrescrito pela sua variável de ambiente
+configuracoes = Configuracoes.carregar()
+configuracoes.aplicar_limites()
+
+ciclo_vida = CicloDeVida()
+
 app = FastAPI(
     title="Mercatório Backend Challenge",
     description="API para originação de precatórios",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=ciclo_vida.lifespan,
+    default_response_class=RespostaJSON
 )
+# Os retornos das rotas são serializados uma única vez com orjson, sem
+# passar por jsonable_encoder (ver adapters/http/respostas.py)
+app.router.route_class = RotaJSONRapida
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,16 +118,359 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configurar servindo de arquivos estáticos
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Prazo de cada requisição: o menor entre PRAZO_REQUISICAO_MS e o cabeçalho
+# X-Prazo-Ms do cliente. Consultas a APIs externas feitas durante a requisição
+# limitam seus timeouts, retentativas e hedges a esse prazo
+PRAZO_REQUISICAO_MS = configuracoes.http.prazo_requisicao_ms
+
+@app.middleware("http")
+async def propagar_prazo(request: Request, call_next):
+    prazo_ms = PRAZO_REQUISICAO_MS
+    try:
+        prazo_ms = min(prazo_ms, float(request.headers.get(CABECALHO_PRAZO, prazo_ms)))
+    except ValueError:
+        pass
+    with prazo(prazo_ms / 1000):
+        return await call_next(request)
 
-db = Database()
+# Consultas acima de CONSULTA_LENTA_MS vão para o log com o plano de execução.
+# Com CONSULTAS_CABECALHO=1 cada resposta traz as consultas da requisição
+# nos cabeçalhos X-Consultas e Server-Timing (apenas para depuração)
+CONSULTAS_CABECALHO = configuracoes.banco.consultas_cabecalho
+
+@app.middleware("http")
+async def perfilar_consultas(request: Request, call_next):
+    with perfil_requisicao() as perfil:
+        resposta = await call_next(request)
+    if CONSULTAS_CABECALHO:
+        resposta.headers["Server-Timing"] = perfil.server_timing()
+        resposta.headers[CABECALHO_CONSULTAS] = json.dumps({
+            "consultas": perfil.total,
+            "tempo_ms": round(perfil.tempo_ms, 3),
+            "mais_lentas": perfil.mais_lentas()
+        })
+    return resposta
+
+db = criar_database(
+    url=configuracoes.banco.url,
+    backend=configuracoes.banco.backend,
+    pool_size=configuracoes.banco.pool_size,
+    consulta_lenta_ms=configuracoes.banco.consulta_lenta_ms,
+    busy_timeout=configuracoes.banco.busy_timeout,
+    pragmas=configuracoes.banco.pragmas()
+)
+# Rotas de criação aceitam Idempotency-Key: repetições da mesma requisição
+# (ex.: após um timeout no cliente) recebem a resposta guardada por
+# IDEMPOTENCIA_TTL_HORAS, sem executar a rota de novo
+ROTAS_IDEMPOTENTES = [r"/credores", r"/credores/\d+/documentos", r"/credores/\d+/certidoes"]
+idempotencia = Idempotencia(
+    db,
+    ttl_segundos=int(configuracoes.http.idempotencia_ttl_horas * 3600),
+    espera_maxima=configuracoes.http.idempotencia_espera_maxima
+)
+app.add_middleware(MiddlewareIdempotencia, idempotencia=idempotencia, rotas=ROTAS_IDEMPOTENTES)
+
+# ARMAZENAMENTO_BACKEND=s3 grava os arquivos em um bucket S3/MinIO e os
+# downloads são redirecionados para URLs assinadas
+armazenamento = criar_armazenamento()
+
+# Com ARQUIVOS_COMPACTACAO=gzip (ou zstd, se instalado) os arquivos sem
+# acesso há ARQUIVOS_DIAS_FRIO dias são compactados no disco. A leitura e o
+# download de arquivos compactados funcionam com ou sem a opção ativa.
+# Apenas para o disco local: no S3 use as classes de armazenamento do bucket
+ARQUIVOS_COMPACTACAO = configuracoes.arquivos.compactacao if isinstance(armazenamento, ArmazenamentoLocal) else ""
+# Percorre os diretórios de upload configurados e as pastas em static/,
+# onde ficam os arquivos enviados antes de UPLOAD_DIR_*
+RAIZES_UPLOADS = tuple(dict.fromkeys((
+    configuracoes.uploads.diretorio_documentos,
+    configuracoes.uploads.diretorio_certidoes,
+    os.path.join("static", "documentos"),
+    os.path.join("static", "certidoes"),
+)))
+armazenamento_arquivos = ArmazenamentoCompactado(
+    db,
+    raizes=RAIZES_UPLOADS,
+    codec=ARQUIVOS_COMPACTACAO,
+    nivel=configuracoes.arquivos.compactacao_nivel or None,
+    dias_frio=configuracoes.arquivos.dias_frio,
+    acessos_para_descompactar=configuracoes.arquivos.acessos_para_descompactar
+) if ARQUIVOS_COMPACTACAO else None
+
+# Configurar servindo de arquivos estáticos
+app.mount(
+    "/static",
+    ArquivosEstaticos(directory="static", armazenamento=armazenamento_arquivos, remoto=armazenamento),
+    name="static"
+)
 credor_repo = CredorRepository(db)
 precatorio_repo = PrecatorioRepository(db)
-documento_repo = DocumentoRepository(db)
-certidao_repo = CertidaoRepository(db)
-certidao_api = CertidaoApiMock()
+exportador_credores = ExportadorCredores(db)
+# Cada gravação de credor, precatório, documento ou certidão grava também
+# um evento na mesma transação. /events entrega os eventos a partir de um
+# cursor; quem aguarda novos eventos é acordado por uma única consulta a
+# cada EVENTOS_INTERVALO_MS. Eventos são mantidos por EVENTOS_RETENCAO_DIAS
+fluxo_eventos = FluxoEventos(
+    db,
+    intervalo_segundos=configuracoes.eventos.intervalo_ms / 1000,
+    retencao_dias=configuracoes.eventos.retencao_dias
+)
+EVENTOS_ESPERA_MAXIMA = configuracoes.eventos.espera_maxima
+# Elegibilidade materializada, atualizada a partir dos eventos: pelo líder a
+# cada ELEGIBILIDADE_INTERVALO segundos e antes de cada leitura
+motor_elegibilidade = MotorElegibilidade(db, fluxo_eventos)
+
+# Precificação vetorizada (NumPy, se instalado) dos precatórios.
+# PRECIFICACAO_PARAMETROS aponta para um JSON com a curva de desconto, a
+# correção anual e o atraso da fila e o spread de cada foro
+def carregar_parametros_precificacao() -> ParametrosPrecificacao:
+    caminho = configuracoes.eventos.precificacao_parametros
+    if not caminho:
+        return ParametrosPrecificacao()
+    with open(caminho, encoding="utf-8") as arquivo:
+        return ParametrosPrecificacao.from_dict(json.load(arquivo))
+
+motor_precificacao = MotorPrecificacao(db, carregar_parametros_precificacao(), fluxo_eventos)
+# Posição de cada precatório na fila de pagamento do seu foro, em memória,
+# montada na primeira consulta e atualizada pelos eventos antes de cada leitura
+fila_pagamento = IndiceFilaPagamento(db, fluxo_eventos)
+pipeline_integridade = PipelineIntegridade(
+    max_processos=configuracoes.uploads.integridade_processos,
+    max_fila=configuracoes.uploads.integridade_fila,
+    timeout_segundos=configuracoes.uploads.integridade_timeout
+)
+documento_repo = DocumentoRepository(
+    db, upload_dir=configuracoes.uploads.diretorio_documentos,
+    integridade=pipeline_integridade, armazenamento=armazenamento
+)
+certidao_repo = CertidaoRepository(
+    db, upload_dir=configuracoes.uploads.diretorio_certidoes,
+    integridade=pipeline_integridade, armazenamento=armazenamento
+)
+certidao_api = CertidaoApiMock(
+    antecedencia_dias=configuracoes.certidoes.varredura_antecedencia_dias,
+    intervalo_horas=configuracoes.certidoes.varredura_intervalo_horas
+)
 certidao_api.set_database(db)
+# Com CERTIDOES_API_URL as certidões vêm de uma API HTTP externa
+# (ou do servidor local benchmarks/servidor_certidoes.py); sem ela, do mock
+CERTIDOES_API_URL = configuracoes.certidoes.api_url
+provedor_certidoes = CertidaoApiHttp(
+    CERTIDOES_API_URL,
+    timeout_segundos=configuracoes.certidoes.api_timeout,
+    max_conexoes=configuracoes.certidoes.api_max_conexoes,
+    tentativas=configuracoes.certidoes.api_tentativas,
+    hedge=configuracoes.certidoes.api_hedge
+) if CERTIDOES_API_URL else certidao_api
+servico_certidoes = CertidaoApiCache(
+    provedor_certidoes,
+    ttl_maximo_segundos=configuracoes.certidoes.cache_ttl_maximo,
+    ttl_negativo_segundos=configuracoes.certidoes.cache_ttl_negativo,
+    janela_obsoleta_segundos=configuracoes.certidoes.cache_janela_obsoleta
+)
+indice_busca = IndiceBuscaSqlite(db)
+fila_jobs = FilaJobsSqlite(db, backoff_base_segundos=configuracoes.jobs.backoff_base_segundos)
+pool_workers = PoolWorkers(
+    fila_jobs,
+    ProcessadoresUpload(documento_repo, certidao_repo, pipeline_integridade, indice_busca, armazenamento).registrar(),
+    num_workers=configuracoes.jobs.workers,
+    intervalo_ociosidade=configuracoes.jobs.intervalo_ociosidade,
+    timeout_orfaos_segundos=configuracoes.jobs.timeout_orfaos_segundos
+)
+RETENCAO_HISTORICO_DIAS = configuracoes.certidoes.historico_retencao_dias
+
+def compactar_historico_certidoes():
+    """
+    Aplica a política de retenção ao histórico de certidões
+    """
+    try:
+        removidas = certidao_repo.compactar_historico(RETENCAO_HISTORICO_DIAS)
+        print(f"Histórico de certidões compactado: {removidas} versões removidas")
+    except Exception as e:
+        print(f"Erro ao compactar histórico de certidões: {str(e)}")
+
+# Revalidação de cada certidão pouco antes do vencimento, espaçada pelo limite de taxa
+agendador_revalidacao = AgendadorRevalidacao(
+    certidao_repo,
+    servico_certidoes,
+    antecedencia_segundos=configuracoes.certidoes.revalidacao_antecedencia_segundos,
+    taxa_maxima=configuracoes.certidoes.revalidacao_taxa_maxima
+)
+certidao_repo.adicionar_observador(agendador_revalidacao)
+if isinstance(provedor_certidoes, CertidaoApiHttp):
+    provedor_certidoes.set_agendador(agendador_revalidacao)
+
+def compactar_arquivos_frios():
+    """
+    Compacta os arquivos frios e descompacta os que voltaram a ser acessados
+    """
+    try:
+        resultado = armazenamento_arquivos.executar_ciclo()
+        print(f"Compactação de arquivos: {resultado}")
+    except Exception as e:
+        print(f"Erro na compactação de arquivos: {str(e)}")
+
+def limpar_idempotencia():
+    """
+    Remove as respostas idempotentes expiradas
+    """
+    try:
+        removidas = idempotencia.limpar_expiradas()
+        print(f"Idempotência: {removidas} respostas expiradas removidas")
+    except Exception as e:
+        print(f"Erro ao limpar respostas idempotentes: {str(e)}")
+
+def limpar_eventos():
+    """
+    Remove os eventos mais antigos que a retenção
+    """
+    try:
+        removidos = fluxo_eventos.limpar_antigos()
+        print(f"Eventos: {removidos} eventos antigos removidos")
+    except Exception as e:
+        print(f"Erro ao limpar eventos: {str(e)}")
+
+def atualizar_elegibilidade():
+    """
+    Recalcula a elegibilidade dos credores alterados desde a última execução
+    """
+    try:
+        motor_elegibilidade.atualizar()
+    except Exception as e:
+        print(f"Erro ao atualizar a elegibilidade: {str(e)}")
+
+tarefas_manutencao = TarefasPeriodicas()
+tarefas_manutencao.registrar("compactacao_historico_certidoes", compactar_historico_certidoes, 24 * 3600)
+tarefas_manutencao.registrar("limpeza_idempotencia", limpar_idempotencia, 3600)
+tarefas_manutencao.registrar("limpeza_eventos", limpar_eventos, 3600)
+tarefas_manutencao.registrar(
+    "elegibilidade", atualizar_elegibilidade, configuracoes.eventos.elegibilidade_intervalo
+)
+if armazenamento_arquivos:
+    tarefas_manutencao.registrar(
+        "compactacao_arquivos",
+        compactar_arquivos_frios,
+        configuracoes.arquivos.compactacao_intervalo
+    )
+
+def iniciar_tarefas_agendadas():
+    """
+    Tarefas executadas apenas pelo processo líder
+    """
+    agendador_revalidacao.iniciar()
+    tarefas_manutencao.iniciar()
+
+def parar_tarefas_agendadas():
+    tarefas_manutencao.parar()
+    agendador_revalidacao.parar()
+
+lider_agendador = EleicaoLider(
+    db,
+    "agendador_certidoes",
+    ao_assumir=iniciar_tarefas_agendadas,
+    ao_perder=parar_tarefas_agendadas
+)
+
+# Controle de admissão (por processo: com N workers o limite efetivo é N vezes maior)
+limite_rota = LimitadorTaxa(
+    taxa=configuracoes.http.limite_rota_taxa,
+    capacidade=configuracoes.http.limite_rota_rajada
+)
+limite_credor = LimitadorTaxa(
+    taxa=configuracoes.http.limite_credor_taxa,
+    capacidade=configuracoes.http.limite_credor_rajada
+)
+consultas_externas = asyncio.Semaphore(configuracoes.http.consultas_externas_max)
+TIMEOUT_FILA_CONSULTAS = configuracoes.http.consultas_externas_timeout_fila
+coalescedor_certidoes = Coalescedor()
+
+# Etapas executadas no lifespan, uma vez por worker (gunicorn/uvicorn --workers):
+# cada processo tem seu próprio pool de conexões e workers de jobs, mas apenas
+# o líder eleito roda o agendador de revalidação
+ciclo_vida.registrar("schema", db.inicializar, db.fechar)
+ciclo_vida.registrar("armazenamento", armazenamento.iniciar, lambda: None)
+ciclo_vida.registrar("jobs", pool_workers.iniciar, pool_workers.parar)
+ciclo_vida.registrar("integridade", lambda: None, pipeline_integridade.fechar)
+if armazenamento_arquivos:
+    # Grava os acessos ainda em memória antes de fechar o banco
+    ciclo_vida.registrar("arquivos", lambda: None, armazenamento_arquivos.gravar_acessos)
+ciclo_vida.registrar("agendador", lider_agendador.iniciar, lider_agendador.parar)
+if isinstance(provedor_certidoes, CertidaoApiHttp):
+    ciclo_vida.registrar("provedor_certidoes", lambda: None, provedor_certidoes.fechar)
+
+# Saúde do processo: /health/live responde sem tocar em nada; /health/ready
+# roda as verificações abaixo em paralelo, cada uma com SAUDE_TIMEOUT_MS para
+# responder, e retorna 503 se alguma crítica falhar. Todas são baratas o
+# bastante para o polling a cada segundo do orquestrador
+monitor_laco = MonitorLacoEventos(intervalo_segundos=configuracoes.saude.intervalo_laco_ms / 1000)
+verificador_saude = VerificadorSaude(timeout_segundos=configuracoes.saude.timeout_ms / 1000)
+
+def verificar_inicializacao() -> dict:
+    return {'ok': ciclo_vida.iniciado, 'etapas_ms': ciclo_vida.duracoes_ms}
+
+def verificar_banco() -> dict:
+    """
+    Ida e volta ao banco, lock de escrita e ocupação do pool
+    """
+    pool = db.estatisticas_pool()
+    if pool.get('tamanho'):
+        pool['saturacao'] = round(pool.get('em_uso', 0) / pool['tamanho'], 3)
+    sonda = db.sondar(configuracoes.saude.escrita_timeout_ms)
+    return {'ok': not sonda['bloqueado'], **sonda, 'pool': pool}
+
+def verificar_fila_jobs() -> dict:
+    """
+    Profundidade da fila e threads de processamento vivas
+    """
+    pendentes = fila_jobs.contar_pendentes()
+    workers = pool_workers.estatisticas()
+    maxima = configuracoes.saude.fila_jobs_maxima
+    return {
+        'ok': workers['vivos'] == workers['workers'] and (not maxima or pendentes <= maxima),
+        'pendentes': pendentes,
+        'pendentes_maximo': maxima or None,
+        **workers
+    }
+
+def verificar_disco() -> dict:
+    caminhos = ["static", configuracoes.uploads.diretorio_documentos, configuracoes.uploads.diretorio_certidoes]
+    if hasattr(db, "db_path"):
+        caminhos.append(os.path.dirname(os.path.abspath(db.db_path)))
+    return espaco_disco(dict.fromkeys(caminhos), configuracoes.saude.disco_minimo_mb)
+
+def verificar_laco_eventos() -> dict:
+    estatisticas = monitor_laco.estatisticas()
+    maximo = configuracoes.saude.atraso_laco_maximo_ms
+    return {'ok': estatisticas['ativo'] and estatisticas['ultimo_ms'] <= maximo, 'limite_ms': maximo, **estatisticas}
+
+def verificar_agendador() -> dict:
+    """
+    Todos os processos precisam da thread de eleição; o líder também do
+    scheduler das tarefas de manutenção e da thread de revalidação, exceto
+    enquanto as inicia ou encerra
+    """
+    manutencao = estado_scheduler(tarefas_manutencao.scheduler)
+    revalidacao = agendador_revalidacao.estatisticas()
+    lider, em_transicao = lider_agendador.lider, lider_agendador.em_transicao
+    tarefas_ok = manutencao['thread_viva'] and revalidacao['ativo']
+    return {
+        'ok': lider_agendador.ativo and (not lider or em_transicao or tarefas_ok),
+        'lider': lider,
+        'em_transicao': em_transicao,
+        'eleicao_ativa': lider_agendador.ativo,
+        'manutencao': manutencao,
+        'revalidacao': revalidacao,
+        'varredura_certidoes': estado_scheduler(certidao_api.scheduler)
+    }
+
+verificador_saude.registrar("inicializacao", verificar_inicializacao)
+verificador_saude.registrar("banco", verificar_banco)
+verificador_saude.registrar("fila_jobs", verificar_fila_jobs)
+verificador_saude.registrar("disco", verificar_disco)
+verificador_saude.registrar("laco_eventos", verificar_laco_eventos)
+verificador_saude.registrar("agendador", verificar_agendador)
+verificador_saude.registrar("memoria", memoria_processo, critica=False)
+ciclo_vida.registrar("monitor_laco", monitor_laco.iniciar, monitor_laco.parar)
+ciclo_vida.registrar("saude", lambda: None, verificador_saude.fechar)
 
 from pydantic import BaseModel, Field
 
@@ -75,9 +492,6 @@ class PrecatorioRequest(BaseModel):
         example="2024-05-24T00:00:00"
     )
 
-    class Config:
-        json_encoders = {Decimal: lambda v: str(v)}
-
 class CredorRequest(BaseModel):
     nome: str = Field(
         description="Nome completo do credor",
@@ -134,14 +548,106 @@ def save_uploaded_file(file: UploadFile, folder: str) -> str:
     filename = f"{timestamp}_{file.filename}"
     filepath = os.path.join(folder, filename)
     
-    # Salva o arquivo
+    # Salva o arquivo em blocos, sem carregá-lo inteiro na memória
     with open(filepath, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
+        shutil.copyfileobj(file.file, buffer)
     
     return filepath
 
-@app.post("/credores", status_code=201)
+async def verificar_integridade_upload(arquivo_url: str, tipos_permitidos: List[str]):
+    """
+    Verifica a estrutura do arquivo salvo no pool de processos; arquivos
+    corrompidos são removidos e a requisição é rejeitada
+    """
+    try:
+        resultado = await pipeline_integridade.verificar_async(arquivo_url, tipos_permitidos)
+    except FilaIntegridadeCheiaError:
+        os.remove(arquivo_url)
+        raise HTTPException(
+            status_code=503,
+            detail="Verificação de arquivos sobrecarregada. Tente novamente mais tarde",
+            headers={"Retry-After": "1"}
+        )
+    if not resultado["valido"]:
+        os.remove(arquivo_url)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Arquivo inválido: {'; '.join(resultado['erros'])}"
+        )
+    return resultado
+
+async def armazenar_upload(arquivo_url: str) -> str:
+    """
+    Move o upload já verificado para o armazenamento configurado. No disco
+    local o arquivo já está no lugar; no S3 ele é enviado em partes
+    paralelas e a cópia local é removida
+    """
+    try:
+        return await asyncio.to_thread(armazenamento.salvar_arquivo, arquivo_url, arquivo_url)
+    except Exception:
+        if os.path.exists(arquivo_url):
+            os.remove(arquivo_url)
+        raise
+
+def rejeitar_por_limite(espera: float):
+    """
+    Responde 429 informando em quantos segundos o cliente pode tentar de novo
+    """
+    raise HTTPException(
+        status_code=429,
+        detail="Limite de requisições excedido. Tente novamente mais tarde",
+        headers={"Retry-After": str(max(1, math.ceil(espera)))}
+    )
+
+def limitar_taxa(rota: str, por_credor: bool = False, coalescedor: Optional[Coalescedor] = None):
+    """
+    Cria uma dependência que aplica o token bucket da rota e, opcionalmente,
+    o do credor. Chamadas que serão coalescidas com uma execução em andamento
+    não geram trabalho novo e por isso não consomem o limite do credor
+    """
+    async def dependencia(request: Request):
+        if por_credor:
+            credor_id = request.path_params.get("credor_id")
+            chave = (rota, credor_id)
+            if not (coalescedor and coalescedor.esta_em_andamento(chave)):
+                permitido, espera = limite_credor.consumir(chave)
+                if not permitido:
+                    rejeitar_por_limite(espera)
+
+        permitido, espera = limite_rota.consumir(rota)
+        if not permitido:
+            rejeitar_por_limite(espera)
+    return dependencia
+
+async def consultar_certidoes_externas(cpf_cnpj: str) -> dict:
+    """
+    Consulta a API de certidões respeitando o limite de consultas simultâneas
+    """
+    try:
+        await asyncio.wait_for(
+            consultas_externas.acquire(), limitar_ao_prazo(TIMEOUT_FILA_CONSULTAS)
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Serviço de certidões sobrecarregado. Tente novamente mais tarde",
+            headers={"Retry-After": str(math.ceil(TIMEOUT_FILA_CONSULTAS))}
+        )
+    try:
+        return await mock_consulta_certidoes(cpf_cnpj)
+    finally:
+        consultas_externas.release()
+
+def enfileirar_jobs(entidade: EntidadeJob, entidade_id: int, tipos: List[TipoJob]) -> List[dict]:
+    """
+    Enfileira os jobs de pós-processamento de um upload e retorna seus dados
+    """
+    return [
+        fila_jobs.enfileirar(tipo, entidade, entidade_id).to_dict()
+        for tipo in tipos
+    ]
+
+@app.post("/credores", status_code=201, dependencies=[Depends(limitar_taxa("criar_credor"))])
 async def criar_credor(credor_request: CredorRequest):
     try:
         # Criar e validar o credor
@@ -182,6 +688,40 @@ async def criar_credor(credor_request: CredorRequest):
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+# Declarada antes de /credores/{credor_id} para que "search" não seja lido como id
+@app.get("/credores/search")
+async def pesquisar_credores(q: str, limite: int = 20):
+    """
+    Busca credores por CPF/CNPJ (com ou sem pontuação, completo ou prefixo),
+    email ou palavras do nome (a última pode estar incompleta), sem
+    distinção de acentos ou maiúsculas
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Informe o termo de busca")
+    inicio = time.perf_counter()
+    try:
+        criterio, credores = credor_repo.pesquisar(q, min(max(limite, 1), 100))
+    except Exception as e:
+        print(f"Erro na busca de credores: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "consulta": q,
+        "criterio": criterio,
+        "total": len(credores),
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        "credores": [
+            {
+                "id": credor.id,
+                "nome": credor.nome,
+                "cpf_cnpj": credor.cpf_cnpj,
+                "email": credor.email,
+                "telefone": credor.telefone
+            }
+            for credor in credores
+        ]
+    }
+
 @app.get("/credores/{credor_id}")
 async def buscar_credor(credor_id: int):
     try:
@@ -194,10 +734,27 @@ async def buscar_credor(credor_id: int):
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/credores/{credor_id}/documentos", status_code=201)
+@app.get("/credores/{credor_id}/certidoes/historico")
+async def listar_historico_certidoes(credor_id: int, tipo: Optional[TipoCertidaoEnum] = None):
+    credor = credor_repo.buscar_por_id(credor_id)
+    if not credor:
+        raise HTTPException(status_code=404, detail="Credor não encontrado")
+    return {
+        "credor_id": credor_id,
+        "historico": certidao_repo.buscar_historico(
+            credor_id, TipoCertidao(tipo.value) if tipo else None
+        )
+    }
+
+@app.post(
+    "/credores/{credor_id}/documentos",
+    status_code=201,
+    dependencies=[Depends(limitar_taxa("upload_documento"))]
+)
 async def upload_documento(
     credor_id: int,
     tipo: TipoDocumentoEnum,
+    background_tasks: BackgroundTasks,
     arquivo: UploadFile = File(...)
 ):
     try:
@@ -206,8 +763,8 @@ async def upload_documento(
         if not credor:
             raise HTTPException(status_code=404, detail="Credor não encontrado")
         
-        # Validar extensão do arquivo (opcional)
-        extensoes_permitidas = {".pdf", ".jpg", ".jpeg", ".png"}
+        # Validar extensão do arquivo
+        extensoes_permitidas = Documento.extensoes_permitidas()
         ext = os.path.splitext(arquivo.filename)[1].lower()
         if ext not in extensoes_permitidas:
             raise HTTPException(
@@ -216,13 +773,15 @@ async def upload_documento(
             )
         
         # Salvar arquivo
-        pasta_documentos = os.path.join("static", "documentos", str(credor_id))
+        pasta_documentos = os.path.join(configuracoes.uploads.diretorio_documentos, str(credor_id))
         arquivo_url = save_uploaded_file(arquivo, pasta_documentos)
+        await verificar_integridade_upload(arquivo_url, ["pdf", "png", "jpeg"])
+        arquivo_url = await armazenar_upload(arquivo_url)
         
         # Criar documento
         documento = Documento(
             credor_id=credor_id,
-            tipo=tipo.value,
+            tipo=TipoDocumento(tipo.value),
             arquivo_url=arquivo_url,
             enviado_em=datetime.now()
         )
@@ -230,14 +789,22 @@ async def upload_documento(
         # Salvar no banco
         documento = documento_repo.criar(documento)
         
+        # Integridade já verificada no upload; hash, miniatura e indexação
+        # do texto são processados de forma assíncrona
+        tipos_jobs = [TipoJob.HASH]
+        tipos_jobs.append(TipoJob.TEXTO if ext == ".pdf" else TipoJob.MINIATURA)
+        jobs = enfileirar_jobs(EntidadeJob.DOCUMENTO, documento.id, tipos_jobs)
+        background_tasks.add_task(pool_workers.notificar)
+        
         return {
             "message": "Documento enviado com sucesso",
             "documento": {
                 "id": documento.id,
-                "tipo": documento.tipo,
+                "tipo": documento.tipo.value,
                 "arquivo_url": documento.arquivo_url,
                 "enviado_em": documento.enviado_em
-            }
+            },
+            "jobs": jobs
         }
         
     except HTTPException as http_err:
@@ -247,10 +814,15 @@ async def upload_documento(
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/credores/{credor_id}/certidoes", status_code=201)
+@app.post(
+    "/credores/{credor_id}/certidoes",
+    status_code=201,
+    dependencies=[Depends(limitar_taxa("upload_certidao"))]
+)
 async def upload_certidao(
     credor_id: int,
     tipo: TipoCertidaoEnum,
+    background_tasks: BackgroundTasks,
     arquivo: UploadFile = File(...)
 ):
     try:
@@ -260,7 +832,7 @@ async def upload_certidao(
             raise HTTPException(status_code=404, detail="Credor não encontrado")
         
         # Validar extensão do arquivo
-        extensoes_permitidas = {".pdf"}
+        extensoes_permitidas = Certidao.extensoes_permitidas()
         ext = os.path.splitext(arquivo.filename)[1].lower()
         if ext not in extensoes_permitidas:
             raise HTTPException(
@@ -269,36 +841,41 @@ async def upload_certidao(
             )
         
         # Salvar arquivo
-        pasta_certidoes = os.path.join("static", "certidoes", str(credor_id))
+        pasta_certidoes = os.path.join(configuracoes.uploads.diretorio_certidoes, str(credor_id))
         arquivo_url = save_uploaded_file(arquivo, pasta_certidoes)
+        await verificar_integridade_upload(arquivo_url, ["pdf"])
+        arquivo_url = await armazenar_upload(arquivo_url)
         
-        # Converter arquivo para base64
-        with open(arquivo_url, "rb") as f:
-            conteudo_base64 = base64.b64encode(f.read()).decode()
-        
-        # Criar certidão
+        # Criar certidão (conteúdo e status são extraídos de forma assíncrona)
         certidao = Certidao(
             credor_id=credor_id,
-            tipo=tipo.value,
-            origem="manual",
+            tipo=TipoCertidao(tipo.value),
+            origem=OrigemCertidao.MANUAL,
             arquivo_url=arquivo_url,
-            conteudo_base64=conteudo_base64,
-            status="pendente",
+            status=StatusCertidao.PENDENTE,
             recebida_em=datetime.now(),
-            valida_ate=datetime.now() + timedelta(days=30)  # Validade padrão de 30 dias
+            valida_ate=Certidao.validade_padrao()
         )
         
         # Salvar no banco
         certidao = certidao_repo.criar(certidao)
         
+        jobs = enfileirar_jobs(
+            EntidadeJob.CERTIDAO,
+            certidao.id,
+            [TipoJob.HASH, TipoJob.STATUS_CERTIDAO, TipoJob.TEXTO]
+        )
+        background_tasks.add_task(pool_workers.notificar)
+        
         return {
             "message": "Certidão enviada com sucesso",
             "certidao": {
                 "id": certidao.id,
-                "tipo": certidao.tipo,
-                "status": certidao.status,
+                "tipo": certidao.tipo.value,
+                "status": certidao.status.value,
                 "valida_ate": certidao.valida_ate
-            }
+            },
+            "jobs": jobs
         }
         
     except HTTPException as http_err:
@@ -308,7 +885,358 @@ async def upload_certidao(
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/credores/{credor_id}/buscar-certidoes", status_code=200)
+@app.get("/documentos/{documento_id}/jobs")
+async def listar_jobs_documento(documento_id: int):
+    documento = documento_repo.buscar_por_id(documento_id)
+    if not documento:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    
+    jobs = fila_jobs.buscar_por_entidade(EntidadeJob.DOCUMENTO, documento_id)
+    return {
+        "documento_id": documento_id,
+        "concluido": all(job.esta_finalizado() for job in jobs),
+        "jobs": [job.to_dict() for job in jobs]
+    }
+
+@app.get("/certidoes/{certidao_id}/jobs")
+async def listar_jobs_certidao(certidao_id: int):
+    certidao = certidao_repo.buscar_por_id(certidao_id)
+    if not certidao:
+        raise HTTPException(status_code=404, detail="Certidão não encontrada")
+    
+    jobs = fila_jobs.buscar_por_entidade(EntidadeJob.CERTIDAO, certidao_id)
+    return {
+        "certidao_id": certidao_id,
+        "status_certidao": certidao.status.value,
+        "concluido": all(job.esta_finalizado() for job in jobs),
+        "jobs": [job.to_dict() for job in jobs]
+    }
+
+async def baixar_arquivo(arquivo_url: Optional[str], request: Request):
+    """
+    Redireciona para a URL assinada do armazenamento remoto ou envia o
+    arquivo local, descompactando-o se estiver no armazenamento compactado
+    """
+    if not arquivo_url:
+        # Certidões obtidas pela API não têm arquivo, apenas o conteúdo
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    url = armazenamento.url_download(arquivo_url, os.path.basename(arquivo_url))
+    if url:
+        return RedirectResponse(url, status_code=307)
+    try:
+        return await asyncio.to_thread(
+            resposta_arquivo,
+            arquivo_url,
+            aceita_gzip(request.headers),
+            armazenamento_arquivos,
+            os.path.basename(arquivo_url)
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+@app.get("/documentos/download/{documento_id}")
+async def baixar_documento(documento_id: int, request: Request):
+    documento = documento_repo.buscar_por_id(documento_id)
+    if not documento:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    return await baixar_arquivo(documento.arquivo_url, request)
+
+@app.get("/certidoes/download/{certidao_id}")
+async def baixar_certidao(certidao_id: int, request: Request):
+    certidao = certidao_repo.buscar_por_id(certidao_id)
+    if not certidao:
+        raise HTTPException(status_code=404, detail="Certidão não encontrada")
+    return await baixar_arquivo(certidao.arquivo_url, request)
+
+@app.delete("/documentos/{documento_id}", status_code=204)
+async def deletar_documento(documento_id: int):
+    documento = documento_repo.buscar_por_id(documento_id)
+    if not documento:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    # O texto indexado é removido por trigger junto com o registro
+    documento_repo.deletar(documento_id)
+
+@app.delete("/certidoes/{certidao_id}", status_code=204)
+async def deletar_certidao(certidao_id: int):
+    certidao = certidao_repo.buscar_por_id(certidao_id)
+    if not certidao:
+        raise HTTPException(status_code=404, detail="Certidão não encontrada")
+    certidao_repo.deletar(certidao_id)
+
+@app.get("/export/credores.{formato}")
+async def exportar_credores(formato: FormatoExportacao, request: Request):
+    """
+    Exportação completa dos credores com precatório e status corrente de
+    cada certidão, em NDJSON ou CSV. O conteúdo é enviado enquanto o banco
+    é lido; com Accept-Encoding: gzip é compactado durante o envio
+    """
+    blocos = exportador_credores.gerar(formato)
+    cabecalhos = {
+        "Content-Disposition": f'attachment; filename="credores_{datetime.now():%Y%m%d}.{formato.value}"',
+        "Vary": "Accept-Encoding"
+    }
+    if aceita_gzip(request.headers):
+        blocos = comprimir_gzip(blocos)
+        cabecalhos["Content-Encoding"] = "gzip"
+    return StreamingResponse(blocos, media_type=TIPOS_CONTEUDO[formato], headers=cabecalhos)
+
+@app.get("/precatorios/valuation")
+async def precificar_precatorios(
+    data_base: Optional[date] = None,
+    foro: Optional[str] = None,
+    apos: int = 0,
+    limite: int = 100
+):
+    """
+    Valor presente dos precatórios na data-base (padrão: hoje), com a data
+    esperada de pagamento pela fila de cada foro. Traz os totais da carteira
+    e por foro e uma página dos precatórios, em ordem de id (para a próxima
+    página use `apos` com o último id recebido)
+    """
+    def avaliar():
+        avaliacao = motor_precificacao.avaliar(data_base, foro)
+        return {
+            **avaliacao.resumo(),
+            "precatorios": avaliacao.itens(apos, min(max(limite, 0), 1000))
+        }
+
+    inicio = time.perf_counter()
+    # Carregar as colunas e calcular ocupa a CPU: fora do loop de eventos
+    resultado = await asyncio.to_thread(avaliar)
+    resultado["tempo_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    return resultado
+
+@app.get("/precatorios/{precatorio_id}/fila")
+async def posicao_na_fila(precatorio_id: int):
+    """
+    Posição do precatório na fila de pagamento do seu foro (ordem de data
+    de publicação e número), com a quantidade e o valor dos precatórios
+    à frente
+    """
+    # A primeira consulta monta o índice: fora do loop de eventos
+    posicao = await asyncio.to_thread(fila_pagamento.posicao, precatorio_id)
+    if not posicao:
+        raise HTTPException(status_code=404, detail="Precatório não encontrado")
+    return posicao
+
+@app.get("/foros/{foro}/fila")
+async def listar_fila(foro: str, apos: int = 0, limite: int = 100):
+    """
+    Precatórios do foro em ordem de pagamento. Para a próxima página use
+    `apos` com a posição do último precatório recebido
+    """
+    fila = await asyncio.to_thread(fila_pagamento.fila, foro, max(apos, 0), min(max(limite, 1), 1000))
+    if not fila:
+        raise HTTPException(status_code=404, detail="Foro sem precatórios")
+    return fila
+
+@app.get("/credores/{credor_id}/elegibilidade")
+async def buscar_elegibilidade(credor_id: int):
+    """
+    Se o credor está apto para compra: um documento de cada tipo e
+    certidões negativas válidas dos quatro tipos. Quando não está, lista
+    as pendências
+    """
+    def buscar():
+        motor_elegibilidade.atualizar()
+        return motor_elegibilidade.buscar(credor_id)
+
+    # Aplicar os eventos pendentes consulta e grava no banco: fora do loop de eventos
+    elegibilidade = await asyncio.to_thread(buscar)
+    if not elegibilidade:
+        raise HTTPException(status_code=404, detail="Credor não encontrado")
+    return elegibilidade.to_dict()
+
+@app.get("/elegibilidade")
+async def listar_aptos(apos: int = 0, limite: int = 100):
+    """
+    Credores aptos para compra agora, em ordem de id. Para a próxima
+    página use `apos` com o último id recebido
+    """
+    def listar():
+        motor_elegibilidade.atualizar()
+        return motor_elegibilidade.resumo(), motor_elegibilidade.listar_aptos(apos, min(max(limite, 1), 1000))
+
+    (total, aptos), credores = await asyncio.to_thread(listar)
+    return {
+        "total": total,
+        "aptos": aptos,
+        "credores": [elegibilidade.to_dict() for elegibilidade in credores]
+    }
+
+@app.post("/elegibilidade/recalcular")
+async def recalcular_elegibilidade():
+    """
+    Reconstrói a elegibilidade de todos os credores
+    """
+    inicio = time.perf_counter()
+    total = await asyncio.to_thread(motor_elegibilidade.recalcular_todos)
+    return {"credores": total, "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2)}
+
+def _linha_sse(evento: dict) -> bytes:
+    return (
+        f"id: {evento['id']}\nevent: {evento['tipo']}\n".encode()
+        + b"data: " + serializar(evento) + b"\n\n"
+    )
+
+@app.get("/events")
+async def listar_eventos(
+    request: Request,
+    cursor: Optional[int] = None,
+    credor_id: Optional[int] = None,
+    tipos: Optional[str] = None,
+    limite: int = 100,
+    espera: float = 0
+):
+    """
+    Alterações em credores, precatórios, documentos e certidões a partir
+    do cursor (id do último evento recebido; 0 para o início).
+
+    - Long-poll: sem eventos novos, aguarda até `espera` segundos antes de
+      responder. Repita a chamada com o `cursor` retornado
+    - SSE: com Accept: text/event-stream a conexão fica aberta e cada
+      evento é enviado assim que gravado. Ao reconectar, o navegador envia
+      Last-Event-ID, que é usado como cursor
+
+    Filtros: credor_id e tipos (separados por vírgula, ex.:
+    certidao.atualizada,documento.criado). Cursores anteriores à retenção
+    respondem 410: recarregue o estado completo e recomece do cursor atual
+    """
+    if cursor is None:
+        ultimo_recebido = request.headers.get("last-event-id", "")
+        cursor = int(ultimo_recebido) if ultimo_recebido.isdigit() else 0
+    filtro_tipos = tipos.split(",") if tipos else None
+    try:
+        eventos, cursor = await asyncio.to_thread(
+            fluxo_eventos.buscar, cursor, limite, credor_id, filtro_tipos
+        )
+    except CursorExpiradoError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        async def transmitir(eventos, cursor):
+            # Intervalo de reconexão sugerido ao navegador
+            yield b"retry: 3000\n\n"
+            while True:
+                for evento in eventos:
+                    yield _linha_sse(evento)
+                if not eventos:
+                    if await request.is_disconnected():
+                        return
+                    if not await fluxo_eventos.aguardar(cursor, 15):
+                        # Comentário SSE: mantém a conexão aberta em proxies
+                        yield b": ativo\n\n"
+                        continue
+                try:
+                    eventos, cursor = await asyncio.to_thread(
+                        fluxo_eventos.buscar, cursor, limite, credor_id, filtro_tipos
+                    )
+                except CursorExpiradoError:
+                    return
+
+        return StreamingResponse(
+            transmitir(eventos, cursor),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    espera = min(max(espera, 0), EVENTOS_ESPERA_MAXIMA)
+    fim = time.monotonic() + espera
+    while not eventos:
+        restante = fim - time.monotonic()
+        if restante <= 0 or not await fluxo_eventos.aguardar(cursor, restante):
+            break
+        eventos, cursor = await asyncio.to_thread(
+            fluxo_eventos.buscar, cursor, limite, credor_id, filtro_tipos
+        )
+    return {"eventos": eventos, "cursor": cursor}
+
+@app.get("/search")
+async def buscar_conteudo(
+    q: str,
+    entidade: Optional[EntidadeJob] = None,
+    credor_id: Optional[int] = None,
+    limite: int = 20
+):
+    """
+    Busca textual no conteúdo de documentos e certidões, com os
+    resultados ordenados por relevância (BM25) e trechos destacados
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Informe o termo de busca")
+    inicio = time.perf_counter()
+    try:
+        resultados = indice_busca.buscar(q, min(max(limite, 1), 100), entidade, credor_id)
+    except BuscaIndisponivelError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        print(f"Erro na busca textual: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "consulta": q,
+        "total": len(resultados),
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        "resultados": resultados
+    }
+
+@app.post("/search/reindexar", status_code=202)
+async def reindexar_conteudo():
+    """
+    Enfileira a extração de texto dos arquivos ainda fora do índice
+    (ex.: enviados antes da busca existir)
+    """
+    pendentes = indice_busca.listar_pendentes()
+    for entidade, entidade_id in pendentes:
+        enfileirar_jobs(entidade, entidade_id, [TipoJob.TEXTO])
+    pool_workers.notificar()
+    return {"enfileirados": len(pendentes)}
+
+async def consultar_e_salvar_certidoes(credor: Credor) -> dict:
+    """
+    Consulta as certidões do credor e grava o resultado
+    """
+    certidoes = await consultar_certidoes_externas(credor.cpf_cnpj)
+    
+    # Origens que falharam são reportadas e as demais certidões são salvas
+    falhas = [cert_data for cert_data in certidoes["certidoes"] if "erro" in cert_data]
+    
+    # Salvar cada certidão retornada. Certidões enviadas manualmente não
+    # são substituídas pelo resultado da API
+    preservadas = 0
+    for cert_data in certidoes["certidoes"]:
+        if "erro" in cert_data:
+            continue
+        certidao = Certidao(
+            credor_id=credor.id,
+            tipo=TipoCertidao(cert_data["tipo"]),
+            origem=OrigemCertidao.API,
+            conteudo_base64=cert_data["conteudo_base64"],
+            status=StatusCertidao(cert_data["status"]),
+            recebida_em=datetime.now(),
+            valida_ate=para_datetime(cert_data.get("valida_ate")) or Certidao.validade_padrao()
+        )
+        certidao = certidao_repo.criar(certidao)
+        if certidao.origem == OrigemCertidao.MANUAL:
+            preservadas += 1
+            continue
+        enfileirar_jobs(EntidadeJob.CERTIDAO, certidao.id, [TipoJob.TEXTO])
+    pool_workers.notificar()
+    
+    return {
+        "message": "Certidões consultadas e salvas com sucesso",
+        "quantidade": len(certidoes["certidoes"]) - len(falhas) - preservadas,
+        "preservadas": preservadas,
+        "falhas": falhas
+    }
+
+@app.post(
+    "/credores/{credor_id}/buscar-certidoes",
+    status_code=200,
+    dependencies=[Depends(limitar_taxa(
+        "buscar_certidoes", por_credor=True, coalescedor=coalescedor_certidoes
+    ))]
+)
 async def buscar_certidoes(credor_id: int):
     try:
         # Verificar se o credor existe
@@ -316,26 +1244,11 @@ async def buscar_certidoes(credor_id: int):
         if not credor:
             raise HTTPException(status_code=404, detail="Credor não encontrado")
         
-        # Consultar certidões via API mock
-        certidoes = await mock_consulta_certidoes(credor.cpf_cnpj)
-        
-        # Salvar cada certidão retornada
-        for cert_data in certidoes["certidoes"]:
-            certidao = Certidao(
-                credor_id=credor_id,
-                tipo=cert_data["tipo"],
-                origem="api",
-                conteudo_base64=cert_data["conteudo_base64"],
-                status=cert_data["status"],
-                recebida_em=datetime.now(),
-                valida_ate=datetime.now() + timedelta(days=30)
-            )
-            certidao_repo.criar(certidao)
-        
-        return {
-            "message": "Certidões consultadas e salvas com sucesso",
-            "quantidade": len(certidoes["certidoes"])
-        }
+        # Chamadas simultâneas para o mesmo credor compartilham uma única consulta
+        return await coalescedor_certidoes.executar(
+            ("buscar_certidoes", str(credor_id)),
+            lambda: consultar_e_salvar_certidoes(credor)
+        )
         
     except HTTPException as http_err:
         raise http_err
@@ -344,34 +1257,106 @@ async def buscar_certidoes(credor_id: int):
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/health/live")
+async def vivacidade():
+    """
+    O processo está de pé e o event loop responde. Não consulta o banco nem
+    outros subsistemas: uma falha neles não deve reiniciar o processo
+    """
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "uptime_segundos": round(time.time() - verificador_saude.iniciado_em, 1)
+    }
+
+@app.get("/health/ready")
+async def prontidao():
+    """
+    O processo pode receber tráfego: 200 se todas as verificações críticas
+    passaram, 503 caso contrário, com o resultado de cada uma
+    """
+    resultado = await verificador_saude.verificar()
+    return RespostaJSON(resultado, status_code=200 if resultado["pronto"] else 503)
+
+@app.get("/debug/runtime")
+async def diagnostico_runtime():
+    """
+    Verificações de prontidão com as threads do processo e a versão do Python
+    """
+    resultado = await verificador_saude.verificar()
+    resultado["python"] = sys.version.split()[0]
+    resultado["threads"] = sorted(thread.name for thread in threading.enumerate())
+    return resultado
+
+@app.get("/debug/settings")
+async def configuracoes_ativas():
+    """
+    Configurações em uso por este processo, com o perfil, a origem de cada
+    valor alterado (perfil, arquivo ou variável de ambiente) e a variável
+    de ambiente de cada campo. Senhas em URLs aparecem mascaradas
+    """
+    return {
+        "pid": os.getpid(),
+        "configuracoes": configuracoes.to_dict(),
+        "pragmas": configuracoes.banco.pragmas(),
+        "origens": configuracoes.origens,
+        "variaveis_ambiente": configuracoes.variaveis_ambiente()
+    }
+
+@app.get("/metrics")
+async def metricas():
+    """
+    Métricas do processo que atendeu a requisição
+    """
+    return {
+        "pid": os.getpid(),
+        "certidoes_cache": servico_certidoes.estatisticas(),
+        "admissao": {
+            "rejeitadas_rota": limite_rota.rejeitadas,
+            "rejeitadas_credor": limite_credor.rejeitadas,
+            "consultas_executadas": coalescedor_certidoes.executadas,
+            "consultas_coalescidas": coalescedor_certidoes.coalescidas,
+            "idempotencia": idempotencia.estatisticas()
+        },
+        "provedor_certidoes": (
+            provedor_certidoes.estatisticas()
+            if isinstance(provedor_certidoes, CertidaoApiHttp) else None
+        ),
+        "revalidacao": agendador_revalidacao.estatisticas(),
+        "eventos": fluxo_eventos.estatisticas(),
+        "elegibilidade": motor_elegibilidade.estatisticas(),
+        "precificacao": motor_precificacao.estatisticas(),
+        "fila_pagamento": fila_pagamento.estatisticas(),
+        "integridade": pipeline_integridade.estatisticas(),
+        "armazenamento": armazenamento.estatisticas(),
+        "arquivos": armazenamento_arquivos.estatisticas() if armazenamento_arquivos else None,
+        "pool": db.estatisticas_pool(),
+        "consultas": db.estatisticas_consultas()
+    }
+
 # API Mock para consulta de certidões
 @app.get("/api/certidoes")
 async def mock_consulta_certidoes(cpf_cnpj: str):
     try:
-        # Simular delay de API externa
-        await asyncio.sleep(1)
-        
-        # Gerar certidões aleatórias
-        tipos = ["federal", "estadual", "municipal", "trabalhista"]
-        status = ["positiva", "negativa"]
-        
-        certidoes = []
-        for tipo in tipos:
-            # Gerar PDF fake em base64
-            fake_pdf = f"Certidão {tipo.upper()} para {cpf_cnpj}".encode()
-            conteudo_base64 = base64.b64encode(fake_pdf).decode()
-            
-            certidoes.append({
-                "tipo": tipo,
-                "status": random.choice(status),
-                "conteudo_base64": conteudo_base64
-            })
+        # A consulta ao serviço passa pelo cache por (cpf_cnpj, tipo)
+        certidoes = await servico_certidoes.buscar_certidoes_async(cpf_cnpj)
         
         return {
             "cpf_cnpj": cpf_cnpj,
             "certidoes": certidoes
         }
         
+    except CircuitoAbertoError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.espera))}
+        )
+    except ErroProvedorCertidoes as e:
+        print(f"Erro na API de certidões: {str(e)}")
+        raise HTTPException(status_code=502, detail=str(e))
+    except PrazoExcedidoError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Erro na API mock: {str(e)}")
         print(traceback.format_exc())
@@ -379,8 +1364,9 @@ async def mock_consulta_certidoes(cpf_cnpj: str):
 
 if __name__ == "__main__":
     # Criar pastas necessárias
-    os.makedirs(os.path.join("static", "documentos"), exist_ok=True)
-    os.makedirs(os.path.join("static", "certidoes"), exist_ok=True)
+    os.makedirs(configuracoes.uploads.diretorio_documentos, exist_ok=True)
+    os.makedirs(configuracoes.uploads.diretorio_certidoes, exist_ok=True)
     
     # Iniciar servidor
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
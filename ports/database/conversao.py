@@ -0,0 +1,16 @@
+from datetime import datetime, date
+from typing import Any, Optional
+
+def para_datetime(valor: Any) -> Optional[datetime]:
+    """
+    Converte o valor de uma coluna de data para datetime.
+    O SQLite devolve strings ISO, enquanto drivers como o do PostgreSQL
+    já devolvem objetos date/datetime
+    """
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime(valor.year, valor.month, valor.day)
+    return datetime.fromisoformat(str(valor))
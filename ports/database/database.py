@@ -1,121 +1,312 @@
 import sqlite3
-from typing import Any, List, Tuple, Optional
+import threading
+import time
+from queue import LifoQueue, Empty, Full
+from typing import Any, Dict, List, Tuple, Optional, Iterable, Iterator
 from contextlib import contextmanager
 import os
+from ports.database.schema import aplicar_migracoes_sqlite
+from ports.database.perfil import PerfiladorConsultas, explicar_sqlite
+from ports.interfaces.Idatabase import IDatabase, ITransacao
 
-class Database:
-    def __init__(self, db_path: str = "database.db"):
+# PRAGMAs de cada conexão: WAL permite leitores concorrentes enquanto outro
+# processo escreve. Cache, mmap e temp_store vêm das configurações
+PRAGMAS_PADRAO = {"journal_mode": "WAL", "synchronous": "NORMAL"}
+
+class TransacaoSqlite(ITransacao):
+    """
+    Operações sobre uma conexão sqlite3 com transação aberta
+    """
+    def __init__(self, conn: sqlite3.Connection, perfilador: PerfiladorConsultas):
+        self.conn = conn
+        self.perfilador = perfilador
+
+    def execute(self, query: str, params: Tuple = ()) -> Any:
+        with self.perfilador.medir(query, params, self.conn) as medicao:
+            cursor = self.conn.execute(query, params)
+            medicao.linhas = cursor.rowcount
+            return cursor.lastrowid
+
+    def execute_many(self, query: str, params_list: Iterable[Tuple]) -> int:
+        # Em lote o log mostra a quantidade de linhas, não os parâmetros
+        with self.perfilador.medir(query, (), self.conn) as medicao:
+            medicao.linhas = self.conn.executemany(query, params_list).rowcount
+            return medicao.linhas
+
+    def execute_returning(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+        with self.perfilador.medir(query, params, self.conn) as medicao:
+            results = self.conn.execute(query, params).fetchall()
+            medicao.linhas = len(results)
+            return results[0] if results else None
+
+    def fetch_one(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+        with self.perfilador.medir(query, params, self.conn) as medicao:
+            result = self.conn.execute(query, params).fetchone()
+            medicao.linhas = 0 if result is None else 1
+            return result
+
+    def fetch_all(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self.perfilador.medir(query, params, self.conn) as medicao:
+            results = self.conn.execute(query, params).fetchall()
+            medicao.linhas = len(results)
+            return results
+
+class Database(IDatabase):
+    """
+    Backend de armazenamento baseado no módulo sqlite3 da biblioteca padrão.
+    Cada consulta é medida pelo perfilador (ver ports/database/perfil.py)
+    """
+    dialeto = "sqlite"
+
+    def __init__(
+        self,
+        db_path: str = "database.db",
+        pool_size: int = 5,
+        busy_timeout: float = 30.0,
+        consulta_lenta_ms: float = 100.0,
+        pragmas: Optional[Dict[str, Any]] = None
+    ):
         self.db_path = db_path
-        self._create_tables()
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.pragmas = pragmas or PRAGMAS_PADRAO
+        self.perfilador = PerfiladorConsultas(consulta_lenta_ms, explicar=explicar_sqlite)
+        self._pool: Optional[LifoQueue] = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
+        self._em_uso = 0
+        self._inicializado = False
+        self._init_lock = threading.Lock()
+
+    def _conectar(self) -> sqlite3.Connection:
+        """
+        Abre uma nova conexão configurada para acesso concorrente entre processos
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for nome, valor in self.pragmas.items():
+            conn.execute(f"PRAGMA {nome}={valor}")
+        return conn
+
+    def _obter_pool(self) -> LifoQueue:
+        """
+        Retorna o pool do processo atual. Conexões SQLite não podem ser
+        compartilhadas após um fork, então cada worker cria o seu próprio pool
+        """
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != pid:
+                    self._pool = LifoQueue(maxsize=self.pool_size)
+                    self._pool_pid = pid
+                    self._em_uso = 0
+        return self._pool
 
     @contextmanager
     def get_connection(self):
         """
-        Gerencia a conexão com o banco de dados usando context manager
+        Gerencia a conexão com o banco de dados usando context manager.
+        Na primeira utilização garante que o schema está atualizado
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        if not self._inicializado:
+            self.inicializar()
+        with self._conexao_do_pool() as conn:
+            yield conn
+
+    @contextmanager
+    def _conexao_do_pool(self):
+        """
+        Reaproveita conexões do pool; se o pool estiver vazio abre uma conexão
+        extra, que é descartada ao final se não houver espaço para devolvê-la
+        """
+        pool = self._obter_pool()
+        try:
+            conn = pool.get_nowait()
+        except Empty:
+            conn = self._conectar()
+
+        with self._pool_lock:
+            self._em_uso += 1
         try:
             yield conn
         finally:
-            conn.close()
+            with self._pool_lock:
+                self._em_uso -= 1
+            if conn.in_transaction:
+                conn.rollback()
+            if pool is self._pool:
+                try:
+                    pool.put_nowait(conn)
+                    conn = None
+                except Full:
+                    pass
+            if conn is not None:
+                conn.close()
 
-    def _create_tables(self):
+    def estatisticas_pool(self) -> dict:
         """
-        Cria as tabelas do banco de dados se não existirem
+        Retorna a ocupação do pool de conexões do processo atual
+        """
+        pool = self._obter_pool()
+        return {
+            'pid': self._pool_pid,
+            'tamanho': self.pool_size,
+            'ociosas': pool.qsize(),
+            'em_uso': self._em_uso
+        }
+
+    def sondar(self, timeout_escrita_ms: float = 200.0) -> dict:
+        """
+        Lê uma página do banco e tenta obter o lock de escrita (BEGIN
+        IMMEDIATE seguido de ROLLBACK, sem gravar nada). Se outro processo
+        segurar o lock por mais de timeout_escrita_ms o banco é reportado
+        como bloqueado. As consultas não passam pelo perfilador
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Tabela de credores
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS credores (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    cpf_cnpj TEXT NOT NULL UNIQUE,
-                    email TEXT NOT NULL,
-                    telefone TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Tabela de precatórios
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS precatorios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    credor_id INTEGER NOT NULL,
-                    numero_precatorio TEXT NOT NULL UNIQUE,
-                    valor_nominal DECIMAL(15,2) NOT NULL,
-                    foro TEXT NOT NULL,
-                    data_publicacao DATE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (credor_id) REFERENCES credores (id) ON DELETE CASCADE
-                )
-            """)
-
-            # Tabela de documentos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS documentos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    credor_id INTEGER NOT NULL,
-                    tipo TEXT NOT NULL,
-                    arquivo_url TEXT NOT NULL,
-                    enviado_em TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (credor_id) REFERENCES credores (id) ON DELETE CASCADE
-                )
-            """)
-
-            # Tabela de certidões
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS certidoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    credor_id INTEGER NOT NULL,
-                    tipo TEXT NOT NULL,
-                    origem TEXT NOT NULL,
-                    arquivo_url TEXT,
-                    conteudo_base64 TEXT,
-                    status TEXT NOT NULL,
-                    recebida_em TIMESTAMP NOT NULL,
-                    valida_ate TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (credor_id) REFERENCES credores (id) ON DELETE CASCADE
-                )
-            """)
-
-            conn.commit()
+            inicio = time.perf_counter()
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            leitura_ms = (time.perf_counter() - inicio) * 1000
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute(f"PRAGMA busy_timeout = {int(timeout_escrita_ms)}")
+            inicio = time.perf_counter()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("ROLLBACK")
+                bloqueado = False
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                bloqueado = True
+            finally:
+                conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+            return {
+                "leitura_ms": round(leitura_ms, 3),
+                "escrita_ms": round((time.perf_counter() - inicio) * 1000, 3),
+                "bloqueado": bloqueado
+            }
+
+    def fechar(self):
+        """
+        Fecha todas as conexões ociosas do pool
+        """
+        pool = self._obter_pool()
+        while True:
+            try:
+                pool.get_nowait().close()
+            except Empty:
+                break
+
+    @property
+    def inicializado(self) -> bool:
+        return self._inicializado
+
+    def inicializar(self):
+        """
+        Garante que o schema está na versão corrente. A versão gravada em
+        PRAGMA user_version é lida primeiro; se já estiver atualizada nenhum
+        DDL é executado. Chamado de forma preguiçosa na primeira conexão
+        """
+        if self._inicializado:
+            return
+        with self._init_lock:
+            if self._inicializado:
+                return
+            with self._conexao_do_pool() as conn:
+                aplicar_migracoes_sqlite(conn)
+            self._inicializado = True
 
     def execute(self, query: str, params: Tuple = ()) -> Any:
         """
         Executa uma query no banco de dados
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
+            with self.perfilador.medir(query, params, conn) as medicao:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                conn.commit()
+                medicao.linhas = cursor.rowcount
             return cursor.lastrowid
 
+    def execute_many(self, query: str, params_list: Iterable[Tuple]) -> int:
+        """
+        Executa o mesmo comando para vários conjuntos de parâmetros
+        em uma única transação (inserção em lote)
+        """
+        with self.transacao() as transacao:
+            return transacao.execute_many(query, params_list)
+
+    @contextmanager
+    def transacao(self):
+        """
+        Abre uma transação: confirma ao final do bloco e desfaz em caso de erro
+        """
+        with self.get_connection() as conn:
+            try:
+                yield TransacaoSqlite(conn, self.perfilador)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def execute_returning(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+        """
+        Executa uma query com cláusula RETURNING e retorna o primeiro registro
+        """
+        with self.get_connection() as conn:
+            with self.perfilador.medir(query, params, conn) as medicao:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                results = cursor.fetchall()
+                conn.commit()
+                medicao.linhas = len(results)
+            return results[0] if results else None
+
     def fetch_one(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
         """
         Busca um único registro no banco de dados
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchone()
+            return TransacaoSqlite(conn, self.perfilador).fetch_one(query, params)
 
     def fetch_all(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
         """
         Busca múltiplos registros no banco de dados
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
+            return TransacaoSqlite(conn, self.perfilador).fetch_all(query, params)
+
+    def iterar(self, query: str, params: Tuple = (), tamanho_lote: int = 1000) -> Iterator[sqlite3.Row]:
+        """
+        Percorre o resultado de uma consulta em lotes. O cursor do SQLite
+        avança conforme os registros são pedidos e, em WAL, enxerga o banco
+        como estava no início da consulta
+        """
+        with self.get_connection() as conn:
+            # Mede só o tempo gasto no banco, não o do consumidor entre lotes
+            inicio = time.perf_counter()
+            cursor = conn.execute(query, params)
+            tempo = time.perf_counter() - inicio
+            linhas = 0
+            try:
+                while True:
+                    inicio = time.perf_counter()
+                    lote = cursor.fetchmany(tamanho_lote)
+                    tempo += time.perf_counter() - inicio
+                    if not lote:
+                        return
+                    linhas += len(lote)
+                    yield from lote
+            finally:
+                cursor.close()
+                self.perfilador.registrar(query, params, tempo * 1000, linhas, conn)
+
+    def estatisticas_consultas(self) -> dict:
+        return self.perfilador.estatisticas()
 
     def table_to_dict(self, row: sqlite3.Row) -> dict:
         """
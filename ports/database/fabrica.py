@@ -0,0 +1,46 @@
+import os
+from typing import Any, Dict, Optional
+from ports.interfaces.Idatabase import IDatabase
+from ports.database.database import Database
+
+BACKENDS = ("sqlite3", "sqlalchemy")
+
+def criar_database(
+    url: Optional[str] = None,
+    backend: Optional[str] = None,
+    pool_size: int = 5,
+    consulta_lenta_ms: float = 100.0,
+    busy_timeout: float = 30.0,
+    pragmas: Optional[Dict[str, Any]] = None
+) -> IDatabase:
+    """
+    Cria o backend de armazenamento a partir de DATABASE_URL/DATABASE_BACKEND.
+
+    - sqlite3 (padrão para URLs sqlite:///): módulo sqlite3 da biblioteca padrão
+    - sqlalchemy: SQLAlchemy Core com pool de conexões, obrigatório para
+      bancos servidor como PostgreSQL (ex.: postgresql+psycopg://...)
+
+    Consultas acima de `consulta_lenta_ms` são registradas no log. `pragmas`
+    vale apenas para SQLite (padrão: PRAGMAS_PADRAO)
+    """
+    url = url or os.getenv("DATABASE_URL", "sqlite:///database.db")
+    backend = backend or os.getenv("DATABASE_BACKEND")
+    if not backend:
+        backend = "sqlite3" if url.startswith("sqlite:///") else "sqlalchemy"
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de banco inválido: {backend}. Use: {', '.join(BACKENDS)}")
+
+    if backend == "sqlite3":
+        if not url.startswith("sqlite:///"):
+            raise ValueError("O backend sqlite3 aceita apenas URLs sqlite:///")
+        return Database(
+            db_path=url[len("sqlite:///"):], pool_size=pool_size, busy_timeout=busy_timeout,
+            consulta_lenta_ms=consulta_lenta_ms, pragmas=pragmas
+        )
+
+    # Importado sob demanda: o SQLAlchemy só é carregado quando usado
+    from ports.database.sqlalchemy_database import SqlAlchemyDatabase
+    return SqlAlchemyDatabase(
+        url, pool_size=pool_size, busy_timeout=busy_timeout, consulta_lenta_ms=consulta_lenta_ms, pragmas=pragmas
+    )
@@ -0,0 +1,201 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Consultas da requisição atual. Propaga para tarefas asyncio e para
+# asyncio.to_thread, que copiam o contexto (como o prazo da requisição)
+_perfil_atual: ContextVar[Optional["PerfilRequisicao"]] = ContextVar("perfil_consultas", default=None)
+
+CABECALHO_CONSULTAS = "X-Consultas"
+
+# Comandos para os quais EXPLAIN QUERY PLAN faz sentido
+COMANDOS_EXPLICAVEIS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+def impressao_digital(params: Any) -> str:
+    """
+    Identificador curto dos parâmetros: permite ver que duas execuções
+    usaram os mesmos valores sem expor CPF, email etc. nos logs
+    """
+    return hashlib.blake2b(repr(params).encode(), digest_size=4).hexdigest()
+
+def resumir_sql(query: str, tamanho: int = 120) -> str:
+    sql = " ".join(query.split())
+    return sql if len(sql) <= tamanho else sql[:tamanho - 3] + "..."
+
+def explicar_sqlite(conn, query: str, params: Any) -> List[str]:
+    """
+    Plano de execução de um comando em uma conexão sqlite3
+    """
+    if not query.lstrip().upper().startswith(COMANDOS_EXPLICAVEIS):
+        return []
+    if not params:
+        # Comandos em lote são registrados sem parâmetros: o plano não depende dos valores
+        params = (None,) * query.count("?")
+    return [linha[-1] for linha in conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()]
+
+
+class PerfilRequisicao:
+    """
+    Consultas executadas durante uma requisição
+    """
+    MAX_CONSULTAS = 100
+
+    def __init__(self):
+        self.consultas: List[Tuple[str, str, float, Optional[int]]] = []
+        self.total = 0
+        self.tempo_ms = 0.0
+
+    def adicionar(self, query: str, params: Any, tempo_ms: float, linhas: Optional[int]):
+        self.total += 1
+        self.tempo_ms += tempo_ms
+        # Requisições com muitas consultas (ex.: exportações) guardam só as primeiras
+        if len(self.consultas) < self.MAX_CONSULTAS:
+            self.consultas.append((query, impressao_digital(params), tempo_ms, linhas))
+
+    def mais_lentas(self, limite: int = 5) -> List[dict]:
+        return [
+            {'sql': resumir_sql(query), 'params': digital, 'ms': round(tempo_ms, 3), 'linhas': linhas}
+            for query, digital, tempo_ms, linhas in sorted(self.consultas, key=lambda c: -c[2])[:limite]
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.tempo_ms:.3f};desc="{self.total} consultas"'
+
+
+@contextmanager
+def perfil_requisicao():
+    """
+    Atribui à requisição as consultas executadas dentro do bloco
+    """
+    perfil = PerfilRequisicao()
+    token = _perfil_atual.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _perfil_atual.reset(token)
+
+
+class Medicao:
+    """
+    Mede uma consulta. O backend preenche `linhas` com a quantidade de
+    linhas retornadas ou afetadas
+    """
+    __slots__ = ('perfilador', 'query', 'params', 'conn', 'linhas', 'inicio')
+
+    def __init__(self, perfilador: "PerfiladorConsultas", query: str, params: Any, conn: Any):
+        self.perfilador = perfilador
+        self.query = query
+        self.params = params
+        self.conn = conn
+        self.linhas: Optional[int] = None
+
+    def __enter__(self) -> "Medicao":
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perfilador.registrar(
+            self.query, self.params, (time.perf_counter() - self.inicio) * 1000, self.linhas, self.conn
+        )
+        return False
+
+
+class PerfiladorConsultas:
+    """
+    Mede cada consulta do backend de banco: tempo, linhas e parâmetros.
+
+    - Atribui a consulta à requisição atual (perfil_requisicao)
+    - Agrega por comando SQL no processo, para /metrics
+    - Consultas acima de `limite_lento_ms` são registradas no log com o
+      plano de execução (calculado uma vez por comando)
+    """
+    def __init__(
+        self,
+        limite_lento_ms: float = 100.0,
+        explicar: Optional[Callable[[Any, str, Any], List[str]]] = None,
+        max_comandos: int = 500
+    ):
+        self.limite_lento_ms = limite_lento_ms
+        self.explicar = explicar
+        self.max_comandos = max_comandos
+        self._lock = threading.Lock()
+        # query -> [execuções, tempo total (ms), tempo máximo (ms), linhas]
+        self._por_comando: Dict[str, list] = {}
+        self._planos: Dict[str, List[str]] = {}
+        self.consultas = 0
+        self.tempo_total_ms = 0.0
+        self.lentas = 0
+
+    def medir(self, query: str, params: Any = (), conn: Any = None) -> Medicao:
+        """
+        Context manager que registra a consulta executada dentro do bloco
+        """
+        return Medicao(self, query, params, conn)
+
+    def registrar(self, query: str, params: Any, tempo_ms: float, linhas: Optional[int], conn: Any = None):
+        perfil = _perfil_atual.get()
+        if perfil is not None:
+            perfil.adicionar(query, params, tempo_ms, linhas)
+
+        lenta = tempo_ms >= self.limite_lento_ms
+        with self._lock:
+            self.consultas += 1
+            self.tempo_total_ms += tempo_ms
+            if lenta:
+                self.lentas += 1
+            # O texto do comando é a chave: os repositórios usam placeholders,
+            # então execuções com valores diferentes caem no mesmo registro
+            estatistica = self._por_comando.get(query)
+            if estatistica is None and len(self._por_comando) < self.max_comandos:
+                estatistica = self._por_comando[query] = [0, 0.0, 0.0, 0]
+            if estatistica is not None:
+                estatistica[0] += 1
+                estatistica[1] += tempo_ms
+                estatistica[2] = max(estatistica[2], tempo_ms)
+                estatistica[3] += linhas or 0
+
+        if lenta:
+            self._registrar_lenta(query, params, tempo_ms, linhas, conn)
+
+    def _registrar_lenta(self, query: str, params: Any, tempo_ms: float, linhas: Optional[int], conn: Any):
+        print(
+            f"Consulta lenta: {tempo_ms:.1f} ms, {linhas if linhas is not None else '?'} linhas, "
+            f"parâmetros {impressao_digital(params)}: {resumir_sql(query, 500)}"
+        )
+        plano = self._planos.get(query)
+        if plano is None and self.explicar and conn is not None:
+            try:
+                plano = self.explicar(conn, query, params)
+            except Exception as e:
+                print(f"Erro ao obter o plano da consulta: {str(e)}")
+                plano = []
+            self._planos[query] = plano
+        for linha in plano or []:
+            print(f"    plano: {linha}")
+
+    def estatisticas(self, limite: int = 10) -> dict:
+        """
+        Totais do processo e os comandos com maior tempo acumulado
+        """
+        with self._lock:
+            comandos = sorted(self._por_comando.items(), key=lambda item: -item[1][1])[:limite]
+            return {
+                'consultas': self.consultas,
+                'tempo_total_ms': round(self.tempo_total_ms, 3),
+                'lentas': self.lentas,
+                'limite_lento_ms': self.limite_lento_ms,
+                'mais_custosas': [
+                    {
+                        'sql': resumir_sql(query),
+                        'execucoes': execucoes,
+                        'tempo_total_ms': round(tempo, 3),
+                        'tempo_medio_ms': round(tempo / execucoes, 3),
+                        'tempo_maximo_ms': round(maximo, 3),
+                        'linhas': linhas,
+                    }
+                    for query, (execucoes, tempo, maximo, linhas) in comandos
+                ]
+            }
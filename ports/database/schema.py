@@ -0,0 +1,403 @@
+"""
+Migrações do schema do banco de dados.
+
+Cada migração é aplicada uma única vez, em ordem, e a versão corrente fica
+registrada em `PRAGMA user_version`. Para alterar o schema, adicione uma nova
+migração ao final da lista; nunca edite uma migração já publicada.
+
+Comandos iniciados por APENAS_SQLITE usam recursos exclusivos do SQLite
+(FTS5, sintaxe de triggers) e são ignorados nos demais bancos.
+"""
+import sqlite3
+from typing import List, Tuple
+
+Migracao = Tuple[int, str, List[str]]
+
+APENAS_SQLITE = "-- apenas sqlite"
+
+# CPF/CNPJ apenas com dígitos, a partir da pontuação usual (mesma regra de
+# core.entities.credor.normalizar_cpf_cnpj para os dados existentes)
+CPF_CNPJ_SQL = "REPLACE(REPLACE(REPLACE(REPLACE(TRIM(cpf_cnpj), '.', ''), '-', ''), '/', ''), ' ', '')"
+
+MIGRACOES: List[Migracao] = [
+    (1, "Tabelas de credores, precatórios, documentos e certidões", [
+        """
+        CREATE TABLE IF NOT EXISTS credores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            cpf_cnpj TEXT NOT NULL UNIQUE,
+            email TEXT NOT NULL,
+            telefone TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS precatorios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            credor_id INTEGER NOT NULL,
+            numero_precatorio TEXT NOT NULL UNIQUE,
+            valor_nominal DECIMAL(15,2) NOT NULL,
+            foro TEXT NOT NULL,
+            data_publicacao DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (credor_id) REFERENCES credores (id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS documentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            credor_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            arquivo_url TEXT NOT NULL,
+            enviado_em TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (credor_id) REFERENCES credores (id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS certidoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            credor_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            arquivo_url TEXT,
+            conteudo_base64 TEXT,
+            status TEXT NOT NULL,
+            recebida_em TIMESTAMP NOT NULL,
+            valida_ate TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (credor_id) REFERENCES credores (id) ON DELETE CASCADE
+        )
+        """
+    ]),
+    (2, "Fila persistente de jobs de pós-processamento", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            entidade TEXT NOT NULL,
+            entidade_id INTEGER NOT NULL,
+            payload TEXT,
+            status TEXT NOT NULL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            max_tentativas INTEGER NOT NULL DEFAULT 3,
+            resultado TEXT,
+            erro TEXT,
+            worker TEXT,
+            disponivel_em TIMESTAMP NOT NULL,
+            iniciado_em TIMESTAMP,
+            finalizado_em TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_disponivel
+        ON jobs (status, disponivel_em)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_entidade
+        ON jobs (entidade, entidade_id)
+        """
+    ]),
+    (3, "Lease de liderança entre processos", [
+        """
+        CREATE TABLE IF NOT EXISTS lideranca (
+            nome TEXT PRIMARY KEY,
+            dono TEXT NOT NULL,
+            expira_em TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    ]),
+    (4, "Certidões correntes por (credor, tipo) e histórico append-only", [
+        """
+        CREATE TABLE IF NOT EXISTS certidoes_historico (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            certidao_id INTEGER NOT NULL,
+            credor_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            arquivo_url TEXT,
+            status TEXT NOT NULL,
+            recebida_em TIMESTAMP NOT NULL,
+            valida_ate TIMESTAMP,
+            registrada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_certidoes_historico_credor_tipo
+        ON certidoes_historico (credor_id, tipo, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_certidoes_historico_registrada_em
+        ON certidoes_historico (registrada_em)
+        """,
+        # Todas as versões existentes vão para o histórico
+        """
+        INSERT INTO certidoes_historico (
+            certidao_id, credor_id, tipo, origem, arquivo_url,
+            status, recebida_em, valida_ate, registrada_em
+        )
+        SELECT id, credor_id, tipo, origem, arquivo_url,
+               status, recebida_em, valida_ate, created_at
+        FROM certidoes
+        ORDER BY id
+        """,
+        # Em certidoes fica apenas a versão mais recente de cada (credor, tipo)
+        """
+        DELETE FROM certidoes
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM certidoes GROUP BY credor_id, tipo
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_certidoes_credor_tipo
+        ON certidoes (credor_id, tipo)
+        """,
+    ]),
+    (5, "Texto extraído de documentos e certidões e índice de busca FTS5", [
+        """
+        CREATE TABLE IF NOT EXISTS conteudo_extraido (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entidade TEXT NOT NULL,
+            entidade_id INTEGER NOT NULL,
+            credor_id INTEGER NOT NULL,
+            texto TEXT NOT NULL,
+            extraido_em TIMESTAMP NOT NULL
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_conteudo_extraido_entidade
+        ON conteudo_extraido (entidade, entidade_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_conteudo_extraido_credor
+        ON conteudo_extraido (credor_id)
+        """,
+        # Tabela de conteúdo externo: o FTS guarda apenas o índice invertido
+        f"""{APENAS_SQLITE}
+        CREATE VIRTUAL TABLE IF NOT EXISTS busca_conteudo USING fts5(
+            texto,
+            content='conteudo_extraido',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS conteudo_extraido_ai AFTER INSERT ON conteudo_extraido BEGIN
+            INSERT INTO busca_conteudo (rowid, texto) VALUES (new.id, new.texto);
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS conteudo_extraido_ad AFTER DELETE ON conteudo_extraido BEGIN
+            INSERT INTO busca_conteudo (busca_conteudo, rowid, texto) VALUES ('delete', old.id, old.texto);
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS conteudo_extraido_au AFTER UPDATE ON conteudo_extraido BEGIN
+            INSERT INTO busca_conteudo (busca_conteudo, rowid, texto) VALUES ('delete', old.id, old.texto);
+            INSERT INTO busca_conteudo (rowid, texto) VALUES (new.id, new.texto);
+        END
+        """,
+        # Exclusões removem o texto do índice (as chaves estrangeiras não
+        # estão ativas, então a limpeza não depende de ON DELETE CASCADE)
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS documentos_conteudo_ad AFTER DELETE ON documentos BEGIN
+            DELETE FROM conteudo_extraido WHERE entidade = 'documento' AND entidade_id = old.id;
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS certidoes_conteudo_ad AFTER DELETE ON certidoes BEGIN
+            DELETE FROM conteudo_extraido WHERE entidade = 'certidao' AND entidade_id = old.id;
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS credores_conteudo_ad AFTER DELETE ON credores BEGIN
+            DELETE FROM conteudo_extraido WHERE credor_id = old.id;
+        END
+        """,
+    ]),
+    (6, "Chaves normalizadas de CPF/CNPJ e email e busca de credores por nome", [
+        "ALTER TABLE credores ADD COLUMN cpf_cnpj_normalizado TEXT",
+        "ALTER TABLE credores ADD COLUMN email_normalizado TEXT",
+        "UPDATE credores SET email_normalizado = LOWER(TRIM(email))",
+        # Credores já duplicados após a normalização (ex.: "123.456.789-00" e
+        # "12345678900"): apenas o mais antigo recebe a chave; os demais ficam
+        # sem ela e precisam ser unificados manualmente
+        f"""
+        UPDATE credores SET cpf_cnpj_normalizado = {CPF_CNPJ_SQL}
+        WHERE id IN (SELECT MIN(id) FROM credores GROUP BY {CPF_CNPJ_SQL})
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_credores_cpf_cnpj_normalizado
+        ON credores (cpf_cnpj_normalizado)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_credores_email_normalizado
+        ON credores (email_normalizado)
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE VIRTUAL TABLE IF NOT EXISTS credores_busca USING fts5(
+            nome,
+            content='credores',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3 4 5 6 7 8'
+        )
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS credores_busca_ai AFTER INSERT ON credores BEGIN
+            INSERT INTO credores_busca (rowid, nome) VALUES (new.id, new.nome);
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS credores_busca_ad AFTER DELETE ON credores BEGIN
+            INSERT INTO credores_busca (credores_busca, rowid, nome) VALUES ('delete', old.id, old.nome);
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        CREATE TRIGGER IF NOT EXISTS credores_busca_au AFTER UPDATE OF nome ON credores BEGIN
+            INSERT INTO credores_busca (credores_busca, rowid, nome) VALUES ('delete', old.id, old.nome);
+            INSERT INTO credores_busca (rowid, nome) VALUES (new.id, new.nome);
+        END
+        """,
+        f"""{APENAS_SQLITE}
+        INSERT INTO credores_busca (credores_busca) VALUES ('rebuild')
+        """,
+    ]),
+    (7, "Registro de acessos aos arquivos enviados para a compactação dos arquivos frios", [
+        """
+        CREATE TABLE IF NOT EXISTS arquivos_acessos (
+            caminho TEXT PRIMARY KEY,
+            ultimo_acesso TIMESTAMP,
+            acessos INTEGER NOT NULL DEFAULT 0,
+            incompressivel INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (8, "Índice de precatórios por credor para a exportação e o detalhe do credor", [
+        """
+        CREATE INDEX IF NOT EXISTS idx_precatorios_credor
+        ON precatorios (credor_id)
+        """,
+    ]),
+    (9, "Respostas guardadas por Idempotency-Key", [
+        """
+        CREATE TABLE IF NOT EXISTS idempotencia (
+            rota TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            impressao TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            dono TEXT NOT NULL,
+            status_code INTEGER,
+            tipo_conteudo TEXT,
+            corpo TEXT,
+            criada_em TIMESTAMP NOT NULL,
+            expira_em TIMESTAMP NOT NULL,
+            PRIMARY KEY (rota, chave)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_idempotencia_expira_em
+        ON idempotencia (expira_em)
+        """,
+    ]),
+    (10, "Outbox de eventos de credores, documentos e certidões", [
+        """
+        CREATE TABLE IF NOT EXISTS eventos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            credor_id INTEGER,
+            entidade_id INTEGER,
+            dados TEXT NOT NULL,
+            criado_em TIMESTAMP NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_eventos_credor
+        ON eventos (credor_id, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_eventos_criado_em
+        ON eventos (criado_em)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS eventos_retencao (
+            chave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )
+        """,
+    ]),
+    (11, "Elegibilidade materializada dos credores e índice de documentos por credor", [
+        """
+        CREATE TABLE IF NOT EXISTS elegibilidade (
+            credor_id INTEGER PRIMARY KEY,
+            requisitos INTEGER NOT NULL,
+            valida_ate TIMESTAMP,
+            calculada_em TIMESTAMP NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_elegibilidade_requisitos
+        ON elegibilidade (requisitos, valida_ate)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_documentos_credor_tipo
+        ON documentos (credor_id, tipo)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS consumidores_eventos (
+            consumidor TEXT PRIMARY KEY,
+            cursor INTEGER NOT NULL,
+            atualizado_em TIMESTAMP NOT NULL
+        )
+        """,
+    ]),
+    (12, "Precatórios do foro em ordem de pagamento", [
+        """
+        CREATE INDEX IF NOT EXISTS idx_precatorios_foro_publicacao
+        ON precatorios (foro, data_publicacao, numero_precatorio)
+        """,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRACOES[-1][0]
+
+
+def versao_sqlite(conn: sqlite3.Connection) -> int:
+    """
+    Retorna a versão do schema gravada no arquivo SQLite
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def aplicar_migracoes_sqlite(conn: sqlite3.Connection) -> int:
+    """
+    Aplica as migrações pendentes em uma conexão sqlite3. Se o schema já
+    estiver na versão corrente nenhum DDL é executado. As migrações rodam
+    dentro de uma transação exclusiva, para que vários workers subindo
+    juntos não migrem em paralelo. Retorna a versão final do schema
+    """
+    if versao_sqlite(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Relê a versão já com o lock: outro processo pode ter migrado
+        versao = versao_sqlite(conn)
+        for numero, descricao, comandos in MIGRACOES:
+            if numero <= versao:
+                continue
+            print(f"Aplicando migração {numero}: {descricao}")
+            for comando in comandos:
+                conn.execute(comando)
+            conn.execute(f"PRAGMA user_version = {numero}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return SCHEMA_VERSION
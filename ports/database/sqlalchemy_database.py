@@ -0,0 +1,356 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple, Optional, Iterable, Iterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine, RowMapping
+
+from ports.database.database import PRAGMAS_PADRAO
+from ports.database.perfil import PerfiladorConsultas, explicar_sqlite
+from ports.database.schema import APENAS_SQLITE, MIGRACOES, SCHEMA_VERSION, aplicar_migracoes_sqlite
+from ports.interfaces.Idatabase import IDatabase, ITransacao
+
+# "?" fora de literais entre aspas simples
+PLACEHOLDER = re.compile(r"\?(?=(?:[^']*'[^']*')*[^']*$)")
+INSERT_TABELA = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+TABELA_COM_ID = re.compile(
+    r"CREATE TABLE IF NOT EXISTS (\w+) \(\s*id INTEGER PRIMARY KEY AUTOINCREMENT",
+    re.IGNORECASE
+)
+
+class TransacaoSqlAlchemy(ITransacao):
+    """
+    Operações sobre uma conexão SQLAlchemy com transação aberta
+    """
+    def __init__(self, database: "SqlAlchemyDatabase", conn: Connection):
+        self.database = database
+        self.conn = conn
+
+    def execute(self, query: str, params: Tuple = ()) -> Any:
+        sql, retorna_id = self.database.preparar(query, inserir_returning=True)
+        result = self.conn.exec_driver_sql(sql, tuple(params))
+        if retorna_id:
+            return result.scalar()
+        return result.lastrowid if self.database.dialeto == "sqlite" else None
+
+    def execute_many(self, query: str, params_list: Iterable[Tuple]) -> int:
+        sql, _ = self.database.preparar(query)
+        lote = [tuple(params) for params in params_list]
+        if not lote:
+            return 0
+        return self.conn.exec_driver_sql(sql, lote).rowcount
+
+    def execute_returning(self, query: str, params: Tuple = ()) -> Optional[RowMapping]:
+        sql, _ = self.database.preparar(query)
+        results = self.conn.exec_driver_sql(sql, tuple(params)).mappings().all()
+        return results[0] if results else None
+
+    def fetch_one(self, query: str, params: Tuple = ()) -> Optional[RowMapping]:
+        sql, _ = self.database.preparar(query)
+        return self.conn.exec_driver_sql(sql, tuple(params)).mappings().first()
+
+    def fetch_all(self, query: str, params: Tuple = ()) -> List[RowMapping]:
+        sql, _ = self.database.preparar(query)
+        return self.conn.exec_driver_sql(sql, tuple(params)).mappings().all()
+
+class SqlAlchemyDatabase(IDatabase):
+    """
+    Backend de armazenamento sobre o SQLAlchemy Core.
+
+    Usa um engine com pool de conexões (QueuePool) e aceita qualquer banco
+    suportado pelo SQLAlchemy; SQLite e PostgreSQL são os testados.
+    Os repositórios continuam escrevendo SQL com placeholders `?`, que são
+    convertidos uma única vez por comando para o paramstyle do driver
+    """
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        busy_timeout: float = 30.0,
+        echo: bool = False,
+        consulta_lenta_ms: float = 100.0,
+        pragmas: Optional[Dict[str, Any]] = None
+    ):
+        self.url = url
+        self.engine: Engine = self._criar_engine(
+            url, pool_size, max_overflow, pool_timeout, busy_timeout, echo, pragmas or PRAGMAS_PADRAO
+        )
+        self.dialeto = self.engine.dialect.name
+        # O plano de execução no log de consultas lentas só é obtido no SQLite
+        self.perfilador = PerfiladorConsultas(
+            consulta_lenta_ms, explicar=explicar_sqlite if self.dialeto == 'sqlite' else None
+        )
+        event.listen(self.engine, 'before_cursor_execute', self._antes_consulta)
+        event.listen(self.engine, 'after_cursor_execute', self._depois_consulta)
+        self.paramstyle = self.engine.dialect.paramstyle
+        self._engine_pid = os.getpid()
+        self._comandos: Dict[Tuple[str, bool], Tuple[str, bool]] = {}
+        self._tabelas_com_id = {
+            tabela.lower()
+            for _, _, comandos in MIGRACOES
+            for comando in comandos
+            for tabela in TABELA_COM_ID.findall(comando)
+        }
+        self._inicializado = False
+        self._init_lock = threading.Lock()
+
+    @staticmethod
+    def _criar_engine(
+        url: str,
+        pool_size: int,
+        max_overflow: int,
+        pool_timeout: float,
+        busy_timeout: float,
+        echo: bool,
+        pragmas: Dict[str, Any]
+    ) -> Engine:
+        """
+        Cria o engine com pool de conexões configurado para o dialeto
+        """
+        opcoes = {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': pool_timeout,
+            'echo': echo,
+        }
+        if url.startswith('sqlite'):
+            opcoes['connect_args'] = {
+                'timeout': busy_timeout,
+                'check_same_thread': False
+            }
+        else:
+            # Descarta conexões derrubadas pelo servidor antes de usá-las
+            opcoes['pool_pre_ping'] = True
+
+        engine = create_engine(url, **opcoes)
+
+        if engine.dialect.name == 'sqlite':
+            @event.listens_for(engine, 'connect')
+            def _configurar_sqlite(dbapi_connection, _):
+                cursor = dbapi_connection.cursor()
+                for nome, valor in pragmas.items():
+                    cursor.execute(f"PRAGMA {nome}={valor}")
+                cursor.close()
+
+        return engine
+
+    @staticmethod
+    def _antes_consulta(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+    def _depois_consulta(self, conn, cursor, statement, parameters, context, executemany):
+        """
+        Mede o tempo do comando no driver; as linhas são as afetadas
+        (rowcount), quando o driver as informa
+        """
+        inicio = conn.info['inicio_consultas'].pop()
+        linhas = cursor.rowcount if cursor.rowcount >= 0 else None
+        self.perfilador.registrar(
+            statement, () if executemany else parameters,
+            (time.perf_counter() - inicio) * 1000, linhas, cursor.connection
+        )
+
+    def _verificar_fork(self):
+        """
+        Após um fork o processo filho não pode reutilizar conexões do pai
+        """
+        pid = os.getpid()
+        if pid != self._engine_pid:
+            self.engine.dispose(close=False)
+            self._engine_pid = pid
+
+    def preparar(self, query: str, inserir_returning: bool = False) -> Tuple[str, bool]:
+        """
+        Converte o comando para o paramstyle do driver e, em bancos sem
+        lastrowid (ex.: PostgreSQL), acrescenta RETURNING id nos INSERTs.
+        O resultado é guardado em cache, assim cada comando é processado
+        uma única vez e o texto enviado ao driver é sempre o mesmo, o que
+        permite ao driver reaproveitar o statement preparado
+        """
+        chave = (query, inserir_returning)
+        preparado = self._comandos.get(chave)
+        if preparado:
+            return preparado
+
+        sql = query
+        if self.paramstyle in ('format', 'pyformat'):
+            sql = PLACEHOLDER.sub('%s', sql.replace('%', '%%'))
+        elif self.paramstyle == 'numeric':
+            contador = iter(range(1, sql.count('?') + 1))
+            sql = PLACEHOLDER.sub(lambda _: f":{next(contador)}", sql)
+        elif self.paramstyle != 'qmark':
+            raise ValueError(f"Paramstyle não suportado: {self.paramstyle}")
+
+        retorna_id = False
+        if inserir_returning and self.dialeto != 'sqlite' and 'RETURNING' not in sql.upper():
+            tabela = INSERT_TABELA.match(sql)
+            if tabela and tabela.group(1).lower() in self._tabelas_com_id:
+                sql = f"{sql.rstrip().rstrip(';')} RETURNING id"
+                retorna_id = True
+
+        self._comandos[chave] = (sql, retorna_id)
+        return sql, retorna_id
+
+    def traduzir_ddl(self, comando: str) -> Optional[str]:
+        """
+        Adapta o DDL das migrações (escrito para SQLite) ao dialeto do engine.
+        Retorna None para comandos exclusivos do SQLite
+        """
+        if self.dialeto != 'sqlite' and comando.lstrip().startswith(APENAS_SQLITE):
+            return None
+        if self.dialeto == 'postgresql':
+            return re.sub(
+                r"INTEGER PRIMARY KEY AUTOINCREMENT", "SERIAL PRIMARY KEY",
+                comando, flags=re.IGNORECASE
+            )
+        return comando
+
+    def inicializar(self):
+        """
+        Garante que o schema está na versão corrente. Em SQLite a versão fica
+        em PRAGMA user_version (o mesmo arquivo pode ser usado pelos dois
+        backends); nos demais bancos, na tabela schema_versao
+        """
+        if self._inicializado:
+            return
+        with self._init_lock:
+            if self._inicializado:
+                return
+            self._verificar_fork()
+            if self.dialeto == 'sqlite':
+                with self.engine.connect() as conn:
+                    aplicar_migracoes_sqlite(conn.connection.dbapi_connection)
+            else:
+                self._aplicar_migracoes()
+            self._inicializado = True
+
+    def _aplicar_migracoes(self):
+        """
+        Aplica as migrações pendentes em bancos servidor, com a tabela de
+        versão bloqueada para que workers concorrentes não migrem juntos
+        """
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS schema_versao (versao INTEGER NOT NULL)"
+            )
+        with self.engine.begin() as conn:
+            if self.dialeto == 'postgresql':
+                conn.exec_driver_sql("LOCK TABLE schema_versao IN ACCESS EXCLUSIVE MODE")
+            versao = conn.exec_driver_sql("SELECT MAX(versao) FROM schema_versao").scalar() or 0
+            if versao >= SCHEMA_VERSION:
+                return
+            for numero, descricao, comandos in MIGRACOES:
+                if numero <= versao:
+                    continue
+                print(f"Aplicando migração {numero}: {descricao}")
+                for comando in comandos:
+                    traduzido = self.traduzir_ddl(comando)
+                    if traduzido:
+                        conn.exec_driver_sql(traduzido)
+                conn.exec_driver_sql(
+                    self.preparar("INSERT INTO schema_versao (versao) VALUES (?)")[0],
+                    (numero,)
+                )
+
+    @contextmanager
+    def transacao(self):
+        """
+        Abre uma transação: confirma ao final do bloco e desfaz em caso de erro
+        """
+        if not self._inicializado:
+            self.inicializar()
+        self._verificar_fork()
+        with self.engine.begin() as conn:
+            yield TransacaoSqlAlchemy(self, conn)
+
+    def execute(self, query: str, params: Tuple = ()) -> Any:
+        """
+        Executa uma query no banco de dados
+        """
+        with self.transacao() as transacao:
+            return transacao.execute(query, params)
+
+    def execute_many(self, query: str, params_list: Iterable[Tuple]) -> int:
+        """
+        Inserção/atualização em lote (executemany do driver)
+        """
+        with self.transacao() as transacao:
+            return transacao.execute_many(query, params_list)
+
+    def execute_returning(self, query: str, params: Tuple = ()) -> Optional[RowMapping]:
+        """
+        Executa uma query com cláusula RETURNING e retorna o primeiro registro
+        """
+        with self.transacao() as transacao:
+            return transacao.execute_returning(query, params)
+
+    @contextmanager
+    def _leitura(self):
+        """
+        Conexão para consultas avulsas: dispensa o COMMIT de uma transação
+        explícita (o pool apenas faz rollback ao devolver a conexão)
+        """
+        if not self._inicializado:
+            self.inicializar()
+        self._verificar_fork()
+        with self.engine.connect() as conn:
+            yield TransacaoSqlAlchemy(self, conn)
+
+    def fetch_one(self, query: str, params: Tuple = ()) -> Optional[RowMapping]:
+        """
+        Busca um único registro no banco de dados
+        """
+        with self._leitura() as leitura:
+            return leitura.fetch_one(query, params)
+
+    def fetch_all(self, query: str, params: Tuple = ()) -> List[RowMapping]:
+        """
+        Busca múltiplos registros no banco de dados
+        """
+        with self._leitura() as leitura:
+            return leitura.fetch_all(query, params)
+
+    def iterar(self, query: str, params: Tuple = (), tamanho_lote: int = 1000) -> Iterator[RowMapping]:
+        """
+        Percorre o resultado de uma consulta em lotes. Com stream_results o
+        driver usa um cursor do lado do servidor (ex.: cursor nomeado no
+        PostgreSQL) em vez de trazer todas as linhas de uma vez
+        """
+        with self._leitura() as leitura:
+            sql, _ = self.preparar(query)
+            resultado = leitura.conn.execution_options(
+                stream_results=True, max_row_buffer=tamanho_lote
+            ).exec_driver_sql(sql, tuple(params))
+            try:
+                for lote in resultado.mappings().partitions(tamanho_lote):
+                    yield from lote
+            finally:
+                resultado.close()
+
+    def estatisticas_consultas(self) -> dict:
+        return self.perfilador.estatisticas()
+
+    def estatisticas_pool(self) -> dict:
+        """
+        Retorna a ocupação do pool de conexões do engine
+        """
+        pool = self.engine.pool
+        estatisticas = {'pid': self._engine_pid, 'status': pool.status()}
+        for nome, metodo in (
+            ('tamanho', 'size'), ('ociosas', 'checkedin'),
+            ('em_uso', 'checkedout'), ('overflow', 'overflow')
+        ):
+            if hasattr(pool, metodo):
+                estatisticas[nome] = getattr(pool, metodo)()
+        return estatisticas
+
+    def fechar(self):
+        """
+        Fecha as conexões do pool
+        """
+        self.engine.dispose()
@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+
+class IArmazenamento(ABC):
+    """
+    Armazenamento dos arquivos enviados (documentos, certidões, miniaturas).
+    A chave de cada arquivo é o caminho lógico gravado em `arquivo_url`
+    (ex.: static/documentos/1/20250526_160159_Profile.pdf), o mesmo em
+    qualquer backend
+    """
+    @abstractmethod
+    def salvar(self, chave: str, origem: BinaryIO, tipo_conteudo: Optional[str] = None) -> str:
+        """
+        Grava o conteúdo lido de `origem` (em blocos) sob a chave
+        """
+        pass
+
+    @abstractmethod
+    def salvar_arquivo(self, chave: str, caminho_local: str, tipo_conteudo: Optional[str] = None) -> str:
+        """
+        Move um arquivo local (ex.: upload já verificado) para o armazenamento
+        """
+        pass
+
+    @abstractmethod
+    def abrir(self, chave: str) -> BinaryIO:
+        """
+        Abre o arquivo para leitura em blocos. Levanta FileNotFoundError
+        """
+        pass
+
+    @abstractmethod
+    def existe(self, chave: Optional[str]) -> bool:
+        pass
+
+    @abstractmethod
+    def remover(self, chave: Optional[str]):
+        pass
+
+    @abstractmethod
+    def url_download(self, chave: str, nome_arquivo: Optional[str] = None) -> Optional[str]:
+        """
+        URL assinada para o cliente baixar o arquivo direto do armazenamento.
+        None quando o backend não oferece URLs (a API envia o arquivo)
+        """
+        pass
+
+    def ler(self, chave: str) -> bytes:
+        with self.abrir(chave) as arquivo:
+            return arquivo.read()
+
+    def iniciar(self):
+        """
+        Preparação executada na subida da aplicação (ex.: criar o bucket)
+        """
+        pass
+
+    def estatisticas(self) -> dict:
+        return {}
@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any, Tuple
+from core.entities.job import EntidadeJob
+
+class IIndiceBusca(ABC):
+    @abstractmethod
+    def indexar(self, entidade: EntidadeJob, entidade_id: int, credor_id: int, texto: str):
+        """
+        Grava (ou substitui) o texto extraído de um documento/certidão
+        """
+        pass
+
+    @abstractmethod
+    def remover(self, entidade: EntidadeJob, entidade_id: int) -> bool:
+        """
+        Remove o texto de um documento/certidão do índice
+        """
+        pass
+
+    @abstractmethod
+    def buscar(
+        self,
+        consulta: str,
+        limite: int = 20,
+        entidade: Optional[EntidadeJob] = None,
+        credor_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca textual ordenada por relevância. Cada resultado traz
+        entidade, entidade_id, credor_id, trecho e relevancia
+        """
+        pass
+
+    @abstractmethod
+    def listar_pendentes(self) -> List[Tuple[EntidadeJob, int]]:
+        """
+        Documentos e certidões ainda sem texto no índice
+        """
+        pass
@@ -1,12 +1,15 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, List, BinaryIO, Dict
+from datetime import datetime
+from typing import Optional, List, BinaryIO, Dict, Tuple
 from core.entities.certidao import Certidao, TipoCertidao, StatusCertidao
 
 class ICertidaoRepository(ABC):
     @abstractmethod
     def criar(self, certidao: Certidao, arquivo: Optional[BinaryIO] = None) -> Certidao:
         """
-        Cria uma nova certidão, opcionalmente com arquivo anexo
+        Grava a certidão corrente do credor para o tipo (substituindo a
+        anterior), opcionalmente com arquivo anexo
         """
         pass
 
@@ -39,9 +42,37 @@ class ICertidaoRepository(ABC):
         pass
 
     @abstractmethod
-    def atualizar(self, certidao: Certidao, arquivo: Optional[BinaryIO] = None) -> Certidao:
+    def atualizar(
+        self,
+        certidao: Certidao,
+        arquivo: Optional[BinaryIO] = None,
+        arquivo_esperado: Optional[str] = None
+    ) -> Optional[Certidao]:
         """
-        Atualiza os dados de uma certidão e opcionalmente o arquivo
+        Atualiza os dados de uma certidão e opcionalmente o arquivo. Com
+        arquivo_esperado só grava se a certidão ainda aponta para esse arquivo
+        """
+        pass
+
+    @abstractmethod
+    def listar_vencimentos(self) -> List[Tuple[int, Optional[datetime]]]:
+        """
+        Lista (id, valida_ate) de todas as certidões correntes
+        """
+        pass
+
+    @abstractmethod
+    def buscar_historico(self, credor_id: int, tipo: Optional[TipoCertidao] = None) -> List[Dict]:
+        """
+        Busca as versões registradas das certidões de um credor
+        """
+        pass
+
+    @abstractmethod
+    def compactar_historico(self, retencao_dias: int = 90, manter_minimo: int = 1) -> int:
+        """
+        Remove versões antigas do histórico conforme a política de retenção
+        Retorna quantidade de versões removidas
         """
         pass
 
@@ -80,12 +111,20 @@ class ICertidaoApiService(ABC):
             {
                 "tipo": "federal",
                 "status": "negativa",
-                "conteudo_base64": "..."
+                "conteudo_base64": "...",
+                "valida_ate": "2024-12-31T00:00:00"
             }
         ]
         """
         pass
 
+    async def buscar_certidoes_async(self, cpf_cnpj: str) -> List[Dict]:
+        """
+        Versão assíncrona de buscar_certidoes. Por padrão executa a versão
+        síncrona em uma thread; adaptadores de rede podem sobrescrevê-la
+        """
+        return await asyncio.to_thread(self.buscar_certidoes, cpf_cnpj)
+
     @abstractmethod
     def validar_certidao(self, certidao_id: int) -> StatusCertidao:
         """
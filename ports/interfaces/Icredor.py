@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from core.entities.credor import Credor
 from core.entities.precatorio import Precatorio
 from core.entities.documento import Documento
@@ -23,7 +23,35 @@ class ICredorRepository(ABC):
     @abstractmethod
     def buscar_por_cpf_cnpj(self, cpf_cnpj: str) -> Optional[Credor]:
         """
-        Busca um credor por CPF/CNPJ
+        Busca um credor por CPF/CNPJ, com ou sem pontuação
+        """
+        pass
+
+    @abstractmethod
+    def buscar_por_prefixo_cpf_cnpj(self, prefixo: str, limite: int = 20) -> List[Credor]:
+        """
+        Busca credores cujo CPF/CNPJ começa pelo prefixo
+        """
+        pass
+
+    @abstractmethod
+    def buscar_por_email(self, email: str, limite: int = 20) -> List[Credor]:
+        """
+        Busca credores pelo email (ou início dele), sem distinção de maiúsculas
+        """
+        pass
+
+    @abstractmethod
+    def buscar_por_nome(self, nome: str, limite: int = 20) -> List[Credor]:
+        """
+        Busca credores por prefixos das palavras do nome
+        """
+        pass
+
+    @abstractmethod
+    def pesquisar(self, termo: str, limite: int = 20) -> Tuple[str, List[Credor]]:
+        """
+        Busca livre por CPF/CNPJ, email ou nome. Retorna (critério, credores)
         """
         pass
 
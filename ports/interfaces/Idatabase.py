@@ -0,0 +1,120 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, List, Tuple, Optional, Iterable, Iterator, Mapping
+
+Row = Mapping[str, Any]
+
+class ITransacao(ABC):
+    """
+    Operações executadas dentro de uma mesma transação.
+    Os comandos usam placeholders `?`, independente do backend
+    """
+    @abstractmethod
+    def execute(self, query: str, params: Tuple = ()) -> Any:
+        """
+        Executa um comando e retorna o id da linha inserida, se houver
+        """
+        pass
+
+    @abstractmethod
+    def execute_many(self, query: str, params_list: Iterable[Tuple]) -> int:
+        """
+        Executa o mesmo comando para vários conjuntos de parâmetros
+        Retorna a quantidade de linhas afetadas
+        """
+        pass
+
+    @abstractmethod
+    def execute_returning(self, query: str, params: Tuple = ()) -> Optional[Row]:
+        """
+        Executa um comando com cláusula RETURNING e retorna o primeiro registro
+        """
+        pass
+
+    @abstractmethod
+    def fetch_one(self, query: str, params: Tuple = ()) -> Optional[Row]:
+        """
+        Busca um único registro
+        """
+        pass
+
+    @abstractmethod
+    def fetch_all(self, query: str, params: Tuple = ()) -> List[Row]:
+        """
+        Busca múltiplos registros
+        """
+        pass
+
+class IDatabase(ITransacao):
+    """
+    Porta de armazenamento usada pelos repositórios.
+    Cada chamada fora de `transacao()` é executada e confirmada isoladamente
+    """
+    # Nome do dialeto SQL (como no SQLAlchemy): recursos exclusivos do
+    # SQLite, como o FTS5, só existem quando é "sqlite"
+    dialeto: str = "sqlite"
+
+    @abstractmethod
+    def inicializar(self):
+        """
+        Garante que o schema está na versão corrente
+        """
+        pass
+
+    @abstractmethod
+    @contextmanager
+    def transacao(self):
+        """
+        Abre uma transação: confirma ao final do bloco e desfaz em caso de erro
+        """
+        pass
+
+    @abstractmethod
+    def iterar(self, query: str, params: Tuple = (), tamanho_lote: int = 1000) -> Iterator[Row]:
+        """
+        Percorre o resultado de uma consulta buscando `tamanho_lote` registros
+        por vez, sem carregar o resultado inteiro na memória. A conexão fica
+        reservada até o iterador terminar ou ser fechado
+        """
+        pass
+
+    @abstractmethod
+    def estatisticas_pool(self) -> dict:
+        """
+        Retorna a ocupação do pool de conexões
+        """
+        pass
+
+    @abstractmethod
+    def fechar(self):
+        """
+        Libera as conexões abertas
+        """
+        pass
+
+    def estatisticas_consultas(self) -> dict:
+        """
+        Tempo e quantidade das consultas executadas pelo processo
+        """
+        return {}
+
+    def sondar(self, timeout_escrita_ms: float = 200.0) -> dict:
+        """
+        Mede o tempo de ida e volta de uma consulta trivial. Backends que
+        conseguem testar o bloqueio de escrita sem gravar nada o fazem
+        esperando no máximo timeout_escrita_ms
+        """
+        inicio = time.perf_counter()
+        self.fetch_one("SELECT 1 AS ok")
+        return {
+            "leitura_ms": round((time.perf_counter() - inicio) * 1000, 3),
+            "escrita_ms": None,
+            "bloqueado": None
+        }
+
+    def table_to_dict(self, row: Row) -> dict:
+        """
+        Converte um registro do banco de dados para dicionário
+        """
+        return dict(zip(row.keys(), [row[chave] for chave in row.keys()]))
@@ -4,9 +4,9 @@ from core.entities.documento import Documento, TipoDocumento
 
 class IDocumentoRepository(ABC):
     @abstractmethod
-    def criar(self, documento: Documento, arquivo: BinaryIO) -> Documento:
+    def criar(self, documento: Documento, arquivo: Optional[BinaryIO] = None) -> Documento:
         """
-        Cria um novo documento e salva o arquivo
+        Cria um novo documento, salvando o arquivo quando informado
         """
         pass
 
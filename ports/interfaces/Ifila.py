@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any
+from core.entities.job import Job, TipoJob, EntidadeJob
+
+class IFilaJobs(ABC):
+    @abstractmethod
+    def enfileirar(
+        self,
+        tipo: TipoJob,
+        entidade: EntidadeJob,
+        entidade_id: int,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        Adiciona um novo job pendente na fila
+        """
+        pass
+
+    @abstractmethod
+    def reservar_proximo(self, worker: str) -> Optional[Job]:
+        """
+        Reserva atomicamente o próximo job disponível para o worker.
+        Retorna None se a fila estiver vazia
+        """
+        pass
+
+    @abstractmethod
+    def concluir(self, job: Job, resultado: Dict[str, Any]) -> Job:
+        """
+        Marca o job como concluído com o resultado informado
+        """
+        pass
+
+    @abstractmethod
+    def falhar(self, job: Job, erro: str) -> Job:
+        """
+        Registra uma falha no job, reagendando-o enquanto houver tentativas
+        """
+        pass
+
+    @abstractmethod
+    def buscar_por_entidade(self, entidade: EntidadeJob, entidade_id: int) -> List[Job]:
+        """
+        Busca todos os jobs de um documento ou certidão
+        """
+        pass
+
+    @abstractmethod
+    def recuperar_orfaos(self, timeout_segundos: int) -> int:
+        """
+        Devolve para a fila jobs presos em execução (ex.: worker reiniciado)
+        Retorna quantidade de jobs recuperados
+        """
+        pass
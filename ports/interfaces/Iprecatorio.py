@@ -55,6 +55,6 @@ class IPrecatorioRepository(ABC):
     @abstractmethod
     def buscar_por_foro(self, foro: str) -> List[Precatorio]:
         """
-        Busca precatórios por foro
+        Busca precatórios por foro, em ordem de pagamento
         """
         pass
\ No newline at end of file